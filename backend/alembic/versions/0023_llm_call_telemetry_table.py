@@ -0,0 +1,70 @@
+"""
+Create llm_call_telemetry for per-call LLM latency / token / cost records.
+
+Revision ID: 0023_llm_call_telemetry
+Revises: 0022_add_google_oauth_to_users
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# Stores the unique revision identifier for this migration.
+revision = "0023_llm_call_telemetry"
+# Stores the immediately previous revision in the migration chain.
+down_revision = "0022_add_google_oauth_to_users"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Holds the connection used to inspect table existence before DDL operations.
+    connection = op.get_bind()
+    # Provides schema metadata for idempotent table creation.
+    inspector = sa.inspect(connection)
+    if not inspector.has_table("llm_call_telemetry"):
+        op.create_table(
+            "llm_call_telemetry",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column(
+                "created_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.text("now()"),
+                nullable=False,
+            ),
+            sa.Column("teacher_id", sa.Integer(), nullable=True),
+            sa.Column("plan", sa.String(length=32), nullable=True),
+            sa.Column("phase", sa.String(length=64), server_default="unknown", nullable=False),
+            sa.Column("backend", sa.String(length=32), nullable=False),
+            sa.Column("model", sa.String(length=128), nullable=True),
+            sa.Column("mode", sa.String(length=16), server_default="generate", nullable=False),
+            sa.Column("ok", sa.Boolean(), server_default="true", nullable=False),
+            sa.Column("error", sa.String(length=255), nullable=True),
+            sa.Column("latency_ms", sa.Integer(), nullable=False),
+            sa.Column("prompt_tokens", sa.Integer(), server_default="0", nullable=False),
+            sa.Column("completion_tokens", sa.Integer(), server_default="0", nullable=False),
+            sa.Column("tokens_estimated", sa.Boolean(), server_default="false", nullable=False),
+            sa.Column("cost_usd", sa.Float(), server_default="0", nullable=False),
+            sa.ForeignKeyConstraint(["teacher_id"], ["users.id"], ondelete="SET NULL"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_llm_call_telemetry_created_at "
+        "ON llm_call_telemetry (created_at)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_llm_call_telemetry_teacher_id "
+        "ON llm_call_telemetry (teacher_id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_llm_call_telemetry_phase_created "
+        "ON llm_call_telemetry (phase, created_at)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_llm_call_telemetry_phase_created")
+    op.execute("DROP INDEX IF EXISTS ix_llm_call_telemetry_teacher_id")
+    op.execute("DROP INDEX IF EXISTS ix_llm_call_telemetry_created_at")
+    op.execute("DROP TABLE IF EXISTS llm_call_telemetry")
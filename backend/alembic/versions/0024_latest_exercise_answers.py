@@ -0,0 +1,85 @@
+"""
+Create latest_exercise_answers and backfill it from exercise_field_answer_events.
+
+Revision ID: 0024_latest_exercise_answers
+Revises: 0023_llm_call_telemetry
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# Stores the unique revision identifier for this migration.
+revision = "0024_latest_exercise_answers"
+# Stores the immediately previous revision in the migration chain.
+down_revision = "0023_llm_call_telemetry"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Holds the connection used to inspect table existence before DDL operations.
+    connection = op.get_bind()
+    # Provides schema metadata for idempotent table creation.
+    inspector = sa.inspect(connection)
+    if not inspector.has_table("latest_exercise_answers"):
+        op.create_table(
+            "latest_exercise_answers",
+            sa.Column("classroom_id", sa.Integer(), nullable=False),
+            sa.Column("student_id", sa.Integer(), nullable=False),
+            sa.Column("block_id", sa.String(), nullable=False),
+            sa.Column("field_key", sa.String(), nullable=False),
+            sa.Column("exercise_key", sa.String(), nullable=False),
+            sa.Column("unit_id", sa.Integer(), nullable=True),
+            sa.Column("segment_id", sa.Integer(), nullable=True),
+            sa.Column("value", postgresql.JSONB(), nullable=True),
+            sa.Column("is_correct", sa.Boolean(), nullable=True),
+            sa.Column("written_by_teacher", sa.Boolean(), server_default="false", nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+            sa.ForeignKeyConstraint(["classroom_id"], ["courses.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["student_id"], ["users.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["unit_id"], ["units.id"], ondelete="SET NULL"),
+            sa.ForeignKeyConstraint(["segment_id"], ["segments.id"], ondelete="SET NULL"),
+            sa.PrimaryKeyConstraint("classroom_id", "student_id", "block_id", "field_key"),
+        )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_lea_classroom_unit "
+        "ON latest_exercise_answers (classroom_id, unit_id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_lea_classroom_segment "
+        "ON latest_exercise_answers (classroom_id, segment_id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_lea_classroom_block "
+        "ON latest_exercise_answers (classroom_id, block_id)"
+    )
+
+    if not inspector.has_table("exercise_field_answer_events"):
+        return
+    # Folds the event history into one row per field; JSON null (the legacy
+    # clear sentinel) becomes SQL NULL.  value may be json on databases
+    # created by 0015, hence the cast.  Rows the live writer already upserted
+    # since boot are newer and are kept.
+    op.execute("""
+        INSERT INTO latest_exercise_answers (
+            classroom_id, student_id, block_id, field_key, exercise_key,
+            unit_id, segment_id, value, is_correct, written_by_teacher, updated_at
+        )
+        SELECT DISTINCT ON (classroom_id, student_id, block_id, field_key)
+            classroom_id, student_id, block_id, field_key, exercise_key,
+            unit_id, segment_id, NULLIF(value::jsonb, 'null'::jsonb), is_correct,
+            written_by_teacher, created_at
+        FROM exercise_field_answer_events
+        ORDER BY classroom_id, student_id, block_id, field_key, created_at DESC, id DESC
+        ON CONFLICT (classroom_id, student_id, block_id, field_key) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_lea_classroom_block")
+    op.execute("DROP INDEX IF EXISTS ix_lea_classroom_segment")
+    op.execute("DROP INDEX IF EXISTS ix_lea_classroom_unit")
+    op.execute("DROP TABLE IF EXISTS latest_exercise_answers")
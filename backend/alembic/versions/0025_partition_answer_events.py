@@ -0,0 +1,177 @@
+"""
+Range-partition exercise_field_answer_events by month and trim its indexes.
+
+The table is rebuilt as a partitioned parent (primary key (id, created_at))
+with one partition per month that has rows, the current month and the next
+two, plus a default partition.  Rows are copied across and the id sequence
+is carried over.  Reads moved to latest_exercise_answers in 0024, so the
+only indexes recreated are ix_efae_field (compaction) and one per cascading
+foreign key (student_id, unit_id, segment_id) so deletes of users, units and
+segments stay index lookups.
+
+Revision ID: 0025_partition_answer_events
+Revises: 0024_latest_exercise_answers
+Create Date: 2026-10-19
+"""
+
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# Stores the unique revision identifier for this migration.
+revision = "0025_partition_answer_events"
+# Stores the immediately previous revision in the migration chain.
+down_revision = "0024_latest_exercise_answers"
+branch_labels = None
+depends_on = None
+
+# Names the answer events table rebuilt by this migration.
+TABLE = "exercise_field_answer_events"
+# Names the pre-migration table while rows are copied out of it.
+OLD_TABLE = f"{TABLE}_unpartitioned"
+# Lists every column copied between the old and new table layouts.
+COLUMNS = (
+    "id, classroom_id, student_id, unit_id, segment_id, exercise_key, block_id, "
+    "field_key, value, is_correct, written_by_teacher, is_broadcast, created_at"
+)
+# Copies rows with value cast to jsonb (0015 created it as json).
+SELECT_COLUMNS = COLUMNS.replace("value,", "value::jsonb,")
+
+_COLUMN_DDL = """
+    id                 INTEGER NOT NULL DEFAULT nextval('{sequence}'::regclass),
+    classroom_id       INTEGER NOT NULL REFERENCES courses(id)  ON DELETE CASCADE,
+    student_id         INTEGER NOT NULL REFERENCES users(id)    ON DELETE CASCADE,
+    unit_id            INTEGER          REFERENCES units(id)    ON DELETE SET NULL,
+    segment_id         INTEGER          REFERENCES segments(id) ON DELETE SET NULL,
+    exercise_key       VARCHAR NOT NULL,
+    block_id           VARCHAR NOT NULL,
+    field_key          VARCHAR NOT NULL,
+    value              JSONB,
+    is_correct         BOOLEAN,
+    written_by_teacher BOOLEAN NOT NULL DEFAULT false,
+    is_broadcast       BOOLEAN NOT NULL DEFAULT false,
+    created_at         TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    CONSTRAINT ck_exercise_field_answer_scope CHECK (segment_id IS NULL OR unit_id IS NOT NULL)
+"""
+
+# Lists indexes that may exist on the unpartitioned table (model, 0015/0016).
+_LEGACY_INDEXES = (
+    "ix_exercise_field_answer_events_id",
+    "ix_exercise_field_answer_events_classroom_id",
+    "ix_exercise_field_answer_events_student_id",
+    "ix_exercise_field_answer_events_unit_id",
+    "ix_exercise_field_answer_events_segment_id",
+    "ix_efae_classroom_student",
+    "ix_efae_classroom_block",
+    "ix_efae_student_block",
+    "ix_efae_unit",
+    "ix_efae_segment",
+    # Same names as below, when create_all built the table before this ran.
+    "ix_efae_field",
+    "ix_efae_student_id",
+    "ix_efae_unit_id",
+    "ix_efae_segment_id",
+)
+
+# Lists the foreign-key columns that keep an index for cascading deletes.
+_FK_INDEX_COLUMNS = ("student_id", "unit_id", "segment_id")
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _is_partitioned(connection) -> bool:
+    return connection.execute(
+        sa.text(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = :table"
+        ),
+        {"table": TABLE},
+    ).first() is not None
+
+
+def _serial_sequence(connection, table: str) -> str:
+    return connection.execute(
+        sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}
+    ).scalar() or f"{TABLE}_id_seq"
+
+
+def upgrade() -> None:
+    # Holds the connection used to inspect table state before DDL operations.
+    connection = op.get_bind()
+    # Provides schema metadata for idempotent table conversion.
+    inspector = sa.inspect(connection)
+    if not inspector.has_table(TABLE) or _is_partitioned(connection):
+        return
+
+    # Keeps the id sequence alive when the old table is dropped.
+    sequence = _serial_sequence(connection, TABLE)
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+    op.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+    op.execute(f"ALTER INDEX IF EXISTS {TABLE}_pkey RENAME TO {OLD_TABLE}_pkey")
+    # Frees the index names; the old table is only read once more below.
+    for index in _LEGACY_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+
+    op.execute(
+        f"CREATE TABLE {TABLE} ({_COLUMN_DDL.format(sequence=sequence)}, "
+        f"PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)"
+    )
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {TABLE}.id")
+
+    # Covers every month that has rows through two months ahead.
+    oldest = connection.execute(sa.text(f"SELECT min(created_at) FROM {OLD_TABLE}")).scalar()
+    now = datetime.now(timezone.utc)
+    month = date((oldest or now).year, (oldest or now).month, 1)
+    last = date(now.year, now.month, 1)
+    for _ in range(2):
+        last = _next_month(last)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE {TABLE}_{month.year:04d}{month.month:02d} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+        )
+        month = _next_month(month)
+    op.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+    op.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {SELECT_COLUMNS} FROM {OLD_TABLE}")
+    op.execute(f"DROP TABLE {OLD_TABLE}")
+    op.execute(
+        f"CREATE INDEX IF NOT EXISTS ix_efae_field "
+        f"ON {TABLE} (classroom_id, student_id, block_id, field_key, created_at)"
+    )
+    for column in _FK_INDEX_COLUMNS:
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_efae_{column} ON {TABLE} ({column})")
+
+
+def downgrade() -> None:
+    # Holds the connection used to inspect table state before DDL operations.
+    connection = op.get_bind()
+    # Provides schema metadata for idempotent rollback steps.
+    inspector = sa.inspect(connection)
+    if not inspector.has_table(TABLE) or not _is_partitioned(connection):
+        return
+
+    sequence = _serial_sequence(connection, TABLE)
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+    op.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+    op.execute(f"ALTER INDEX IF EXISTS {TABLE}_pkey RENAME TO {OLD_TABLE}_pkey")
+    op.execute("DROP INDEX IF EXISTS ix_efae_field")
+    for column in _FK_INDEX_COLUMNS:
+        op.execute(f"DROP INDEX IF EXISTS ix_efae_{column}")
+    op.execute(
+        f"CREATE TABLE {TABLE} ({_COLUMN_DDL.format(sequence=sequence)}, PRIMARY KEY (id))"
+    )
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {TABLE}.id")
+    op.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {OLD_TABLE}")
+    # Drops the partitioned parent together with every partition.
+    op.execute(f"DROP TABLE {OLD_TABLE} CASCADE")
+    op.execute(f"CREATE INDEX IF NOT EXISTS ix_exercise_field_answer_events_id ON {TABLE} (id)")
+    op.execute(f"CREATE INDEX IF NOT EXISTS ix_efae_classroom_student ON {TABLE} (classroom_id, student_id)")
+    op.execute(f"CREATE INDEX IF NOT EXISTS ix_efae_classroom_block ON {TABLE} (classroom_id, block_id)")
+    op.execute(f"CREATE INDEX IF NOT EXISTS ix_efae_student_block ON {TABLE} (student_id, block_id)")
+    op.execute(f"CREATE INDEX IF NOT EXISTS ix_efae_unit ON {TABLE} (classroom_id, student_id, unit_id)")
+    op.execute(f"CREATE INDEX IF NOT EXISTS ix_efae_segment ON {TABLE} (classroom_id, student_id, segment_id)")
@@ -8,9 +8,22 @@ configured provider.  Designed for:
   • Teacher peace-of-mind ("why is generation slow right now?")
   • Ops / debugging without needing to tail logs
 
+Every probe result is also fed into that backend's circuit breaker (a
+successful probe closes an open circuit), and the breaker state is returned
+under "circuit".
+
+GET /admin/ai/rate-limits — snapshot of the proactive per-backend limiters
+(RPM/TPM bucket levels, admission-queue depth and queue wait times).
+
+GET /admin/ai/hedging — hedge rate / secondary win rate of hedged providers.
+
+GET /admin/ai/telemetry — p50/p95 latency, tokens and estimated cost per
+pipeline phase, from llm_call_telemetry (plus this worker's live counters).
+
 Security notes
 --------------
 • Requires teacher JWT (get_current_teacher) — not exposed publicly.
+  /telemetry also admits admins; teachers only see their own calls there.
 • API keys are never echoed; error messages are sanitised (no stack traces).
 • Both providers are pinged in parallel; one failing never blocks the other.
 • Total wall-clock timeout per provider: 10 s (enforced at the provider level).
@@ -21,7 +34,8 @@ Response shape
   "groq": {
     "status":     "ok" | "error",
     "model":      "llama-3.3-70b-versatile",
-    "latency_ms": 312           # only present on success
+    "latency_ms": 312,          # only present on success
+    "circuit":    {"state": "closed", "error_rate": 0.0, ...}
   },
   "deepseek": {
     "status": "error",
@@ -36,11 +50,15 @@ from __future__ import annotations
 import asyncio
 import logging
 import time
-from typing import Any
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
 
-from app.core.auth import get_current_teacher
+from app.core.auth import get_current_teacher, get_current_user
+from app.core.database import get_db
 from app.models.user import User
 
 logger = logging.getLogger(__name__)
@@ -195,7 +213,150 @@ async def ai_health(
             "error":  _sanitise_error(deepseek_result),
         }
 
+    from app.services.ai.providers.circuit_breaker import (
+        get_circuit_breaker,
+        record_probe_result,
+    )
+
+    for backend, result in (("groq", groq_result), ("deepseek", deepseek_result)):
+        if result.get("model") != "(unknown)":
+            # Only feed probes that reached the backend (not missing-key errors).
+            record_probe_result(
+                backend,
+                ok=result["status"] == "ok",
+                latency=result.get("latency_ms", 0) / 1000,
+                error=result.get("error", ""),
+            )
+        breaker = get_circuit_breaker(backend)
+        if breaker is not None:
+            result["circuit"] = breaker.snapshot()
+
     return {
         "groq":     groq_result,
         "deepseek": deepseek_result,
-    }
\ No newline at end of file
+    }
+
+
+@router.get(
+    "/rate-limits",
+    summary="AI rate-limiter and admission-queue state",
+    description=(
+        "Returns, per LLM backend, the configured requests/tokens-per-minute "
+        "limits, current bucket levels, queue depth and admission wait times. "
+        "Requires a valid teacher session."
+    ),
+    tags=["ai-health"],
+)
+async def ai_rate_limits(
+    _current_user: User = Depends(get_current_teacher),
+) -> dict[str, dict[str, Any]]:
+    """In-process only — each worker reports its own limiters."""
+    from app.services.ai.providers.rate_limiter import rate_limiter_stats
+
+    return rate_limiter_stats()
+
+
+
+@router.get(
+    "/hedging",
+    summary="Hedged-request statistics",
+    description=(
+        "Returns, per hedged provider, the current hedge delay, how often the "
+        "secondary backend was fired (hedge rate) and how often it won. "
+        "Requires a valid teacher session."
+    ),
+    tags=["ai-health"],
+)
+async def ai_hedging(
+    _current_user: User = Depends(get_current_teacher),
+) -> dict[str, dict[str, Any]]:
+    """Empty unless AI_HEDGE_ENABLED=true and a hedged call has been made."""
+    from app.services.ai.providers.hedging import hedging_stats
+
+    return hedging_stats()
+
+
+@router.get(
+    "/telemetry",
+    summary="LLM latency / token / cost percentiles per phase",
+    description=(
+        "Aggregates llm_call_telemetry over the last `hours` hours: call count, "
+        "error count, p50/p95 latency, average prompt/completion tokens and "
+        "estimated cost per pipeline phase (unit.plan, exercise.match_pairs …). "
+        "Teachers only see their own calls; admins see every teacher's calls or "
+        "one teacher's via `teacher_id`, plus this worker's live counters."
+    ),
+    tags=["ai-health"],
+)
+async def ai_telemetry(
+    hours: int = Query(24, ge=1, le=24 * 30),
+    teacher_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> dict[str, Any]:
+    """
+    Buffered rows of this worker are flushed first so the numbers include
+    calls made seconds ago; other workers flush on their own interval.
+
+    A teacher asking for another teacher's numbers gets 403; without
+    ``teacher_id`` the query is scoped to the caller.  Only admins get the
+    cross-teacher aggregate and the process-wide ``live`` counters.
+    """
+    is_admin = current_user.role == "admin"
+    if not is_admin:
+        if current_user.role != "teacher":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions",
+            )
+        if teacher_id is not None and teacher_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Teachers can only view their own telemetry",
+            )
+        teacher_id = current_user.id
+
+    from app.models.llm_call_telemetry import LLMCallTelemetry
+    from app.services.ai.providers.telemetry import flush_telemetry, telemetry_snapshot
+
+    await asyncio.to_thread(flush_telemetry)
+
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    t = LLMCallTelemetry
+    query = (
+        db.query(
+            t.phase,
+            func.count(t.id),
+            func.count(t.id).filter(t.ok.is_(False)),
+            func.percentile_cont(0.5).within_group(t.latency_ms),
+            func.percentile_cont(0.95).within_group(t.latency_ms),
+            func.avg(t.prompt_tokens),
+            func.avg(t.completion_tokens),
+            func.sum(t.cost_usd),
+        )
+        .filter(t.created_at >= since)
+        .group_by(t.phase)
+        .order_by(func.sum(t.latency_ms).desc())
+    )
+    if teacher_id is not None:
+        query = query.filter(t.teacher_id == teacher_id)
+
+    phases = [
+        {
+            "phase":                 phase,
+            "calls":                 calls,
+            "errors":                errors,
+            "p50_ms":                round(p50) if p50 is not None else None,
+            "p95_ms":                round(p95) if p95 is not None else None,
+            "avg_prompt_tokens":     round(float(avg_in or 0)),
+            "avg_completion_tokens": round(float(avg_out or 0)),
+            "cost_usd":              round(float(cost or 0), 6),
+        }
+        for phase, calls, errors, p50, p95, avg_in, avg_out, cost in query.all()
+    ]
+    return {
+        "hours":      hours,
+        "teacher_id": teacher_id,
+        "phases":     phases,
+        "live":       telemetry_snapshot() if is_admin else None,
+    }
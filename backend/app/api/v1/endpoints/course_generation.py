@@ -15,21 +15,35 @@ Endpoints:
     source_token lets the SSE stream retrieve the extracted text.
 
   GET /course-builder/{course_id}/stream
-    SSE stream — generates segments + exercises unit by unit.
+    SSE stream — generates segments + exercises for every unit, several units
+    at a time (per-teacher cap by plan, see _teacher_unit_slots), each with
+    its own DB session.  unit_start / unit_done arrive as they happen, so
+    units may finish out of order; reconnects pass ?done_unit_ids=.
     Optional ?source_token=<uuid> — if present the extracted file
     text is forwarded to UnitGenerateRequest.source_content so each
     unit is grounded in the uploaded materials.
     Auth via ?token= query param (EventSource cannot set headers).
+    Each generated section is pushed as a ``segment_ready`` event the moment
+    its text is ready, before the unit is persisted (``unit_done``).
+    Units already pre-generated by /speculate are attached to, not restarted.
+
+  POST /course-builder/{course_id}/speculate
+    Called right after the outline's unit rows are created.  Starts generating
+    the first unit(s) in the background (app/services/course_speculation.py)
+    while the teacher reviews the outline; PATCH /outline discards the
+    speculation for every unit it edits.
 """
 
 from __future__ import annotations
 
 import asyncio
+import functools
+import hashlib
 import json
 import logging
+import os
 import re
-import time
-import uuid
+import weakref
 from typing import Any, AsyncIterator, Optional
 
 from fastapi import APIRouter, Depends, File, Form, Query, UploadFile
@@ -40,6 +54,11 @@ from app.core.auth import get_current_teacher
 from app.core.database import get_db
 from app.core.teacher_tariffs import check_and_consume_teacher_ai_quota
 from app.models.user import User
+from app.services.ai.providers.telemetry import llm_context
+from app.services.ai.tolerant_json import loads_tolerant
+from app.services.card_image_plan import CardImagePlan, card_image_scope
+from app.services.course_speculation import SPECULATIVE_UNITS, SpeculativeUnit, speculation_registry
+from app.services.source_store import get_source_store
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
@@ -69,6 +88,25 @@ _DEFAULT_EXERCISE_TYPES = [
     "type_word_to_image",
 ]
 
+# ── Pipelined course generation ───────────────────────────────────────────────
+# Units generated at once for one teacher (across all of their streams).
+# COURSE_UNIT_CONCURRENCY caps every plan; 1 restores unit-by-unit generation.
+_UNIT_CONCURRENCY_BY_PLAN = {"free": 2, "standard": 3, "pro": 4}
+_UNIT_CONCURRENCY_CAP     = int(os.environ.get("COURSE_UNIT_CONCURRENCY", "4"))
+
+
+class _UnitSlots(asyncio.Semaphore):
+    """A teacher's unit semaphore, remembering the limit it was built with."""
+
+    def __init__(self, limit: int) -> None:
+        super().__init__(limit)
+        self.limit = limit
+
+
+# teacher_id → slots.  Weak values: an entry goes away as soon as no stream or
+# speculative job holds its semaphore, so idle teachers cost nothing.
+_teacher_unit_semaphores: "weakref.WeakValueDictionary[int, _UnitSlots]" = weakref.WeakValueDictionary()
+
 # ── Uploaded-file limits ──────────────────────────────────────────────────────
 # deepseek-chat has a 64K-token context (~200K+ chars), so these caps are about
 # keeping cost/latency reasonable and — crucially — making sure EVERY uploaded
@@ -83,11 +121,11 @@ _MAX_UPLOAD_BYTES       = 10 * 1024 * 1024   # 10 MB per file
 _MAX_PER_FILE_CHARS     = 25_000
 _MAX_FILE_CONTENT_CHARS = 40_000
 
-# Source-token cache: token → (extracted_text, expiry_unix_ts)
-# Tokens expire after 30 minutes.  The stream endpoint pops them on first use
-# so they are single-use by design.
+# Source tokens: extracted text kept in the shared source store
+# (app/services/source_store.py — in-memory or Redis, compressed, capped at
+# _MAX_FILE_CONTENT_CHARS).  Tokens expire after 30 minutes.  The stream
+# endpoint pops them on first use so they are single-use by design.
 _TOKEN_TTL_SECONDS = 1800
-_source_cache: dict[str, tuple[str, float]] = {}
 
 
 # ── Schemas ───────────────────────────────────────────────────────────────────
@@ -132,6 +170,17 @@ class CourseOutlineWithTokenResponse(CourseOutlineResponse):
     source_token: str
 
 
+class SpeculateRequest(BaseModel):
+    """
+    Body for POST /{course_id}/speculate — the same generation inputs the
+    stream will later receive as query params.
+    """
+    level: str = Field(default="B1")
+    language: str = Field(default="English")
+    native_language: str = Field(default="English")
+    source_token: Optional[str] = Field(default=None)
+
+
 class PatchOutlineRequest(BaseModel):
     """
     Body for PATCH /{course_id}/outline.
@@ -408,100 +457,19 @@ Rules:
 Return ONLY the JSON object."""
 
 
-# ── Parser helpers ────────────────────────────────────────────────────────────
-
-
-def _repair_outline_json(text: str) -> str:
-    """
-    Best-effort JSON repair for outline responses.
-
-    Handles the most common LLM mistakes:
-    1. Unescaped double-quotes inside string values — e.g. the model writes
-       "Harry said "Expecto Patronum"" instead of escaping the inner quotes.
-       Strategy: scan char-by-char tracking in_string state; when we see a '"'
-       that is NOT preceded by '\\' and is NOT a structural delimiter (i.e. the
-       next non-whitespace char is a letter/digit, not : , } ]), treat it as a
-       literal double-quote and replace with \\".
-    2. Trailing commas before ] or }.
-    3. Truncated JSON — close any unclosed brackets/braces.
-    """
-    import re as _re
-
-    # Step 1: strip markdown fences if present
-    text = _re.sub(r"^```[a-z]*\n?", "", text.strip())
-    text = _re.sub(r"\n?```$", "", text.strip())
-
-    # Step 2: remove trailing commas before ] or }
-    text = _re.sub(r",\s*([\]}])", r"\1", text)
-
-    # Step 3: close open brackets/braces
-    stack: list[str] = []
-    in_string = False
-    escape_next = False
-    for ch in text:
-        if escape_next:
-            escape_next = False
-            continue
-        if ch == "\\" and in_string:
-            escape_next = True
-            continue
-        if ch == '"':
-            in_string = not in_string
-            continue
-        if in_string:
-            continue
-        if ch in "{[":
-            stack.append(ch)
-        elif ch == "}" and stack and stack[-1] == "{":
-            stack.pop()
-        elif ch == "]" and stack and stack[-1] == "[":
-            stack.pop()
-
-    suffix = ""
-    if in_string:
-        suffix += '"'
-    for opener in reversed(stack):
-        suffix += "}" if opener == "{" else "]"
-    return text + suffix
-
-
 # ── Parser ────────────────────────────────────────────────────────────────────
 
 
 def _parse_outline(raw: str) -> CourseOutlineResponse:
-    text = raw.strip()
-
-    if text.startswith("```"):
-        lines = text.splitlines()[1:]
-        if lines and lines[-1].strip().startswith("```"):
-            lines = lines[:-1]
-        text = "\n".join(lines).strip()
-
-    brace_start = text.find("{")
-    if brace_start == -1:
+    if "{" not in raw:
         raise ValueError("No JSON object in AI response.")
 
-    depth, brace_end = 0, -1
-    for i, ch in enumerate(text[brace_start:], start=brace_start):
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                brace_end = i + 1
-                break
-
-    raw_json = text[brace_start:brace_end] if brace_end != -1 else text[brace_start:]
-
-    # Try strict parse first, then fall back to the repair heuristic so a single
-    # unescaped quote in a Harry Potter example doesn't kill the whole outline.
+    # The tolerant decoder also keeps a single unescaped quote in a Harry
+    # Potter example from killing the whole outline.
     try:
-        data = json.loads(raw_json)
-    except json.JSONDecodeError:
-        try:
-            data = json.loads(_repair_outline_json(raw_json))
-        except json.JSONDecodeError as exc:
-            raise ValueError(f"Could not parse outline JSON after repair: {exc}") from exc
+        data = loads_tolerant(raw, roots="{")
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"Could not parse outline JSON after repair: {exc}") from exc
 
     title = str(data.get("title", "")).strip()
     if not title:
@@ -676,44 +644,28 @@ async def _extract_files_text(files: list[UploadFile]) -> str:
     return _fair_share_budget(blocks, _MAX_FILE_CONTENT_CHARS)
 
 
-# ── Source-token cache helpers ────────────────────────────────────────────────
+# ── Source-token helpers ────────────────────────────────────────────────
 
 
 def _store_source_token(text: str) -> str:
-    """Store *text* in the cache and return a fresh UUID token."""
-    _evict_expired_tokens()
-    token = str(uuid.uuid4())
-    _source_cache[token] = (text, time.monotonic() + _TOKEN_TTL_SECONDS)
-    logger.debug("source_cache: stored token %s (%d chars)", token, len(text))
-    return token
+    """Store *text* in the source store and return a fresh UUID token."""
+    return get_source_store(_MAX_FILE_CONTENT_CHARS).put(text, _TOKEN_TTL_SECONDS)
 
 
 def _pop_source_token(token: str) -> str | None:
     """
-    Retrieve and *remove* the cached text for *token*.
+    Retrieve and *remove* the stored text for *token*.
 
     Returns None if the token is unknown or expired.
-    Single-use by design — the SSE stream consumes it on the first connect.
+    Single-use by design — the SSE stream consumes it on the first connect,
+    whichever worker it lands on.
     """
-    _evict_expired_tokens()
-    entry = _source_cache.pop(token, None)
-    if entry is None:
-        return None
-    text, expiry = entry
-    if time.monotonic() > expiry:
-        logger.info("source_cache: token %s expired", token)
-        return None
-    logger.debug("source_cache: consumed token %s (%d chars)", token, len(text))
+    text = get_source_store(_MAX_FILE_CONTENT_CHARS).pop(token)
+    if text is not None:
+        logger.debug("source_store: consumed token %s (%d chars)", token, len(text))
     return text
 
 
-def _evict_expired_tokens() -> None:
-    now = time.monotonic()
-    expired = [t for t, (_, exp) in _source_cache.items() if now > exp]
-    for t in expired:
-        del _source_cache[t]
-
-
 # ── AI provider ───────────────────────────────────────────────────────────────
 
 
@@ -735,18 +687,25 @@ def _get_provider_for_user(user: "User", db: "Session"):
             plan,
             "DeepSeek" if plan in ("standard", "pro") else "Groq",
         )
-        return get_provider_for_plan(plan), plan
+        return get_provider_for_plan(plan, workload="course"), plan
     except Exception as exc:
         logger.warning("course-gen provider fallback — plan resolution failed: %s", exc)
         from app.services.ai_exercise_generator import _default_provider
         return _default_provider, "free"
 
 
-async def _call_ai(prompt: str, provider=None) -> str:
+async def _call_ai(
+    prompt: str,
+    provider=None,
+    *,
+    teacher_id: int | None = None,
+    plan: str | None = None,
+) -> str:
     if provider is None:
         from app.services.ai_exercise_generator import _default_provider
         provider = _default_provider
-    return await provider.agenerate(prompt)
+    with llm_context(phase="course.outline", teacher_id=teacher_id, plan=plan):
+        return await provider.agenerate(prompt)
 
 
 # ── Endpoint 1: generate-outline (JSON, no files) ────────────────────────────
@@ -790,6 +749,8 @@ async def generate_course_outline(
                     native_language=body.native_language or "",
                 ),
                 provider,
+                teacher_id=current_user.id,
+                plan=plan,
             )
         )
         logger.info("generate-outline: '%s' (%d units)", outline.title, len(outline.units))
@@ -875,6 +836,8 @@ async def generate_course_outline_from_files(
                     native_language=native_language or "",
                 ),
                 provider,
+                teacher_id=current_user.id,
+                plan=plan,
             )
         )
         logger.info(
@@ -923,6 +886,154 @@ def _verify_token(token: str) -> "tuple[User | None, str | None]":
         return None, error_code
 
 
+def _teacher_unit_slots(teacher_id: int, plan: str | None) -> asyncio.Semaphore:
+    """
+    Semaphore limiting how many units *teacher_id* generates concurrently.
+
+    Shared by every stream of the same teacher.  When the plan (and so the
+    limit) changes a fresh semaphore is created; units already running keep
+    the old one until they finish.  The entry is dropped once nothing holds
+    the semaphore any more.
+    """
+    limit = max(1, min(
+        _UNIT_CONCURRENCY_CAP,
+        _UNIT_CONCURRENCY_BY_PLAN.get((plan or "free").strip().lower(), 2),
+    ))
+    slots = _teacher_unit_semaphores.get(teacher_id)
+    if slots is None or slots.limit != limit:
+        slots = _UnitSlots(limit)
+        _teacher_unit_semaphores[teacher_id] = slots
+    return slots
+
+
+def _course_description(db: Session, course_id: int) -> str:
+    """
+    The course description — the teacher's directive (e.g. "use examples from
+    Harry Potter") forwarded into every UnitGenerateRequest so it propagates
+    into text-block and exercise prompts.
+    """
+    try:
+        from app.models.course import Course as CourseModel
+        course = db.query(CourseModel).filter(CourseModel.id == course_id).first()
+        if course and course.description:
+            return course.description.strip()
+    except Exception as exc:
+        logger.warning("course-gen: could not load course description: %s", exc)
+    return ""
+
+
+def _unit_spec(unit: Any) -> dict:
+    """Plain per-unit generation inputs, detached from the ORM row."""
+    return {
+        "id": unit.id,
+        "title": unit.title,
+        "description": (getattr(unit, "description", None) or "").strip(),
+        "outline_sections": unit.outline_sections or None,
+        "created_by": getattr(unit, "created_by", 0) or 0,
+    }
+
+
+def _unit_fingerprint(
+    spec: dict, level: str, language: str, native_language: str,
+    course_description: str, source_content: str,
+) -> str:
+    """Hash of everything _unit_request() reads — equal hashes, equal units."""
+    payload = json.dumps(
+        [
+            spec["title"], spec["description"], spec["outline_sections"],
+            level, language, native_language, course_description,
+            hashlib.sha256(source_content.encode("utf-8")).hexdigest(),
+        ],
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _unit_request(
+    spec: dict,
+    *,
+    level: str,
+    language: str,
+    native_language: str,
+    course_description: str,
+    source_content: str,
+    teacher_id: int,
+    teacher_plan: str,
+):
+    from app.services.unit_generator import UnitGenerateRequest
+
+    # Build the combined teacher directive for this unit.
+    # unit.description is the per-unit content guide written in the outline
+    # review (e.g. "Students learn present simple and adverbs of frequency.
+    # Example phrases: 'I usually wake up at 7 a.m.'").
+    # course_description is the overarching course-level directive
+    # (e.g. "use examples from Friends").
+    # Both are injected as MANDATORY context into every text-block and exercise
+    # prompt; unit-level description goes first as it is more specific.
+    _unit_desc = spec["description"]
+    if _unit_desc and course_description:
+        _combined_description: str | None = (
+            f"{_unit_desc}\n\nCourse directive: {course_description}"
+        )
+    elif _unit_desc:
+        _combined_description = _unit_desc
+    elif course_description:
+        _combined_description = course_description
+    else:
+        _combined_description = None
+
+    return UnitGenerateRequest(
+        unit_id=spec["id"],
+        topic=spec["title"],
+        level=level,
+        language=language,
+        instruction_language=native_language,
+        # content_language = the TARGET language (the language the course
+        # teaches, e.g. "english").  Without this the exercise generators
+        # default to "auto" and pick up the NATIVE language from the
+        # Russian/bilingual explanation text blocks — causing all exercises
+        # to be generated in Russian instead of English.
+        content_language=language.lower(),
+        # Use the teacher-defined section count when available;
+        # fall back to the hardcoded default only for units that
+        # were never put through the outline review step.
+        num_segments=(
+            len(spec["outline_sections"])
+            if spec["outline_sections"]
+            else _DEFAULT_NUM_SEGMENTS
+        ),
+        exercise_types=_DEFAULT_EXERCISE_TYPES,
+        teacher_id=teacher_id or spec["created_by"],
+        # Forward extracted file text so each unit is grounded in
+        # the teacher's uploaded materials.  Empty string when no
+        # files were provided — UnitGeneratorService ignores it.
+        source_content=source_content,
+        # Inject the unit description (content guide) and/or the
+        # course-level directive as a MANDATORY teacher directive so
+        # every text-block and exercise prompt is grounded in them.
+        description=_combined_description,
+        # Pass the teacher-reviewed sections so the generator
+        # creates exactly those segments without re-running the
+        # AI topic planner.  None when no outline was saved.
+        outline_sections=spec["outline_sections"],
+        plan=teacher_plan,
+    )
+
+
+def _segment_event(unit_id: int, seg_index: int, seg_total: int, seg_bp: Any) -> dict:
+    return {
+        "type": "segment_ready",
+        "unit_id": unit_id,
+        "segment_index": seg_index,
+        "segment_total": seg_total,
+        "title": seg_bp.title,
+        "description": seg_bp.description,
+        "texts": [
+            {"title": t.title, "content": t.content} for t in seg_bp.texts
+        ],
+    }
+
+
 async def _stream_generation(
     course_id: int,
     level: str,
@@ -935,7 +1046,7 @@ async def _stream_generation(
 ) -> AsyncIterator[str]:
     from app.core.database import SessionLocal
     from app.models.unit import Unit as UnitModel
-    from app.services.unit_generator import UnitGeneratorService, UnitGenerateRequest
+    from app.services.unit_generator import UnitGeneratorService
     from app.services.ai.providers.router import get_provider_for_plan
     from app.core.teacher_tariffs import check_and_consume_teacher_ai_quota  # noqa: F401 (kept for future use)
 
@@ -952,17 +1063,7 @@ async def _stream_generation(
         db.close()
         return
 
-    # Load the course description so the teacher's directive (e.g. "use examples
-    # from Harry Potter") is forwarded into every UnitGenerateRequest and
-    # propagates into text-block and exercise prompts.
-    course_description: str = ""
-    try:
-        from app.models.course import Course as CourseModel
-        _course = db.query(CourseModel).filter(CourseModel.id == course_id).first()
-        if _course and _course.description:
-            course_description = _course.description.strip()
-    except Exception as exc:
-        logger.warning("stream_course_generation: could not load course description: %s", exc)
+    course_description = _course_description(db, course_id)
 
     # Tracks units that should be skipped when the client reconnects mid-stream.
     done_unit_ids = done_unit_ids or set()
@@ -977,137 +1078,165 @@ async def _stream_generation(
     })
     await asyncio.sleep(0.1)
 
+    teacher_id = user.id if user else 0
+    speculation = speculation_registry.get(course_id)
+    if speculation is not None and speculation.teacher_id != teacher_id:
+        speculation = None
     try:
-        provider = get_provider_for_plan(teacher_plan)
-        logger.info(
-            "stream_course_generation: plan=%r provider=%s course_id=%d",
-            teacher_plan, type(provider).__name__, course_id,
-        )
-        service = UnitGeneratorService(ai_provider=provider)
+        if speculation is not None:
+            # Reuse the speculative run's service so image-card answer words
+            # stay unique across the units it already generated.
+            service = speculation.service
+        else:
+            provider = get_provider_for_plan(teacher_plan, workload="course")
+            logger.info(
+                "stream_course_generation: plan=%r provider=%s course_id=%d",
+                teacher_plan, type(provider).__name__, course_id,
+            )
+            service = UnitGeneratorService(ai_provider=provider)
     except RuntimeError as exc:
         yield _sse({"type": "error", "error": str(exc)})
         db.close()
         return
 
-    # Counts successful unit generations in the current streaming session.
-    units_done = 0
-    # Defines how often we emit SSE heartbeats while waiting on long operations.
-    heartbeat_interval_seconds = 20
-    for index, unit in enumerate(pending_units):
-        yield _sse({
-            "type": "unit_start",
-            "unit_id": unit.id,
-            "title": unit.title,
-            "index": index,
-            "total": total,
-        })
-        await asyncio.sleep(0.05)
-
-        # ── No separate unit_generation quota check here ──────────────────────
-        # This SSE stream is always triggered as part of a course-generation
-        # flow.  The teacher already spent a `course_generation` credit when
-        # they called generate-outline (or generate-outline-from-files).
-        # Double-gating on `unit_generation` means a teacher who has used their
-        # standalone unit-gen quota cannot complete a course they legitimately
-        # paid for with a course-gen credit.  The `course_generation` bucket is
-        # the correct meter for this entire flow.
+    # ── Pipelined unit scheduler ──────────────────────────────────────────────
+    # Up to _teacher_unit_slots(...) units generate at once; each worker owns
+    # its DB session and reports unit_start / segment_ready / unit_done /
+    # unit_error through one queue, so events reach the client in the order
+    # they happen.  The per-teacher semaphore also caps a second tab (or a
+    # reconnect racing the old stream) that generates for the same teacher.
+    #
+    # ── No separate unit_generation quota check here ──────────────────────
+    # This SSE stream is always triggered as part of a course-generation
+    # flow.  The teacher already spent a `course_generation` credit when
+    # they called generate-outline (or generate-outline-from-files).
+    # Double-gating on `unit_generation` means a teacher who has used their
+    # standalone unit-gen quota cannot complete a course they legitimately
+    # paid for with a course-gen credit.  The `course_generation` bucket is
+    # the correct meter for this entire flow.
+    slots = _teacher_unit_slots(teacher_id, teacher_plan)
+    events: asyncio.Queue[dict] = asyncio.Queue()
+
+    # Plain per-unit inputs — the ORM rows stay with the loader session.
+    unit_specs = [_unit_spec(unit) for unit in pending_units]
+    db.close()
 
-        try:
-            # Wraps unit generation so we can keep the SSE connection alive with heartbeats.
-
-            # Build the combined teacher directive for this unit.
-            # unit.description is the per-unit content guide written in the outline
-            # review (e.g. "Students learn present simple and adverbs of frequency.
-            # Example phrases: 'I usually wake up at 7 a.m.'").
-            # course_description is the overarching course-level directive
-            # (e.g. "use examples from Friends").
-            # Both are injected as MANDATORY context into every text-block and exercise
-            # prompt; unit-level description goes first as it is more specific.
-            _unit_desc = (getattr(unit, "description", None) or "").strip()
-            if _unit_desc and course_description:
-                _combined_description: str | None = (
-                    f"{_unit_desc}\n\nCourse directive: {course_description}"
-                )
-            elif _unit_desc:
-                _combined_description = _unit_desc
-            elif course_description:
-                _combined_description = course_description
-            else:
-                _combined_description = None
-
-            generation_task = asyncio.create_task(service.generate(
-                UnitGenerateRequest(
-                    unit_id=unit.id,
-                    topic=unit.title,
-                    level=level,
-                    language=language,
-                    instruction_language=native_language,
-                    # content_language = the TARGET language (the language the course
-                    # teaches, e.g. "english").  Without this the exercise generators
-                    # default to "auto" and pick up the NATIVE language from the
-                    # Russian/bilingual explanation text blocks — causing all exercises
-                    # to be generated in Russian instead of English.
-                    content_language=language.lower(),
-                    # Use the teacher-defined section count when available;
-                    # fall back to the hardcoded default only for units that
-                    # were never put through the outline review step.
-                    num_segments=(
-                        len(unit.outline_sections)
-                        if unit.outline_sections
-                        else _DEFAULT_NUM_SEGMENTS
-                    ),
-                    exercise_types=_DEFAULT_EXERCISE_TYPES,
-                    teacher_id=user.id if user else (getattr(unit, "created_by", 0) or 0),
-                    # Forward extracted file text so each unit is grounded in
-                    # the teacher's uploaded materials.  Empty string when no
-                    # files were provided — UnitGeneratorService ignores it.
-                    source_content=source_content,
-                    # Inject the unit description (content guide) and/or the
-                    # course-level directive as a MANDATORY teacher directive so
-                    # every text-block and exercise prompt is grounded in them.
-                    description=_combined_description,
-                    # Pass the teacher-reviewed sections so the generator
-                    # creates exactly those segments without re-running the
-                    # AI topic planner.  None when no outline was saved.
-                    outline_sections=unit.outline_sections or None,
-                ),
-                db,
-            ))
-
-            while not generation_task.done():
-                try:
-                    await asyncio.wait_for(
-                        asyncio.shield(generation_task),
-                        timeout=heartbeat_interval_seconds,
-                    )
-                except asyncio.TimeoutError:
-                    yield ": heartbeat\n\n"
-
-            result = generation_task.result()
-            units_done += 1
-            yield _sse({
-                "type": "unit_done",
-                "unit_id": unit.id,
+    # Units pre-generated by /speculate with these exact inputs are followed
+    # (or replayed) instead of generated again.
+    speculative: dict[int, SpeculativeUnit] = {}
+    if speculation is not None:
+        for spec in unit_specs:
+            fingerprint = _unit_fingerprint(
+                spec, level, language, native_language, course_description, source_content,
+            )
+            claimed = speculation_registry.claim(course_id, spec["id"], fingerprint)
+            if claimed is not None:
+                speculative[spec["id"]] = claimed
+
+    # Vocabulary-card images are planned course-wide: each concept is rendered
+    # once for all units and fal.ai calls share the global image semaphore.
+    card_plan = CardImagePlan(own_sessions=True)
+
+    async def _run_unit(index: int, spec: dict) -> None:
+        if spec["id"] in speculative:
+            # No slot: the speculative job already holds (or held) one.
+            events.put_nowait({
+                "type": "unit_start",
+                "unit_id": spec["id"],
+                "title": spec["title"],
                 "index": index,
-                "segments_created": result.segments_created,
-                "exercises_created": result.exercises_created,
+                "total": total,
             })
-        except Exception as exc:
-            logger.warning("SSE unit %d failed: %s", unit.id, exc, exc_info=True)
-            # No unit_generation credit was consumed in this flow, so no refund needed.
-            yield _sse({
-                "type": "unit_error",
-                "unit_id": unit.id,
+            async for event in speculative[spec["id"]].events():
+                events.put_nowait({**event, "index": index})
+            return
+
+        async with slots:
+            events.put_nowait({
+                "type": "unit_start",
+                "unit_id": spec["id"],
+                "title": spec["title"],
                 "index": index,
-                "error": str(exc),
+                "total": total,
             })
 
-        yield ": heartbeat\n\n"
-
-        if index < total - 1:
-            await asyncio.sleep(0.5)
+            # Segment blueprints arrive here as soon as each one is generated,
+            # long before the unit is persisted — pushed as segment_ready.
+            def _on_segment(seg_index, seg_total, seg_bp):
+                events.put_nowait({
+                    **_segment_event(spec["id"], seg_index, seg_total, seg_bp),
+                    "index": index,
+                })
+
+            unit_db = SessionLocal()
+            try:
+                result = await service.generate(
+                    _unit_request(
+                        spec,
+                        level=level,
+                        language=language,
+                        native_language=native_language,
+                        course_description=course_description,
+                        source_content=source_content,
+                        teacher_id=teacher_id,
+                        teacher_plan=teacher_plan,
+                    ),
+                    unit_db,
+                    on_segment=_on_segment,
+                )
+                events.put_nowait({
+                    "type": "unit_done",
+                    "unit_id": spec["id"],
+                    "index": index,
+                    "segments_created": result.segments_created,
+                    "exercises_created": result.exercises_created,
+                })
+            except Exception as exc:
+                logger.warning("SSE unit %d failed: %s", spec["id"], exc, exc_info=True)
+                # No unit_generation credit was consumed in this flow, so no refund needed.
+                events.put_nowait({
+                    "type": "unit_error",
+                    "unit_id": spec["id"],
+                    "index": index,
+                    "error": str(exc),
+                })
+            finally:
+                unit_db.close()
+
+    async def _run_unit_with_card_plan(index: int, spec: dict) -> None:
+        with card_image_scope(card_plan):
+            await _run_unit(index, spec)
+
+    workers = [
+        asyncio.create_task(_run_unit_with_card_plan(index, spec))
+        for index, spec in enumerate(unit_specs)
+    ]
+    # Counts successful unit generations in the current streaming session.
+    units_done = 0
+    units_finished = 0
+    # Defines how often we emit SSE heartbeats while waiting on long operations.
+    heartbeat_interval_seconds = 20
+    try:
+        while units_finished < total:
+            try:
+                event = await asyncio.wait_for(events.get(), timeout=heartbeat_interval_seconds)
+            except asyncio.TimeoutError:
+                if all(worker.done() for worker in workers) and events.empty():
+                    break                       # a worker died without reporting
+                yield ": heartbeat\n\n"
+                continue
+            if event["type"] in ("unit_done", "unit_error"):
+                units_finished += 1
+                units_done += event["type"] == "unit_done"
+            yield _sse(event)
+    finally:
+        # Client went away (or we are done): stop any unit still generating.
+        for worker in workers:
+            if not worker.done():
+                worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        logger.info("stream_course_generation: card images %s", card_plan.stats())
 
-    db.close()
     yield _sse({"type": "complete", "units_done": units_done, "total": total})
 
 
@@ -1211,7 +1340,138 @@ async def stream_course_generation(
     )
 
 
-# ── Endpoint 4: PATCH outline ─────────────────────────────────────────────────
+# ── Endpoint 4: speculative pre-generation ───────────────────────────────────
+
+
+async def _speculate_unit(
+    unit: SpeculativeUnit,
+    *,
+    request: Any,
+    service: Any,
+    slots: asyncio.Semaphore,
+) -> None:
+    """Generate one unit ahead of the stream, recording its SSE events on *unit*."""
+    from app.core.database import SessionLocal
+
+    async with slots:
+        unit_db = SessionLocal()
+        try:
+            with card_image_scope(CardImagePlan(own_sessions=True)):
+                result = await service.generate(
+                    request,
+                    unit_db,
+                    on_segment=lambda i, n, bp: unit.emit(_segment_event(unit.unit_id, i, n, bp)),
+                )
+            unit.result = result
+            unit.emit({
+                "type": "unit_done",
+                "unit_id": unit.unit_id,
+                "segments_created": result.segments_created,
+                "exercises_created": result.exercises_created,
+            })
+        except Exception as exc:
+            logger.warning("speculative unit %d failed: %s", unit.unit_id, exc, exc_info=True)
+            unit.emit({"type": "unit_error", "unit_id": unit.unit_id, "error": str(exc)})
+        finally:
+            unit_db.close()
+
+
+def _is_blank_unit(db: Session, unit_id: int) -> bool:
+    """True for a fresh stub — at most the empty placeholder segment."""
+    from app.models.segment import Segment
+
+    segments = db.query(Segment).filter(Segment.unit_id == unit_id).limit(2).all()
+    return len(segments) <= 1 and not any(seg.media_blocks for seg in segments)
+
+
+@router.post("/{course_id}/speculate")
+async def speculate_course_units(
+    course_id: int,
+    body: SpeculateRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_teacher),
+) -> dict:
+    """
+    POST /course-builder/{course_id}/speculate
+
+    Start generating the first COURSE_SPECULATIVE_UNITS units in the
+    background, with the inputs the stream will use, as soon as the outline's
+    unit rows exist.  Only blank units are speculated, so existing content
+    is never overwritten.  Covered by the course_generation credit already
+    spent on the outline — no quota is consumed.
+
+    Returns ``{"unit_ids": [...]}`` — the units now being pre-generated.
+    """
+    from app.models.course import Course as CourseModel
+    from app.models.unit import Unit as UnitModel
+    from app.services.unit_generator import UnitGeneratorService
+
+    if SPECULATIVE_UNITS <= 0:
+        return {"unit_ids": []}
+    # Only the course's own teacher may spend LLM calls writing into its units.
+    course = db.query(CourseModel).filter(
+        CourseModel.id == course_id,
+        CourseModel.created_by == current_user.id,
+    ).first()
+    if not course:
+        from fastapi import HTTPException
+        raise HTTPException(status_code=404, detail="Course not found.")
+
+    units = (
+        db.query(UnitModel)
+        .filter(UnitModel.course_id == course_id)
+        .order_by(UnitModel.order_index)
+        .limit(SPECULATIVE_UNITS)
+        .all()
+    )
+    specs = [_unit_spec(unit) for unit in units if _is_blank_unit(db, unit.id)]
+    if not specs:
+        return {"unit_ids": []}
+
+    level = str(body.level).strip().upper()
+    level = level if level in CEFR_LEVELS else "B1"
+    # peek, not pop: the stream still consumes the token when it connects.
+    source_content = ""
+    if body.source_token:
+        source_content = get_source_store(_MAX_FILE_CONTENT_CHARS).peek(body.source_token) or ""
+    course_description = _course_description(db, course_id)
+
+    provider, plan = _get_provider_for_user(current_user, db)
+    existing = speculation_registry.get(course_id)
+    service = (
+        existing.service
+        if existing is not None and existing.teacher_id == current_user.id
+        else UnitGeneratorService(ai_provider=provider)
+    )
+    slots = _teacher_unit_slots(current_user.id, plan)
+
+    jobs = []
+    for spec in specs:
+        request = _unit_request(
+            spec,
+            level=level,
+            language=body.language,
+            native_language=body.native_language,
+            course_description=course_description,
+            source_content=source_content,
+            teacher_id=current_user.id,
+            teacher_plan=plan,
+        )
+        fingerprint = _unit_fingerprint(
+            spec, level, body.language, body.native_language, course_description, source_content,
+        )
+        run = functools.partial(_speculate_unit, request=request, service=service, slots=slots)
+        jobs.append((spec["id"], fingerprint, run))
+
+    unit_ids = speculation_registry.start(course_id, current_user.id, service, jobs)
+    logger.info(
+        "speculate: course_id=%d teacher_id=%d units=%s stats=%s",
+        course_id, current_user.id, unit_ids, speculation_registry.stats(),
+    )
+    return {"unit_ids": unit_ids}
+
+
+# ── Endpoint 5: PATCH outline ─────────────────────────────────────────────────
 
 
 @router.patch("/{course_id}/outline", response_model=CourseOutlineResponse)
@@ -1233,6 +1493,8 @@ async def patch_course_outline(
     - Section changes are stored in the outline only (returned in the
       response) and will influence the SSE generation prompt via the
       unit title; the DB has no separate segment records for sections yet.
+    - Speculative pre-generation of every edited or deleted unit is
+      discarded (see /speculate).
     """
     from app.core.database import SessionLocal
     from app.models.unit import Unit as UnitModel
@@ -1269,6 +1531,9 @@ async def patch_course_outline(
 
         # Keeps a mutable list so we can append newly created stubs below.
         db_units_list: list[UnitModel] = list(db_units)
+        # Units whose generation inputs changed — their speculative
+        # pre-generation (if any) no longer matches the outline.
+        edited_unit_ids: set[int] = set()
 
         # Update existing units (title / description / timestamp).
         # Skip units whose title, description, and sections are all unchanged
@@ -1297,6 +1562,7 @@ async def patch_course_outline(
                 db_unit.description      = new_description
                 db_unit.outline_sections = new_sections
                 db_unit.updated_at       = _dt.datetime.utcnow()
+                edited_unit_ids.add(db_unit.id)
             else:
                 # Teacher added a new unit in the outline review panel.
                 # Create a DB stub so the SSE stream picks it up for generation.
@@ -1335,6 +1601,8 @@ async def patch_course_outline(
         if len(body.units) < len(db_units_list):
             units_to_delete = db_units_list[len(body.units):]
             for excess_unit in units_to_delete:
+                if excess_unit.id is not None:
+                    edited_unit_ids.add(excess_unit.id)
                 db.delete(excess_unit)
             logger.info(
                 "patch_course_outline: course_id=%d deleted %d excess unit(s) "
@@ -1344,6 +1612,21 @@ async def patch_course_outline(
             # Trim so the response loop below only covers kept units
             db_units_list = db_units_list[: len(body.units)]
 
+        # Throw away speculative work built from the old outline: running
+        # jobs are cancelled, finished ones lose their segments so the stream
+        # regenerates the unit from the edited outline.  (The course flow
+        # charges no per-unit credit, so there is nothing to refund.)
+        stale_segment_ids = await speculation_registry.discard(course_id, edited_unit_ids)
+        if stale_segment_ids:
+            from app.models.segment import Segment
+            db.query(Segment).filter(Segment.id.in_(stale_segment_ids)).delete(
+                synchronize_session=False,
+            )
+            logger.info(
+                "patch_course_outline: course_id=%d dropped %d speculative segment(s)",
+                course_id, len(stale_segment_ids),
+            )
+
         db.commit()
 
         # Rebuild response from current DB state merged with edited sections
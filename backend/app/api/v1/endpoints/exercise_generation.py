@@ -39,6 +39,8 @@ from app.core.teacher_tariffs import (
     get_teacher_tariff_display_state,
 )
 from app.services.ai_exercise_generator import get_provider_for_plan
+from app.services.ai.providers.rate_limiter import admission_priority, priority_for_plan
+from app.services.ai.providers.telemetry import llm_context
 from app.models.user import User
 from app.schemas.exercise_generation import (
     ExerciseGenerateRequest,
@@ -452,6 +454,8 @@ async def generate_exercise_block(
         content_language=body.content_language,
         instruction_language=body.instruction_language,
         generator_params=body.build_generator_params(),
+        # Interactive path — hedged DeepSeek/Groq chain when AI_HEDGE_ENABLED.
+        provider=get_provider_for_plan(plan),
         # Forwards the teacher's intent: preview=True skips the DB write so the
         # block is only saved when the Save button is explicitly clicked.
         preview_only=body.preview_only,
@@ -540,17 +544,20 @@ async def generate_exercise_from_file(
     plan, _ = get_teacher_tariff_display_state(db, current_user)
     try:
         from app.services.ai_exercise_generator import generate_exercise as _gen
-        exercise_data, metadata = await _gen(
-            exercise_type=exercise_type,
-            unit_content=file_text,
-            content_language=(content_language or "auto").strip().lower(),
-            instruction_language=(instruction_language or "english").strip().lower(),
-            topic_hint=None,
-            gap_count=resolved_gap_count,
-            gap_type=gap_type,
-            difficulty=difficulty,
-            provider=get_provider_for_plan(plan),
-        )
+        with admission_priority(priority_for_plan(plan, "exercise")), llm_context(
+            phase=f"exercise.{exercise_type}", teacher_id=current_user.id, plan=plan,
+        ):
+            exercise_data, metadata = await _gen(
+                exercise_type=exercise_type,
+                unit_content=file_text,
+                content_language=(content_language or "auto").strip().lower(),
+                instruction_language=(instruction_language or "english").strip().lower(),
+                topic_hint=None,
+                gap_count=resolved_gap_count,
+                gap_type=gap_type,
+                difficulty=difficulty,
+                provider=get_provider_for_plan(plan),
+            )
     except NotImplementedError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except ValueError as exc:
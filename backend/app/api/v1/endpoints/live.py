@@ -28,15 +28,41 @@ Protocol (server → client)
         • Other students' "s/{N}/…" keys are excluded.
         • Teacher "ex/…" fills, presence, and lesson-nav keys are included as-is.
       Teachers receive the full raw room["patches"].
+      room["patches"] is a RoomPatches (shared / per-student maps), so a
+      snapshot costs O(own keys) and shared JSON is cached per version.
+
+  Clients opening the socket with the "live.msgpack.v1" subprotocol get
+  MessagePack binary frames stamped with the room version, a delta instead
+  of the snapshot when they rejoin with {"epoch", "since"}, and presence as
+  join/leave diffs — see app.services.live_wire.  JSON is the default.
 
   { "type": "patch",     "key": "…", "value": <any> }
 
+  Frames are serialised once per broadcast and queued per socket
+  (app.core.ws_outbox).  A client that falls behind is closed with 1013 and
+  resyncs from the snapshot it gets on reconnect.
+
 Answer persistence & DB hydration
 ──────────────────────────────────
-Every exercise field patch is written to exercise_field_answer_events with
-unit_id + segment_id.  On student join, if no live answers are in memory
-(e.g. server restart), the latest row per (block_id, field_key) is loaded
-from DB and injected so the personalized snapshot restores their work.
+Every exercise field patch is staged for exercise_field_answer_events with
+unit_id + segment_id.  app.services.live_answer_writer keeps only the last
+value per field within LIVE_ANSWER_DEBOUNCE_MS, then batches the rows into
+one INSERT every LIVE_ANSWER_FLUSH_MS off the event loop.  Student patch
+fan-out can be capped per key with LIVE_PATCH_FANOUT_MS.  Reads of the
+table (hydration, REST restore, clear) flush the queue first.  Each batch
+also upserts latest_exercise_answers (one row per student field, clears as
+null sentinels), which hydration and the REST endpoint read by index with
+unit/segment filters in SQL.  On student join, if no live answers are in
+memory (e.g. server restart), those rows are loaded and injected so the
+personalized snapshot restores their work.
+
+Multiple workers
+────────────────
+Rooms live in process memory.  With LIVE_BACKPLANE=redis every worker that
+holds sockets for a room publishes its patches (last-writer-wins per key) and
+presence through app.services.live_backplane, and loads the shared snapshot
+when it opens the room, so teachers and students may land on any worker.
+Each worker persists answers for its own sockets only.
 
 REST answer endpoint
 ─────────────────────
@@ -44,27 +70,42 @@ GET /api/v1/classrooms/{classroom_id}/exercise-answers
   ?student_id=N   (optional — omit to get all students, teacher only)
   ?unit_id=N      (optional filter)
   ?segment_id=N   (optional filter)
+
+GET /api/v1/live/stats   (teacher) — answer writer queue / batch metrics and the
+                         last answer-events maintenance pass (table size before/after)
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import os
 import re
+from datetime import datetime, timezone
 from typing import Any, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
-from sqlalchemy import text
+from sqlalchemy import insert, text
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db, SessionLocal
-from app.core.auth import get_current_user, get_current_user_from_token
+from app.core.auth import get_current_teacher, get_current_user, get_current_user_from_token
 from app.core.enrollment_guard import check_course_access
+from app.core.ws_outbox import outbox_hub
 from app.models.user import User
 from app.models.course import Course
+from app.services.answer_event_maintenance import maintenance_stats
+from app.services.latest_exercise_answers import upsert_latest_answers
+from app.services.live_answer_writer import BROADCAST, live_answer_writer
+from app.services import live_wire
+from app.services.live_backplane import get_backplane
+from app.services.live_coalescer import KeyedCoalescer
+from app.services.live_patch_store import RoomPatches
 
-from app.models.exercise_field_answer_event import ExerciseFieldAnswerEvent  # noqa: F401
+from app.models.exercise_field_answer_event import ExerciseFieldAnswerEvent
+from app.models.latest_exercise_answer import LatestExerciseAnswer  # noqa: F401
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -114,47 +155,157 @@ def _ensure_room(classroom_id: int) -> dict:
     if classroom_id not in _rooms:
         _rooms[classroom_id] = {
             "connections":   set(),
-            "patches":       {},
+            "patches":       RoomPatches(),
             "users":         {},
             "student_conns": {},
             "teacher_conns": set(),
+            "remote_users":  {},
+            "binary_conns":  set(),
         }
     room = _rooms[classroom_id]
     room.setdefault("student_conns", {})
     room.setdefault("teacher_conns", set())
+    room.setdefault("remote_users", {})
+    room.setdefault("binary_conns", set())
     return room
 
 
-async def _send_json(ws: WebSocket, data: dict) -> None:
-    try:
-        await ws.send_text(json.dumps(data))
-    except Exception:
-        pass
+# ─── Cross-worker backplane ───────────────────────────────────────────────────
+# Other workers holding sockets for the same room see every patch and presence
+# change (app.services.live_backplane; LIVE_BACKPLANE=redis).  The default
+# in-memory backplane shares nothing — single-worker behaviour.
 
+_backplane = get_backplane()
 
-async def _broadcast(
-    classroom_id: int,
+
+async def _open_room(classroom_id: int) -> dict:
+    """_ensure_room, loading the shared snapshot when this worker creates the room."""
+    room = _ensure_room(classroom_id)
+    ready = room.get("ready")
+    if ready is None:
+        ready = room["ready"] = asyncio.get_running_loop().create_future()
+        try:
+            snapshot = await _backplane.open_room(classroom_id)
+            room["patches"].update(snapshot["patches"])
+            room["remote_users"].update(snapshot["presence"])
+        finally:
+            ready.set_result(None)
+    else:
+        await asyncio.shield(ready)
+    return room
+
+
+async def _on_remote_event(classroom_id: int, event: dict) -> None:
+    room = _rooms.get(classroom_id)
+    if room is None:
+        return
+    if event["op"] == "presence":
+        if event["users"]:
+            room["remote_users"][event["worker"]] = event["users"]
+        else:
+            room["remote_users"].pop(event["worker"], None)
+        _sync_presence(classroom_id, room, publish=False)
+        return
+
+    key, value, target = event["key"], event["value"], event["target"]
+    room["patches"][key] = value
+    if target is not None:
+        # Teacher patch routed to one student: same frames as the origin sends.
+        _send_frame(
+            room,
+            room["student_conns"].get(target, ()),
+            {"type": "patch", "key": key[len(f"s/{target}/"):], "value": value},
+        )
+        _send_frame(room, room["teacher_conns"], {"type": "patch", "key": key, "value": value})
+        return
+    _broadcast(classroom_id, {"type": "patch", "key": key, "value": value})
+    if event.get("meta"):
+        # Teacher broadcast: this worker writes the rows for its own students.
+        await _stage_broadcast_rows(classroom_id, room, key, value, **event["meta"])
+
+
+_backplane.set_handler(_on_remote_event)
+
+
+# Sends only enqueue on the socket's outbox (app.core.ws_outbox); its writer
+# task does the network I/O, so a slow client never holds up the others.
+# Sockets on the binary protocol (room["binary_conns"], app.services.live_wire)
+# get MessagePack frames stamped with the room version; a frame is serialised
+# at most once per protocol.
+
+def _send_frame(
+    room: dict,
+    sockets,
     data: dict,
     exclude: Optional[WebSocket] = None,
 ) -> None:
-    room = _rooms.get(classroom_id)
-    if not room:
-        return
-    dead: set[WebSocket] = set()
-    for ws in list(room["connections"]):
+    binary = room["binary_conns"]
+    text_frame: Optional[str] = None
+    packed: Optional[bytes] = None
+    for ws in sockets:
         if ws is exclude:
             continue
-        try:
-            await ws.send_text(json.dumps(data))
-        except Exception:
-            dead.add(ws)
-    room["connections"] -= dead
+        if ws in binary:
+            if packed is None:
+                packed = live_wire.pack({**data, "v": room["patches"].version})
+            outbox_hub.send(ws, packed)
+        else:
+            if text_frame is None:
+                text_frame = json.dumps(data)
+            outbox_hub.send(ws, text_frame)
 
 
-async def _sync_presence(classroom_id: int, room: dict) -> None:
-    users = list(room["users"].values())
-    room["patches"]["_presence/users"] = users
-    await _broadcast(classroom_id, {"type": "patch", "key": "_presence/users", "value": users})
+def _broadcast(
+    classroom_id: int,
+    data: dict,
+    exclude: Optional[WebSocket] = None,
+) -> None:
+    room = _rooms.get(classroom_id)
+    if not room:
+        return
+    _send_frame(room, room["connections"], data, exclude=exclude)
+
+
+async def _emit_fanout(room_key: tuple[int, str], payload: tuple[dict, WebSocket]) -> None:
+    frame, sender = payload
+    room = _rooms.get(room_key[0])
+    if room and _FANOUT_MS > 0:
+        # A delayed emit must carry a version above every frame sent while it
+        # was pending, or a client reconnecting in between would skip it.
+        room["patches"].touch(frame["key"])
+    _broadcast(room_key[0], frame, exclude=sender)
+
+
+# Student patches reach the teacher at most once per LIVE_PATCH_FANOUT_MS per
+# key (first keystroke immediately, the latest value at the end of the window).
+# 0 sends every keystroke.  The room snapshot is always updated at once.
+_FANOUT_MS = float(os.environ.get("LIVE_PATCH_FANOUT_MS", "0"))
+_fanout = KeyedCoalescer(_FANOUT_MS, _emit_fanout, leading=True)
+
+
+def _sync_presence(classroom_id: int, room: dict, publish: bool = True) -> None:
+    local = list(room["users"].values())
+    if publish:
+        _backplane.publish_presence(classroom_id, local)
+    users = list({
+        u["user_id"]: u
+        for u in [*(u for lst in room["remote_users"].values() for u in lst), *local]
+    }.values())
+    patches: RoomPatches = room["patches"]
+    before = patches["_presence/users"] if "_presence/users" in patches else []
+    patches["_presence/users"] = users
+
+    # JSON clients get the whole list; binary clients only who joined / left.
+    binary = room["binary_conns"]
+    outbox_hub.broadcast(
+        [ws for ws in room["connections"] if ws not in binary],
+        json.dumps({"type": "patch", "key": "_presence/users", "value": users}),
+    )
+    joined, left = live_wire.presence_diff(before, users)
+    if binary and (joined or left):
+        outbox_hub.broadcast(binary, live_wire.pack({
+            "type": "presence", "joined": joined, "left": left, "v": patches.version,
+        }))
 
 
 def _is_teacher(user: User, course: Course) -> bool:
@@ -166,38 +317,52 @@ def _is_teacher(user: User, course: Course) -> bool:
 
 # ─── Snapshot personalization ─────────────────────────────────────────────────
 
-def _build_student_snapshot(patches: dict, student_id: int) -> dict:
+def _snapshot_frame(room: dict, student_id: Optional[int] = None) -> str:
     """
-    Build a snapshot tailored for a specific student.
-
-    Rules:
-    • "s/{student_id}/ex/…"  →  emitted as plain "ex/…"  (own answers, restored)
-    • "s/{other_id}/…"       →  excluded  (another student's private data)
-    • Everything else        →  included as-is
-                                (teacher fills "ex/…", presence, lesson nav)
+    Serialised snapshot frame: personalised for *student_id*, the full raw
+    state for teachers (student_id None).
 
-    Personalised snapshots ensure exercise blocks subscribed to the plain
-    "ex/…" key receive the student's saved answers on join / reconnect.
+    Students get their own "s/{uid}/ex/…" answers as plain "ex/…" keys so
+    exercise blocks find them on join / reconnect; other students' keys are
+    excluded.  Built from RoomPatches' cached JSON, so a join costs
+    O(own keys) rather than a scan of the whole room.
     """
-    prefix = f"s/{student_id}/"
-    personal: dict = {}
-
-    for k, v in patches.items():
-        if k.startswith(prefix):
-            # Own scoped answer — strip prefix so exercise blocks find it
-            personal[k[len(prefix):]] = v
-        elif k.startswith("s/"):
-            # Another student's answer — exclude
-            continue
-        else:
-            personal[k] = v
+    patches: RoomPatches = room["patches"]
+    body = patches.full_json() if student_id is None else patches.student_json(student_id)
+    return '{"type": "snapshot", "patches": ' + body + "}"
+
 
-    return personal
+_wire_counters = {"binary_joins": 0, "delta_snapshots": 0, "full_snapshots": 0}
+
+
+def _binary_snapshot_frame(
+    room: dict,
+    student_id: Optional[int] = None,
+    epoch: Any = None,
+    since: Any = None,
+) -> bytes:
+    """
+    MessagePack snapshot for a binary-protocol join: only the patches written
+    after *since* when the client's *epoch* is this room's, else the full
+    snapshot (same views as _snapshot_frame).
+    """
+    patches: RoomPatches = room["patches"]
+    _wire_counters["binary_joins"] += 1
+    if epoch == patches.epoch and isinstance(since, int) and not isinstance(since, bool):
+        delta = patches.delta(since, student_id)
+        if delta is not None:
+            _wire_counters["delta_snapshots"] += 1
+            return live_wire.snapshot_frame(
+                live_wire.pack(delta), epoch=patches.epoch, version=patches.version, since=since,
+            )
+    _wire_counters["full_snapshots"] += 1
+    body = patches.full_msgpack() if student_id is None else patches.student_msgpack(student_id)
+    return live_wire.snapshot_frame(body, epoch=patches.epoch, version=patches.version)
 
 
 # ─── DB persistence ───────────────────────────────────────────────────────────
 
-def _save_answer_event(
+def _answer_event_row(
     *,
     classroom_id: int,
     student_id: int,
@@ -210,37 +375,66 @@ def _save_answer_event(
     is_correct: Optional[bool],
     written_by_teacher: bool,
     is_broadcast: bool,
+) -> dict[str, Any]:
+    """Column dict for one exercise_field_answer_events row (see live_answer_writer)."""
+    return {
+        "classroom_id":       classroom_id,
+        "student_id":         student_id,
+        "unit_id":            unit_id,
+        "segment_id":         segment_id,
+        "exercise_key":       exercise_key,
+        "block_id":           block_id,
+        "field_key":          field_key,
+        "value":              value,
+        "is_correct":         is_correct,
+        "written_by_teacher": written_by_teacher,
+        "is_broadcast":       is_broadcast,
+    }
+
+
+async def _stage_broadcast_rows(
+    classroom_id: int,
+    room: dict,
+    key: str,
+    value: Any,
+    *,
+    unit_id: Optional[int],
+    segment_id: Optional[int],
+    is_correct: Optional[bool],
 ) -> None:
-    """Write one answer event row using a fresh db session."""
-    db: Session = SessionLocal()
-    try:
-        event = ExerciseFieldAnswerEvent(
+    """Stage one answer row per student on this worker for a teacher broadcast patch."""
+    _, logical_key, block_id, field_key = _parse_exercise_key(key)
+    if not (logical_key and block_id and field_key):
+        return
+    # One staged entry for the whole fan-out — written in a single INSERT.
+    await live_answer_writer.stage((classroom_id, BROADCAST, logical_key), [
+        _answer_event_row(
             classroom_id=classroom_id,
-            student_id=student_id,
+            student_id=sid,
             unit_id=unit_id,
             segment_id=segment_id,
-            exercise_key=exercise_key,
+            exercise_key=logical_key,
             block_id=block_id,
             field_key=field_key,
             value=value,
             is_correct=is_correct,
-            written_by_teacher=written_by_teacher,
-            is_broadcast=is_broadcast,
+            written_by_teacher=True,
+            is_broadcast=True,
         )
-        db.add(event)
-        db.commit()
-        logger.debug(
-            "Answer saved: classroom=%s student=%s key=%s unit=%s segment=%s",
-            classroom_id, student_id, exercise_key, unit_id, segment_id,
-        )
-    except Exception as exc:
-        logger.warning("Failed to persist answer event: %s", exc)
-        try:
-            db.rollback()
-        except Exception:
-            pass
-    finally:
-        db.close()
+        for sid in list(room["student_conns"].keys())
+    ])
+
+
+def _scope_filter(unit_id: Optional[int], segment_id: Optional[int]) -> tuple[str, dict[str, Any]]:
+    """Optional ``AND unit_id = … AND segment_id = …`` clause and its params."""
+    clause, params = "", {}
+    if unit_id is not None:
+        clause += " AND unit_id = :unit_id"
+        params["unit_id"] = unit_id
+    if segment_id is not None:
+        clause += " AND segment_id = :segment_id"
+        params["segment_id"] = segment_id
+    return clause, params
 
 
 def _load_latest_answers_for_student(
@@ -251,44 +445,27 @@ def _load_latest_answers_for_student(
 ) -> dict[str, Any]:
     """
     Return the latest value per (block_id, field_key) for a student.
-    Uses a global DISTINCT ON (without SQL scope filtering) so null sentinel rows
-    written by clear operations always beat older non-null answers.
 
-    Python post-filtering rules:
-    • value IS None -> field was explicitly cleared, exclude from result.
-    • value exists but scope differs from request -> exclude.
-    • value exists and scope matches request (or no scope requested) -> include.
+    Reads latest_exercise_answers by primary-key prefix.  Cleared fields are
+    null sentinels (excluded by ``value IS NOT NULL``); scope is that of the
+    latest write, so a field last answered in another unit is excluded.
 
     Returns: { "ex/{block_id}/{field_key}": value, … }
     """
+    scope, params = _scope_filter(unit_id, segment_id)
     db: Session = SessionLocal()
     try:
         rows = db.execute(
-            text("""
-                SELECT DISTINCT ON (block_id, field_key)
-                    exercise_key, value, unit_id, segment_id
-                FROM exercise_field_answer_events
+            text(f"""
+                SELECT exercise_key, value
+                FROM latest_exercise_answers
                 WHERE classroom_id = :classroom_id
                   AND student_id   = :student_id
-                ORDER BY block_id, field_key, created_at DESC
+                  AND value IS NOT NULL{scope}
             """),
-            {
-                "classroom_id": classroom_id,
-                "student_id":   student_id,
-            },
+            {"classroom_id": classroom_id, "student_id": student_id, **params},
         ).fetchall()
-
-        result: dict[str, Any] = {}
-        for row in rows:
-            if row.value is None:
-                continue
-            if unit_id is not None and row.unit_id != unit_id:
-                continue
-            if segment_id is not None and row.segment_id != segment_id:
-                continue
-            result[row.exercise_key] = row.value
-
-        return result
+        return {row.exercise_key: row.value for row in rows}
 
     except Exception as exc:
         logger.warning("Failed to load answers for student %s: %s", student_id, exc)
@@ -305,30 +482,23 @@ def _load_all_latest_answers(
     """
     Return latest answers for ALL students in a classroom.
 
-    Uses global DISTINCT ON so null sentinel rows win recency before filtering.
-    Null rows are excluded and non-null rows are scope-filtered in Python.
+    Same rules as _load_latest_answers_for_student, across every student.
     """
+    scope, params = _scope_filter(unit_id, segment_id)
     db: Session = SessionLocal()
     try:
         rows = db.execute(
-            text("""
-                SELECT DISTINCT ON (student_id, block_id, field_key)
-                    student_id, exercise_key, value, unit_id, segment_id
-                FROM exercise_field_answer_events
+            text(f"""
+                SELECT student_id, exercise_key, value
+                FROM latest_exercise_answers
                 WHERE classroom_id = :classroom_id
-                ORDER BY student_id, block_id, field_key, created_at DESC
+                  AND value IS NOT NULL{scope}
             """),
-            {"classroom_id": classroom_id},
+            {"classroom_id": classroom_id, **params},
         ).fetchall()
 
         result: dict[int, dict[str, Any]] = {}
         for row in rows:
-            if row.value is None:
-                continue
-            if unit_id is not None and row.unit_id != unit_id:
-                continue
-            if segment_id is not None and row.segment_id != segment_id:
-                continue
             result.setdefault(row.student_id, {})[row.exercise_key] = row.value
         return result
 
@@ -377,6 +547,10 @@ async def get_exercise_answers(
         except Exception:
             raise HTTPException(status_code=403, detail="Not enrolled in this classroom")
 
+    # Answers typed moments ago may still be queued for the next batch.
+    await live_answer_writer.flush(classroom_id, student_id if teacher else current_user.id)
+
+    if not teacher:
         patches = _load_latest_answers_for_student(
             classroom_id=classroom_id,
             student_id=current_user.id,
@@ -429,14 +603,15 @@ def _clear_block_for_student(
 ) -> int:
     """
     Discover which field_keys exist for this (classroom, student, block_id)
-    then write one null-value event per field_key.
+    then write one null-value event per field_key, and the matching null
+    sentinels into latest_exercise_answers.
     Returns the number of null rows written.
     """
-    # Collect all distinct historical field keys for the target block.
+    # Every field ever written has a latest row, cleared ones included.
     existing_fields = db.execute(
         text("""
-            SELECT DISTINCT field_key
-            FROM exercise_field_answer_events
+            SELECT field_key
+            FROM latest_exercise_answers
             WHERE classroom_id = :classroom_id
               AND student_id   = :student_id
               AND block_id     = :block_id
@@ -448,31 +623,31 @@ def _clear_block_for_student(
         },
     ).fetchall()
 
-    # Tracks how many null sentinel rows are written in this call.
-    rows_written = 0
-    for row in existing_fields:
-        # Stores the block field key being nulled for the new event row.
-        field_key = row.field_key
-        # Stores the normalized exercise key consumed by hydrate/restore queries.
-        logical_key = f"ex/{block_id}/{field_key}"
-        # Creates one null-value sentinel event so DISTINCT ON resolves to null.
-        null_event = ExerciseFieldAnswerEvent(
+    # One timestamp for the event rows and the sentinels they produce.
+    cleared_at = datetime.now(timezone.utc)
+    null_rows = [
+        _answer_event_row(
             classroom_id=classroom_id,
             student_id=student_id,
-            exercise_key=logical_key,
+            unit_id=unit_id,
+            segment_id=segment_id,
+            exercise_key=f"ex/{block_id}/{row.field_key}",
             block_id=block_id,
-            field_key=field_key,
+            field_key=row.field_key,
             value=None,
+            is_correct=None,
             written_by_teacher=False,
             is_broadcast=False,
-            unit_id=unit_id,
-            segment_id=segment_id,
-        )
-        db.add(null_event)
-        rows_written += 1
-
+        ) | {"created_at": cleared_at}
+        for row in existing_fields
+    ]
+    if not null_rows:
+        return 0
+
+    db.execute(insert(ExerciseFieldAnswerEvent), null_rows)
+    upsert_latest_answers(db, null_rows)
     db.commit()
-    return rows_written
+    return len(null_rows)
 
 
 @router.post("/classrooms/{classroom_id}/exercise-answers/clear")
@@ -504,6 +679,8 @@ async def clear_exercise_answers(
     unit_id = payload.unit_id
     # Stores optional segment metadata that gets copied into new null rows.
     segment_id = payload.segment_id
+    # Writes queued answers first so their field keys are found and nulled too.
+    await live_answer_writer.flush(classroom_id, payload.student_id if is_teacher else current_user.id)
 
     if not is_teacher:
         # Writes null sentinel events for the current student only.
@@ -533,7 +710,7 @@ async def clear_exercise_answers(
     all_student_ids_result = db.execute(
         text("""
             SELECT DISTINCT student_id
-            FROM exercise_field_answer_events
+            FROM latest_exercise_answers
             WHERE classroom_id = :classroom_id
               AND block_id     = :block_id
         """),
@@ -560,8 +737,41 @@ async def clear_exercise_answers(
     }
 
 
+# ─── Live metrics ─────────────────────────────────────────────────────────────
+
+@router.get("/live/stats")
+async def live_stats(_current_user: User = Depends(get_current_teacher)):
+    """In-process only — each worker reports its own rooms and answer queue."""
+    return {
+        "rooms":         len(_rooms),
+        "fanout":        _fanout.stats(),
+        "outbound":      outbox_hub.stats(),
+        "backplane":     _backplane.stats(),
+        "answer_writer": live_answer_writer.stats(),
+        "answer_events": maintenance_stats(),
+        "wire":          dict(_wire_counters),
+    }
+
+
 # ─── WebSocket endpoint ───────────────────────────────────────────────────────
 
+async def _iter_messages(websocket: WebSocket):
+    """Decoded client messages — JSON text or MessagePack binary — until disconnect."""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        try:
+            if message.get("bytes") is not None:
+                msg = live_wire.unpack(message["bytes"])
+            else:
+                msg = json.loads(message.get("text") or "")
+        except Exception:
+            continue
+        if isinstance(msg, dict):
+            yield msg
+
+
 @router.websocket("/ws/classroom/{classroom_id}/live")
 async def live_ws(
     websocket: WebSocket,
@@ -569,21 +779,24 @@ async def live_ws(
     token: Optional[str] = Query(default=None),
     db: Session = Depends(get_db),
 ):
+    # Binary protocol when the client offers it (app.services.live_wire).
+    subprotocol = live_wire.negotiate(websocket)
+
     # ── Auth ────────────────────────────────────────────────────────────────
     if not token:
-        await websocket.accept()
+        await websocket.accept(subprotocol=subprotocol)
         await websocket.close(code=4001, reason="Missing auth token")
         return
 
     current_user: User | None = get_current_user_from_token(token, db)
     if current_user is None:
-        await websocket.accept()
+        await websocket.accept(subprotocol=subprotocol)
         await websocket.close(code=4003, reason="Invalid or expired token")
         return
 
     course = db.query(Course).filter(Course.id == classroom_id).first()
     if not course:
-        await websocket.accept()
+        await websocket.accept(subprotocol=subprotocol)
         await websocket.close(code=4004, reason="Classroom not found")
         return
 
@@ -593,18 +806,21 @@ async def live_ws(
         try:
             check_course_access(db, current_user, classroom_id)
         except Exception:
-            await websocket.accept()
+            await websocket.accept(subprotocol=subprotocol)
             await websocket.close(code=4003, reason="Not enrolled in this classroom")
             return
 
-    await websocket.accept()
+    await websocket.accept(subprotocol=subprotocol)
     logger.info(
-        "Live WS connected: user=%s classroom=%s role=%s",
-        current_user.id, classroom_id, "teacher" if teacher else "student",
+        "Live WS connected: user=%s classroom=%s role=%s protocol=%s",
+        current_user.id, classroom_id, "teacher" if teacher else "student", subprotocol or "json",
     )
 
-    room = _ensure_room(classroom_id)
+    room = await _open_room(classroom_id)
+    outbox_hub.open(websocket)
     room["connections"].add(websocket)
+    if subprotocol:
+        room["binary_conns"].add(websocket)
 
     if teacher:
         room["teacher_conns"].add(websocket)
@@ -615,12 +831,7 @@ async def live_ws(
     joined = False
 
     try:
-        async for raw in websocket.iter_text():
-            try:
-                msg = json.loads(raw)
-            except json.JSONDecodeError:
-                continue
-
+        async for msg in _iter_messages(websocket):
             msg_type = msg.get("type")
 
             # ── join ─────────────────────────────────────────────────────────
@@ -632,7 +843,7 @@ async def live_ws(
                     "avatar_url": getattr(current_user, "avatar_url", None),
                     "role":       "teacher" if teacher else "student",
                 }
-                await _sync_presence(classroom_id, room)
+                _sync_presence(classroom_id, room)
 
                 if not teacher:
                     uid = current_user.id
@@ -640,8 +851,9 @@ async def live_ws(
 
                     # Hydrate from DB when live memory has no answers for this student
                     # (covers server restart and first-ever join)
-                    has_live_answers = any(k.startswith(student_prefix) for k in room["patches"])
+                    has_live_answers = room["patches"].has_student(uid)
                     if not has_live_answers:
+                        await live_answer_writer.flush(classroom_id, uid)
                         saved = _load_latest_answers_for_student(
                             classroom_id=classroom_id,
                             student_id=uid,
@@ -650,6 +862,13 @@ async def live_ws(
                             scoped = f"{student_prefix}{exercise_key}"
                             if scoped not in room["patches"]:
                                 room["patches"][scoped] = value
+                                _backplane.publish_patch(classroom_id, scoped, value, seed=True)
+                                # Teachers see restored answers now, and binary
+                                # teachers' versions stay gap-free for deltas.
+                                _send_frame(
+                                    room, room["teacher_conns"],
+                                    {"type": "patch", "key": scoped, "value": value},
+                                )
                         if saved:
                             logger.debug(
                                 "DB-hydrated %d answers for student=%s classroom=%s",
@@ -657,11 +876,20 @@ async def live_ws(
                             )
 
                     # Send personalised snapshot: own answers as plain "ex/…" keys
-                    personal = _build_student_snapshot(room["patches"], uid)
-                    await _send_json(websocket, {"type": "snapshot", "patches": personal})
+                    if subprotocol:
+                        outbox_hub.send(websocket, _binary_snapshot_frame(
+                            room, uid, msg.get("epoch"), msg.get("since"),
+                        ))
+                    else:
+                        outbox_hub.send(websocket, _snapshot_frame(room, uid))
                 else:
                     # Teachers get the full raw snapshot (all scoped keys visible)
-                    await _send_json(websocket, {"type": "snapshot", "patches": room["patches"]})
+                    if subprotocol:
+                        outbox_hub.send(websocket, _binary_snapshot_frame(
+                            room, None, msg.get("epoch"), msg.get("since"),
+                        ))
+                    else:
+                        outbox_hub.send(websocket, _snapshot_frame(room))
 
                 logger.debug(
                     "User %s joined live room %s (teacher=%s, snapshot_keys=%d)",
@@ -690,25 +918,22 @@ async def live_ws(
 
                     scoped_key = f"s/{target_uid}/{key}"
                     room["patches"][scoped_key] = value
+                    _backplane.publish_patch(classroom_id, scoped_key, value, target=target_uid)
 
-                    student_frame = {"type": "patch", "key": key, "value": value}
-                    dead: set[WebSocket] = set()
-                    for sw in list(room["student_conns"].get(target_uid, set())):
-                        try:
-                            await sw.send_text(json.dumps(student_frame))
-                        except Exception:
-                            dead.add(sw)
-                    if dead:
-                        room["student_conns"].get(target_uid, set()).difference_update(dead)
-                        room["connections"] -= dead
-
-                    teacher_echo = {"type": "patch", "key": scoped_key, "value": value}
-                    for tw in list(room["teacher_conns"]):
-                        await _send_json(tw, teacher_echo)
+                    _send_frame(
+                        room,
+                        room["student_conns"].get(target_uid, ()),
+                        {"type": "patch", "key": key, "value": value},
+                    )
+                    _send_frame(
+                        room,
+                        room["teacher_conns"],
+                        {"type": "patch", "key": scoped_key, "value": value},
+                    )
 
                     _, logical_key, block_id, field_key = _parse_exercise_key(key)
                     if logical_key and block_id and field_key:
-                        _save_answer_event(
+                        await live_answer_writer.stage((classroom_id, target_uid, logical_key), [_answer_event_row(
                             classroom_id=classroom_id,
                             student_id=target_uid,
                             unit_id=unit_id,
@@ -720,7 +945,7 @@ async def live_ws(
                             is_correct=is_correct,
                             written_by_teacher=True,
                             is_broadcast=False,
-                        )
+                        )])
 
                     logger.debug(
                         "Teacher targeted: classroom=%s key=%s → student=%s unit=%s segment=%s",
@@ -730,28 +955,14 @@ async def live_ws(
                 # ── Teacher broadcast (all students) ──────────────────────────
                 elif teacher:
                     room["patches"][key] = value
-                    await _broadcast(
+                    _broadcast(
                         classroom_id,
                         {"type": "patch", "key": key, "value": value},
                         exclude=websocket,
                     )
-
-                    _, logical_key, block_id, field_key = _parse_exercise_key(key)
-                    if logical_key and block_id and field_key:
-                        for sid in list(room["student_conns"].keys()):
-                            _save_answer_event(
-                                classroom_id=classroom_id,
-                                student_id=sid,
-                                unit_id=unit_id,
-                                segment_id=segment_id,
-                                exercise_key=logical_key,
-                                block_id=block_id,
-                                field_key=field_key,
-                                value=value,
-                                is_correct=is_correct,
-                                written_by_teacher=True,
-                                is_broadcast=True,
-                            )
+                    meta = {"unit_id": unit_id, "segment_id": segment_id, "is_correct": is_correct}
+                    _backplane.publish_patch(classroom_id, key, value, meta=meta)
+                    await _stage_broadcast_rows(classroom_id, room, key, value, **meta)
 
                     logger.debug(
                         "Teacher broadcast: classroom=%s key=%s students=%s unit=%s segment=%s",
@@ -761,15 +972,15 @@ async def live_ws(
                 # ── Student patch ─────────────────────────────────────────────
                 else:
                     room["patches"][key] = value
-                    await _broadcast(
-                        classroom_id,
-                        {"type": "patch", "key": key, "value": value},
-                        exclude=websocket,
+                    _backplane.publish_patch(classroom_id, key, value)
+                    await _fanout.push(
+                        (classroom_id, key),
+                        ({"type": "patch", "key": key, "value": value}, websocket),
                     )
 
                     sid_from_key, logical_key, block_id, field_key = _parse_exercise_key(key)
                     if sid_from_key and logical_key and block_id and field_key:
-                        _save_answer_event(
+                        await live_answer_writer.stage((classroom_id, sid_from_key, logical_key), [_answer_event_row(
                             classroom_id=classroom_id,
                             student_id=sid_from_key,
                             unit_id=unit_id,
@@ -781,7 +992,7 @@ async def live_ws(
                             is_correct=is_correct,
                             written_by_teacher=False,
                             is_broadcast=False,
-                        )
+                        )])
 
                     logger.debug(
                         "Student patch: classroom=%s key=%s user=%s unit=%s segment=%s",
@@ -801,6 +1012,8 @@ async def live_ws(
         logger.exception("Unhandled error in live WS: %s", exc)
     finally:
         room["connections"].discard(websocket)
+        room["binary_conns"].discard(websocket)
+        outbox_hub.close(websocket)
         if teacher:
             room["teacher_conns"].discard(websocket)
         else:
@@ -813,8 +1026,9 @@ async def live_ws(
 
         if joined:
             room["users"].pop(current_user.id, None)
-            await _sync_presence(classroom_id, room)
+            _sync_presence(classroom_id, room)
 
-        if not room["connections"]:
+        if not room["connections"] and _rooms.get(classroom_id) is room:
             _rooms.pop(classroom_id, None)
+            await _backplane.close_room(classroom_id)
             logger.debug("Live room %s removed (no more connections)", classroom_id)
\ No newline at end of file
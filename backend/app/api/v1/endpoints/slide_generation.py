@@ -45,9 +45,12 @@ from app.services.ai.image_providers.fal_provider import FalImageProvider
 from app.services.ai.image_providers.svg_provider import SVGImageProvider
 from app.services.ai.providers.base import AIProvider, AIProviderError
 from app.services.ai.providers.groq_provider import GroqProvider
+from app.services.ai.providers.circuit_breaker import with_circuit_breaker
+from app.services.ai.providers.rate_limiter import with_rate_limit
+from app.services.ai.providers.telemetry import with_telemetry
 from app.services.image_prompt_builder import ImagePromptBuilder
 from app.services.slide_generator import SlideGeneratorService, SlideGenerationError
-from app.services.slide_image_service import SlideImageService
+from app.services.slide_image_service import SlideImageService, store_slide_image
 
 logger      = logging.getLogger(__name__)
 router      = APIRouter()
@@ -59,7 +62,11 @@ _CACHE_ON   = os.environ.get("SLIDE_CACHE_ENABLED", "true").lower() != "false"
 @lru_cache(maxsize=1)
 def get_ai_provider() -> AIProvider:
     """One LLM client per process. Swap implementation here only."""
-    return GroqProvider()
+    # Shared singleton → no fixed priority; slide calls queue at the caller's
+    # admission_priority() (free-tier default) behind course generation.
+    return with_circuit_breaker(
+        with_rate_limit(with_telemetry(GroqProvider(), "groq", phase="slides"), "groq"), "groq",
+    )
 
 
 # ── Per-request dependencies ──────────────────────────────────────────────────
@@ -295,8 +302,9 @@ async def _image_stream(
     One asyncio.Task per eligible slide, all sharing a Semaphore(3) so at
     most three provider calls run at the same time.
 
-    Each task resolves into a (slide_id, data_uri) pair that it puts on a
-    shared asyncio.Queue.  The generator awaits the queue in a tight loop,
+    Each task resolves into a (slide_id, image_url) pair that it puts on a
+    shared asyncio.Queue — the image is uploaded to storage as soon as it is
+    generated, so the URL (not a data URI) travels over the stream.  The generator awaits the queue in a tight loop,
     yielding image_ready events in *completion order* — the fastest image
     appears in the browser first, regardless of slide position.
 
@@ -404,16 +412,20 @@ async def _image_stream(
 
         async with sem:
             try:
-                result = await img_provider.agenerate_image(
+                result = img_provider.render_slide_template(
+                    title, bullets, alt_text,
+                ) or await img_provider.agenerate_image(
                     prompt   = prompt,
                     alt_text = alt_text,
                     style    = style,
                 )
-                data_uri = result.as_data_uri()
                 logger.debug(
                     "Slide %d image ready — source=%s size=%d",
                     slide_id, result.source, len(result.data),
                 )
+                # Upload while still holding the slot so the frame carries a
+                # short URL instead of a multi-hundred-KB data URI.
+                data_uri = await store_slide_image(result)
             except Exception as exc:
                 logger.error(
                     "Slide %d image generation failed: %s", slide_id, exc, exc_info=True
@@ -436,7 +448,7 @@ async def _image_stream(
         slide_id, data_uri = await queue.get()
         yield _sse("image_ready", {
             "slide_id":  slide_id,
-            "image_url": data_uri,   # named image_url per the spec; value is a data URI
+            "image_url": data_uri,   # storage URL; data URI only for placeholders / upload failure
         })
 
     # All tasks are done at this point; gather just to propagate any unexpected
@@ -529,4 +541,83 @@ async def generate_slides_with_images_stream(
             "X-Accel-Buffering": "no",     # nginx: disable proxy buffering
             "Connection":        "keep-alive",
         },
-    )
\ No newline at end of file
+    )
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Streamed slide text
+# ─────────────────────────────────────────────────────────────────────────────
+
+async def _slide_text_stream(
+    body:    SlideGenerationRequest,
+    service: SlideGeneratorService,
+) -> AsyncGenerator[str, None]:
+    """
+    Drive SlideGeneratorService.agenerate_slides_stream() and translate its
+    items into SSE frames.  Each slide is pushed the moment its JSON object
+    closes in the LLM token stream, so the first slide reaches the browser
+    after a few seconds instead of after the whole deck has been generated.
+    """
+    t0 = time.perf_counter()
+    first_slide_at: float | None = None
+    try:
+        async for kind, payload in service.agenerate_slides_stream(body):
+            if kind == "slide":
+                if first_slide_at is None:
+                    first_slide_at = time.perf_counter() - t0
+                yield _sse("slide", {
+                    "slide_id": payload.id,
+                    "slide":    payload.model_dump(mode="json"),
+                })
+            elif kind == "retry":
+                yield _sse("retry", {"attempt": payload})
+            elif kind == "deck":
+                logger.info(
+                    "Slide stream done in %.1fs (first slide %.1fs) | topic=%r slides=%d",
+                    time.perf_counter() - t0, first_slide_at or 0.0,
+                    body.topic, len(payload.slides),
+                )
+                yield _sse("deck", payload.model_dump(mode="json"))
+    except AIProviderError as exc:
+        logger.error("Slide stream: provider error: %s", exc)
+        yield _sse("error", {"message": "AI provider unavailable."})
+        return
+    except SlideGenerationError as exc:
+        yield _sse("error", {"message": str(exc)})
+        return
+
+    yield _sse("finished", {})
+
+
+@router.post(
+    "/generate-slides-stream",
+    summary="Stream slide text generation via Server-Sent Events",
+    response_class=StreamingResponse,
+)
+async def generate_slides_stream(
+    body:    SlideGenerationRequest,
+    service: SlideSvc,
+) -> StreamingResponse:
+    """
+    Same input as ``POST /generate-slides``, but slides are streamed.
+
+    ## Event sequence
+
+    | Event      | Payload                         | When                                   |
+    |------------|---------------------------------|----------------------------------------|
+    | `slide`    | `{slide_id: N, slide: {...}}`   | As soon as each slide's JSON closes    |
+    | `retry`    | `{attempt: N}`                  | Output was invalid — discard slides    |
+    | `deck`     | full `SlideDeck`                | After the last slide, validated        |
+    | `finished` | `{}`                            | Stream end                             |
+    | `error`    | `{message: "…"}`                | Generation failed                      |
+
+    Cache hits replay every cached slide immediately, followed by `deck`.
+    """
+    return StreamingResponse(
+        _slide_text_stream(body, service),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control":     "no-cache",
+            "X-Accel-Buffering": "no",
+            "Connection":        "keep-alive",
+        },
+    )
@@ -80,7 +80,7 @@ async def websocket_live_session(
         ).first()
         
         if active_session:
-            await websocket.send_text(json.dumps({
+            live_session_manager.send_json(websocket, {
                 "event": "SESSION_STARTED",
                 "payload": {
                     "classroom_id": active_session.classroom_id,
@@ -91,7 +91,7 @@ async def websocket_live_session(
                     "timestamp": int(active_session.updated_at.timestamp() * 1000),
                     "student_count": live_session_manager.get_student_count(classroom_id)
                 }
-            }))
+            })
         
         # Listen for messages
         while True:
@@ -104,10 +104,10 @@ async def websocket_live_session(
                 
                 # Only teachers can broadcast
                 if role != "teacher":
-                    await websocket.send_text(json.dumps({
+                    live_session_manager.send_json(websocket, {
                         "event": "ERROR",
                         "payload": {"message": "Only teachers can broadcast messages"}
-                    }))
+                    })
                     continue
                 
                 # Validate payload
@@ -115,10 +115,10 @@ async def websocket_live_session(
                     payload["classroom_id"] = classroom_id
                 
                 if payload.get("classroom_id") != classroom_id:
-                    await websocket.send_text(json.dumps({
+                    live_session_manager.send_json(websocket, {
                         "event": "ERROR",
                         "payload": {"message": "classroom_id mismatch"}
-                    }))
+                    })
                     continue
                 
                 # Update database if it's a state-changing event
@@ -151,17 +151,21 @@ async def websocket_live_session(
                 payload["student_count"] = live_session_manager.get_student_count(classroom_id)
                 await live_session_manager.broadcast_to_classroom(classroom_id, event, payload)
                 
+            except WebSocketDisconnect:
+                # Sends are queued and never raise, so the disconnect must
+                # leave the loop here rather than via a failing error reply.
+                raise
             except json.JSONDecodeError:
-                await websocket.send_text(json.dumps({
+                live_session_manager.send_json(websocket, {
                     "event": "ERROR",
                     "payload": {"message": "Invalid JSON"}
-                }))
+                })
             except Exception as e:
                 logger.error(f"Error processing WebSocket message: {e}")
-                await websocket.send_text(json.dumps({
+                live_session_manager.send_json(websocket, {
                     "event": "ERROR",
                     "payload": {"message": str(e)}
-                }))
+                })
     
     except WebSocketDisconnect:
         live_session_manager.disconnect(websocket)
@@ -1,11 +1,16 @@
 """
 WebSocket connection manager for live sessions
+
+Outgoing messages are serialised once and queued on each socket's outbox
+(app.core.ws_outbox), so a slow client cannot delay the rest of the class.
 """
 from typing import Dict, Set
 from fastapi import WebSocket
 import json
 import logging
 
+from app.core.ws_outbox import outbox_hub
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,6 +26,7 @@ class LiveSessionManager:
     async def connect(self, websocket: WebSocket, classroom_id: int, user_id: int, role: str):
         """Connect a client to a classroom"""
         await websocket.accept()
+        outbox_hub.open(websocket)
         
         if classroom_id not in self.classroom_connections:
             self.classroom_connections[classroom_id] = set()
@@ -35,6 +41,7 @@ class LiveSessionManager:
     
     def disconnect(self, websocket: WebSocket):
         """Disconnect a client"""
+        outbox_hub.close(websocket)
         if websocket not in self.connection_info:
             return
         
@@ -62,17 +69,13 @@ class LiveSessionManager:
         }
         message_json = json.dumps(message)
         
-        disconnected = set()
-        for websocket in self.classroom_connections[classroom_id]:
-            try:
-                await websocket.send_text(message_json)
-            except Exception as e:
-                logger.warning(f"Failed to send message to client: {e}")
-                disconnected.add(websocket)
-        
-        # Clean up disconnected clients
-        for ws in disconnected:
-            self.disconnect(ws)
+        # Sockets that fail or fall behind are closed by their outbox; the
+        # endpoint's receive loop then calls disconnect().
+        outbox_hub.broadcast(self.classroom_connections[classroom_id], message_json)
+    
+    def send_json(self, websocket: WebSocket, data: dict) -> None:
+        """Send a message to one client, in order with its broadcasts"""
+        outbox_hub.send(websocket, json.dumps(data))
     
     async def broadcast_student_count(self, classroom_id: int):
         """Broadcast updated student count to teacher"""
@@ -86,17 +89,14 @@ class LiveSessionManager:
         )
         
         # Send to teacher only
-        for websocket in self.classroom_connections[classroom_id]:
-            if websocket in self.connection_info:
-                _, _, role = self.connection_info[websocket]
-                if role == "teacher":
-                    try:
-                        await websocket.send_text(json.dumps({
-                            "event": "STUDENT_COUNT_UPDATED",
-                            "payload": {"student_count": student_count}
-                        }))
-                    except Exception:
-                        pass
+        teachers = [
+            ws for ws in self.classroom_connections[classroom_id]
+            if ws in self.connection_info and self.connection_info[ws][2] == "teacher"
+        ]
+        outbox_hub.broadcast(teachers, json.dumps({
+            "event": "STUDENT_COUNT_UPDATED",
+            "payload": {"student_count": student_count}
+        }))
     
     def get_student_count(self, classroom_id: int) -> int:
         """Get the number of connected students"""
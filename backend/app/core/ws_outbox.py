@@ -0,0 +1,215 @@
+"""
+app/core/ws_outbox.py
+=====================
+Per-connection outbound queues for classroom WebSockets.
+
+Broadcasting used to ``json.dumps`` the message once per recipient and await
+``send_text`` on each socket in turn, so one student on a slow connection
+delayed every recipient after them — and the sender's own handler.
+
+Every socket now gets a ``SocketOutbox``: a bounded queue of already
+serialised frames drained by its own writer task.  ``OutboxHub.broadcast``
+serialises once and only enqueues, so a broadcast costs the same whatever
+the recipients' network looks like.  Frames for one socket keep their order.
+A frame is a ``str`` (text) or ``bytes`` (binary, see app/services/live_wire).
+
+Slow consumers
+--------------
+• A send that takes longer than ``LIVE_WS_SEND_TIMEOUT`` closes the socket
+  (1013 "try again later").
+• A queue that reaches ``LIVE_WS_QUEUE_MAX`` frames is handled by
+  ``LIVE_WS_OVERFLOW``:
+    close        (default) close the socket; the client reconnects and gets a
+                 fresh snapshot, so it never runs on a state with holes in it.
+    drop_oldest  discard the oldest queued frame and keep going — for
+                 streams where only the latest frames matter.
+
+Closing the socket ends its receive loop, so the endpoint's own cleanup
+(room membership, presence) runs as for any disconnect.
+
+Environment variables
+---------------------
+LIVE_WS_QUEUE_MAX      default: 256   frames queued per socket
+LIVE_WS_SEND_TIMEOUT   default: 5     seconds one send may take
+LIVE_WS_OVERFLOW       default: close close | drop_oldest
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any, Iterable
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+_QUEUE_MAX    = int(os.environ.get("LIVE_WS_QUEUE_MAX", "256"))
+_SEND_TIMEOUT = float(os.environ.get("LIVE_WS_SEND_TIMEOUT", "5"))
+_OVERFLOW     = os.environ.get("LIVE_WS_OVERFLOW", "close").strip().lower()
+
+SLOW_CONSUMER_CLOSE_CODE = 1013
+_CLOSE_TIMEOUT = 1.0
+
+
+class SocketOutbox:
+    """Bounded frame queue + writer task for one WebSocket."""
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        counters: dict[str, int],
+        *,
+        max_frames: int,
+        send_timeout: float,
+        overflow: str,
+    ) -> None:
+        self.ws = ws
+        self.closed = False
+        self._counters = counters
+        self._send_timeout = send_timeout
+        self._overflow = overflow
+        self._queue: asyncio.Queue[str | bytes] = asyncio.Queue(maxsize=max(1, max_frames))
+        self._writer = asyncio.create_task(self._drain())
+        self._closing: asyncio.Task | None = None
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def send(self, frame: str | bytes) -> bool:
+        """Queue *frame*; False when the socket is closed or was just closed."""
+        if self.closed:
+            return False
+        if self._queue.full():
+            if self._overflow == "drop_oldest":
+                self._queue.get_nowait()
+                self._counters["frames_dropped"] += 1
+            else:
+                self._counters["overflow_closes"] += 1
+                self._counters["frames_dropped"] += self._queue.qsize() + 1
+                self._abort("outbound queue full")
+                return False
+        self._queue.put_nowait(frame)
+        self._counters["frames_enqueued"] += 1
+        self._counters["bytes_enqueued"] += len(frame)
+        return True
+
+    def cancel(self) -> None:
+        """Stop the writer and discard queued frames (socket already gone)."""
+        self.closed = True
+        if not self._writer.done():
+            self._writer.cancel()
+
+    async def _drain(self) -> None:
+        while True:
+            frame = await self._queue.get()
+            try:
+                send = self.ws.send_bytes if isinstance(frame, bytes) else self.ws.send_text
+                await asyncio.wait_for(send(frame), self._send_timeout)
+            except asyncio.TimeoutError:
+                self._counters["send_timeouts"] += 1
+                self._counters["frames_dropped"] += self._queue.qsize() + 1
+                await self._close(f"send exceeded {self._send_timeout:.0f}s")
+                return
+            except Exception:
+                # Socket already closed by the peer; its receive loop cleans up.
+                self._counters["send_errors"] += 1
+                self.closed = True
+                return
+            self._counters["frames_sent"] += 1
+
+    def _abort(self, reason: str) -> None:
+        self.closed = True
+        if not self._writer.done():
+            self._writer.cancel()
+        self._closing = asyncio.create_task(self._close(reason))
+
+    async def _close(self, reason: str) -> None:
+        self.closed = True
+        logger.info("Closing slow WebSocket consumer: %s", reason)
+        try:
+            await asyncio.wait_for(
+                self.ws.close(code=SLOW_CONSUMER_CLOSE_CODE, reason=reason), _CLOSE_TIMEOUT,
+            )
+        except Exception:
+            pass
+
+
+class OutboxHub:
+    """Process-wide WebSocket → SocketOutbox map with shared counters."""
+
+    def __init__(
+        self,
+        *,
+        max_frames: int = _QUEUE_MAX,
+        send_timeout: float = _SEND_TIMEOUT,
+        overflow: str = _OVERFLOW,
+    ) -> None:
+        if overflow not in ("close", "drop_oldest"):
+            logger.warning("Unknown LIVE_WS_OVERFLOW=%r — using 'close'", overflow)
+            overflow = "close"
+        self._max_frames = max_frames
+        self._send_timeout = send_timeout
+        self._overflow = overflow
+        self._outboxes: dict[WebSocket, SocketOutbox] = {}
+        self._counters = {
+            "frames_enqueued": 0,
+            "bytes_enqueued":  0,
+            "frames_sent":     0,
+            "frames_dropped":  0,
+            "overflow_closes": 0,
+            "send_timeouts":   0,
+            "send_errors":     0,
+        }
+
+    def open(self, ws: WebSocket) -> SocketOutbox:
+        """Attach an outbox to an accepted socket (idempotent)."""
+        outbox = self._outboxes.get(ws)
+        if outbox is None:
+            outbox = SocketOutbox(
+                ws, self._counters,
+                max_frames=self._max_frames,
+                send_timeout=self._send_timeout,
+                overflow=self._overflow,
+            )
+            self._outboxes[ws] = outbox
+        return outbox
+
+    def close(self, ws: WebSocket) -> None:
+        """Detach *ws*; queued frames are discarded."""
+        outbox = self._outboxes.pop(ws, None)
+        if outbox is not None:
+            outbox.cancel()
+
+    def send(self, ws: WebSocket, frame: str | bytes) -> bool:
+        """Queue one serialised frame for *ws*; False if *ws* has no open outbox."""
+        outbox = self._outboxes.get(ws)
+        return outbox is not None and outbox.send(frame)
+
+    def broadcast(
+        self,
+        sockets: Iterable[WebSocket],
+        frame: str | bytes,
+        exclude: WebSocket | None = None,
+    ) -> int:
+        """Queue the same serialised *frame* for every socket; returns how many took it."""
+        queued = 0
+        for ws in sockets:
+            if ws is not exclude and self.send(ws, frame):
+                queued += 1
+        return queued
+
+    def stats(self) -> dict[str, Any]:
+        depths = [o.depth for o in self._outboxes.values()]
+        return {
+            **self._counters,
+            "sockets":         len(depths),
+            "queued_frames":   sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "overflow_policy": self._overflow,
+        }
+
+
+outbox_hub = OutboxHub()
@@ -18,6 +18,7 @@ from .live_session import LiveSession
 from .homework_submission import UnitHomeworkSubmission, HomeworkSubmissionStatus
 from .teacher_payment import TeacherPayment, TeacherPaymentStatus
 from .teacher_ai_usage import TeacherAIUsage
+from .llm_call_telemetry import LLMCallTelemetry
 
 __all__ = [
     "User",
@@ -54,4 +55,5 @@ __all__ = [
     "TeacherPayment",
     "TeacherPaymentStatus",
     "TeacherAIUsage",
+    "LLMCallTelemetry",
 ]
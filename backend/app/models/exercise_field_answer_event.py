@@ -24,6 +24,20 @@ Migration note:
         ADD COLUMN segment_id INTEGER REFERENCES segments(id) ON DELETE SET NULL;
     CREATE INDEX ix_efae_unit    ON exercise_field_answer_events (classroom_id, student_id, unit_id);
     CREATE INDEX ix_efae_segment ON exercise_field_answer_events (classroom_id, student_id, segment_id);
+
+Partitioning (alembic 0025):
+    On PostgreSQL the migration rebuilds the table range-partitioned by
+    created_at into monthly partitions ``exercise_field_answer_events_YYYYMM``
+    plus a default partition, with primary key (id, created_at).  The model
+    keeps the key on ``id`` alone (ids come from one sequence, so they stay
+    unique) so ``create_all`` still works on SQLite and other scratch
+    databases; those get a plain table.  Partitions are created ahead of
+    time, compacted and expired by app/services/answer_event_maintenance.py.
+
+    Reads go to latest_exercise_answers.  The secondary indexes left are
+    ix_efae_field for compaction and one per foreign key that cascades
+    (student_id, unit_id, segment_id), so deleting a user, unit or segment
+    does not scan every partition; classroom_id is covered by ix_efae_field.
 """
 
 from __future__ import annotations
@@ -38,16 +52,17 @@ from app.core.database import Base
 class ExerciseFieldAnswerEvent(Base):
     __tablename__ = "exercise_field_answer_events"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # Partitioned tables key on (id, created_at) — see the module docstring.
+    id = Column(Integer, primary_key=True)
 
     # Scope
-    classroom_id = Column(Integer, ForeignKey("courses.id",   ondelete="CASCADE"),  nullable=False, index=True)
-    student_id   = Column(Integer, ForeignKey("users.id",     ondelete="CASCADE"),  nullable=False, index=True)
+    classroom_id = Column(Integer, ForeignKey("courses.id",   ondelete="CASCADE"),  nullable=False)
+    student_id   = Column(Integer, ForeignKey("users.id",     ondelete="CASCADE"),  nullable=False)
 
     # Lesson context — which unit + segment the block lived in when answered.
     # Nullable so rows written before this column existed remain valid.
-    unit_id    = Column(Integer, ForeignKey("units.id",    ondelete="SET NULL"), nullable=True,  index=True)
-    segment_id = Column(Integer, ForeignKey("segments.id", ondelete="SET NULL"), nullable=True,  index=True)
+    unit_id    = Column(Integer, ForeignKey("units.id",    ondelete="SET NULL"), nullable=True)
+    segment_id = Column(Integer, ForeignKey("segments.id", ondelete="SET NULL"), nullable=True)
 
     # Exercise field identity
     exercise_key = Column(String, nullable=False)   # "ex/{blockId}/{fieldKey}"
@@ -65,13 +80,12 @@ class ExerciseFieldAnswerEvent(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     __table_args__ = (
-        # Composite indexes for the most common query patterns
-        Index("ix_efae_classroom_student",  "classroom_id", "student_id"),
-        Index("ix_efae_classroom_block",    "classroom_id", "block_id"),
-        Index("ix_efae_student_block",      "student_id",   "block_id"),
-        # Unit / segment scoping — used by the REST restore endpoint
-        Index("ix_efae_unit",    "classroom_id", "student_id", "unit_id"),
-        Index("ix_efae_segment", "classroom_id", "student_id", "segment_id"),
+        # Compaction: superseded rows per field, joined to latest_exercise_answers.
+        Index("ix_efae_field", "classroom_id", "student_id", "block_id", "field_key", "created_at"),
+        # ON DELETE CASCADE / SET NULL lookups from users, units and segments
+        Index("ix_efae_student_id", "student_id"),
+        Index("ix_efae_unit_id",    "unit_id"),
+        Index("ix_efae_segment_id", "segment_id"),
     )
 
     def __repr__(self) -> str:
@@ -0,0 +1,64 @@
+"""
+app/models/latest_exercise_answer.py
+====================================
+Current value of every exercise field, one row per
+(classroom_id, student_id, block_id, field_key).
+
+``exercise_field_answer_events`` is the append-only history; this table is its
+materialised "latest row wins" view.  It is maintained by upsert in the same
+transaction as every event insert (see app/services/latest_exercise_answers.py),
+so live hydration and the restore endpoint read it by primary key instead of
+running DISTINCT ON over every event a classroom has ever produced.
+
+Clears are stored as null sentinels: ``value`` is SQL NULL and the row stays,
+so a later out-of-order write with an older ``updated_at`` cannot resurrect
+the cleared answer.  Readers filter ``value IS NOT NULL``.
+
+Scope columns (unit_id, segment_id) are those of the latest write, which is
+what the old query filtered on after picking the latest event.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.core.database import Base
+
+
+class LatestExerciseAnswer(Base):
+    __tablename__ = "latest_exercise_answers"
+
+    # Identity — one row per field per student
+    classroom_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True)
+    student_id   = Column(Integer, ForeignKey("users.id",   ondelete="CASCADE"), primary_key=True)
+    block_id     = Column(String, primary_key=True)
+    field_key    = Column(String, primary_key=True)
+    exercise_key = Column(String, nullable=False)   # "ex/{blockId}/{fieldKey}"
+
+    # Scope of the latest write
+    unit_id    = Column(Integer, ForeignKey("units.id",    ondelete="SET NULL"), nullable=True)
+    segment_id = Column(Integer, ForeignKey("segments.id", ondelete="SET NULL"), nullable=True)
+
+    # Payload — SQL NULL marks a cleared field
+    value      = Column(JSONB(none_as_null=True), nullable=True)
+    is_correct = Column(Boolean, nullable=True)
+
+    written_by_teacher = Column(Boolean, nullable=False, default=False)
+
+    # created_at of the event this row reflects; upserts only move it forward
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        # Teacher "all students" restore filtered by unit / segment
+        Index("ix_lea_classroom_unit",    "classroom_id", "unit_id"),
+        Index("ix_lea_classroom_segment", "classroom_id", "segment_id"),
+        # Clear endpoint — students with fields in one block
+        Index("ix_lea_classroom_block",   "classroom_id", "block_id"),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<LatestExerciseAnswer classroom={self.classroom_id} "
+            f"student={self.student_id} key={self.exercise_key!r}>"
+        )
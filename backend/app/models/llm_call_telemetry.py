@@ -0,0 +1,50 @@
+"""
+ORM rows for per-call LLM telemetry (latency, tokens and cost per phase).
+
+Rows are buffered in memory by app.services.ai.providers.telemetry and written
+here in batches; GET /admin/ai/telemetry reads them back as p50/p95 per phase.
+"""
+
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class LLMCallTelemetry(Base):
+    """One provider call (generate, agenerate or a whole stream)."""
+
+    __tablename__ = "llm_call_telemetry"
+    __table_args__ = (
+        Index("ix_llm_call_telemetry_phase_created", "phase", "created_at"),
+    )
+
+    # Surrogate primary key for ORM identity.
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # When the call finished (set by the collector, not at flush time).
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    # Teacher whose request issued the call; NULL for background / health probes.
+    teacher_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    # Normalised tariff plan at call time (free / standard / pro).
+    plan = Column(String(32), nullable=True)
+    # Pipeline phase slug (e.g. unit.plan, unit.segment_text, exercise.match_pairs).
+    phase = Column(String(64), nullable=False, server_default="unknown")
+    # Backend name as used by the rate limiter ("deepseek", "groq", …).
+    backend = Column(String(32), nullable=False)
+    # Model id reported by the provider instance.
+    model = Column(String(128), nullable=True)
+    # "generate" or "stream".
+    mode = Column(String(16), nullable=False, server_default="generate")
+    # False when the provider raised.
+    ok = Column(Boolean, nullable=False, server_default="true")
+    # Truncated provider error message when ok is False.
+    error = Column(String(255), nullable=True)
+    # Wall-clock duration of the provider call in milliseconds.
+    latency_ms = Column(Integer, nullable=False)
+    # Token usage; reported by the backend when available, else estimated.
+    prompt_tokens = Column(Integer, nullable=False, server_default="0")
+    completion_tokens = Column(Integer, nullable=False, server_default="0")
+    # True when the token counts are the ~4 chars/token estimate.
+    tokens_estimated = Column(Boolean, nullable=False, server_default="false")
+    # Estimated spend in USD from the per-backend price table.
+    cost_usd = Column(Float, nullable=False, server_default="0")
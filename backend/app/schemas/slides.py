@@ -124,7 +124,7 @@ class Slide(BaseModel):
     )
     image: Optional[str] = Field(
         default=None,
-        description="Data URI string (e.g. 'data:image/svg+xml,...') populated after image generation.",
+        description="Image URL populated after image generation (a data URI for placeholders or when uploads are off).",
     )
 
     @field_validator("bullet_points")
@@ -165,6 +165,18 @@ class ImageProvider(ABC):
             self.generate_image, prompt, alt_text, style, width, height
         )
 
+    def render_slide_template(
+        self,
+        title:         str,
+        bullet_points: list[str],
+        alt_text:      str = "",
+    ) -> Optional[ImageResult]:
+        """
+        Deterministic local rendering for a slide, or None to use the
+        provider's normal generation.  Only SVGImageProvider overrides this.
+        """
+        return None
+
     # ── dunder ────────────────────────────────────────────────────────────────
 
     def __repr__(self) -> str:
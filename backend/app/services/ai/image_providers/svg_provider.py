@@ -20,11 +20,23 @@ This preserves full backward compatibility with existing tests.
 
 The same pattern applies to HuggingFaceImageProvider — see
 huggingface_provider.py for an identical integration.
+
+Template fast path
+------------------
+Slide callers first try render_slide_template(title, bullets): slides that
+match a template in app/services/slide_svg_templates.py (vocabulary grid,
+conjugation table, timeline, comparison, dialogue) are rendered locally in
+milliseconds and deterministically; only the rest reach the LLM.
+
+Environment variables
+---------------------
+SLIDE_SVG_TEMPLATES  "false" disables the template fast path (default true).
 """
 
 from __future__ import annotations
 
 import logging
+import os
 import re
 from typing import Optional
 
@@ -35,9 +47,13 @@ from app.services.ai.image_providers.image_base import (
     ImageResult,
 )
 from app.services.ai.providers.base import AIProvider, AIProviderError
+from app.services.ai.providers.telemetry import llm_context
+from app.services.slide_svg_templates import render_slide_svg
 
 logger = logging.getLogger(__name__)
 
+_TEMPLATES_ON = os.environ.get("SLIDE_SVG_TEMPLATES", "true").strip().lower() != "false"
+
 # ── Prompt ────────────────────────────────────────────────────────────────────
 
 _SYSTEM_PROMPT = """\
@@ -233,6 +249,28 @@ class SVGImageProvider(ImageProvider):
 
         return result
 
+    def render_slide_template(
+        self,
+        title:         str,
+        bullet_points: list[str],
+        alt_text:      str = "",
+    ) -> Optional[ImageResult]:
+        """Render the slide from a local template; None when none matches."""
+        if not _TEMPLATES_ON:
+            return None
+        rendered = render_slide_svg(title, bullet_points)
+        if rendered is None:
+            return None
+        intent, svg = rendered
+        logger.debug("SVG template %r rendered — chars=%d title=%r", intent, len(svg), title[:40])
+        return ImageResult(
+            data        = svg,
+            format      = ImageFormat.SVG,
+            alt_text    = alt_text or title,
+            source      = f"{repr(self)}/template:{intent}",
+            prompt_used = f"template:{intent}",
+        )
+
     # ── Internal generation ────────────────────────────────────────────────────
 
     def _generate_with_retry(
@@ -246,7 +284,8 @@ class SVGImageProvider(ImageProvider):
             if attempt > 0:
                 logger.warning("SVG retry %d/%d — prompt=%r…", attempt, self._max_retries, prompt[:40])
             try:
-                raw = self._provider.generate(full_prompt)
+                with llm_context(phase="image.svg"):
+                    raw = self._provider.generate(full_prompt)
                 svg = self._extract_and_validate(raw)
                 logger.info("SVG generated — chars=%d provider=%r", len(svg), self._provider)
                 return self._make_result(svg, prompt, alt_text or title)
@@ -268,7 +307,8 @@ class SVGImageProvider(ImageProvider):
             if attempt > 0:
                 logger.warning("SVG async retry %d/%d", attempt, self._max_retries)
             try:
-                raw = await self._provider.agenerate(full_prompt)
+                with llm_context(phase="image.svg"):
+                    raw = await self._provider.agenerate(full_prompt)
                 svg = self._extract_and_validate(raw)
                 return self._make_result(svg, prompt, alt_text or title)
             except (AIProviderError, ImageProviderError) as exc:
@@ -317,7 +357,8 @@ class SVGImageProvider(ImageProvider):
             if attempt > 0:
                 logger.warning("SVG vocab card retry %d/%d", attempt, self._max_retries)
             try:
-                raw = await self._provider.agenerate(full_prompt)
+                with llm_context(phase="image.vocab_card"):
+                    raw = await self._provider.agenerate(full_prompt)
                 svg = self._extract_and_validate(raw)
                 logger.info(
                     "SVG vocab card generated — chars=%d provider=%r",
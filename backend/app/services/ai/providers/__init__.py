@@ -8,6 +8,11 @@ from .anthropic_provider import AnthropicProvider
 from .deepseek_provider import DeepSeekProvider
 from app.services.ai.providers.router import get_provider_for_plan
 from app.services.ai.providers.groq_provider import GroqProvider
+from app.services.ai.providers.rate_limiter import (
+    RateLimitedProvider,
+    admission_priority,
+    priority_for_plan,
+)
 
 
 __all__ = [
@@ -19,4 +24,7 @@ __all__ = [
     "DeepSeekProvider",
     "get_provider_for_plan",
     "GroqProvider",
+    "RateLimitedProvider",
+    "admission_priority",
+    "priority_for_plan",
 ]
@@ -0,0 +1,556 @@
+"""
+app/services/ai/providers/circuit_breaker.py
+
+Per-backend circuit breaker + health-aware routing for LLM calls.
+
+ai_health.py can probe Groq and DeepSeek, but routing never used that
+information: a backend that had been timing out for minutes still received
+every request first and burned its full timeout each time before the fallback
+chain moved on.  A circuit breaker remembers recent outcomes per backend and
+short-circuits calls while the backend looks unhealthy.
+
+States
+------
+  closed     normal operation; outcomes are recorded in a rolling window of
+             the last ``window`` calls.  The circuit opens when, with at least
+             ``min_calls`` samples,
+               • the error rate reaches ``error_rate``, or
+               • the share of calls slower than ``slow_call_seconds`` reaches
+                 ``slow_call_rate``.
+  open       calls fail immediately with ``CircuitOpenError`` (an
+             AIProviderError, so existing fallback chains move on at once).
+             After ``open_seconds`` the circuit becomes eligible for a trial.
+  half_open  exactly one trial call is let through — either a real request or
+             the background probe.  Success closes the circuit, failure
+             re-opens it for another ``open_seconds``.
+
+Routing
+-------
+``get_provider_for_plan`` asks ``healthy_backend()`` which backend to build,
+so a plan mapped to an open backend is routed to the alternate one for as long
+as the circuit stays open.  The DeepSeek→Groq exercise chain and the hedged
+provider check ``is_available()`` and skip an open primary without waiting.
+
+Background probes
+-----------------
+``start_probe_task()`` (called from main.py on startup) wakes every
+``probe_interval`` seconds and, for every open circuit whose cool-down has
+elapsed, sends the same one-word prompt as the AI health endpoint.  Idle
+backends therefore recover without sacrificing a real teacher request.
+
+Outcomes that do not say anything about backend health — admission-queue
+rejections from the local rate limiter — are ignored.  Latency is measured
+from the moment the rate limiter admits the call (time spent queued locally is
+excluded) and, for streams, up to the first chunk.
+
+Environment variables
+---------------------
+AI_CIRCUIT_ENABLED           default: "true"
+AI_CIRCUIT_WINDOW            default: 20    calls kept in the rolling window
+AI_CIRCUIT_MIN_CALLS         default: 5     samples before the circuit may open
+AI_CIRCUIT_ERROR_RATE        default: 0.5
+AI_CIRCUIT_SLOW_CALL_SECONDS default: 45
+AI_CIRCUIT_SLOW_CALL_RATE    default: 0.8
+AI_CIRCUIT_OPEN_SECONDS      default: 30    cool-down before a half-open trial
+AI_CIRCUIT_PROBE_INTERVAL    default: 15    seconds between probe sweeps
+
+Usage
+-----
+    provider = with_circuit_breaker(with_rate_limit(GroqProvider(), "groq"), "groq")
+    circuit_breaker_states()   # → {"groq": {"state": "closed", ...}, ...}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Iterator
+
+from app.services.ai.providers.base import AIProvider, AIProviderError
+from app.services.ai.providers.rate_limiter import AdmissionRejected, upstream_started
+
+logger = logging.getLogger(__name__)
+
+# ── configuration ─────────────────────────────────────────────────────────────
+
+_ENABLED           = os.environ.get("AI_CIRCUIT_ENABLED", "true").strip().lower() != "false"
+_WINDOW            = int(os.environ.get("AI_CIRCUIT_WINDOW", "20"))
+_MIN_CALLS         = int(os.environ.get("AI_CIRCUIT_MIN_CALLS", "5"))
+_ERROR_RATE        = float(os.environ.get("AI_CIRCUIT_ERROR_RATE", "0.5"))
+_SLOW_CALL_SECONDS = float(os.environ.get("AI_CIRCUIT_SLOW_CALL_SECONDS", "45"))
+_SLOW_CALL_RATE    = float(os.environ.get("AI_CIRCUIT_SLOW_CALL_RATE", "0.8"))
+_OPEN_SECONDS      = float(os.environ.get("AI_CIRCUIT_OPEN_SECONDS", "30"))
+_PROBE_INTERVAL    = float(os.environ.get("AI_CIRCUIT_PROBE_INTERVAL", "15"))
+
+# Same minimal prompt / timeout as the AI health endpoint.
+_PROBE_PROMPT  = "Reply with the single word: ok"
+_PROBE_TIMEOUT = 10.0
+
+# Backends that can stand in for each other in plan routing.
+_ALTERNATES: dict[str, tuple[str, ...]] = {
+    "deepseek": ("groq",),
+    "groq":     ("deepseek",),
+}
+_BACKEND_KEYS: dict[str, str] = {
+    "deepseek": "DEEPSEEK_API_KEY",
+    "groq":     "GROQ_API_KEY",
+}
+
+CLOSED    = "closed"
+OPEN      = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(AIProviderError):
+    """Raised instead of calling a backend whose circuit is open."""
+
+
+# ── breaker ───────────────────────────────────────────────────────────────────
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker for one backend.
+
+    Callers use ``allow_request()`` before a call and ``record_success`` /
+    ``record_failure`` afterwards.  ``is_available()`` is the side-effect-free
+    variant used for routing decisions.
+    """
+
+    def __init__(
+        self,
+        backend: str,
+        window: int = _WINDOW,
+        min_calls: int = _MIN_CALLS,
+        error_rate: float = _ERROR_RATE,
+        slow_call_seconds: float = _SLOW_CALL_SECONDS,
+        slow_call_rate: float = _SLOW_CALL_RATE,
+        open_seconds: float = _OPEN_SECONDS,
+    ) -> None:
+        self.backend           = backend
+        self.min_calls         = min_calls
+        self.error_rate        = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate    = slow_call_rate
+        self.open_seconds      = open_seconds
+
+        self._lock = threading.Lock()
+        # (ok, latency_seconds) of the most recent calls while closed.
+        self._outcomes: deque[tuple[bool, float]] = deque(maxlen=window)
+        self._state           = CLOSED
+        self._opened_at       = 0.0
+        self._trial_in_flight = False
+        self._last_error      = ""
+
+        # ── monitoring counters ───────────────────────────────────────────────
+        self._opens    = 0
+        self._rejected = 0
+
+    # ── state machine (call with self._lock held) ─────────────────────────────
+
+    def _cooled_down(self, now: float) -> bool:
+        return now - self._opened_at >= self.open_seconds
+
+    def _open(self, now: float, reason: str) -> None:
+        self._state           = OPEN
+        self._opened_at       = now
+        self._trial_in_flight = False
+        self._opens          += 1
+        logger.warning(
+            "CircuitBreaker[%s]: OPEN for %.0fs (%s)",
+            self.backend, self.open_seconds, reason,
+        )
+
+    def _close(self) -> None:
+        self._state           = CLOSED
+        self._trial_in_flight = False
+        self._outcomes.clear()
+        logger.info("CircuitBreaker[%s]: CLOSED — backend healthy again", self.backend)
+
+    def _rates(self) -> tuple[float, float]:
+        n = len(self._outcomes)
+        if not n:
+            return 0.0, 0.0
+        errors = sum(1 for ok, _ in self._outcomes if not ok)
+        slow   = sum(1 for _, secs in self._outcomes if secs >= self.slow_call_seconds)
+        return errors / n, slow / n
+
+    def _evaluate(self, now: float) -> None:
+        if len(self._outcomes) < self.min_calls:
+            return
+        err_rate, slow_rate = self._rates()
+        if err_rate >= self.error_rate:
+            self._open(now, f"error rate {err_rate:.0%} over {len(self._outcomes)} calls")
+        elif slow_rate >= self.slow_call_rate:
+            self._open(
+                now,
+                f"{slow_rate:.0%} of calls slower than {self.slow_call_seconds:.0f}s",
+            )
+
+    # ── public API ────────────────────────────────────────────────────────────
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def is_available(self) -> bool:
+        """True if a call would currently be let through (no side effects)."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._trial_in_flight:
+                return False
+            return self._state == HALF_OPEN or self._cooled_down(time.monotonic())
+
+    def allow_request(self) -> bool:
+        """
+        Decide whether a call may proceed.  In half-open state the first
+        caller claims the single trial slot; everybody else is rejected until
+        the trial reports back.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self._state == OPEN and self._cooled_down(now):
+                self._state = HALF_OPEN
+                logger.info("CircuitBreaker[%s]: HALF_OPEN — allowing one trial call", self.backend)
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def release_trial(self) -> None:
+        """Give the trial slot back when a trial call ended without an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._close()
+            elif self._state == CLOSED:
+                self._outcomes.append((True, latency))
+                self._evaluate(time.monotonic())
+            # OPEN: a straggler that started before the circuit opened — ignore.
+
+    def record_failure(self, latency: float, error: BaseException | str = "") -> None:
+        with self._lock:
+            self._last_error = str(error)[:200]
+            now = time.monotonic()
+            if self._state == HALF_OPEN:
+                self._open(now, "half-open trial failed")
+            elif self._state == CLOSED:
+                self._outcomes.append((False, latency))
+                self._evaluate(now)
+
+    def mark_healthy(self) -> None:
+        """Close the circuit on out-of-band evidence (a successful health probe)."""
+        with self._lock:
+            if self._state != CLOSED:
+                self._close()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state           = CLOSED
+            self._trial_in_flight = False
+            self._outcomes.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Monitoring view: state, rolling error/slow rates, open counters."""
+        with self._lock:
+            err_rate, slow_rate = self._rates()
+            now = time.monotonic()
+            retry_in = 0.0
+            if self._state == OPEN:
+                retry_in = max(0.0, self.open_seconds - (now - self._opened_at))
+            return {
+                "state":            self._state,
+                "window_calls":     len(self._outcomes),
+                "error_rate":       round(err_rate, 3),
+                "slow_call_rate":   round(slow_rate, 3),
+                "retry_in_s":       round(retry_in, 1),
+                "opens":            self._opens,
+                "rejected":         self._rejected,
+                "last_error":       self._last_error,
+            }
+
+    def __repr__(self) -> str:
+        return f"<CircuitBreaker backend={self.backend!r} state={self.state!r}>"
+
+
+# ── registry ──────────────────────────────────────────────────────────────────
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(backend: str) -> CircuitBreaker | None:
+    """
+    Return the process-wide breaker for *backend*, or None when circuit
+    breaking is disabled (AI_CIRCUIT_ENABLED=false).
+    """
+    if not _ENABLED:
+        return None
+    name = backend.strip().lower()
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name)
+            _breakers[name] = breaker
+        return breaker
+
+
+def circuit_breaker_states() -> dict[str, dict[str, Any]]:
+    """Snapshot of every breaker created so far, keyed by backend name."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.backend: b.snapshot() for b in breakers}
+
+
+def backend_available(backend: str) -> bool:
+    """True unless *backend* has an open circuit."""
+    breaker = get_circuit_breaker(backend)
+    return breaker is None or breaker.is_available()
+
+
+def is_available(provider: AIProvider) -> bool:
+    """True unless *provider* is a CircuitBreakerProvider with an open circuit."""
+    return provider.is_available() if isinstance(provider, CircuitBreakerProvider) else True
+
+
+def healthy_backend(preferred: str) -> str:
+    """
+    Return *preferred* unless its circuit is open and a configured alternate
+    backend is available — then return the alternate.  When every candidate
+    is open the preferred backend is kept (its calls will fail fast).
+    """
+    if backend_available(preferred):
+        return preferred
+    for alternate in _ALTERNATES.get(preferred, ()):
+        key_var = _BACKEND_KEYS.get(alternate)
+        if key_var and not (os.environ.get(key_var) or "").strip():
+            continue
+        if backend_available(alternate):
+            logger.warning(
+                "CircuitBreaker: %s circuit open — routing to %s instead",
+                preferred, alternate,
+            )
+            return alternate
+    return preferred
+
+
+def record_probe_result(backend: str, ok: bool, latency: float, error: str = "") -> None:
+    """
+    Feed an externally run health probe (e.g. GET /admin/ai/health) into the
+    breaker.  A successful probe closes an open circuit; a failed one only
+    counts as a regular failed call.
+    """
+    breaker = get_circuit_breaker(backend)
+    if breaker is None:
+        return
+    if ok:
+        breaker.mark_healthy()
+        breaker.record_success(latency)
+    else:
+        breaker.record_failure(latency, error)
+
+
+def with_circuit_breaker(provider: AIProvider, backend: str) -> AIProvider:
+    """Wrap *provider* in a CircuitBreakerProvider unless breaking is disabled."""
+    breaker = get_circuit_breaker(backend)
+    if breaker is None:
+        return provider
+    return CircuitBreakerProvider(provider, breaker)
+
+
+# ── provider wrapper ──────────────────────────────────────────────────────────
+
+class CircuitBreakerProvider(AIProvider):
+    """
+    AIProvider wrapper that records call outcomes in a CircuitBreaker and
+    raises ``CircuitOpenError`` without calling *inner* while it is open.
+
+    Wrap it *outside* the RateLimitedProvider so a short-circuited call never
+    waits in the admission queue.  Unknown attributes are forwarded to
+    *inner*, like RateLimitedProvider does.
+    """
+
+    def __init__(self, inner: AIProvider, breaker: CircuitBreaker) -> None:
+        self._inner   = inner
+        self._breaker = breaker
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._inner, name)
+
+    def is_available(self) -> bool:
+        return self._breaker.is_available()
+
+    def _admit(self) -> float:
+        if not self._breaker.allow_request():
+            raise CircuitOpenError(
+                f"{self._breaker.backend} circuit open — backend recently failing, call skipped"
+            )
+        return time.monotonic()
+
+    @staticmethod
+    def _latency(started: float) -> float:
+        # Time in the local admission queue says nothing about the backend.
+        return time.monotonic() - upstream_started(started)
+
+    def _on_error(self, exc: AIProviderError, latency: float) -> None:
+        if isinstance(exc, (AdmissionRejected, CircuitOpenError)):
+            self._breaker.release_trial()
+            return
+        self._breaker.record_failure(latency, exc)
+
+    # ── AIProvider ────────────────────────────────────────────────────────────
+
+    def generate(self, prompt: str) -> str:
+        started = self._admit()
+        try:
+            out = self._inner.generate(prompt)
+        except AIProviderError as exc:
+            self._on_error(exc, self._latency(started))
+            raise
+        except BaseException:
+            self._breaker.release_trial()
+            raise
+        self._breaker.record_success(self._latency(started))
+        return out
+
+    async def agenerate(self, prompt: str) -> str:
+        started = self._admit()
+        try:
+            out = await self._inner.agenerate(prompt)
+        except AIProviderError as exc:
+            self._on_error(exc, self._latency(started))
+            raise
+        except BaseException:
+            # Cancelled (e.g. the losing side of a hedge) — no verdict.
+            self._breaker.release_trial()
+            raise
+        self._breaker.record_success(self._latency(started))
+        return out
+
+    # ── streaming (outcome recorded once per stream) ──────────────────────────
+    # Latency is the time to the first chunk: how long the caller takes to
+    # read the rest of the stream is not the backend's doing.
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        started = self._admit()
+        first_chunk: float | None = None
+        try:
+            if hasattr(self._inner, "generate_stream"):
+                for tok in self._inner.generate_stream(prompt):
+                    if first_chunk is None:
+                        first_chunk = self._latency(started)
+                    yield tok
+            else:
+                out = self._inner.generate(prompt)
+                first_chunk = self._latency(started)
+                yield out
+        except AIProviderError as exc:
+            self._on_error(exc, self._latency(started) if first_chunk is None else first_chunk)
+            raise
+        except BaseException:
+            self._breaker.release_trial()
+            raise
+        self._breaker.record_success(self._latency(started) if first_chunk is None else first_chunk)
+
+    async def agenerate_stream(self, prompt: str) -> AsyncIterator[str]:
+        started = self._admit()
+        first_chunk: float | None = None
+        try:
+            if hasattr(self._inner, "agenerate_stream"):
+                async for tok in self._inner.agenerate_stream(prompt):
+                    if first_chunk is None:
+                        first_chunk = self._latency(started)
+                    yield tok
+            else:
+                out = await self._inner.agenerate(prompt)
+                first_chunk = self._latency(started)
+                yield out
+        except AIProviderError as exc:
+            self._on_error(exc, self._latency(started) if first_chunk is None else first_chunk)
+            raise
+        except BaseException:
+            self._breaker.release_trial()
+            raise
+        self._breaker.record_success(self._latency(started) if first_chunk is None else first_chunk)
+
+    def __repr__(self) -> str:
+        return f"<CircuitBreakerProvider inner={self._inner!r} backend={self._breaker.backend!r}>"
+
+
+# ── background half-open probes ───────────────────────────────────────────────
+
+def _build_probe_provider(backend: str) -> AIProvider | None:
+    if backend == "groq":
+        from app.services.ai.providers.groq_provider import GroqProvider
+        return GroqProvider(timeout=_PROBE_TIMEOUT, max_tokens=16)
+    if backend == "deepseek":
+        from app.services.ai.providers.deepseek_provider import DeepSeekProvider
+        return DeepSeekProvider(timeout=_PROBE_TIMEOUT, max_tokens=16)
+    return None
+
+
+async def probe_backend(breaker: CircuitBreaker) -> None:
+    """
+    Run one half-open trial for *breaker* if it is due.  The probe goes
+    straight to the backend (no rate limiter, no breaker wrapper).
+    """
+    if breaker.state == CLOSED or not breaker.is_available():
+        return
+    try:
+        provider = _build_probe_provider(breaker.backend)
+    except AIProviderError as exc:
+        logger.debug("CircuitBreaker[%s]: probe skipped (%s)", breaker.backend, exc)
+        return
+    if provider is None or not breaker.allow_request():
+        return
+    started = time.monotonic()
+    try:
+        await provider.agenerate(_PROBE_PROMPT)
+    except asyncio.CancelledError:
+        breaker.release_trial()
+        raise
+    except Exception as exc:
+        breaker.record_failure(time.monotonic() - started, exc)
+        logger.info("CircuitBreaker[%s]: probe failed (%s)", breaker.backend, exc)
+        return
+    breaker.record_success(time.monotonic() - started)
+
+
+async def _probe_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        with _breakers_lock:
+            breakers = list(_breakers.values())
+        for breaker in breakers:
+            try:
+                await probe_backend(breaker)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("CircuitBreaker[%s]: probe crashed", breaker.backend)
+
+
+_probe_task: asyncio.Task | None = None
+
+
+def start_probe_task(interval_seconds: float = _PROBE_INTERVAL) -> None:
+    """Start the background half-open probe loop (idempotent)."""
+    global _probe_task
+    if not _ENABLED:
+        return
+    if _probe_task is None or _probe_task.done():
+        _probe_task = asyncio.create_task(_probe_loop(interval_seconds))
+        logger.info("CircuitBreaker: probe task started (every %.0fs)", interval_seconds)
@@ -29,13 +29,15 @@ deepseek-reasoner  ← chain-of-thought reasoning model (slower, more thorough)
 
 from __future__ import annotations
 
+import json
 import logging
 import os
-from typing import Any
+from typing import Any, AsyncIterator, Iterator
 
 import httpx
 
 from app.services.ai.providers.base import AIProvider, AIProviderError
+from app.services.ai.providers.telemetry import report_usage
 
 logger = logging.getLogger(__name__)
 
@@ -131,13 +133,13 @@ class DeepSeekProvider(AIProvider):
         combined = f"{system_prompt or ''} {prompt}"
         return "json" in combined.lower()
 
-    def _build_payload(self, prompt: str) -> dict[str, Any]:
+    def _build_payload(self, prompt: str, *, stream: bool = False) -> dict[str, Any]:
         payload: dict[str, Any] = {
             "model":       self.model,
             "messages":    self._build_messages(prompt),
             "temperature": self.temperature,
             "max_tokens":  self.max_tokens,
-            "stream":      False,
+            "stream":      stream,
         }
         # DeepSeek rejects json_object unless the prompt mentions "json" somewhere.
         if self.json_mode and self._prompt_requests_json(prompt, self.system_prompt):
@@ -201,6 +203,7 @@ class DeepSeekProvider(AIProvider):
             data.get("model"),
             data.get("usage", {}).get("total_tokens", "?"),
         )
+        report_usage(data.get("usage"))
         return data["choices"][0]["message"]["content"]
 
     # ── AIProvider: async ─────────────────────────────────────────────────────
@@ -217,6 +220,102 @@ class DeepSeekProvider(AIProvider):
         import asyncio
         return await asyncio.to_thread(self.generate, prompt)
 
+    # ── Streaming ─────────────────────────────────────────────────────────────
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Yields text tokens as DeepSeek produces them (OpenAI-style SSE).
+
+        Each SSE line:
+            data: {"choices": [{"delta": {"content": "<token>"}}]}
+        Terminated with:
+            data: [DONE]
+        """
+        payload = self._build_payload(prompt, stream=True)
+
+        try:
+            with self._client.stream("POST", "/chat/completions", json=payload) as resp:
+                resp.raise_for_status()
+                for raw_line in resp.iter_lines():
+                    if not raw_line or not raw_line.startswith("data:"):
+                        continue
+
+                    data_str = raw_line[len("data:"):].strip()
+                    if data_str == "[DONE]":
+                        break
+
+                    try:
+                        chunk = json.loads(data_str)
+                    except json.JSONDecodeError:
+                        continue
+
+                    delta = chunk.get("choices", [{}])[0].get("delta", {})
+                    token = delta.get("content", "")
+                    if token:
+                        yield token
+
+        except httpx.TimeoutException as exc:
+            raise AIProviderError(
+                f"DeepSeek stream timed out after {self.timeout}s"
+            ) from exc
+        except httpx.HTTPStatusError as exc:
+            # The body of a streamed response has not been read yet.
+            exc.response.read()
+            self._handle_http_error(exc)
+        except httpx.RequestError as exc:
+            raise AIProviderError(
+                f"Cannot reach DeepSeek API at {_DEEPSEEK_API_BASE}: {exc}"
+            ) from exc
+
+    async def agenerate_stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Async generator for streaming — bridges generate_stream() into the
+        event loop via a worker thread.  Tokens are handed over with
+        ``call_soon_threadsafe`` onto an asyncio.Queue, so the consumer awaits
+        instead of polling.  Errors raised in the worker are re-raised here.
+
+        When the consumer stops early (break, aclose, cancellation) the
+        worker stops reading at the next token and closes the HTTP stream.
+        """
+        import asyncio
+        import threading
+
+        loop = asyncio.get_running_loop()
+        q: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        _DONE = object()
+
+        def _put(item: Any) -> None:
+            try:
+                loop.call_soon_threadsafe(q.put_nowait, item)
+            except RuntimeError:        # loop already closed — nobody is listening
+                stop.set()
+
+        def _producer() -> None:
+            tokens = self.generate_stream(prompt)
+            try:
+                for tok in tokens:
+                    if stop.is_set():
+                        break
+                    _put(tok)
+            except BaseException as exc:  # forwarded to the consumer
+                _put(exc)
+            finally:
+                tokens.close()
+                _put(_DONE)
+
+        loop.run_in_executor(None, _producer)
+        try:
+            while True:
+                item = await q.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+
     # ── misc ──────────────────────────────────────────────────────────────────
 
     def __repr__(self) -> str:
@@ -38,6 +38,7 @@ from typing import Any, Iterator, AsyncIterator
 import httpx
 
 from app.services.ai.providers.base import AIProvider, AIProviderError
+from app.services.ai.providers.telemetry import report_usage
 
 logger = logging.getLogger(__name__)
 
@@ -195,6 +196,7 @@ class GroqProvider(AIProvider):
             tokens_used,
             finish_reason,
         )
+        report_usage(data.get("usage"))
         if finish_reason == "length":
             raise AIProviderError(
                 f"Groq response was truncated (finish_reason=length, "
@@ -278,6 +280,8 @@ class GroqProvider(AIProvider):
             try:
                 for tok in self.generate_stream(prompt):
                     q.put(tok)
+            except BaseException as exc:  # forwarded to the consumer
+                q.put(exc)
             finally:
                 q.put(_DONE)
 
@@ -290,6 +294,8 @@ class GroqProvider(AIProvider):
             item = q.get_nowait()
             if item is _DONE:
                 break
+            if isinstance(item, BaseException):
+                raise item
             yield item
 
     # ── misc ──────────────────────────────────────────────────────────────────
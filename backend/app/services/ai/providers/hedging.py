@@ -0,0 +1,300 @@
+"""
+app/services/ai/providers/hedging.py
+
+HedgedProvider — bounded tail latency for interactive generations.
+
+The DeepSeek→Groq chain in ai_exercise_generator.py only fails over after the
+primary *errors*.  A slow-but-alive DeepSeek response can therefore take 60+
+seconds while Groq sits idle.  A hedged request fires the secondary once the
+primary has been running longer than a hedge delay, takes whichever answer
+arrives first and cancels the other one.
+
+Hedge delay
+-----------
+• fixed  — ``delay=8.0`` (or AI_HEDGE_DELAY=8)
+• rolling — ``delay=None`` (default): the primary's rolling p90 latency over
+  the last ``window`` calls, clamped to [min_delay, max_delay].  Until enough
+  samples exist the ``AI_HEDGE_MIN_SAMPLES`` warm-up uses max_delay, so a
+  cold process does not hedge every request.
+
+With a p90 delay roughly 10 % of calls are hedged, which caps the extra
+upstream load while cutting the slow tail.
+
+Failure semantics
+-----------------
+If the primary raises *before* the hedge fires, the secondary is called right
+away — the same behaviour as ``_DeepSeekPrimaryWithGroqFallback``.  If one of
+two in-flight calls raises, the other one is awaited.  Only when both fail is
+the primary's error re-raised.
+
+Cancellation note: providers run their sync HTTP client in a worker thread
+(``asyncio.to_thread``), so cancelling the loser abandons its result rather
+than aborting the socket; the thread finishes in the background.
+
+An open primary circuit (circuit_breaker.py) skips straight to the secondary.
+
+The instance is shared process-wide, so the backend that answered is not
+stored on it: each call records it in a ContextVar (telemetry.report_answered_by)
+and ``model`` reads it back for the calling task, falling back to the
+primary's model.
+
+The sync ``generate`` path does not hedge (it would need two threads per
+call); it keeps plain primary → secondary failover.
+
+Environment variables
+---------------------
+AI_HEDGE_ENABLED      default: "false" — opt-in for interactive endpoints
+AI_HEDGE_DELAY        fixed hedge delay in seconds; empty = rolling quantile
+AI_HEDGE_QUANTILE     default: 0.9
+AI_HEDGE_MIN_DELAY    default: 2   seconds
+AI_HEDGE_MAX_DELAY    default: 30  seconds
+AI_HEDGE_MIN_SAMPLES  default: 10  primary latencies before the quantile is used
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from app.services.ai.providers.base import AIProvider, AIProviderError
+from app.services.ai.providers.circuit_breaker import is_available
+from app.services.ai.providers.telemetry import answered_by, report_answered_by
+
+logger = logging.getLogger(__name__)
+
+# ── configuration ─────────────────────────────────────────────────────────────
+
+HEDGING_ENABLED = os.environ.get("AI_HEDGE_ENABLED", "false").strip().lower() == "true"
+
+_FIXED_DELAY  = os.environ.get("AI_HEDGE_DELAY", "").strip()
+_QUANTILE     = float(os.environ.get("AI_HEDGE_QUANTILE", "0.9"))
+_MIN_DELAY    = float(os.environ.get("AI_HEDGE_MIN_DELAY", "2"))
+_MAX_DELAY    = float(os.environ.get("AI_HEDGE_MAX_DELAY", "30"))
+_MIN_SAMPLES  = int(os.environ.get("AI_HEDGE_MIN_SAMPLES", "10"))
+_WINDOW       = 200
+
+
+def _model_of(provider: AIProvider) -> str:
+    return getattr(provider, "model", type(provider).__name__)
+
+
+# ── provider ──────────────────────────────────────────────────────────────────
+
+class HedgedProvider(AIProvider):
+    """
+    Fire *secondary* after a delay if *primary* has not answered yet.
+
+    Parameters
+    ----------
+    primary / secondary : AIProvider
+        Usually the rate-limited DeepSeek and Groq providers.
+    name : str
+        Label used in logs and in ``hedging_stats()``.
+    delay : float | None
+        Fixed hedge delay in seconds.  None → rolling ``quantile`` of the
+        primary's recent latencies.
+    """
+
+    def __init__(
+        self,
+        primary: AIProvider,
+        secondary: AIProvider,
+        name: str = "exercise",
+        delay: float | None = float(_FIXED_DELAY) if _FIXED_DELAY else None,
+        quantile: float = _QUANTILE,
+        min_delay: float = _MIN_DELAY,
+        max_delay: float = _MAX_DELAY,
+        window: int = _WINDOW,
+    ) -> None:
+        self._primary   = primary
+        self._secondary = secondary
+        self.name       = name
+        self._delay     = delay
+        self._quantile  = quantile
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._calls          = 0
+        self._hedged         = 0
+        self._secondary_wins = 0
+        self._failovers      = 0
+
+        _register(self)
+
+    @property
+    def model(self) -> str:
+        """Model that answered this task's latest call (the primary's before any)."""
+        return answered_by(self) or _model_of(self._primary)
+
+    def _answered(self, provider: AIProvider) -> None:
+        report_answered_by(self, _model_of(provider))
+
+    # ── hedge delay ───────────────────────────────────────────────────────────
+
+    def _record_primary_latency(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary before firing the secondary."""
+        if self._delay is not None:
+            return self._delay
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < _MIN_SAMPLES:
+            return self._max_delay
+        idx = min(len(samples) - 1, int(self._quantile * len(samples)))
+        return min(self._max_delay, max(self._min_delay, samples[idx]))
+
+    # ── AIProvider ────────────────────────────────────────────────────────────
+
+    def generate(self, prompt: str) -> str:
+        """Sync path: plain failover, no hedging."""
+        if not is_available(self._primary):
+            self._answered(self._secondary)
+            return self._secondary.generate(prompt)
+        try:
+            out = self._primary.generate(prompt)
+            self._answered(self._primary)
+            return out
+        except AIProviderError as exc:
+            logger.warning("Hedge[%s]: primary failed (%s) — sync failover.", self.name, exc)
+            with self._lock:
+                self._failovers += 1
+            self._answered(self._secondary)
+            return self._secondary.generate(prompt)
+
+    async def agenerate(self, prompt: str) -> str:
+        if not is_available(self._primary):
+            # Primary circuit open — nothing to hedge against.
+            with self._lock:
+                self._failovers += 1
+            self._answered(self._secondary)
+            return await self._secondary.agenerate(prompt)
+
+        delay = self.hedge_delay()
+        with self._lock:
+            self._calls += 1
+
+        started = time.monotonic()
+        primary_task = asyncio.create_task(self._primary.agenerate(prompt))
+        try:
+            done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        except asyncio.CancelledError:
+            primary_task.cancel()
+            raise
+
+        if done:
+            try:
+                out = primary_task.result()
+            except AIProviderError as exc:
+                # Failed before the hedge fired — ordinary failover.
+                logger.warning(
+                    "Hedge[%s]: primary failed after %.1fs (%s) — failing over.",
+                    self.name, time.monotonic() - started, exc,
+                )
+                with self._lock:
+                    self._failovers += 1
+                self._answered(self._secondary)
+                return await self._secondary.agenerate(prompt)
+            self._record_primary_latency(time.monotonic() - started)
+            self._answered(self._primary)
+            return out
+
+        # ── primary is slow: hedge ────────────────────────────────────────────
+        with self._lock:
+            self._hedged += 1
+        logger.info(
+            "Hedge[%s]: primary still running after %.1fs — firing secondary %s.",
+            self.name, delay, _model_of(self._secondary),
+        )
+        secondary_task = asyncio.create_task(self._secondary.agenerate(prompt))
+        pending = {primary_task, secondary_task}
+        first_error: BaseException | None = None
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return self._accept(task, primary_task, started)
+                    # Prefer surfacing the primary's error when both fail.
+                    if first_error is None or task is primary_task:
+                        first_error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+            if not primary_task.done() or primary_task.cancelled():
+                # Censored sample: the primary took at least this long.
+                self._record_primary_latency(time.monotonic() - started)
+
+        assert first_error is not None
+        raise first_error
+
+    def _accept(
+        self,
+        winner: asyncio.Task,
+        primary_task: asyncio.Task,
+        started: float,
+    ) -> str:
+        if winner is primary_task:
+            self._record_primary_latency(time.monotonic() - started)
+            self._answered(self._primary)
+        else:
+            with self._lock:
+                self._secondary_wins += 1
+            self._answered(self._secondary)
+            logger.info(
+                "Hedge[%s]: secondary won after %.1fs.",
+                self.name, time.monotonic() - started,
+            )
+        return winner.result()
+
+    # ── monitoring ────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            calls, hedged, wins = self._calls, self._hedged, self._secondary_wins
+            failovers = self._failovers
+        return {
+            "primary":         _model_of(self._primary),
+            "secondary":       _model_of(self._secondary),
+            "hedge_delay_s":   round(self.hedge_delay(), 2),
+            "calls":           calls,
+            "hedged":          hedged,
+            "hedge_rate":      round(hedged / calls, 3) if calls else 0.0,
+            "secondary_wins":  wins,
+            "win_rate":        round(wins / hedged, 3) if hedged else 0.0,
+            "failovers":       failovers,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"<HedgedProvider name={self.name!r} primary={self._primary!r} "
+            f"secondary={self._secondary!r}>"
+        )
+
+
+# ── registry ──────────────────────────────────────────────────────────────────
+
+_hedgers: dict[str, HedgedProvider] = {}
+_hedgers_lock = threading.Lock()
+
+
+def _register(provider: HedgedProvider) -> None:
+    with _hedgers_lock:
+        _hedgers[provider.name] = provider
+
+
+def hedging_stats() -> dict[str, dict[str, Any]]:
+    """Hedge rate / win rate of every HedgedProvider, keyed by name."""
+    with _hedgers_lock:
+        hedgers = list(_hedgers.values())
+    return {h.name: h.stats() for h in hedgers}
@@ -0,0 +1,607 @@
+"""
+app/services/ai/providers/rate_limiter.py
+
+Proactive per-backend rate limiting + priority admission queue for LLM calls.
+
+Until now rate limits were handled *reactively*: ``_WithOllamaFallback`` and
+``_DeepSeekPrimaryWithGroqFallback`` only noticed a 429 after the round trip
+had already failed, and then cascaded onto the slower fallback backend.  Under
+bursts (a 12-unit course stream + a handful of single-exercise clicks) that
+wastes a request per 429 and pushes most traffic onto the fallback.
+
+This module keeps two token buckets per backend — requests/minute and
+tokens/minute — and makes every call wait for admission *before* it is sent.
+
+Design
+------
+  BackendRateLimiter   one per backend name ("deepseek", "groq", …)
+      ├── TokenBucket  requests/minute   (capacity = RPM, refill RPM/60 per s)
+      ├── TokenBucket  tokens/minute     (capacity = TPM, refill TPM/60 per s)
+      └── admission queue — a heap of (priority, seq) tickets.  Only the head
+          ticket may draw from the buckets, so a paid-plan course generation
+          queued behind free-tier single exercises still goes out first.
+
+  RateLimitedProvider  AIProvider wrapper that acquires admission, calls the
+                       wrapped provider, then reconciles the token estimate
+                       with the actual prompt + completion size.  A 429 that
+                       slips through anyway pauses the backend for a short
+                       cool-down instead of letting every queued call retry.
+
+Priorities (lower = admitted first)
+-----------------------------------
+The plan tier dominates, then the workload:
+
+    paid course  <  paid unit  <  paid slides  <  paid exercise
+        <  free course  <  …  <  free exercise
+
+Wrappers built by the plan router carry a fixed priority.  The shared
+DeepSeek→Groq exercise chain is a singleton, so callers set the priority for
+the current task with ``admission_priority(...)`` — it is stored in a
+``ContextVar`` and therefore follows ``asyncio.create_task`` and
+``asyncio.to_thread``.
+
+Environment variables
+---------------------
+AI_RATE_LIMIT_ENABLED                default: "true"
+AI_RATE_LIMIT_<BACKEND>_RPM          requests per minute (0 = unlimited)
+AI_RATE_LIMIT_<BACKEND>_TPM          tokens per minute   (0 = unlimited)
+AI_RATE_LIMIT_MAX_WAIT               default: 120  seconds in the queue before
+                                     the call fails with a rate-limit error
+                                     (which the fallback chains understand)
+AI_RATE_LIMIT_COMPLETION_ESTIMATE    default: 1500 completion tokens assumed
+                                     at admission time
+AI_RATE_LIMIT_COOLDOWN               default: 10 seconds a backend is paused
+                                     after an upstream 429
+
+Usage
+-----
+    limiter  = get_rate_limiter("groq")
+    provider = RateLimitedProvider(GroqProvider(), limiter)
+
+    with admission_priority(priority_for_plan("pro", "course")):
+        text = await provider.agenerate(prompt)
+
+    rate_limiter_stats()   # → {"groq": {...queue depth, wait times...}, ...}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterator
+
+from app.services.ai.providers.base import AIProvider, AIProviderError
+
+logger = logging.getLogger(__name__)
+
+# ── configuration ─────────────────────────────────────────────────────────────
+
+_ENABLED            = os.environ.get("AI_RATE_LIMIT_ENABLED", "true").strip().lower() != "false"
+_MAX_WAIT_SECONDS   = float(os.environ.get("AI_RATE_LIMIT_MAX_WAIT", "120"))
+_COMPLETION_ESTIMATE = int(os.environ.get("AI_RATE_LIMIT_COMPLETION_ESTIMATE", "1500"))
+_COOLDOWN_SECONDS   = float(os.environ.get("AI_RATE_LIMIT_COOLDOWN", "10"))
+
+# How often a queued (non-head) waiter re-checks its position.
+_POLL_INTERVAL = 0.05
+# Upper bound on a single sleep of the head waiter, so a higher-priority
+# arrival can overtake it promptly.
+_MAX_HEAD_SLEEP = 1.0
+
+# Defaults per backend: (requests/minute, tokens/minute).
+# Groq's free/dev tiers are tight; DeepSeek publishes no hard limit but
+# throttles under load, so we keep a generous ceiling.
+_DEFAULT_LIMITS: dict[str, tuple[int, int]] = {
+    "groq":     (30, 12_000),
+    "deepseek": (120, 400_000),
+    "ollama":   (0, 0),
+}
+
+_RATE_LIMIT_PHRASES = (
+    "rate limit",
+    "429",
+    "slow down",
+    "quota",
+    "too many requests",
+)
+
+
+# ── priorities ────────────────────────────────────────────────────────────────
+
+# Workload rank inside one plan tier (lower = more important).
+_WORKLOAD_RANK: dict[str, int] = {
+    "course":   0,
+    "unit":     1,
+    "slides":   2,
+    "exercise": 3,
+}
+_PAID_PLANS = {"standard", "pro"}
+
+# Lowest priority — used when nobody declared one (free-tier single exercise).
+DEFAULT_PRIORITY = 2 * len(_WORKLOAD_RANK) - 1
+
+_priority_var: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "ai_admission_priority", default=DEFAULT_PRIORITY,
+)
+# Monotonic time the current task's last call left the admission queue, so
+# outer wrappers (the circuit breaker) can time the upstream call alone.
+_admitted_at_var: contextvars.ContextVar[float] = contextvars.ContextVar(
+    "ai_admitted_at", default=0.0,
+)
+
+
+class AdmissionRejected(AIProviderError):
+    """
+    Raised when a call waited too long in the admission queue.
+
+    Subclasses AIProviderError (and mentions "rate limit") so the fallback
+    chains treat it like a 429, but it says nothing about backend health —
+    the circuit breaker ignores it.
+    """
+
+
+def priority_for_plan(plan: str | None, workload: str = "exercise") -> int:
+    """
+    Map a teacher plan + workload kind to an admission priority.
+
+    >>> priority_for_plan("pro", "course") < priority_for_plan("free", "exercise")
+    True
+    """
+    rank = _WORKLOAD_RANK.get((workload or "").strip().lower(), _WORKLOAD_RANK["exercise"])
+    paid = (plan or "free").strip().lower() in _PAID_PLANS
+    return rank if paid else rank + len(_WORKLOAD_RANK)
+
+
+def current_admission_priority() -> int:
+    """Priority declared for the current task (``DEFAULT_PRIORITY`` if none)."""
+    return _priority_var.get()
+
+
+def upstream_started(since: float) -> float:
+    """
+    When the call started at *since* was actually sent: its admission time if
+    a RateLimitedProvider admitted it after *since*, else *since* itself.
+    """
+    return max(since, _admitted_at_var.get())
+
+
+@contextmanager
+def admission_priority(priority: int) -> Iterator[None]:
+    """Declare the admission priority for every LLM call made inside the block."""
+    token = _priority_var.set(priority)
+    try:
+        yield
+    finally:
+        _priority_var.reset(token)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token) — good enough for budgeting."""
+    return max(1, len(text or "") // 4)
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """True when *exc* looks like an upstream HTTP 429 / quota error."""
+    msg = str(exc).lower()
+    return any(phrase in msg for phrase in _RATE_LIMIT_PHRASES)
+
+
+# ── token bucket ──────────────────────────────────────────────────────────────
+
+class TokenBucket:
+    """
+    Classic token bucket.  Not thread-safe on its own — the owning
+    BackendRateLimiter serialises access under its lock.
+
+    The level may go negative after ``adjust`` (a call used more tokens than
+    estimated); that debt is simply paid back by the refill.
+    """
+
+    def __init__(self, capacity: float, per_minute: float) -> None:
+        self.capacity = float(capacity)
+        self._refill_per_second = float(per_minute) / 60.0
+        self._level = float(capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated)
+        self._level = min(self.capacity, self._level + elapsed * self._refill_per_second)
+        self._updated = now
+
+    def seconds_until(self, amount: float, now: float) -> float:
+        """Seconds until *amount* can be taken (0 when available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)   # oversized requests must not deadlock
+        if self._level >= amount:
+            return 0.0
+        return (amount - self._level) / self._refill_per_second
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self._level -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Charge (+) or refund (−) *delta* after the fact."""
+        self._level = min(self.capacity, self._level - delta)
+
+    @property
+    def level(self) -> float:
+        self._refill(time.monotonic())
+        return self._level
+
+
+# ── per-backend limiter + admission queue ─────────────────────────────────────
+
+class BackendRateLimiter:
+    """
+    Requests/minute + tokens/minute limiter with a priority admission queue.
+
+    Thread-safe: the sync ``acquire_blocking`` (used by ``generate``) and the
+    async ``acquire`` (used by ``agenerate``) share the same queue.
+
+    Parameters
+    ----------
+    backend : str
+        Backend name — used for logs, errors and stats.
+    rpm / tpm : int
+        Requests / tokens per minute.  0 disables that dimension.
+    max_wait : float
+        Seconds a call may sit in the queue before it is rejected with a
+        rate-limit ``AIProviderError`` (so fallback chains can step in).
+    """
+
+    def __init__(
+        self,
+        backend: str,
+        rpm: int,
+        tpm: int,
+        max_wait: float = _MAX_WAIT_SECONDS,
+    ) -> None:
+        self.backend  = backend
+        self.rpm      = rpm
+        self.tpm      = tpm
+        self.max_wait = max_wait
+
+        self._requests = TokenBucket(rpm, rpm) if rpm > 0 else None
+        self._tokens   = TokenBucket(tpm, tpm) if tpm > 0 else None
+
+        self._lock    = threading.Lock()
+        self._waiters: list[tuple[int, int]] = []   # heap of (priority, seq)
+        self._seq     = itertools.count()
+        self._paused_until = 0.0
+
+        # stats
+        self._admitted       = 0
+        self._rejected       = 0
+        self._upstream_429s  = 0
+        self._wait_total     = 0.0
+        self._wait_max       = 0.0
+        self._wait_last      = 0.0
+
+    # ── queue mechanics ───────────────────────────────────────────────────────
+
+    def _enqueue(self, priority: int) -> tuple[int, int]:
+        ticket = (priority, next(self._seq))
+        with self._lock:
+            heapq.heappush(self._waiters, ticket)
+        return ticket
+
+    def _abandon(self, ticket: tuple[int, int]) -> None:
+        with self._lock:
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+
+    def _next_wait(self, ticket: tuple[int, int], tokens: int, started: float) -> float:
+        """
+        Try to admit *ticket*.  Returns 0 when admitted, otherwise how long to
+        sleep before trying again.  Raises when the wait budget is exhausted.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._waiters and self._waiters[0] == ticket:
+                wait = max(
+                    self._paused_until - now,
+                    self._requests.seconds_until(1, now) if self._requests else 0.0,
+                    self._tokens.seconds_until(tokens, now) if self._tokens else 0.0,
+                )
+                if wait <= 0:
+                    heapq.heappop(self._waiters)
+                    if self._requests:
+                        self._requests.take(1, now)
+                    if self._tokens:
+                        self._tokens.take(tokens, now)
+                    self._record_admission(now - started)
+                    return 0.0
+                sleep_for = min(wait, _MAX_HEAD_SLEEP)
+            else:
+                wait = 0.0
+                sleep_for = _POLL_INTERVAL
+
+            if (now - started) + wait > self.max_wait:
+                self._rejected += 1
+                raise AdmissionRejected(
+                    f"{self.backend} rate limit: admission queue wait would exceed "
+                    f"{self.max_wait:.0f}s ({len(self._waiters)} call(s) queued)."
+                )
+        return sleep_for
+
+    def _record_admission(self, waited: float) -> None:
+        self._admitted   += 1
+        self._wait_total += waited
+        self._wait_last   = waited
+        self._wait_max    = max(self._wait_max, waited)
+        if waited > 1.0:
+            logger.info(
+                "RateLimiter[%s]: admitted after %.2fs in queue (%d still queued)",
+                self.backend, waited, len(self._waiters),
+            )
+
+    # ── public API ────────────────────────────────────────────────────────────
+
+    async def acquire(self, tokens: int, priority: int = DEFAULT_PRIORITY) -> float:
+        """Wait (async) until the call may be sent.  Returns seconds waited."""
+        started = time.monotonic()
+        ticket = self._enqueue(priority)
+        try:
+            while True:
+                sleep_for = self._next_wait(ticket, tokens, started)
+                if sleep_for <= 0:
+                    return time.monotonic() - started
+                await asyncio.sleep(sleep_for)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    def acquire_blocking(self, tokens: int, priority: int = DEFAULT_PRIORITY) -> float:
+        """Thread-blocking variant of ``acquire`` for sync ``generate`` calls."""
+        started = time.monotonic()
+        ticket = self._enqueue(priority)
+        try:
+            while True:
+                sleep_for = self._next_wait(ticket, tokens, started)
+                if sleep_for <= 0:
+                    return time.monotonic() - started
+                time.sleep(sleep_for)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    def reconcile(self, estimated: int, actual: int) -> None:
+        """Correct the tokens bucket once the real call size is known."""
+        if self._tokens is None or actual == estimated:
+            return
+        with self._lock:
+            self._tokens.adjust(actual - estimated)
+
+    def penalize(self, seconds: float = _COOLDOWN_SECONDS) -> None:
+        """Pause admissions after an upstream 429 slipped through."""
+        with self._lock:
+            self._upstream_429s += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning(
+            "RateLimiter[%s]: upstream rate limit — pausing admissions for %.0fs",
+            self.backend, seconds,
+        )
+
+    def snapshot(self) -> dict[str, Any]:
+        """Monitoring view: limits, current bucket levels, queue depth, wait times."""
+        with self._lock:
+            admitted = self._admitted
+            return {
+                "rpm":                 self.rpm,
+                "tpm":                 self.tpm,
+                "requests_available":  round(self._requests.level, 1) if self._requests else None,
+                "tokens_available":    round(self._tokens.level) if self._tokens else None,
+                "queued":              len(self._waiters),
+                "admitted":            admitted,
+                "rejected":            self._rejected,
+                "upstream_429s":       self._upstream_429s,
+                "paused_for_s":        round(max(0.0, self._paused_until - time.monotonic()), 1),
+                "wait_avg_ms":         round(self._wait_total / admitted * 1000) if admitted else 0,
+                "wait_max_ms":         round(self._wait_max * 1000),
+                "wait_last_ms":        round(self._wait_last * 1000),
+            }
+
+    def __repr__(self) -> str:
+        return f"<BackendRateLimiter backend={self.backend!r} rpm={self.rpm} tpm={self.tpm}>"
+
+
+# ── registry ──────────────────────────────────────────────────────────────────
+
+_limiters: dict[str, BackendRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        logger.warning("Ignoring non-integer %s=%r (using %d)", name, raw, default)
+        return default
+
+
+def get_rate_limiter(backend: str) -> BackendRateLimiter | None:
+    """
+    Return the process-wide limiter for *backend*, or None when rate limiting
+    is disabled (AI_RATE_LIMIT_ENABLED=false) or both limits are 0.
+    """
+    if not _ENABLED:
+        return None
+    name = backend.strip().lower()
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            rpm_default, tpm_default = _DEFAULT_LIMITS.get(name, (0, 0))
+            rpm = _env_int(f"AI_RATE_LIMIT_{name.upper()}_RPM", rpm_default)
+            tpm = _env_int(f"AI_RATE_LIMIT_{name.upper()}_TPM", tpm_default)
+            if rpm <= 0 and tpm <= 0:
+                return None
+            limiter = BackendRateLimiter(name, rpm=rpm, tpm=tpm)
+            _limiters[name] = limiter
+            logger.info("RateLimiter[%s]: rpm=%d tpm=%d", name, rpm, tpm)
+        return limiter
+
+
+def rate_limiter_stats() -> dict[str, dict[str, Any]]:
+    """Snapshot of every limiter created so far, keyed by backend name."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {lim.backend: lim.snapshot() for lim in limiters}
+
+
+def with_rate_limit(provider: AIProvider, backend: str, priority: int | None = None) -> AIProvider:
+    """Wrap *provider* in a RateLimitedProvider when a limiter exists for *backend*."""
+    limiter = get_rate_limiter(backend)
+    if limiter is None:
+        return provider
+    return RateLimitedProvider(provider, limiter, priority=priority)
+
+
+def concurrency_hint(provider: AIProvider, ceiling: int) -> int:
+    """
+    How many calls are worth keeping in flight through *provider* at once.
+
+    One slot per 10 RPM of the backend limiter found in the wrapper chain
+    (Groq's 30 RPM → 3, DeepSeek's 120 RPM → 12), capped at *ceiling*.
+    Without a limiter (disabled, unlimited backend) the ceiling is used.
+    More fan-out than that only lengthens the admission queue.
+    """
+    ceiling = max(1, ceiling)
+    node: Any = provider
+    for _ in range(8):                      # wrappers nest a few levels at most
+        if isinstance(node, RateLimitedProvider):
+            rpm = node._limiter.rpm
+            return ceiling if rpm <= 0 else max(1, min(ceiling, rpm // 10))
+        node = node.__dict__.get("_inner") if hasattr(node, "__dict__") else None
+        if node is None:
+            break
+    return ceiling
+
+
+# ── provider wrapper ──────────────────────────────────────────────────────────
+
+class RateLimitedProvider(AIProvider):
+    """
+    AIProvider wrapper that waits for admission before every call.
+
+    Parameters
+    ----------
+    inner : AIProvider
+        The real backend provider.
+    limiter : BackendRateLimiter
+        Limiter shared by every wrapper of the same backend.
+    priority : int | None
+        Fixed admission priority.  None → use ``current_admission_priority()``
+        at call time (for shared singleton chains).
+
+    Unknown attributes (``model``, ``json_mode``, ``max_tokens`` …) are
+    forwarded to *inner* so callers that introspect the provider keep working.
+    """
+
+    def __init__(
+        self,
+        inner: AIProvider,
+        limiter: BackendRateLimiter,
+        priority: int | None = None,
+    ) -> None:
+        self._inner    = inner
+        self._limiter  = limiter
+        self._priority = priority
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes not found on the wrapper itself.
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._inner, name)
+
+    def _effective_priority(self) -> int:
+        return self._priority if self._priority is not None else current_admission_priority()
+
+    def _estimate(self, prompt: str) -> int:
+        return estimate_tokens(prompt) + _COMPLETION_ESTIMATE
+
+    def _settle(self, prompt: str, estimated: int, output: str) -> None:
+        self._limiter.reconcile(estimated, estimate_tokens(prompt) + estimate_tokens(output))
+
+    def _on_error(self, exc: AIProviderError) -> None:
+        if is_rate_limit_error(exc) and not isinstance(exc, AdmissionRejected):
+            self._limiter.penalize()
+
+    # ── AIProvider ────────────────────────────────────────────────────────────
+
+    def generate(self, prompt: str) -> str:
+        estimated = self._estimate(prompt)
+        self._limiter.acquire_blocking(estimated, self._effective_priority())
+        _admitted_at_var.set(time.monotonic())
+        try:
+            out = self._inner.generate(prompt)
+        except AIProviderError as exc:
+            self._on_error(exc)
+            raise
+        self._settle(prompt, estimated, out)
+        return out
+
+    async def agenerate(self, prompt: str) -> str:
+        estimated = self._estimate(prompt)
+        await self._limiter.acquire(estimated, self._effective_priority())
+        _admitted_at_var.set(time.monotonic())
+        try:
+            out = await self._inner.agenerate(prompt)
+        except AIProviderError as exc:
+            self._on_error(exc)
+            raise
+        self._settle(prompt, estimated, out)
+        return out
+
+    # ── streaming (admission once per stream) ─────────────────────────────────
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        estimated = self._estimate(prompt)
+        self._limiter.acquire_blocking(estimated, self._effective_priority())
+        _admitted_at_var.set(time.monotonic())
+        chunks: list[str] = []
+        try:
+            if hasattr(self._inner, "generate_stream"):
+                for tok in self._inner.generate_stream(prompt):
+                    chunks.append(tok)
+                    yield tok
+            else:
+                out = self._inner.generate(prompt)
+                chunks.append(out)
+                yield out
+        except AIProviderError as exc:
+            self._on_error(exc)
+            raise
+        self._settle(prompt, estimated, "".join(chunks))
+
+    async def agenerate_stream(self, prompt: str) -> AsyncIterator[str]:
+        estimated = self._estimate(prompt)
+        await self._limiter.acquire(estimated, self._effective_priority())
+        _admitted_at_var.set(time.monotonic())
+        chunks: list[str] = []
+        try:
+            if hasattr(self._inner, "agenerate_stream"):
+                async for tok in self._inner.agenerate_stream(prompt):
+                    chunks.append(tok)
+                    yield tok
+            else:
+                out = await self._inner.agenerate(prompt)
+                chunks.append(out)
+                yield out
+        except AIProviderError as exc:
+            self._on_error(exc)
+            raise
+        self._settle(prompt, estimated, "".join(chunks))
+
+    def __repr__(self) -> str:
+        return f"<RateLimitedProvider inner={self._inner!r} backend={self._limiter.backend!r}>"
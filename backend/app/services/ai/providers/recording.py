@@ -0,0 +1,309 @@
+"""
+app/services/ai/providers/recording.py
+
+RecordingProvider / ReplayProvider — offline LLM fixtures for benchmarks.
+
+The unit, course, slide and exercise pipelines could only be exercised
+against a live LLM, so regressions in our own parsing and persistence
+overhead were invisible behind 5–60 s of network latency.
+
+RecordingProvider  wraps a real provider and appends every prompt→response
+                   pair (plus latency, and per-chunk timing for streamed
+                   calls) to a JSON fixture file.
+ReplayProvider     serves those responses back deterministically, optionally
+                   re-creating the recorded latency scaled by
+                   ``latency_scale`` (0 = instant, 1 = as recorded).
+
+Fixture format
+--------------
+{
+  "version": 1,
+  "records": [
+    {
+      "key":       "<sha256 of prompt>",
+      "prompt":    "<first 300 chars, for humans>",
+      "mode":      "generate" | "stream",
+      "response":  "<full text>",
+      "latency_s": 4.21,
+      "chunks":    [[0.41, "{\"sl"], [0.44, "ides\""], ...]    # stream only
+    },
+    ...
+  ]
+}
+
+Matching
+--------
+Records are looked up by the SHA-256 of the prompt; repeated prompts are
+served in recording order.  A prompt with no recording raises
+AIProviderError and is counted in ``misses`` — serving some other record
+instead would hand the pipeline a response to a different question.  Some
+generators randomise prompt details (gap counts, example picks), so seed
+``random`` the same way when recording and replaying; after a prompt change,
+re-record the fixture.
+
+Usage
+-----
+    live = RecordingProvider(get_provider_for_plan("pro"), "fixtures/llm/unit.json")
+    ...run the pipeline once...
+
+    replay = ReplayProvider("fixtures/llm/unit.json", latency_scale=0)
+    ...run it again, offline...
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator
+
+from app.services.ai.providers.base import AIProvider, AIProviderError
+
+logger = logging.getLogger(__name__)
+
+_FIXTURE_VERSION = 1
+_PROMPT_PREVIEW  = 300
+
+
+def prompt_key(prompt: str) -> str:
+    """Stable fixture key for *prompt*."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def _load_records(path: Path) -> list[dict[str, Any]]:
+    if not path.exists():
+        return []
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("version") != _FIXTURE_VERSION:
+        raise ValueError(f"Unsupported LLM fixture version in {path}: {data.get('version')!r}")
+    return list(data.get("records") or [])
+
+
+# ── recording ─────────────────────────────────────────────────────────────────
+
+class RecordingProvider(AIProvider):
+    """
+    Pass-through provider that records every successful call to *path*.
+
+    The fixture is rewritten (atomically) after each call, so a crashed or
+    interrupted run still leaves a usable file.  Existing records in *path*
+    are kept unless ``append=False``.
+    """
+
+    def __init__(self, inner: AIProvider, path: str | Path, append: bool = True) -> None:
+        self._inner = inner
+        self.path   = Path(path)
+        self._lock  = threading.Lock()
+        self._records: list[dict[str, Any]] = _load_records(self.path) if append else []
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._inner, name)
+
+    @property
+    def records(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return list(self._records)
+
+    def _record(
+        self,
+        prompt: str,
+        mode: str,
+        response: str,
+        latency: float,
+        chunks: list[list[Any]] | None = None,
+    ) -> None:
+        entry: dict[str, Any] = {
+            "key":       prompt_key(prompt),
+            "prompt":    prompt[:_PROMPT_PREVIEW],
+            "mode":      mode,
+            "response":  response,
+            "latency_s": round(latency, 4),
+        }
+        if chunks is not None:
+            entry["chunks"] = chunks
+        with self._lock:
+            self._records.append(entry)
+            self._save_locked()
+
+    def _save_locked(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps(
+            {"version": _FIXTURE_VERSION, "records": self._records},
+            ensure_ascii=False, indent=1,
+        )
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".llm-fixture-")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(payload)
+        os.replace(tmp, self.path)
+
+    # ── AIProvider ────────────────────────────────────────────────────────────
+
+    def generate(self, prompt: str) -> str:
+        started = time.perf_counter()
+        out = self._inner.generate(prompt)
+        self._record(prompt, "generate", out, time.perf_counter() - started)
+        return out
+
+    async def agenerate(self, prompt: str) -> str:
+        started = time.perf_counter()
+        out = await self._inner.agenerate(prompt)
+        self._record(prompt, "generate", out, time.perf_counter() - started)
+        return out
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        started = time.perf_counter()
+        chunks: list[list[Any]] = []
+        if hasattr(self._inner, "generate_stream"):
+            for tok in self._inner.generate_stream(prompt):
+                chunks.append([round(time.perf_counter() - started, 4), tok])
+                yield tok
+        else:
+            out = self._inner.generate(prompt)
+            chunks.append([round(time.perf_counter() - started, 4), out])
+            yield out
+        self._record(
+            prompt, "stream", "".join(c[1] for c in chunks),
+            time.perf_counter() - started, chunks,
+        )
+
+    async def agenerate_stream(self, prompt: str) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        chunks: list[list[Any]] = []
+        if hasattr(self._inner, "agenerate_stream"):
+            async for tok in self._inner.agenerate_stream(prompt):
+                chunks.append([round(time.perf_counter() - started, 4), tok])
+                yield tok
+        else:
+            out = await self._inner.agenerate(prompt)
+            chunks.append([round(time.perf_counter() - started, 4), out])
+            yield out
+        self._record(
+            prompt, "stream", "".join(c[1] for c in chunks),
+            time.perf_counter() - started, chunks,
+        )
+
+    def __repr__(self) -> str:
+        return f"<RecordingProvider inner={self._inner!r} path={str(self.path)!r}>"
+
+
+# ── replay ────────────────────────────────────────────────────────────────────
+
+class ReplayProvider(AIProvider):
+    """
+    Serve recorded responses from a fixture file.
+
+    Parameters
+    ----------
+    path : str | Path
+        Fixture written by RecordingProvider.
+    latency_scale : float
+        Multiplier applied to recorded latency / chunk offsets.
+        0 (default) replays instantly.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        latency_scale: float = 0.0,
+        model: str = "replay",
+    ) -> None:
+        self.path          = Path(path)
+        self.latency_scale = max(0.0, latency_scale)
+        self.model         = model
+
+        records = _load_records(self.path)
+        if not records:
+            raise ValueError(f"LLM fixture {self.path} is missing or empty — record it first.")
+        self._lock = threading.Lock()
+        self._records = records
+        self._by_key: dict[str, deque[int]] = defaultdict(deque)
+        for idx, rec in enumerate(records):
+            self._by_key[rec["key"]].append(idx)
+        self._used: set[int] = set()
+
+        # ── counters (read by the benchmark runner) ───────────────────────────
+        self.calls           = 0
+        self.misses          = 0
+        self.simulated_wait  = 0.0
+
+    def _take(self, prompt: str) -> dict[str, Any]:
+        key = prompt_key(prompt)
+        with self._lock:
+            self.calls += 1
+            queue = self._by_key.get(key)
+            while queue:
+                idx = queue.popleft()
+                if idx not in self._used:
+                    self._used.add(idx)
+                    return self._records[idx]
+            self.misses += 1
+        logger.error("ReplayProvider: no recording for prompt %r… in %s", prompt[:80], self.path)
+        raise AIProviderError(
+            f"ReplayProvider: no recording for prompt {prompt[:80]!r}… in {self.path} "
+            "(prompt changed or called more often than recorded — re-record the fixture)"
+        )
+
+    def _delay(self, rec: dict[str, Any]) -> float:
+        seconds = float(rec.get("latency_s") or 0.0) * self.latency_scale
+        self.simulated_wait += seconds
+        return seconds
+
+    def reset(self) -> None:
+        """Make every record available again (for repeated benchmark runs)."""
+        with self._lock:
+            self._by_key.clear()
+            for idx, rec in enumerate(self._records):
+                self._by_key[rec["key"]].append(idx)
+            self._used.clear()
+
+    # ── AIProvider ────────────────────────────────────────────────────────────
+
+    def generate(self, prompt: str) -> str:
+        rec = self._take(prompt)
+        delay = self._delay(rec)
+        if delay:
+            time.sleep(delay)
+        return rec["response"]
+
+    async def agenerate(self, prompt: str) -> str:
+        rec = self._take(prompt)
+        delay = self._delay(rec)
+        if delay:
+            await asyncio.sleep(delay)
+        return rec["response"]
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        rec = self._take(prompt)
+        chunks = rec.get("chunks") or [[rec.get("latency_s") or 0.0, rec["response"]]]
+        self._delay(rec)
+        elapsed = 0.0
+        for offset, tok in chunks:
+            wait = float(offset) * self.latency_scale - elapsed
+            if wait > 0:
+                time.sleep(wait)
+                elapsed += wait
+            yield tok
+
+    async def agenerate_stream(self, prompt: str) -> AsyncIterator[str]:
+        rec = self._take(prompt)
+        chunks = rec.get("chunks") or [[rec.get("latency_s") or 0.0, rec["response"]]]
+        self._delay(rec)
+        elapsed = 0.0
+        for offset, tok in chunks:
+            wait = float(offset) * self.latency_scale - elapsed
+            if wait > 0:
+                await asyncio.sleep(wait)
+                elapsed += wait
+            yield tok
+
+    def __repr__(self) -> str:
+        return f"<ReplayProvider path={str(self.path)!r} records={len(self._records)}>"
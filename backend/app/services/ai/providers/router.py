@@ -16,12 +16,26 @@ Environment variables
 AI_PROVIDER_FREE    default: "deepseek"  — provider for free-plan teachers
 AI_PROVIDER_PAID    default: "deepseek"  — provider for standard/pro teachers
 
+Every provider returned here is wrapped in a ``RateLimitedProvider`` (see
+rate_limiter.py) so calls wait for per-backend RPM/TPM admission instead of
+discovering a 429 after the round trip.  The plan + *workload* pick the
+admission priority: paid course generation goes out before free-tier work.
+
+Routing is health-aware: when the configured backend's circuit breaker is open
+(see circuit_breaker.py) the alternate backend is used instead, and every
+returned provider records its call outcomes in the breaker.
+
+Innermost, a ``TelemetryProvider`` (see telemetry.py) records latency, tokens
+and cost of every backend call under the caller's ``llm_context`` phase.
+
 Usage
 -----
 from app.services.ai.providers.router import get_provider_for_plan
 
 provider = get_provider_for_plan(teacher.plan)          # e.g. "free"
 result   = await provider.agenerate(prompt)
+
+provider = get_provider_for_plan(teacher.plan, workload="course")
 """
 
 from __future__ import annotations
@@ -30,6 +44,9 @@ import logging
 import os
 
 from app.services.ai.providers.base import AIProvider, AIProviderError
+from app.services.ai.providers.circuit_breaker import healthy_backend, with_circuit_breaker
+from app.services.ai.providers.rate_limiter import priority_for_plan, with_rate_limit
+from app.services.ai.providers.telemetry import with_telemetry
 
 logger = logging.getLogger(__name__)
 
@@ -90,7 +107,7 @@ def _build_provider(backend: str, *, json_mode: bool = False) -> AIProvider:
     )
 
 
-def get_provider_for_plan(plan: str) -> AIProvider:
+def get_provider_for_plan(plan: str, workload: str = "unit") -> AIProvider:
     """
     Return the appropriate AI provider for *plan*.
 
@@ -104,12 +121,16 @@ def get_provider_for_plan(plan: str) -> AIProvider:
     plan : str
         The teacher's subscription plan identifier.  Case-insensitive.
         Expected values: ``"free"``, ``"standard"``, ``"pro"``.
+    workload : str
+        What the provider is used for — ``"course"``, ``"unit"``, ``"slides"``
+        or ``"exercise"``.  Only affects the rate-limiter admission priority.
 
     Returns
     -------
     AIProvider
-        A configured provider instance.  Free-plan providers are created with
-        ``json_mode=True`` so structured exercise generation works out-of-the-box.
+        A configured, rate-limited, circuit-breaker-guarded provider instance.  Free-plan providers are
+        created with ``json_mode=True`` so structured exercise generation works
+        out-of-the-box.
 
     Raises
     ------
@@ -123,18 +144,19 @@ def get_provider_for_plan(plan: str) -> AIProvider:
     result   = await provider.agenerate(my_prompt)
     """
     normalised = plan.strip().lower() if plan else "free"
+    priority   = priority_for_plan(normalised, workload)
 
     if normalised in _FREE_PLANS:
         logger.info(
             "Plan-router: plan=%r → backend=%r (free tier)", normalised, _FREE_BACKEND
         )
-        return _build_provider(_FREE_BACKEND, json_mode=True)
+        return _guarded_provider(_FREE_BACKEND, json_mode=True, priority=priority)
 
     if normalised in _PAID_PLANS:
         logger.info(
             "Plan-router: plan=%r → backend=%r (paid tier)", normalised, _PAID_BACKEND
         )
-        return _build_provider(_PAID_BACKEND, json_mode=False)
+        return _guarded_provider(_PAID_BACKEND, json_mode=False, priority=priority)
 
     # Unknown plan — fall back to free-tier behaviour and log a warning so
     # engineers notice if a new plan string is introduced without updating here.
@@ -143,4 +165,27 @@ def get_provider_for_plan(plan: str) -> AIProvider:
         plan,
         _FREE_BACKEND,
     )
-    return _build_provider(_FREE_BACKEND, json_mode=True)
\ No newline at end of file
+    return _guarded_provider(_FREE_BACKEND, json_mode=True, priority=priority)
+
+
+def _guarded_provider(backend: str, *, json_mode: bool, priority: int) -> AIProvider:
+    """
+    Build *backend* (or its alternate while *backend*'s circuit is open),
+    wrapped in telemetry, the rate limiter and the circuit breaker.
+    """
+    chosen = healthy_backend(backend)
+    if chosen != backend:
+        try:
+            provider = _build_provider(chosen, json_mode=json_mode)
+        except AIProviderError as exc:
+            logger.warning(
+                "Plan-router: alternate backend %r unusable (%s) — keeping %r",
+                chosen, exc, backend,
+            )
+            chosen   = backend
+            provider = _build_provider(backend, json_mode=json_mode)
+    else:
+        provider = _build_provider(backend, json_mode=json_mode)
+    return with_circuit_breaker(
+        with_rate_limit(with_telemetry(provider, chosen), chosen, priority), chosen,
+    )
@@ -0,0 +1,506 @@
+"""
+app/services/ai/providers/telemetry.py
+
+Per-call LLM telemetry: latency, tokens and cost by pipeline phase.
+
+Nothing recorded how long each provider call took, how many prompt and
+completion tokens it used, or which part of a pipeline issued it — so there
+was no way to tell which prompts are worth shrinking or caching.
+
+Design
+------
+  TelemetryProvider   AIProvider wrapper placed directly around the backend
+                      client (inside the rate limiter and circuit breaker, so
+                      queue wait is *not* counted as latency).  Every call —
+                      generate, agenerate, or a whole stream — produces one
+                      row: backend, model, mode, ok/error, latency, tokens,
+                      estimated cost, plus the current *call context*.
+
+  call context        phase / teacher_id / plan, declared by callers with
+                      ``llm_context(...)``.  Stored in a ``ContextVar`` like
+                      the admission priority, so it follows
+                      ``asyncio.create_task`` and ``asyncio.to_thread``.
+                      Nested blocks only override the keys they pass.
+
+  TelemetryCollector  process-wide buffer.  Keeps a rolling latency window
+                      per phase for live p50/p95 and a bounded list of rows
+                      waiting to be written.  ``flush_telemetry()`` inserts
+                      them into ``llm_call_telemetry`` in one batch; the
+                      background task started from main.py calls it every
+                      ``AI_TELEMETRY_FLUSH_INTERVAL`` seconds and once more on
+                      shutdown.
+
+Token counts come from the backend's ``usage`` block when the provider calls
+``report_usage(...)`` (DeepSeek and Groq non-streamed responses); otherwise
+the rate limiter's ~4 chars/token estimate is used and the row is flagged
+``tokens_estimated``.
+
+Phases in use
+-------------
+  unit.plan  unit.titles  unit.segment_text  unit.vocabulary
+  exercise.<type>  exercise.instruction  image.svg  image.vocab_card
+  course.outline  course.blueprint  slides (default phase of the slide client)
+
+Environment variables
+---------------------
+AI_TELEMETRY_ENABLED          default: "true"
+AI_TELEMETRY_FLUSH_INTERVAL   default: 30     seconds between batch flushes
+AI_TELEMETRY_MAX_BUFFER       default: 10000  unflushed rows kept in memory
+                                              (oldest dropped beyond that)
+AI_TELEMETRY_WINDOW           default: 500    latencies per phase kept for
+                                              the live percentiles
+AI_TELEMETRY_PRICE_<BACKEND>  "<input>,<output>" USD per million tokens,
+                              e.g. AI_TELEMETRY_PRICE_DEEPSEEK="0.27,1.10"
+
+Usage
+-----
+    provider = with_telemetry(DeepSeekProvider(), "deepseek")
+
+    with llm_context(teacher_id=user.id, plan="pro"):
+        with llm_context(phase="unit.plan"):
+            raw = await provider.agenerate(prompt)
+
+    telemetry_snapshot()      # → {"phases": {"unit.plan": {"p50_ms": …}}, …}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Iterator
+
+from app.services.ai.providers.base import AIProvider
+from app.services.ai.providers.rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# ── configuration ─────────────────────────────────────────────────────────────
+
+_ENABLED        = os.environ.get("AI_TELEMETRY_ENABLED", "true").strip().lower() != "false"
+_FLUSH_INTERVAL = float(os.environ.get("AI_TELEMETRY_FLUSH_INTERVAL", "30"))
+_MAX_BUFFER     = int(os.environ.get("AI_TELEMETRY_MAX_BUFFER", "10000"))
+_WINDOW         = int(os.environ.get("AI_TELEMETRY_WINDOW", "500"))
+
+_ERROR_CHARS = 255
+
+# USD per million (input, output) tokens — list prices, override per backend.
+_DEFAULT_PRICES: dict[str, tuple[float, float]] = {
+    "deepseek": (0.27, 1.10),
+    "groq":     (0.59, 0.79),
+    "ollama":   (0.0, 0.0),
+}
+
+UNKNOWN_PHASE = "unknown"
+
+
+def _price(backend: str) -> tuple[float, float]:
+    raw = os.environ.get(f"AI_TELEMETRY_PRICE_{backend.upper()}")
+    if raw:
+        try:
+            inp, out = (float(part) for part in raw.split(",", 1))
+            return inp, out
+        except ValueError:
+            logger.warning("Ignoring malformed AI_TELEMETRY_PRICE_%s=%r", backend.upper(), raw)
+    return _DEFAULT_PRICES.get(backend, (0.0, 0.0))
+
+
+def estimate_cost(backend: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost of one call on *backend*."""
+    inp, out = _price(backend)
+    return (prompt_tokens * inp + completion_tokens * out) / 1_000_000
+
+
+# ── call context ──────────────────────────────────────────────────────────────
+
+_context_var: contextvars.ContextVar[dict[str, Any] | None] = contextvars.ContextVar(
+    "ai_llm_context", default=None,
+)
+# Mutable holder the backend fills via report_usage(); a fresh dict per call.
+_usage_var: contextvars.ContextVar[dict[str, int] | None] = contextvars.ContextVar(
+    "ai_llm_usage", default=None,
+)
+
+
+# (router id, model) of the backend that answered the latest call routed by a
+# per-call router such as HedgedProvider — a shared instance must not store
+# that on itself, concurrent calls would overwrite each other.
+_answered_by_var: contextvars.ContextVar[tuple[int, str] | None] = contextvars.ContextVar(
+    "ai_llm_answered_by", default=None,
+)
+
+
+def current_llm_context() -> dict[str, Any]:
+    """Phase / teacher_id / plan declared for the current task."""
+    return dict(_context_var.get() or {})
+
+
+@contextmanager
+def llm_context(
+    *,
+    phase: str | None = None,
+    teacher_id: int | None = None,
+    plan: str | None = None,
+) -> Iterator[None]:
+    """
+    Attribute every LLM call made inside the block.
+
+    Only the keys that are not None are overridden, so an inner
+    ``llm_context(phase=...)`` keeps the outer teacher_id / plan.
+    """
+    updates = {
+        key: value
+        for key, value in (("phase", phase), ("teacher_id", teacher_id), ("plan", plan))
+        if value is not None
+    }
+    token = _context_var.set({**(_context_var.get() or {}), **updates})
+    try:
+        yield
+    finally:
+        _context_var.reset(token)
+
+
+def report_usage(usage: dict[str, Any] | None) -> None:
+    """
+    Hand the backend's OpenAI-style ``usage`` block to the enclosing
+    TelemetryProvider call.  No-op outside a telemetry-wrapped call.
+    """
+    holder = _usage_var.get()
+    if holder is None or not usage:
+        return
+    try:
+        holder["prompt_tokens"] = int(usage.get("prompt_tokens") or 0)
+        holder["completion_tokens"] = int(usage.get("completion_tokens") or 0)
+    except (TypeError, ValueError):
+        pass
+
+
+def report_answered_by(router: object, model: str) -> None:
+    """Record that *model* answered the current task's latest call through *router*."""
+    _answered_by_var.set((id(router), model))
+
+
+def answered_by(router: object) -> str | None:
+    """Model that answered the current task's latest call through *router*, if any."""
+    entry = _answered_by_var.get()
+    return entry[1] if entry is not None and entry[0] == id(router) else None
+
+
+# ── percentiles ───────────────────────────────────────────────────────────────
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Linear-interpolated percentile (*q* in 0…1) of *values*; None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+# ── collector ─────────────────────────────────────────────────────────────────
+
+class TelemetryCollector:
+    """Thread-safe in-memory aggregation + flush buffer."""
+
+    def __init__(self, max_buffer: int = _MAX_BUFFER, window: int = _WINDOW) -> None:
+        self._lock = threading.Lock()
+        self._pending: deque[dict[str, Any]] = deque(maxlen=max(1, max_buffer))
+        self._latencies: dict[str, deque[int]] = defaultdict(lambda: deque(maxlen=max(1, window)))
+        self._totals: dict[str, dict[str, float]] = defaultdict(
+            lambda: {"calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+        )
+        self.flushed = 0
+        self.dropped = 0
+        self.flush_errors = 0
+
+    def record(self, row: dict[str, Any]) -> None:
+        phase = row["phase"]
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append(row)
+            self._latencies[phase].append(row["latency_ms"])
+            totals = self._totals[phase]
+            totals["calls"] += 1
+            totals["errors"] += 0 if row["ok"] else 1
+            totals["prompt_tokens"] += row["prompt_tokens"]
+            totals["completion_tokens"] += row["completion_tokens"]
+            totals["cost_usd"] += row["cost_usd"]
+
+    def drain(self) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = list(self._pending)
+            self._pending.clear()
+        return rows
+
+    def requeue(self, rows: list[dict[str, Any]]) -> None:
+        """Put rows back after a failed flush (newer rows win if over capacity)."""
+        with self._lock:
+            room = self._pending.maxlen - len(self._pending)
+            keep = rows[-room:] if room > 0 else []
+            self.dropped += len(rows) - len(keep)
+            self._pending.extendleft(reversed(keep))
+            self.flush_errors += 1
+
+    def mark_flushed(self, count: int) -> None:
+        with self._lock:
+            self.flushed += count
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            latencies = {phase: list(window) for phase, window in self._latencies.items()}
+            totals = {phase: dict(t) for phase, t in self._totals.items()}
+            pending = len(self._pending)
+        phases: dict[str, Any] = {}
+        for phase in sorted(totals):
+            t = totals[phase]
+            window = latencies.get(phase, [])
+            p50 = percentile(window, 0.5)
+            p95 = percentile(window, 0.95)
+            phases[phase] = {
+                "calls":             int(t["calls"]),
+                "errors":            int(t["errors"]),
+                "p50_ms":            round(p50) if p50 is not None else None,
+                "p95_ms":            round(p95) if p95 is not None else None,
+                "prompt_tokens":     int(t["prompt_tokens"]),
+                "completion_tokens": int(t["completion_tokens"]),
+                "cost_usd":          round(t["cost_usd"], 6),
+            }
+        return {
+            "phases":       phases,
+            "pending":      pending,
+            "flushed":      self.flushed,
+            "dropped":      self.dropped,
+            "flush_errors": self.flush_errors,
+        }
+
+
+_collector = TelemetryCollector()
+
+
+def get_collector() -> TelemetryCollector:
+    return _collector
+
+
+def telemetry_snapshot() -> dict[str, Any]:
+    """Live per-phase aggregates since process start (for the admin endpoint)."""
+    return _collector.snapshot()
+
+
+def flush_telemetry() -> int:
+    """
+    Write every buffered row to ``llm_call_telemetry`` in one batch.
+
+    Blocking — call via ``asyncio.to_thread`` from async code.  On failure the
+    rows are put back into the buffer and 0 is returned.
+    """
+    rows = _collector.drain()
+    if not rows:
+        return 0
+
+    from sqlalchemy import insert
+
+    from app.core.database import SessionLocal
+    from app.models.llm_call_telemetry import LLMCallTelemetry
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(LLMCallTelemetry), rows)
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        _collector.requeue(rows)
+        logger.warning("LLM telemetry: flush of %d row(s) failed: %s", len(rows), exc)
+        return 0
+    finally:
+        db.close()
+    _collector.mark_flushed(len(rows))
+    logger.debug("LLM telemetry: flushed %d row(s)", len(rows))
+    return len(rows)
+
+
+async def _flush_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(flush_telemetry)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("LLM telemetry: flush loop crashed")
+
+
+_flush_task: asyncio.Task | None = None
+
+
+def start_flush_task(interval_seconds: float = _FLUSH_INTERVAL) -> None:
+    """Start the periodic batch flush (idempotent)."""
+    global _flush_task
+    if not _ENABLED:
+        return
+    if _flush_task is None or _flush_task.done():
+        _flush_task = asyncio.create_task(_flush_loop(interval_seconds))
+        logger.info("LLM telemetry: flush task started (every %.0fs)", interval_seconds)
+
+
+async def stop_flush_task() -> None:
+    """Cancel the flush loop and write whatever is still buffered."""
+    global _flush_task
+    if _flush_task is not None and not _flush_task.done():
+        _flush_task.cancel()
+        try:
+            await _flush_task
+        except asyncio.CancelledError:
+            pass
+    _flush_task = None
+    await asyncio.to_thread(flush_telemetry)
+
+
+# ── provider wrapper ──────────────────────────────────────────────────────────
+
+def with_telemetry(provider: AIProvider, backend: str, phase: str | None = None) -> AIProvider:
+    """Wrap *provider* in a TelemetryProvider unless telemetry is disabled."""
+    if not _ENABLED:
+        return provider
+    return TelemetryProvider(provider, backend, phase=phase)
+
+
+class TelemetryProvider(AIProvider):
+    """
+    AIProvider wrapper that records one telemetry row per call.
+
+    *phase* is the fallback phase for calls made without an ``llm_context``
+    phase — for single-purpose clients such as the slide generator, whose
+    streams are consumed outside any request-scoped context.
+
+    Unknown attributes (``model``, ``json_mode``, ``max_tokens`` …) are
+    forwarded to *inner*.
+    """
+
+    def __init__(
+        self,
+        inner: AIProvider,
+        backend: str,
+        phase: str | None = None,
+        collector: TelemetryCollector | None = None,
+    ) -> None:
+        self._inner     = inner
+        self._backend   = backend
+        self._phase     = phase
+        self._collector = collector or _collector
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._inner, name)
+
+    def _record(
+        self,
+        *,
+        mode: str,
+        started: float,
+        prompt: str,
+        output: str,
+        usage: dict[str, int],
+        error: BaseException | None = None,
+    ) -> None:
+        ctx = _context_var.get() or {}
+        estimated = not usage
+        prompt_tokens = usage.get("prompt_tokens") if usage else estimate_tokens(prompt)
+        completion_tokens = (
+            usage.get("completion_tokens") if usage
+            else (estimate_tokens(output) if output else 0)
+        )
+        self._collector.record({
+            "created_at":        datetime.now(timezone.utc),
+            "teacher_id":        ctx.get("teacher_id"),
+            "plan":              ctx.get("plan"),
+            "phase":             ctx.get("phase") or self._phase or UNKNOWN_PHASE,
+            "backend":           self._backend,
+            "model":             str(getattr(self._inner, "model", "") or "")[:128] or None,
+            "mode":              mode,
+            "ok":                error is None,
+            "error":             str(error)[:_ERROR_CHARS] if error is not None else None,
+            "latency_ms":        int((time.perf_counter() - started) * 1000),
+            "prompt_tokens":     prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "tokens_estimated":  estimated,
+            "cost_usd":          estimate_cost(self._backend, prompt_tokens, completion_tokens),
+        })
+
+    # ── AIProvider ────────────────────────────────────────────────────────────
+
+    def generate(self, prompt: str) -> str:
+        usage: dict[str, int] = {}
+        token = _usage_var.set(usage)
+        started = time.perf_counter()
+        try:
+            out = self._inner.generate(prompt)
+        except Exception as exc:
+            self._record(mode="generate", started=started, prompt=prompt, output="", usage=usage, error=exc)
+            raise
+        finally:
+            _usage_var.reset(token)
+        self._record(mode="generate", started=started, prompt=prompt, output=out, usage=usage)
+        return out
+
+    async def agenerate(self, prompt: str) -> str:
+        usage: dict[str, int] = {}
+        token = _usage_var.set(usage)
+        started = time.perf_counter()
+        try:
+            out = await self._inner.agenerate(prompt)
+        except Exception as exc:
+            self._record(mode="generate", started=started, prompt=prompt, output="", usage=usage, error=exc)
+            raise
+        finally:
+            _usage_var.reset(token)
+        self._record(mode="generate", started=started, prompt=prompt, output=out, usage=usage)
+        return out
+
+    # ── streaming (one row per stream) ────────────────────────────────────────
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        started = time.perf_counter()
+        chunks: list[str] = []
+        try:
+            if hasattr(self._inner, "generate_stream"):
+                for tok in self._inner.generate_stream(prompt):
+                    chunks.append(tok)
+                    yield tok
+            else:
+                out = self._inner.generate(prompt)
+                chunks.append(out)
+                yield out
+        except Exception as exc:
+            self._record(mode="stream", started=started, prompt=prompt, output="".join(chunks), usage={}, error=exc)
+            raise
+        self._record(mode="stream", started=started, prompt=prompt, output="".join(chunks), usage={})
+
+    async def agenerate_stream(self, prompt: str) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        chunks: list[str] = []
+        try:
+            if hasattr(self._inner, "agenerate_stream"):
+                async for tok in self._inner.agenerate_stream(prompt):
+                    chunks.append(tok)
+                    yield tok
+            else:
+                out = await self._inner.agenerate(prompt)
+                chunks.append(out)
+                yield out
+        except Exception as exc:
+            self._record(mode="stream", started=started, prompt=prompt, output="".join(chunks), usage={}, error=exc)
+            raise
+        self._record(mode="stream", started=started, prompt=prompt, output="".join(chunks), usage={})
+
+    def __repr__(self) -> str:
+        return f"<TelemetryProvider inner={self._inner!r} backend={self._backend!r}>"
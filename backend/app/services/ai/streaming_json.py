@@ -0,0 +1,217 @@
+"""
+app/services/ai/streaming_json.py
+
+Incremental JSON parser for streamed LLM output.
+
+Slide decks and unit blueprints arrive as one JSON object with a list of
+items (``"slides": [...]``, ``"segments": [...]``).  Waiting for the whole
+response and then running regex / bracket-repair passes over it means the
+first item can only be shown once the last one has been generated.
+
+``StreamingArrayParser`` is fed the raw token chunks from
+``generate_stream`` / ``agenerate_stream`` and returns every item of the
+target array as soon as its closing brace arrives.  It keeps a single
+scanner state (string / escape flags + container stack), so every character
+is looked at exactly once no matter how the response is chunked.  Only the
+unscanned tail and the item still open are kept in the scan buffer; the
+chunks themselves are joined once, by ``text`` / ``finish()``.
+
+Tolerated noise
+---------------
+• markdown fences and prose before the first ``{``
+• invalid backslash escapes, raw control characters and trailing commas
+  inside an item (each closed item goes through ``tolerant_json``)
+• a truncated tail — items that closed before the cut are already emitted,
+  and ``finish()`` reports them without any bracket-closing repair.
+
+Usage
+-----
+    parser = StreamingArrayParser("slides")
+    async for chunk in provider.agenerate_stream(prompt):
+        for slide in parser.feed(chunk):
+            yield slide                      # dict, as soon as it closes
+    data = parser.finish()                   # full object, or {"slides": items}
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any
+
+from app.services.ai.tolerant_json import loads_tolerant
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingArrayParser:
+    """
+    Emit the elements of ``<root>.<array_key>`` while the JSON is streaming.
+
+    Parameters
+    ----------
+    array_key : str
+        Key of the list inside the root object whose object items should be
+        emitted (``"slides"``, ``"segments"``, ``"units"`` …).
+    """
+
+    def __init__(self, array_key: str) -> None:
+        self.array_key = array_key
+        self._chunks: list[str] = []
+        # Scan window: the fed text from absolute index self._offset on.
+        # Every index below (_pos, _root_start, …) is absolute.
+        self._buf = ""
+        self._offset = 0
+        self._pos = 0                     # next index to scan
+
+        self._root_start = -1             # index of the root "{"
+        self._root_end = -1               # index after the root "}"
+        # One entry per open container: (opener, key it was opened under).
+        self._stack: list[tuple[str, str | None]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string: str | None = None
+        self._pending_key: str | None = None
+        self._item_start = -1
+
+        self.items: list[dict[str, Any]] = []
+
+    # ── feeding ───────────────────────────────────────────────────────────────
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return "".join(self._chunks)
+
+    @property
+    def complete(self) -> bool:
+        """True once the root object has closed."""
+        return self._root_end != -1
+
+    def feed(self, chunk: str) -> list[dict[str, Any]]:
+        """Consume *chunk*; return the array items that closed inside it."""
+        if not chunk or self.complete:
+            return []
+        self._chunks.append(chunk)
+        # Drop what is scanned and no longer needed: keep the open item and
+        # the open string (its text becomes the next key), if any.
+        keep = self._pos
+        if self._item_start != -1:
+            keep = min(keep, self._item_start)
+        if self._in_string:
+            keep = min(keep, self._string_start)
+        self._buf = self._buf[keep - self._offset:] + chunk
+        self._offset = keep
+        emitted: list[dict[str, Any]] = []
+        text, base = self._buf, self._offset
+        i = self._pos
+
+        while i - base < len(text):
+            ch = text[i - base]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start + 1 - base : i - base]
+                i += 1
+                continue
+
+            if self._root_start == -1:
+                if ch == "{":
+                    self._root_start = i
+                    self._stack.append(("{", None))
+                i += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":":
+                self._pending_key = self._last_string
+            elif ch in "{[":
+                key = self._pending_key if self._stack and self._stack[-1][0] == "{" else None
+                self._pending_key = None
+                if ch == "{" and self._in_target_array():
+                    self._item_start = i
+                self._stack.append((ch, key))
+            elif ch in "}]":
+                if not self._stack:
+                    i += 1
+                    continue
+                self._stack.pop()
+                self._pending_key = None
+                if ch == "}" and self._item_start != -1 and self._in_target_array():
+                    item = self._parse_item(text[self._item_start - base : i + 1 - base])
+                    self._item_start = -1
+                    if item is not None:
+                        self.items.append(item)
+                        emitted.append(item)
+                if not self._stack:
+                    self._root_end = i + 1
+                    i += 1
+                    break
+            elif ch == ",":
+                self._pending_key = None
+            i += 1
+
+        self._pos = i
+        return emitted
+
+    def _in_target_array(self) -> bool:
+        # root "{"  →  "[" opened under array_key  →  item "{"
+        return (
+            len(self._stack) == 2
+            and self._stack[1][0] == "["
+            and self._stack[1][1] == self.array_key
+        )
+
+    def _parse_item(self, raw: str) -> dict[str, Any] | None:
+        try:
+            value = loads_tolerant(raw, roots="{")
+        except json.JSONDecodeError as exc:
+            logger.warning(
+                "StreamingArrayParser[%s]: skipping unparsable item %d (%s)",
+                self.array_key, len(self.items), exc,
+            )
+            return None
+        return value if isinstance(value, dict) else None
+
+    # ── result ────────────────────────────────────────────────────────────────
+
+    def finish(self) -> dict[str, Any]:
+        """
+        Return the parsed root object.
+
+        When the root closed and parses, that object is returned as-is.
+        Otherwise (truncated or malformed tail) the result is
+        ``{array_key: <items emitted so far>}`` plus nothing else — callers
+        back-fill top-level fields they know from the request.
+        """
+        if self._root_start != -1 and self._root_end != -1:
+            try:
+                data = loads_tolerant(self.text[self._root_start : self._root_end], roots="{")
+                if isinstance(data, dict):
+                    return data
+            except json.JSONDecodeError:
+                pass
+        if self.items:
+            logger.warning(
+                "StreamingArrayParser[%s]: response incomplete — keeping %d closed item(s)",
+                self.array_key, len(self.items),
+            )
+        return {self.array_key: list(self.items)}
+
+
+def parse_array_items(text: str, array_key: str) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """
+    One-shot helper for non-streamed responses: feed *text* in one go and
+    return ``(root_object_or_salvage, items)``.
+    """
+    parser = StreamingArrayParser(array_key)
+    parser.feed(text)
+    return parser.finish(), parser.items
@@ -0,0 +1,302 @@
+"""
+app/services/ai/tolerant_json.py
+
+Single-pass tolerant JSON decoder for LLM output.
+
+Every generator used to carry its own repair chain — strip fences with a
+regex, brace-count to isolate the object, regex away trailing commas,
+``json.loads``, walk the string again for control characters, walk it once
+more to close brackets, ``json.loads`` again.  Each step re-scanned the
+whole response, and each generator fixed a different subset of problems.
+
+``repair_json`` does all of it in one left-to-right scan.  A compiled token
+regex consumes whole runs of well-formed members (strings, literals, ``:``
+and ``,``) in C; Python only handles brackets, the rare string that needs
+repair and, on a truncated response, the innermost open container.
+
+Tolerated noise
+---------------
+• markdown fences and prose before the first ``{`` / ``[`` and after the
+  root value closes
+• raw control characters (newline, tab, …) inside strings
+• invalid backslash escapes inside strings (``\\T``, ``C:\\Users``)
+• trailing and doubled commas, mismatched closing brackets
+• unescaped inner quotes (``"He said "ciao" to me"``) — a quote that is
+  not followed by ``:`` ``,`` ``}`` ``]`` is kept as a literal
+• a truncated tail — the open string is closed, a dangling key / colon gets
+  ``null``, a half-written literal is dropped and open containers are closed
+
+Usage
+-----
+    data = loads_tolerant(raw)                        # dict / list
+    data = loads_tolerant(raw, allow_truncated=False) # TruncatedJSONError if cut
+    text = repair_json(raw)                           # repaired JSON string
+
+Both raise ``json.JSONDecodeError`` (a ``ValueError``) when *raw* contains no
+JSON value at all or the repaired text still does not parse.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+__all__ = ["TruncatedJSONError", "repair_json", "loads_tolerant", "scan_json"]
+
+_CLEAN_STRING = r'"(?:[^"\\\x00-\x1f]++|\\["\\/bfnrt]|\\u[0-9a-fA-F]{4})*+"'
+_LITERAL = r"(?:-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null)(?![\w.+-])"
+
+# Next token outside a string:
+#   run    one or more well-formed members — a clean string that is properly
+#          terminated, a complete literal, ":" or a "," not followed by a
+#          closer — copied verbatim;
+#   op     a bracket, or a "," / ":" the run could not take;
+#   dirty  the opening quote of a string that needs repair.
+_TOKEN = re.compile(
+    r"(?P<run>(?:\s++"
+    rf"|{_CLEAN_STRING}(?=\s*+(?:[:,}}\]]|\Z))"
+    rf"|{_LITERAL}"
+    r"|:"
+    r"|,(?!\s*+[,}\]])"
+    r")++)"
+    r"|(?P<op>[{}\[\],:])"
+    r'|(?P<dirty>")'
+)
+# Next character that matters inside a string being repaired.
+_STRING_SPECIAL = re.compile(r'["\\\x00-\x1f]')
+# Top-level tokens of an already repaired container (truncated-tail fix-up).
+_MEMBER = re.compile(rf'{_CLEAN_STRING}|[{{}}\[\],:]|[^\s"{{}}\[\],:]+')
+_COMPLETE_LITERAL = re.compile(_LITERAL)
+
+# Characters that may legitimately follow a closing quote.
+_AFTER_STRING = frozenset(":,}]")
+_VALID_ESCAPES = frozenset('"\\/bfnrtu')
+_HEX = frozenset("0123456789abcdefABCDEF")
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_CLOSERS = {"{": "}", "[": "]"}
+_OPENERS = {"}": "{", "]": "["}
+_WHITESPACE = " \t\r\n"
+
+
+class TruncatedJSONError(json.JSONDecodeError):
+    """The response ended before its root value closed (allow_truncated=False)."""
+
+
+def scan_json(text: str, roots: str = "{[") -> tuple[str, bool]:
+    """
+    Repair the first JSON value in *text* that opens with one of *roots*.
+
+    Returns ``(repaired, truncated)`` — *truncated* is True when *text* ended
+    before the root value closed and the tail had to be synthesised.
+
+    Raises ``json.JSONDecodeError`` when no root opener is present.
+    """
+    n = len(text)
+    start = -1
+    for opener in roots:
+        idx = text.find(opener)
+        if idx != -1 and (start == -1 or idx < start):
+            start = idx
+    if start == -1:
+        raise json.JSONDecodeError("No JSON value found", text, 0)
+
+    out: list[str] = [text[start]]
+    stack: list[str] = [text[start]]
+    opened_at: list[int] = [0]        # index into *out* of each open container
+    bare_at = -1                      # index into *out* of the last bare word
+    i = start + 1
+
+    while i < n:
+        m = _TOKEN.search(text, i)
+        if m is None:
+            bare_at = len(out)
+            out.append(text[i:])
+            break
+        if m.start() > i:
+            bare_at = len(out)                # a word the grammar does not know,
+            out.append(text[i : m.start()])   # or a literal cut by the response end
+        tok = m.group()
+        kind = m.lastgroup
+        i = m.end()
+
+        if kind == "run":
+            if tok[0] in ", \t\r\n" and _last_char(out) == ",":
+                tok = tok.lstrip().removeprefix(",")    # ",," keeps one
+            out.append(tok)
+        elif kind == "dirty":
+            i, closed = _scan_string(text, i, out)
+            if not closed:
+                out.append('"')
+                break
+        elif tok in "{[":
+            stack.append(tok)
+            opened_at.append(len(out))
+            out.append(tok)
+        elif tok in "}]":
+            if _OPENERS[tok] not in stack:
+                continue                      # stray closer with no opener: drop it
+            _end_member(out)
+            # A mismatched closer closes every container opened after its opener.
+            while _CLOSERS[stack[-1]] != tok:
+                out.append(_CLOSERS[stack.pop()])
+                opened_at.pop()
+            out.append(tok)
+            stack.pop()
+            opened_at.pop()
+            if not stack:
+                return "".join(out), False
+        elif tok == ",":
+            if _last_char(out) != ",":        # ",," keeps one; a trailing one is
+                out.append(tok)               # dropped by the next closer
+        else:
+            out.append(tok)
+
+    # ── truncated: settle the innermost container, then close them all ───────
+    if bare_at == len(out) - 1 and not _COMPLETE_LITERAL.fullmatch(out[-1].strip()):
+        out.pop()                             # "tru", "3." …
+    inner = "".join(out[opened_at[-1] :])
+    del out[opened_at[-1] :]
+    out.append(_settle_tail(inner))
+    out.extend(_CLOSERS[o] for o in reversed(stack))
+    return "".join(out), True
+
+
+def _last_char(out: list[str]) -> str:
+    if out[-1] and out[-1][-1] not in _WHITESPACE:
+        return out[-1][-1]
+    for chunk in reversed(out):
+        stripped = chunk.rstrip()
+        if stripped:
+            return stripped[-1]
+    return ""
+
+
+def _end_member(out: list[str]) -> None:
+    # Called before a closer: drop a trailing comma, give a dangling colon a value.
+    if out[-1] and out[-1][-1] not in ",: \t\r\n":
+        return
+    for k in range(len(out) - 1, -1, -1):
+        stripped = out[k].rstrip()
+        if not stripped:
+            continue
+        if stripped[-1] == ",":
+            out[k] = stripped[:-1]
+        elif stripped[-1] == ":":
+            out.append("null")
+        return
+
+
+def _settle_tail(inner: str) -> str:
+    """
+    Make the innermost open container of a truncated response closable.
+
+    *inner* starts with its opener and has been repaired up to the cut.  A
+    trailing comma is removed, and a key or colon left without a value gets
+    ``null``.
+    """
+    inner = inner.rstrip()
+
+    # Walk the container's own members (nested values are skipped by depth).
+    is_object = inner[0] == "{"
+    depth = 0
+    last = ""
+    expect_key = is_object
+    last_was_key = False
+    for m in _MEMBER.finditer(inner, 1):
+        tok = m.group()
+        if tok in "{[":
+            depth += 1
+        elif tok in "}]":
+            depth -= 1
+        if depth or tok in "}]":
+            last, last_was_key, expect_key = tok, False, False
+            continue
+        last_was_key = expect_key and tok[0] == '"'
+        if tok == ",":
+            expect_key = is_object
+        elif tok != ":":
+            expect_key = False
+        last = tok
+
+    if last == ",":
+        return inner[:-1]
+    if last == ":":
+        return inner + "null"
+    if last_was_key:
+        return inner + ":null"
+    return inner
+
+
+def _scan_string(text: str, i: int, out: list[str]) -> tuple[int, bool]:
+    """
+    Copy a string body starting after its opening quote into *out*.
+
+    Returns ``(next_index, closed)``.  Control characters and invalid escapes
+    are rewritten; a quote followed by anything other than ``: , } ]`` (or the
+    end of the text) is treated as an unescaped inner quote.
+    """
+    n = len(text)
+    out.append('"')
+    while True:
+        m = _STRING_SPECIAL.search(text, i)
+        if m is None:
+            out.append(text[i:])
+            return n, False
+        j = m.start()
+        if j > i:
+            out.append(text[i:j])
+        ch = text[j]
+        if ch == '"':
+            k = j + 1
+            while k < n and text[k] in _WHITESPACE:
+                k += 1
+            if k >= n or text[k] in _AFTER_STRING:
+                out.append('"')
+                return j + 1, True
+            out.append('\\"')
+            i = j + 1
+        elif ch == "\\":
+            nxt = text[j + 1] if j + 1 < n else ""
+            if not nxt:
+                return n, False                     # dangling backslash at the cut
+            if nxt == "u" and not (j + 6 <= n and all(c in _HEX for c in text[j + 2 : j + 6])):
+                if j + 6 > n and all(c in _HEX for c in text[j + 2 :]):
+                    return n, False                 # \\u escape cut mid-way
+                out.append("\\\\")
+                i = j + 1
+            elif nxt in _VALID_ESCAPES:
+                out.append(text[j : j + 2])
+                i = j + 2
+            else:
+                out.append("\\\\")
+                i = j + 1
+        else:
+            out.append(_CONTROL_ESCAPES.get(ch) or f"\\u{ord(ch):04x}")
+            i = j + 1
+
+
+def repair_json(text: str, roots: str = "{[") -> str:
+    """Return the first JSON value in *text*, repaired in a single scan."""
+    return scan_json(text, roots)[0]
+
+
+def loads_tolerant(text: str, roots: str = "{[", *, allow_truncated: bool = True) -> Any:
+    """
+    Parse the first JSON value in *text*, tolerating typical LLM noise.
+
+    Well-formed input takes the ``json.loads`` fast path.  With
+    *allow_truncated* False a response that was cut off raises
+    ``TruncatedJSONError`` instead of returning a synthesised tail, so the
+    caller can fall back to keeping only the items that closed.
+    """
+    stripped = text.strip()
+    if stripped and stripped[0] in roots:
+        try:
+            return json.loads(stripped)
+        except json.JSONDecodeError:
+            pass
+    repaired, truncated = scan_json(text, roots)
+    if truncated and not allow_truncated:
+        raise TruncatedJSONError("JSON value is truncated", text, len(text))
+    return json.loads(repaired)
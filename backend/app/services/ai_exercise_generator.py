@@ -11,7 +11,9 @@ Provider routing (exercise generation)
 --------------------------------------
 Default chain is **DeepSeek first**, then **Groq** if the primary raises
 ``AIProviderError`` (rate limits, auth, timeouts).  Shared across all teacher
-plans; quota is still enforced per tier in the API layer.
+plans; quota is still enforced per tier in the API layer.  Both backends are
+wrapped in the proactive RPM/TPM limiter (providers/rate_limiter.py); callers
+declare their plan priority with ``admission_priority(...)``.
 
 Token-optimisation strategy (passage mode)
 ------------------------------------------
@@ -44,9 +46,15 @@ import logging
 import os
 import random
 import re
+from dataclasses import dataclass, field
 from typing import Any
 
 from app.services.ai.providers.base import AIProvider, AIProviderError
+from app.services.ai.providers.circuit_breaker import is_available, with_circuit_breaker
+from app.services.ai.providers.hedging import HEDGING_ENABLED, HedgedProvider
+from app.services.ai.providers.rate_limiter import with_rate_limit
+from app.services.ai.providers.telemetry import with_telemetry
+from app.services.ai.tolerant_json import loads_tolerant, repair_json
 from app.services.image_prompt_builder import ImagePromptBuilder
 
 logger = logging.getLogger(__name__)
@@ -273,7 +281,15 @@ class _DeepSeekPrimaryWithGroqFallback(AIProvider):
         # Exposed for logging/metadata; mirrors whichever backend last succeeded.
         self.model = getattr(primary, "model", type(primary).__name__)
 
+    def _skip_primary(self) -> bool:
+        # Primary circuit open → go straight to Groq instead of failing fast
+        # and logging a fallback warning on every call.
+        return self._secondary is not None and not is_available(self._primary)
+
     def generate(self, prompt: str) -> str:
+        if self._skip_primary():
+            self.model = getattr(self._secondary, "model", type(self._secondary).__name__)
+            return self._secondary.generate(prompt)
         try:
             out = self._primary.generate(prompt)
             self.model = getattr(self._primary, "model", type(self._primary).__name__)
@@ -289,6 +305,9 @@ class _DeepSeekPrimaryWithGroqFallback(AIProvider):
             return self._secondary.generate(prompt)
 
     async def agenerate(self, prompt: str) -> str:
+        if self._skip_primary():
+            self.model = getattr(self._secondary, "model", type(self._secondary).__name__)
+            return await self._secondary.agenerate(prompt)
         try:
             out = await self._primary.agenerate(prompt)
             self.model = getattr(self._primary, "model", type(self._primary).__name__)
@@ -320,7 +339,9 @@ def _try_build_groq_secondary() -> AIProvider | None:
     try:
         from app.services.ai.providers.groq_provider import GroqProvider
 
-        return GroqProvider()
+        return with_circuit_breaker(
+            with_rate_limit(with_telemetry(GroqProvider(), "groq"), "groq"), "groq",
+        )
     except AIProviderError as exc:
         # Prevent crash when Groq env is present but misconfigured at runtime.
         logger.warning("Groq fallback not usable for exercises: %s", exc)
@@ -339,7 +360,11 @@ def _build_deepseek_primary_chain() -> AIProvider:
     groq_secondary = _try_build_groq_secondary()
 
     try:
-        primary_llm = DeepSeekProvider()
+        # Rate-limited without a fixed priority: the shared chain serves every
+        # plan, so admission priority comes from the caller's admission_priority().
+        primary_llm = with_circuit_breaker(
+            with_rate_limit(with_telemetry(DeepSeekProvider(), "deepseek"), "deepseek"), "deepseek",
+        )
     except AIProviderError as exc:
         if groq_secondary is None:
             raise
@@ -381,6 +406,36 @@ def get_exercise_deepseek_groq_chain() -> AIProvider:
     return _exercise_deepseek_groq_chain
 
 
+# Hedged variant of the chain for latency-critical interactive endpoints.
+_exercise_hedged_chain: AIProvider | None = None
+
+
+def get_interactive_exercise_provider() -> AIProvider:
+    """
+    Provider for interactive single-exercise generation.
+
+    With AI_HEDGE_ENABLED=true (and both DeepSeek and Groq configured) this is
+    a ``HedgedProvider``: Groq is fired once DeepSeek has been running longer
+    than its rolling p90, and the first answer wins — bounding tail latency
+    instead of waiting for DeepSeek to error out.  Otherwise it is the plain
+    DeepSeek→Groq failover chain.
+    """
+    global _exercise_hedged_chain
+    chain = get_exercise_deepseek_groq_chain()
+    if not HEDGING_ENABLED or not isinstance(chain, _DeepSeekPrimaryWithGroqFallback):
+        return chain
+    if chain._secondary is None:
+        return chain
+    if _exercise_hedged_chain is None:
+        _exercise_hedged_chain = HedgedProvider(
+            primary=chain._primary,
+            secondary=chain._secondary,
+            name="exercise",
+        )
+        logger.info("AI exercise hedging enabled: %r", _exercise_hedged_chain)
+    return _exercise_hedged_chain
+
+
 def _build_default_provider() -> AIProvider:
     # Default deployment uses DeepSeek first (Groq remains optional fallback).
     provider_name = os.environ.get("AI_PROVIDER", "deepseek").strip().lower()
@@ -427,11 +482,12 @@ def get_provider_for_plan(plan: str) -> AIProvider:
     interactive exercises (HTTP layer still enforces per-tier AI quotas).
 
     The ``plan`` argument is reserved for future per-tier routing; today every
-    tier shares the chain returned by ``get_exercise_deepseek_groq_chain``.
+    tier shares the chain returned by ``get_interactive_exercise_provider``
+    (hedged when AI_HEDGE_ENABLED=true).
     """
     # Reserved for future per-plan overrides; identical routing for all tiers today.
     canonical_plan = (plan or "free").strip().lower()
-    chain = get_exercise_deepseek_groq_chain()
+    chain = get_interactive_exercise_provider()
     logger.info(
         "Exercise provider for plan=%r: DeepSeek→Groq chain (active_model=%s)",
         canonical_plan,
@@ -889,86 +945,37 @@ Return ONLY the JSON object. No markdown. No prose. No code fences."""
 # ══════════════════════════════════════════════════════════════════════════════
 
 def _extract_json_object(raw: str) -> str:
-    """Strip markdown fences and extract the first top-level JSON object."""
-    cleaned = re.sub(r"```(?:json)?", "", raw, flags=re.IGNORECASE).strip()
-    match = re.search(r"\{.*\}", cleaned, re.DOTALL)
-    if not match:
+    """
+    Return the first top-level JSON object in *raw*, repaired.
+
+    Fences, surrounding prose, trailing commas, raw control characters inside
+    strings and a truncated tail are all handled in one scan by
+    ``app.services.ai.tolerant_json``.
+    """
+    try:
+        return repair_json(raw, roots="{")
+    except json.JSONDecodeError:
         logger.error("No JSON object found in model output:\n%s", raw[:500])
         raise ValueError(
             "Model did not return a JSON object. "
             f"Raw output (first 500 chars): {raw[:500]!r}"
-        )
-    json_text = match.group(0)
-    json_text = re.sub(r",\s*(\])", r"\1", json_text)
-    json_text = re.sub(r",\s*(\})", r"\1", json_text)
-    return json_text
-
-
-def _sanitize_json_control_chars(json_str: str) -> str:
-    """Escape unescaped control characters (newline, carriage return, tab)
-    that appear *inside* JSON string values.
-
-    Ollama (and some other local models) sometimes emit literal newlines within
-    a JSON string instead of the escaped ``\\n`` sequence.  This causes
-    ``json.loads`` to fail with "Expecting ',' delimiter" because the parser
-    thinks the string ended at the newline.
-
-    The function walks the JSON character-by-character, tracking whether we are
-    inside a string, and replaces any bare control character it finds there with
-    its proper JSON escape sequence.  It is safe to call on already-valid JSON.
-    """
-    result: list[str] = []
-    in_string = False
-    escape_next = False
-
-    for ch in json_str:
-        if escape_next:
-            result.append(ch)
-            escape_next = False
-            continue
-
-        if ch == "\\" and in_string:
-            result.append(ch)
-            escape_next = True
-            continue
-
-        if ch == '"':
-            in_string = not in_string
-            result.append(ch)
-            continue
-
-        if in_string:
-            if ch == "\n":
-                result.append("\\n")
-            elif ch == "\r":
-                result.append("\\r")
-            elif ch == "\t":
-                result.append("\\t")
-            else:
-                result.append(ch)
-        else:
-            result.append(ch)
-
-    return "".join(result)
+        ) from None
 
 
 def _robust_json_loads(raw: str) -> Any:
-    """Parse JSON from a raw LLM response with progressive repair steps.
+    """Parse the first JSON object in a raw LLM response.
 
-    1. Extract the first JSON object and strip trailing commas
-       (via ``_extract_json_object``).
-    2. Try ``json.loads`` directly.
-    3. If that fails, sanitize unescaped control characters inside strings
-       (via ``_sanitize_json_control_chars``) and retry.
+    Well-formed output takes the ``json.loads`` fast path; anything else is
+    repaired in a single pass (see ``_extract_json_object``).  Ollama in
+    particular emits literal newlines inside string values, which plain
+    ``json.loads`` rejects with "Expecting ',' delimiter".
 
-    Raises ``json.JSONDecodeError`` only when all attempts are exhausted.
+    Raises ``ValueError`` when there is no object at all and
+    ``json.JSONDecodeError`` when the repaired text still does not parse.
     """
-    extracted = _extract_json_object(raw)
-    try:
-        return json.loads(extracted)
-    except json.JSONDecodeError:
-        sanitized = _sanitize_json_control_chars(extracted)
-        return json.loads(sanitized)
+    if "{" not in raw:
+        _extract_json_object(raw)  # logs and raises the "no JSON object" error
+    return loads_tolerant(raw, roots="{")
 
 
 def _repair_drag_to_gap(data: Any) -> dict:
@@ -1973,8 +1980,11 @@ def _parse_match_pairs_json(raw: str) -> dict:
     """Parse LLM JSON output into match_pairs data structure."""
     import json as _json
     cleaned = raw.strip().lstrip("```json").lstrip("```").rstrip("```").strip()
-    data = _json.loads(cleaned)
- 
+    return _match_pairs_from_dict(_json.loads(cleaned))
+
+
+def _match_pairs_from_dict(data: dict) -> dict:
+    """Normalise a parsed ``{"title", "pairs": [{left, right}]}`` object."""
     # Normalise: ensure ids exist
     left_items  = []
     right_items = []
@@ -2409,14 +2419,9 @@ async def generate_order_paragraphs_from_unit_content(
         try:
             raw = await _provider.agenerate(prompt)
 
-            # _robust_json_loads applies three repair steps in order:
-            #   1. _extract_json_object – strips markdown fences, locates the
-            #      first {...} block, removes trailing commas in arrays/objects.
-            #   2. json.loads – fast path for well-formed output.
-            #   3. _sanitize_json_control_chars + json.loads – handles the most
-            #      common Ollama failure: literal newlines inside string values
-            #      (paragraphs span multiple sentences) produce the
-            #      "Expecting ',' delimiter" error at the first bare \n.
+            # _robust_json_loads tolerates fences, trailing commas and the
+            # most common Ollama failure: literal newlines inside string
+            # values (paragraphs span multiple sentences).
             parsed = _robust_json_loads(raw)
 
             paragraphs = [str(p) for p in parsed.get("paragraphs", []) if str(p).strip()]
@@ -3514,28 +3519,7 @@ async def generate_true_false_from_unit_content(
                 cleaned = re.sub(r"\n?```$", "", cleaned).strip()
  
             parsed = _json.loads(cleaned)
- 
-            raw_questions = parsed.get("questions", parsed.get("statements", []))
-            if not raw_questions:
-                raise ValueError("No questions/statements in LLM output.")
- 
-            questions = []
-            for q in raw_questions:
-                prompt_text = str(
-                    q.get("prompt", q.get("statement", q.get("question", "")))
-                ).strip()
-                raw_answer = q.get("correct_answer", q.get("answer", q.get("is_true", True)))
-                is_true = (
-                    raw_answer
-                    if isinstance(raw_answer, bool)
-                    else str(raw_answer).lower() == "true"
-                )
-                if not prompt_text:
-                    continue
-                questions.append({"prompt": prompt_text, "correct_answer": is_true})
- 
-            if not questions:
-                raise ValueError("All generated statements were malformed.")
+            questions = _true_false_questions(parsed)
  
             data = {
                 "title":     str(parsed.get("title", "")).strip() or fallback_title,
@@ -3561,6 +3545,32 @@ async def generate_true_false_from_unit_content(
     )
 
 
+def _true_false_questions(parsed: dict) -> list[dict]:
+    """Normalise the ``questions`` (or ``statements``) list of a parsed reply."""
+    raw_questions = parsed.get("questions", parsed.get("statements", []))
+    if not raw_questions:
+        raise ValueError("No questions/statements in LLM output.")
+
+    questions = []
+    for q in raw_questions:
+        prompt_text = str(
+            q.get("prompt", q.get("statement", q.get("question", "")))
+        ).strip()
+        raw_answer = q.get("correct_answer", q.get("answer", q.get("is_true", True)))
+        is_true = (
+            raw_answer
+            if isinstance(raw_answer, bool)
+            else str(raw_answer).lower() == "true"
+        )
+        if not prompt_text:
+            continue
+        questions.append({"prompt": prompt_text, "correct_answer": is_true})
+
+    if not questions:
+        raise ValueError("All generated statements were malformed.")
+    return questions
+
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # text — Markdown reading / grammar explanation (TextBlock in the lesson player)
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -4091,4 +4101,282 @@ async def generate_exercise_instruction(
     # Defensive cap: keep the first line only — the AI is asked for one line
     # but multi-line replies sneak through occasionally.
     cleaned = cleaned.splitlines()[0].strip() if cleaned else fallback
-    return cleaned or fallback
\ No newline at end of file
+    return cleaned or fallback
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# BATCHED GENERATION — several exercise types + instructions in one prompt
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# generate_exercise() re-sends the source material once per exercise type and
+# generate_exercise_instruction() adds one more round-trip per block, so a
+# segment with N exercises costs up to 2N prompts over the same text.
+#
+# generate_exercise_batch() asks for every JSON-shaped type in _BATCH_PARTS plus
+# the learner instruction of EVERY requested type in a single structured
+# prompt.  Each part is run through the same parse / _validate_* helpers as the
+# single-type generators; parts that are missing or fail validation are listed
+# in ``failed`` and the caller regenerates only those via generate_exercise().
+# Types without a batch schema (image cards, tests, ordering, …) are always
+# generated singly but still get their instruction from the batch.
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+# Output contract per batchable type, embedded verbatim in the batch prompt.
+_BATCH_PARTS: dict[str, str] = {
+    "drag_to_gap": (
+        '{"title": "<descriptive title>", "passage": "<passage with each answer in '
+        '[square brackets], e.g. She [will finish] her work.>"}'
+    ),
+    "type_word_in_gap": (
+        '{"title": "<descriptive title>", "passage": "<passage with each answer in '
+        '[square brackets]>"}'
+    ),
+    "match_pairs": (
+        '{"title": "<descriptive title>", "pairs": [{"left": "<term>", "right": "<match>"}, ...]}'
+    ),
+    "true_false": (
+        '{"title": "<descriptive title>", "questions": '
+        '[{"prompt": "<statement>", "correct_answer": true}, ...]}'
+    ),
+    "true-false": (
+        '{"title": "<descriptive title>", "questions": '
+        '[{"prompt": "<statement>", "correct_answer": true}, ...]}'
+    ),
+}
+
+
+@dataclass
+class ExerciseBatchResult:
+    """Outcome of one generate_exercise_batch() call."""
+
+    # Validated (exercise_data, metadata) per exercise type.
+    exercises: dict[str, tuple[dict, dict]] = field(default_factory=dict)
+    # Learner instruction per requested exercise type (English fallback when missing).
+    instructions: dict[str, str] = field(default_factory=dict)
+    # Batchable types whose part was missing or invalid → reason.
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def _batch_part_rules(
+    exercise_type: str,
+    params: dict,
+    topic_hint: str | None,
+    content_language: str,
+    bilingual: tuple[str, str] | None,
+) -> str:
+    """Per-type rules for one part of the batch prompt."""
+    if exercise_type in ("drag_to_gap", "type_word_in_gap"):
+        gap_count = params.get("gap_count")
+        count = (
+            f"exactly {gap_count} gaps" if gap_count
+            else "an appropriate number of gaps (3–8)"
+        )
+        gap_type = f" Gap words: {params['gap_type']}." if params.get("gap_type") else ""
+        return (
+            f"A fill-in-the-gap passage with {count}.{gap_type} Every answer is the exact "
+            "word/phrase (≤4 words) inside [brackets]; ALL answers must be UNIQUE."
+        )
+    if exercise_type == "match_pairs":
+        count = max(4, params.get("pair_count") or _extract_count_from_hint(topic_hint, default=6))
+        if bilingual:
+            target, native = bilingual
+            langs = (
+                f" 'left' is the word or phrase in {target.upper()}, "
+                f"'right' is its translation in {native.upper()}."
+            )
+        else:
+            langs = " Pairs are term ↔ definition/translation from the source."
+        return f"Exactly {count} clearly related pairs.{langs}"
+    count = max(4, params.get("pair_count") or _extract_count_from_hint(topic_hint, default=6))
+    lang = (
+        f" Statements in {content_language.upper()}."
+        if content_language and content_language.strip().lower() not in ("", "auto")
+        else ""
+    )
+    return (
+        f"Exactly {count} unambiguous declarative statements, about half true and "
+        f"half false (false ones contain a plausible wrong detail).{lang}"
+    )
+
+
+def _finalize_batch_part(
+    exercise_type: str,
+    part: Any,
+    params: dict,
+    bilingual: tuple[str, str] | None,
+) -> tuple[dict, dict]:
+    """Validate one batch part with the single-type helpers; raise ValueError on failure."""
+    if not isinstance(part, dict):
+        raise ValueError(f"expected an object, got {type(part).__name__}")
+    title = str(part.get("title") or "").strip()
+    meta: dict = {"exercise_type": exercise_type}
+
+    if exercise_type in ("drag_to_gap", "type_word_in_gap"):
+        passage = str(part.get("passage") or "")
+        gap_count = params.get("gap_count")
+        warning = _validate_marked_passage(passage, gap_count, None)
+        data = _parse_marked_passage(passage, title or "Fill in the gaps")
+        _validate_drag_to_gap(data, gap_count)
+        data.pop("_sentence_count_warning", None)
+        data.pop("_partial_gap_warning", None)
+        meta["gap_count_requested"] = gap_count if gap_count is not None else "auto"
+        meta["gap_count_actual"] = len(data["gaps"])
+        if warning:
+            meta["warning"] = warning
+        return data, meta
+
+    if exercise_type == "match_pairs":
+        data = _match_pairs_from_dict(part)
+        data["title"] = data["title"] or "Match the pairs"
+        meta["bilingual_mode"] = bilingual is not None
+        if bilingual:
+            meta["left_language"], meta["right_language"] = bilingual
+        return data, meta
+
+    questions = _true_false_questions(part)
+    meta["question_count"] = len(questions)
+    return {"title": title or "True / False", "questions": questions}, meta
+
+
+async def generate_exercise_batch(
+    exercise_types: list[str],
+    unit_content: str,
+    content_language: str = "auto",
+    instruction_language: str = "english",
+    topic_hint: str | None = None,
+    *,
+    type_params: dict[str, dict] | None = None,
+    type_hints: dict[str, str] | None = None,
+    native_language: str | None = None,
+    target_language: str | None = None,
+    provider: AIProvider | None = None,
+) -> ExerciseBatchResult:
+    """
+    Generate several exercise types and their learner instructions in one call.
+
+    Parameters
+    ----------
+    exercise_types
+        Registry keys for one segment; duplicates are generated once.
+    type_params
+        Per-type generator params (``gap_count``, ``gap_type``, ``pair_count``).
+    type_hints
+        Per-type directive appended to that part's rules (e.g. the language
+        contract UnitGenerator prepends to single-type hints).
+
+    Returns an ExerciseBatchResult; ``failed`` lists the batchable types the
+    caller must regenerate with generate_exercise().  No LLM call is made when
+    nothing is batchable and the instructions are English.
+
+    Raises
+    ------
+    AIProviderError  Underlying LLM provider failed.
+    """
+    types = list(dict.fromkeys(exercise_types))
+    result = ExerciseBatchResult(
+        instructions={t: _english_fallback_for(t) for t in types},
+    )
+    batch_types = [t for t in types if t in _BATCH_PARTS]
+    translate = _normalize_instruction_language(instruction_language) != "english"
+    if not batch_types and not translate:
+        return result
+
+    type_params = type_params or {}
+    type_hints = type_hints or {}
+    _native = (native_language or "").strip()
+    _target = (target_language or "").strip()
+    bilingual = (
+        (_target, _native)
+        if _native and _target
+        and "auto" not in (_native.lower(), _target.lower())
+        and _native.lower() != _target.lower()
+        else None
+    )
+
+    title_lang = (
+        f" Write every \"title\" in {instruction_language.upper()}."
+        if instruction_language and instruction_language.lower() not in ("auto", "")
+        else ""
+    )
+    content_lang = (
+        f"All exercise content MUST be in {content_language.upper()}.\n"
+        if content_language and content_language.strip().lower() not in ("", "auto")
+        else "Use the language of the source material for all exercise content.\n"
+    )
+    part_lines = []
+    for t in batch_types:
+        rules = _batch_part_rules(t, type_params.get(t, {}), topic_hint, content_language, bilingual)
+        extra = f" {type_hints[t].strip()}" if type_hints.get(t) else ""
+        part_lines.append(f'- "{t}": {rules}{extra}\n  Shape: {_BATCH_PARTS[t]}')
+    instruction_lines = [f'- "{t}": {_english_fallback_for(t)}' for t in types]
+    topic_str = f"\n\nTeacher directive: {topic_hint}" if topic_hint else ""
+
+    sections = [
+        "You are a language-exercise designer. "
+        "Respond ONLY with one valid JSON object — no markdown, no explanation.",
+        f"Source material:\n{unit_content[:3000]}{topic_str}",
+    ]
+    if batch_types:
+        sections.append(
+            "Create one exercise per key below, all derived from the source material. "
+            f"{content_lang}"
+            "Each \"title\" is SHORT (≤8 words), DESCRIPTIVE and topic-specific — never generic."
+            f"{title_lang}\n" + "\n".join(part_lines)
+        )
+    if translate:
+        sections.append(
+            f"Also translate each learner instruction below into {instruction_language}: "
+            "short, imperative, natural wording for a language-learning app.\n"
+            + "\n".join(instruction_lines)
+        )
+    shape = []
+    if batch_types:
+        shape.append('"exercises": {' + ", ".join(f'"{t}": {{...}}' for t in batch_types) + "}")
+    if translate:
+        shape.append('"instructions": {' + ", ".join(f'"{t}": "..."' for t in types) + "}")
+    sections.append("Respond with exactly this JSON structure:\n{" + ", ".join(shape) + "}")
+    prompt = "\n\n".join(sections)
+
+    _provider = provider or _default_provider
+    raw = await _provider.agenerate(prompt)
+    try:
+        parsed = _robust_json_loads(raw)
+        if not isinstance(parsed, dict):
+            raise ValueError("batch reply is not a JSON object")
+    except (ValueError, json.JSONDecodeError) as exc:
+        logger.warning("exercise batch: unparseable reply (%s); all parts fall back.", exc)
+        result.failed = {t: f"unparseable batch reply: {exc}" for t in batch_types}
+        return result
+
+    instructions = parsed.get("instructions") if translate else None
+    if isinstance(instructions, dict):
+        for t in types:
+            line = str(instructions.get(t) or "").strip().strip("`\"'").strip()
+            if line:
+                result.instructions[t] = line.splitlines()[0].strip()
+
+    exercises = parsed.get("exercises")
+    exercises = exercises if isinstance(exercises, dict) else {}
+    model = getattr(_provider, "model", "unknown")
+    for t in batch_types:
+        try:
+            data, meta = _finalize_batch_part(t, exercises.get(t), type_params.get(t, {}), bilingual)
+        except (ValueError, KeyError, TypeError, AttributeError) as exc:
+            logger.warning("exercise batch: part %r failed validation: %s", t, exc)
+            result.failed[t] = str(exc)
+            continue
+        data["instruction"] = result.instructions[t]
+        meta.update({
+            "generation_model":     model,
+            "generation_strategy":  "batch",
+            "generation_attempts":  1,
+            "batch_size":           len(batch_types),
+            "instruction":          result.instructions[t],
+            "instruction_language": instruction_language,
+        })
+        result.exercises[t] = (data, meta)
+
+    logger.info(
+        "exercise batch: %d/%d parts valid, %d instructions (%d prompt chars).",
+        len(result.exercises), len(batch_types), len(types), len(prompt),
+    )
+    return result
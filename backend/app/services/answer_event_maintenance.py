@@ -0,0 +1,360 @@
+"""
+app/services/answer_event_maintenance.py
+========================================
+Partition upkeep, compaction and retention for ``exercise_field_answer_events``.
+
+The table is append-only with one row per persisted live patch, and nothing
+reads its full history any more — hydration and restore use
+latest_exercise_answers.  Since alembic 0025 it is range-partitioned by
+``created_at`` into monthly partitions (``exercise_field_answer_events_YYYYMM``)
+plus ``exercise_field_answer_events_default``.  One maintenance pass:
+
+1. ensure_partitions — creates the current month and the next
+   ``ANSWER_EVENTS_PARTITIONS_AHEAD`` months, so live inserts never land in
+   the default partition (which would block creating that month later).
+2. compact_closed_lessons — deletes every row superseded by a newer write to
+   the same (classroom, student, block, field) once the lesson is closed:
+   the classroom has no live_sessions row and the field's latest write is
+   older than ``ANSWER_EVENTS_COMPACT_AFTER_HOURS``.  The newest row per
+   field (the one latest_exercise_answers reflects) is always kept.
+   Deleted in batches of ``ANSWER_EVENTS_COMPACT_BATCH`` rows, one commit each.
+3. expire_partitions — monthly partitions whose whole range is older than
+   ``ANSWER_EVENTS_RETENTION_DAYS`` are written to
+   ``{ANSWER_EVENTS_ARCHIVE_DIR}/{partition}.jsonl.gz`` (when set), then
+   detached and dropped.  latest_exercise_answers is untouched, so students
+   still get their answers back after the raw history is gone.
+
+Each pass records the table size (all partitions, indexes included) before
+and after, next to the answer writer's batch latency, in maintenance_stats()
+— surfaced by GET /live/stats.  scripts/bench_answer_events.py measures
+insert latency and size on demand.
+
+On a database where the table is not partitioned (0025 not applied, or a
+plain table from ``create_all``) steps 1 and 3 are skipped; compaction still
+runs.  Off PostgreSQL the size figures are reported as None.
+
+Environment variables
+---------------------
+ANSWER_EVENTS_MAINTENANCE_HOURS    Pass interval; 0 only ensures partitions at startup (default 24).
+ANSWER_EVENTS_PARTITIONS_AHEAD     Future monthly partitions to keep created (default 2).
+ANSWER_EVENTS_COMPACT_AFTER_HOURS  Quiet time before a closed lesson is compacted; 0 disables (default 24).
+ANSWER_EVENTS_COMPACT_BATCH        Rows deleted per compaction transaction (default 5000).
+ANSWER_EVENTS_RETENTION_DAYS       Raw history kept; 0 keeps everything (default 0).
+ANSWER_EVENTS_ARCHIVE_DIR          Where expired partitions are archived; empty drops them unarchived.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_INTERVAL_HOURS      = float(os.environ.get("ANSWER_EVENTS_MAINTENANCE_HOURS", "24"))
+_PARTITIONS_AHEAD    = int(os.environ.get("ANSWER_EVENTS_PARTITIONS_AHEAD", "2"))
+_COMPACT_AFTER_HOURS = float(os.environ.get("ANSWER_EVENTS_COMPACT_AFTER_HOURS", "24"))
+_COMPACT_BATCH       = int(os.environ.get("ANSWER_EVENTS_COMPACT_BATCH", "5000"))
+_RETENTION_DAYS      = float(os.environ.get("ANSWER_EVENTS_RETENTION_DAYS", "0"))
+_ARCHIVE_DIR         = os.environ.get("ANSWER_EVENTS_ARCHIVE_DIR", "")
+
+TABLE = "exercise_field_answer_events"
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+_PARTITION_RE = re.compile(rf"^{TABLE}_(\d{{4}})(\d{{2}})$")
+
+
+# ── Partition naming ──────────────────────────────────────────────────────────
+
+def month_start(moment: datetime | date) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_{month.year:04d}{month.month:02d}"
+
+
+def partition_month(name: str) -> date | None:
+    """Inverse of partition_name(); None for the default or foreign tables."""
+    m = _PARTITION_RE.match(name)
+    return date(int(m.group(1)), int(m.group(2)), 1) if m else None
+
+
+def partition_ddl(month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+    )
+
+
+def expired_months(months: list[date], now: datetime, retention_days: float) -> list[date]:
+    """Months whose whole range ends before ``now - retention_days``."""
+    if retention_days <= 0:
+        return []
+    cutoff = (now - timedelta(days=retention_days)).date()
+    return sorted(m for m in months if next_month(m) <= cutoff)
+
+
+# ── Inspection ────────────────────────────────────────────────────────────────
+
+def is_partitioned(db: Session) -> bool:
+    """True on PostgreSQL once 0025 has run; always False on other databases."""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(
+        text("""
+            SELECT 1 FROM pg_partitioned_table p
+            JOIN pg_class c ON c.oid = p.partrelid
+            WHERE c.relname = :table
+        """),
+        {"table": TABLE},
+    ).first() is not None
+
+
+def list_partitions(db: Session) -> list[str]:
+    rows = db.execute(
+        text("""
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = :table
+            ORDER BY c.relname
+        """),
+        {"table": TABLE},
+    ).fetchall()
+    return [row.relname for row in rows]
+
+
+def table_stats(db: Session) -> dict[str, Any] | None:
+    """
+    Size (bytes, indexes included) and estimated rows across every partition;
+    None off PostgreSQL, where the pg_class catalog does not exist.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    row = db.execute(
+        text("""
+            SELECT COALESCE(SUM(pg_total_relation_size(c.oid)), 0) AS total_bytes,
+                   COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)      AS est_rows,
+                   COUNT(*) - 1                                    AS partitions
+            FROM pg_class c
+            WHERE c.relname = :table
+               OR c.oid IN (
+                   SELECT i.inhrelid FROM pg_inherits i
+                   JOIN pg_class p ON p.oid = i.inhparent
+                   WHERE p.relname = :table
+               )
+        """),
+        {"table": TABLE},
+    ).one()
+    return {
+        "total_bytes": int(row.total_bytes),
+        "est_rows":    int(row.est_rows),
+        "partitions":  max(0, int(row.partitions)),
+    }
+
+
+# ── Maintenance steps ─────────────────────────────────────────────────────────
+
+def ensure_partitions(db: Session, now: datetime | None = None, ahead: int | None = None) -> int:
+    """Create the default partition and the current + upcoming months; returns months ensured."""
+    if not is_partitioned(db):
+        return 0
+    now = now or datetime.now(timezone.utc)
+    ahead = _PARTITIONS_AHEAD if ahead is None else max(0, ahead)
+    db.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+    month = month_start(now)
+    ensured = 0
+    for _ in range(ahead + 1):
+        try:
+            with db.begin_nested():
+                db.execute(text(partition_ddl(month)))
+            ensured += 1
+        except Exception as exc:  # noqa: BLE001
+            # Rows for this month already sit in the default partition.
+            logger.warning("answer_events: cannot create %s: %s", partition_name(month), exc)
+        month = next_month(month)
+    db.commit()
+    return ensured
+
+
+def compact_closed_lessons(
+    db: Session,
+    quiet_hours: float | None = None,
+    batch: int | None = None,
+    now: datetime | None = None,
+) -> int:
+    """Delete superseded events of closed lessons; returns rows deleted."""
+    quiet_hours = _COMPACT_AFTER_HOURS if quiet_hours is None else quiet_hours
+    if quiet_hours <= 0:
+        return 0
+    batch = max(1, _COMPACT_BATCH if batch is None else batch)
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(hours=quiet_hours)
+    deleted = 0
+    while True:
+        result = db.execute(
+            text(f"""
+                DELETE FROM {TABLE}
+                WHERE (id, created_at) IN (
+                    SELECT e.id, e.created_at
+                    FROM {TABLE} e
+                    JOIN latest_exercise_answers l
+                      ON  l.classroom_id = e.classroom_id
+                      AND l.student_id   = e.student_id
+                      AND l.block_id     = e.block_id
+                      AND l.field_key    = e.field_key
+                    WHERE e.created_at < l.updated_at
+                      AND l.updated_at   < :cutoff
+                      AND NOT EXISTS (
+                          SELECT 1 FROM live_sessions s WHERE s.classroom_id = e.classroom_id
+                      )
+                    LIMIT :batch
+                )
+            """),
+            {"cutoff": cutoff, "batch": batch},
+        )
+        db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch:
+            return deleted
+
+
+def archive_partition(db: Session, name: str, archive_dir: str) -> tuple[Path, int]:
+    """Stream one partition to ``{archive_dir}/{name}.jsonl.gz``; returns (path, rows)."""
+    directory = Path(archive_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f"{name}.jsonl.gz"
+    partial = target.with_suffix(".gz.partial")
+    rows = 0
+    result = db.execute(
+        text(f"SELECT * FROM {name} ORDER BY created_at, id")
+        .execution_options(stream_results=True, yield_per=2000)
+    )
+    with gzip.open(partial, "wt", encoding="utf-8") as fh:
+        for row in result.mappings():
+            fh.write(json.dumps(dict(row), default=str) + "\n")
+            rows += 1
+    partial.replace(target)
+    return target, rows
+
+
+def expire_partitions(
+    db: Session,
+    retention_days: float | None = None,
+    archive_dir: str | None = None,
+    now: datetime | None = None,
+) -> list[dict[str, Any]]:
+    """Archive (optionally) then detach and drop monthly partitions past retention."""
+    retention_days = _RETENTION_DAYS if retention_days is None else retention_days
+    archive_dir = _ARCHIVE_DIR if archive_dir is None else archive_dir
+    if retention_days <= 0 or not is_partitioned(db):
+        return []
+    months = [m for m in map(partition_month, list_partitions(db)) if m is not None]
+    expired: list[dict[str, Any]] = []
+    for month in expired_months(months, now or datetime.now(timezone.utc), retention_days):
+        name = partition_name(month)
+        entry: dict[str, Any] = {"partition": name, "archive": None, "rows": None}
+        if archive_dir:
+            path, rows = archive_partition(db, name, archive_dir)
+            entry.update(archive=str(path), rows=rows)
+        db.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+        db.execute(text(f"DROP TABLE {name}"))
+        db.commit()
+        logger.info("answer_events: expired partition %s (%s)", name, entry)
+        expired.append(entry)
+    return expired
+
+
+# ── Full pass ─────────────────────────────────────────────────────────────────
+
+_last_run: dict[str, Any] | None = None
+
+
+def run_maintenance(db: Session) -> dict[str, Any]:
+    """ensure → compact → expire, with table size before and after."""
+    global _last_run
+    started = time.perf_counter()
+    before = table_stats(db)
+    report: dict[str, Any] = {
+        "partitioned":        is_partitioned(db),
+        "partitions_ensured": ensure_partitions(db),
+        "compacted_rows":     compact_closed_lessons(db),
+        "expired":            expire_partitions(db),
+    }
+    report.update(
+        size_before=before,
+        size_after=table_stats(db),
+        duration_ms=round((time.perf_counter() - started) * 1000, 1),
+        finished_at=datetime.now(timezone.utc).isoformat(),
+    )
+    _last_run = report
+    logger.info("answer_events: maintenance done — %s", report)
+    return report
+
+
+def maintenance_stats() -> dict[str, Any]:
+    """Last pass report plus the live writer's insert timings."""
+    from app.services.live_answer_writer import live_answer_writer  # noqa: PLC0415
+
+    writer = live_answer_writer.stats()
+    return {
+        "last_run": _last_run,
+        "insert":   {k: writer[k] for k in ("last_flush_ms", "avg_batch_rows", "batches", "written_rows")},
+    }
+
+
+# ── Background task ───────────────────────────────────────────────────────────
+
+_maintenance_task: asyncio.Task | None = None
+
+
+def _with_session(step) -> Any:
+    from app.core.database import SessionLocal  # noqa: PLC0415
+
+    db = SessionLocal()
+    try:
+        return step(db)
+    finally:
+        db.close()
+
+
+async def _maintenance_loop(interval_seconds: float) -> None:
+    # Partitions first, so the current month never spills into the default one.
+    try:
+        await asyncio.to_thread(_with_session, ensure_partitions)
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("answer_events: could not ensure partitions: %s", exc)
+    while interval_seconds > 0:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(_with_session, run_maintenance)
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("answer_events: maintenance failed: %s", exc)
+
+
+def start_maintenance_task() -> None:
+    """
+    Ensure partitions, then launch the periodic pass (only the partition
+    check runs when ANSWER_EVENTS_MAINTENANCE_HOURS is 0).
+    """
+    global _maintenance_task
+    if _maintenance_task is None or _maintenance_task.done():
+        _maintenance_task = asyncio.create_task(_maintenance_loop(_INTERVAL_HOURS * 3600))
+        logger.info(
+            "answer_events: maintenance task started (interval=%.1fh, retention=%.0fd)",
+            _INTERVAL_HOURS, _RETENTION_DAYS,
+        )
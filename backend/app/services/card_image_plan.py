@@ -0,0 +1,139 @@
+"""
+app/services/card_image_plan.py
+===============================
+Course-scoped planner for vocabulary-card images.
+
+Word-to-image exercises (drag_word_to_image, type_word_to_image,
+select_form_to_image) each illustrate their cards independently.  Across a
+12-unit course the same concept ("apple") shows up in many exercises, often
+at the same moment, so every one of them missed the image cache and paid for
+its own fal.ai call.
+
+A CardImagePlan is keyed by the same concept string used as
+``cache_key_seed`` for the image cache:
+
+* the first card asking for a concept starts ONE image job; every later or
+  concurrent card with that concept awaits the same job and receives its URL;
+* a failed job (None) is dropped so a later card may retry;
+* every job runs under one process-wide semaphore, so a course burst never
+  fires more than ``CARD_IMAGE_CONCURRENCY`` fal.ai requests at a time.
+
+Usage
+-----
+    plan = CardImagePlan(own_sessions=True)    # one per course generation
+    ...
+    with card_image_scope(plan):               # inside every unit worker
+        await service.generate(...)
+
+Outside a scope each exercise gets a throwaway plan (dedupe within it only).
+
+Environment variables
+---------------------
+CARD_IMAGE_CONCURRENCY  Max concurrent card-image jobs per process (default 4).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+_CONCURRENCY = int(os.environ.get("CARD_IMAGE_CONCURRENCY", "4"))
+
+_semaphore: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
+
+
+def _global_semaphore() -> asyncio.Semaphore:
+    # Created lazily (and per loop) so it binds to the running event loop.
+    global _semaphore
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore[0] is not loop:
+        _semaphore = (loop, asyncio.Semaphore(max(1, _CONCURRENCY)))
+    return _semaphore[1]
+
+
+class CardImagePlan:
+    """Concept → shared image job for one generation run."""
+
+    def __init__(self, own_sessions: bool = False) -> None:
+        # When True each job opens its own DB session instead of borrowing the
+        # caller's, because the job may outlive the unit that started it.
+        self.own_sessions = own_sessions
+        self._jobs: dict[str, asyncio.Future] = {}
+        self.requested = 0
+        self.deduped = 0
+        self.generated = 0
+
+    async def image_url(
+        self,
+        concept: str,
+        render: Callable[[Any], Awaitable[str | None]],
+        db: Any = None,
+    ) -> str | None:
+        """Return the image URL for *concept*, running *render(db)* at most once."""
+        self.requested += 1
+        job = self._jobs.get(concept)
+        if job is None:
+            job = asyncio.ensure_future(self._run(render, db))
+            self._jobs[concept] = job
+        else:
+            self.deduped += 1
+        # shield: a cancelled card (client disconnect) must not cancel a job
+        # other cards are waiting for.
+        url = await asyncio.shield(job)
+        if url is None and self._jobs.get(concept) is job:
+            del self._jobs[concept]
+        return url
+
+    async def _run(self, render: Callable[[Any], Awaitable[str | None]], db: Any) -> str | None:
+        async with _global_semaphore():
+            if not (self.own_sessions and db is not None):
+                url = await render(db)
+            else:
+                from app.core.database import SessionLocal  # noqa: PLC0415
+
+                session = SessionLocal()
+                try:
+                    url = await render(session)
+                finally:
+                    session.close()
+        if url is not None:
+            self.generated += 1
+        return url
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "requested": self.requested,
+            "deduped":   self.deduped,
+            "generated": self.generated,
+            "concepts":  len(self._jobs),
+        }
+
+
+_current_plan: contextvars.ContextVar[CardImagePlan | None] = contextvars.ContextVar(
+    "card_image_plan", default=None,
+)
+
+
+def current_card_image_plan() -> CardImagePlan | None:
+    """Plan of the enclosing card_image_scope(), if any."""
+    return _current_plan.get()
+
+
+@contextmanager
+def card_image_scope(plan: CardImagePlan | None = None) -> Iterator[CardImagePlan]:
+    """
+    Make *plan* (default: a fresh one) current for this task and the tasks it
+    starts.  Enter it inside each worker task when several tasks share a plan.
+    """
+    plan = plan or CardImagePlan(own_sessions=True)
+    token = _current_plan.set(plan)
+    try:
+        yield plan
+    finally:
+        _current_plan.reset(token)
@@ -18,6 +18,8 @@ from app.models.course import Course, CourseLevel, CourseStatus
 from app.models.unit import Unit, UnitLevel
 from app.models.task import Task, TaskType, TaskStatus
 from app.services.ai.providers.base import AIProvider, AIProviderError
+from app.services.ai.providers.telemetry import llm_context
+from app.services.ai.tolerant_json import loads_tolerant
 from app.services.test_builder import create_ai_generated_test
 
 logger = logging.getLogger(__name__)
@@ -79,7 +81,8 @@ class CourseGeneratorService:
             Raw course blueprint with units, tasks, tests structure.
         """
         prompt = self._build_prompt(request)
-        raw_output = await self.provider.agenerate(prompt)
+        with llm_context(phase="course.blueprint"):
+            raw_output = await self.provider.agenerate(prompt)
         blueprint = self._parse_json(raw_output)
         return blueprint
 
@@ -260,25 +263,17 @@ Return ONLY valid JSON, no markdown, no code blocks."""
         """
         Extract JSON from LLM output.
 
-        Handles cases where the model wraps JSON in markdown code blocks.
+        Fences, prose, trailing commas and a truncated tail are repaired by
+        the shared tolerant decoder.
         """
-        raw_output = raw_output.strip()
-
-        # Remove markdown code blocks if present
-        if raw_output.startswith("```"):
-            lines = raw_output.split("\n")
-            # Remove first line (```json or ```)
-            lines = lines[1:]
-            # Remove last line if it's ```
-            if lines and lines[-1].strip() == "```":
-                lines = lines[:-1]
-            raw_output = "\n".join(lines)
-
         try:
-            return json.loads(raw_output)
+            data = loads_tolerant(raw_output, roots="{")
         except json.JSONDecodeError as exc:
             logger.error("Failed to parse JSON from LLM output: %s", raw_output[:500])
             raise ValueError(f"AI returned invalid JSON: {exc}") from exc
+        if not isinstance(data, dict):
+            raise ValueError("AI returned invalid JSON: expected an object")
+        return data
 
 
 # ── Helper functions ────────────────────────────────────────────────────────────
@@ -0,0 +1,243 @@
+"""
+app/services/course_speculation.py
+==================================
+Speculative pre-generation of the first units of an AI-built course.
+
+After the outline is saved the teacher usually spends tens of seconds
+reviewing it before opening GET /course-builder/{id}/stream, and only then
+does unit 1 start generating.  POST /course-builder/{id}/speculate starts
+the first ``COURSE_SPECULATIVE_UNITS`` units straight away; the stream then
+*attaches* to that work instead of starting over:
+
+* a running job is followed live — its buffered segment_ready events are
+  replayed, then new ones forwarded as they happen;
+* a finished job is replayed instantly (unit_done included);
+* a job whose unit was edited through PATCH /{id}/outline is discarded —
+  cancelled if still running, its segments deleted if already persisted —
+  and the stream generates the edited unit normally.
+
+Each job is fingerprinted with the exact generation inputs (title,
+description, sections, languages, level).  The stream only attaches when its
+own fingerprint matches, so an edit made through any other path is caught
+at claim time too.
+
+The registry is per process: with several workers the stream attaches only
+when it lands on the worker that speculated (sticky sessions), otherwise it
+regenerates the unit and overwrites the speculative content.
+
+Environment variables
+---------------------
+COURSE_SPECULATIVE_UNITS  Leading units to pre-generate, 0–2 (default 1; 0 disables).
+COURSE_SPECULATION_TTL    Seconds an unclaimed speculation is remembered (default 1800).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+SPECULATIVE_UNITS = max(0, min(2, int(os.environ.get("COURSE_SPECULATIVE_UNITS", "1"))))
+_TTL_SECONDS      = float(os.environ.get("COURSE_SPECULATION_TTL", "1800"))
+
+TERMINAL_EVENTS = ("unit_done", "unit_error")
+
+
+class SpeculativeUnit:
+    """One pre-generated unit: its task plus every event it has produced."""
+
+    def __init__(self, unit_id: int, fingerprint: str) -> None:
+        self.unit_id = unit_id
+        self.fingerprint = fingerprint
+        self.task: asyncio.Task | None = None
+        self.history: list[dict] = []
+        self.result: Any = None           # UnitGenerateResult once unit_done
+        self.claimed = False
+        self._listeners: list[asyncio.Queue[dict]] = []
+
+    @property
+    def finished(self) -> bool:
+        return bool(self.history) and self.history[-1]["type"] in TERMINAL_EVENTS
+
+    def emit(self, event: dict) -> None:
+        """Record *event* and forward it to every attached stream."""
+        self.history.append(event)
+        for queue in self._listeners:
+            queue.put_nowait(event)
+
+    async def events(self) -> AsyncIterator[dict]:
+        """Replay the history, then follow live events until unit_done / unit_error."""
+        queue: asyncio.Queue[dict] = asyncio.Queue()
+        for event in self.history:
+            queue.put_nowait(event)
+        self._listeners.append(queue)
+        try:
+            while True:
+                event = await queue.get()
+                yield event
+                if event["type"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            self._listeners.remove(queue)
+
+
+class CourseSpeculation:
+    """Speculative jobs for one course, plus what the stream should reuse."""
+
+    def __init__(self, course_id: int, teacher_id: int, service: Any) -> None:
+        self.course_id = course_id
+        self.teacher_id = teacher_id
+        # The UnitGeneratorService the jobs ran on; the stream reuses it so
+        # image-card answer words stay unique across the whole course.
+        self.service = service
+        self.created_at = time.monotonic()
+        self.units: dict[int, SpeculativeUnit] = {}
+
+
+class SpeculationRegistry:
+    """Process-wide course_id → CourseSpeculation map."""
+
+    def __init__(self, ttl_seconds: float = _TTL_SECONDS) -> None:
+        self._ttl = ttl_seconds
+        self._courses: dict[int, CourseSpeculation] = {}
+        self._counters = {"started": 0, "claimed": 0, "discarded": 0, "expired": 0}
+
+    def start(
+        self,
+        course_id: int,
+        teacher_id: int,
+        service: Any,
+        jobs: list[tuple[int, str, Callable[[SpeculativeUnit], Awaitable[None]]]],
+    ) -> list[int]:
+        """
+        Launch ``run(unit)`` for each ``(unit_id, fingerprint, run)`` not
+        already speculated with the same fingerprint.  Returns the unit ids
+        that are now speculated.
+        """
+        self._expire()
+        course = self._courses.get(course_id)
+        if course is None or course.teacher_id != teacher_id:
+            course = CourseSpeculation(course_id, teacher_id, service)
+            self._courses[course_id] = course
+        started: list[int] = []
+        for unit_id, fingerprint, run in jobs:
+            existing = course.units.get(unit_id)
+            if existing is not None and existing.fingerprint == fingerprint:
+                started.append(unit_id)
+                continue
+            if existing is not None:
+                self._cancel(existing)
+            unit = SpeculativeUnit(unit_id, fingerprint)
+            unit.task = asyncio.create_task(self._guarded(unit, run))
+            course.units[unit_id] = unit
+            self._counters["started"] += 1
+            started.append(unit_id)
+        return started
+
+    def get(self, course_id: int) -> CourseSpeculation | None:
+        self._expire()
+        return self._courses.get(course_id)
+
+    def claim(self, course_id: int, unit_id: int, fingerprint: str) -> SpeculativeUnit | None:
+        """
+        Hand the speculative job for *unit_id* to a stream, or None.
+
+        A job built from different inputs is discarded here (its persisted
+        content is overwritten when the stream regenerates the unit).
+        """
+        course = self._courses.get(course_id)
+        unit = course.units.get(unit_id) if course else None
+        if unit is None:
+            return None
+        if unit.fingerprint != fingerprint or (unit.finished and unit.result is None):
+            # Stale inputs, or the job failed — let the stream regenerate.
+            del course.units[unit_id]
+            self._cancel(unit)
+            return None
+        unit.claimed = True
+        self._counters["claimed"] += 1
+        logger.info(
+            "course_speculation: stream attached to unit %d of course %d (%s)",
+            unit_id, course_id, "finished" if unit.finished else "running",
+        )
+        return unit
+
+    async def discard(self, course_id: int, unit_ids: set[int]) -> list[int]:
+        """
+        Drop unclaimed jobs for *unit_ids* (edited or deleted in the outline).
+
+        Running jobs are cancelled and awaited.  Returns the ids of segments
+        that finished jobs already persisted; the caller deletes them.  A job
+        cancelled mid-persist may leave partial segments behind — the
+        stream's regeneration replaces them (_persist clears the unit first).
+        """
+        course = self._courses.get(course_id)
+        if course is None:
+            return []
+        stale_segments: list[int] = []
+        cancelled: list[asyncio.Task] = []
+        for unit_id in unit_ids:
+            unit = course.units.get(unit_id)
+            if unit is None or unit.claimed:
+                continue
+            del course.units[unit_id]
+            if unit.task is not None and not unit.task.done():
+                unit.task.cancel()
+                cancelled.append(unit.task)
+            elif unit.result is not None:
+                stale_segments.extend(getattr(unit.result, "segment_ids", []) or [])
+            self._counters["discarded"] += 1
+            logger.info("course_speculation: discarded unit %d of course %d", unit_id, course_id)
+        if cancelled:
+            await asyncio.gather(*cancelled, return_exceptions=True)
+        if not course.units:
+            self._courses.pop(course_id, None)
+        return stale_segments
+
+    def stats(self) -> dict[str, Any]:
+        running = sum(
+            1 for c in self._courses.values() for u in c.units.values()
+            if u.task is not None and not u.task.done()
+        )
+        return {**self._counters, "courses": len(self._courses), "running": running}
+
+    # ── Internal ──────────────────────────────────────────────────────────────
+
+    @staticmethod
+    async def _guarded(unit: SpeculativeUnit, run: Callable[[SpeculativeUnit], Awaitable[None]]) -> None:
+        # Every job ends with a terminal event, so attached streams never hang
+        # on a job that was cancelled or crashed without reporting.
+        try:
+            await run(unit)
+        except asyncio.CancelledError:
+            if not unit.finished:
+                unit.emit({"type": "unit_error", "unit_id": unit.unit_id, "error": "speculation cancelled"})
+            raise
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("course_speculation: unit %d failed: %s", unit.unit_id, exc, exc_info=True)
+        if not unit.finished:
+            unit.emit({"type": "unit_error", "unit_id": unit.unit_id, "error": "speculation aborted"})
+
+    def _cancel(self, unit: SpeculativeUnit) -> None:
+        if unit.task is not None and not unit.task.done():
+            unit.task.cancel()
+        self._counters["discarded"] += 1
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self._ttl
+        for course_id, course in list(self._courses.items()):
+            if course.created_at >= cutoff:
+                continue
+            # Unclaimed finished work stays persisted; only the bookkeeping goes.
+            for unit in course.units.values():
+                if not unit.claimed and unit.task is not None and not unit.task.done():
+                    unit.task.cancel()
+            del self._courses[course_id]
+            self._counters["expired"] += 1
+
+
+speculation_registry = SpeculationRegistry()
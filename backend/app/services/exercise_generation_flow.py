@@ -13,6 +13,14 @@ Exercise-type-specific logic (prompts, output parsing, validation) lives
 exclusively in ai_exercise_generator.py — this file never knows about
 individual exercise shapes.
 
+Batched mode
+------------
+generate_exercise_batch_for_segment() asks for several exercise types and
+their learner instructions in ONE prompt over the shared unit content; the
+validated parts are then passed to generate_exercise_for_segment(prefetched=…)
+which only persists them.  Types that fail validation (or have no batch
+schema) go through the normal single-type call.
+
 Adding a new exercise type
 --------------------------
 1.  Add a generator function in ai_exercise_generator.py.
@@ -43,10 +51,19 @@ from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
 from app.services.ai.providers.base import AIProvider, AIProviderError
+from app.services.ai.providers.rate_limiter import (
+    admission_priority,
+    current_admission_priority,
+    priority_for_plan,
+)
+from app.services.ai.providers.telemetry import llm_context
 from app.services.ai_exercise_generator import (
+    ExerciseBatchResult,
     generate_exercise,
+    generate_exercise_batch,
     generate_exercise_instruction,
 )
+from app.services.card_image_plan import CardImagePlan, current_card_image_plan
 
 # Sentinel value matching the historical default of ``instruction_language``
 # across this module's public functions. When a caller does not override the
@@ -185,6 +202,7 @@ async def _generate_single_card_image(
     created_by: int,
     style: str,
     db=None,
+    local_plan: CardImagePlan | None = None,
 ) -> None:
     """
     Generate and save an image for a single vocabulary card using fal.ai only.
@@ -224,6 +242,48 @@ async def _generate_single_card_image(
         )
         return
 
+    # One job per concept for the whole generation run (see card_image_plan):
+    # concurrent / later cards with the same concept share its URL.
+    plan = current_card_image_plan() or local_plan or CardImagePlan()
+
+    async def _render(session) -> str | None:
+        return await _render_card_image(
+            description=description,
+            alt_text=alt_text,
+            concept=concept,
+            card_id=card.get("id"),
+            fal_key=fal_key,
+            fal_model=fal_model,
+            fal_image_size=fal_image_size,
+            fal_lora_url=fal_lora_url,
+            fal_lora_scale=fal_lora_scale,
+            style=style,
+            db=session,
+        )
+
+    url = await plan.image_url(concept or description.lower(), _render, db)
+    if url:
+        card["imageUrl"] = url
+        logger.info(
+            "_generate_single_card_image: image for card %r → %s", card.get("id"), url,
+        )
+
+
+async def _render_card_image(
+    *,
+    description: str,
+    alt_text: str,
+    concept: str,
+    card_id: Any,
+    fal_key: str,
+    fal_model: str,
+    fal_image_size: str,
+    fal_lora_url: str,
+    fal_lora_scale: float,
+    style: str,
+    db=None,
+) -> str | None:
+    """Generate one card image via fal.ai (cache-aware) and store it; None on failure."""
     # Attempt fal.ai generation (cache-aware).
     try:
         from app.services.ai.image_providers import FalImageProvider  # noqa: PLC0415
@@ -249,40 +309,35 @@ async def _generate_single_card_image(
         # Prevent a single card failure from blocking the whole batch.
         logger.warning(
             "_generate_single_card_image: fal.ai failed for card %r — leaving imageUrl empty: %s",
-            card.get("id"), exc,
+            card_id, exc,
         )
-        return  # Leave imageUrl empty so the teacher can upload manually.
+        return None  # Leave imageUrl empty so the teacher can upload manually.
 
     # Persist the result via the file_storage abstraction.
     # In cloud mode (MINIO_PUBLIC_URL set) files go to the S3-compatible bucket
     # so they survive Render redeploys.  In local dev they land on disk as before.
+    # Objects are content-addressed: a cache hit returns the same bytes, so the
+    # existing object is reused instead of uploading another copy per exercise.
     try:
         from app.services.ai.image_providers.image_base import ImageFormat  # noqa: PLC0415
-        from app.services.file_storage import save_image  # noqa: PLC0415
+        from app.services.file_storage import save_image_by_hash  # noqa: PLC0415
 
         if img_result.format == ImageFormat.SVG:
             # SVG is plain text; encode to bytes for unified storage call.
-            filename = f"{uuid.uuid4().hex[:16]}.svg"
             raw_bytes = img_result.data.encode("utf-8")
             mime = "image/svg+xml"
         else:
             # All raster formats (PNG, JPEG, WEBP) are base64-encoded bytes.
-            filename = f"{uuid.uuid4().hex[:16]}.png"
             raw_bytes = _base64.b64decode(img_result.data)
             mime = "image/png"
 
-        # Logical path inside the bucket / uploads directory.
-        object_name = f"questions/{created_by}/{filename}"
-        card["imageUrl"] = save_image(data=raw_bytes, object_name=object_name, content_type=mime)
-        logger.info(
-            "_generate_single_card_image: saved image for card %r → %s",
-            card.get("id"), card["imageUrl"],
-        )
+        return await asyncio.to_thread(save_image_by_hash, raw_bytes, mime)
     except Exception as exc:  # noqa: BLE001
         logger.warning(
             "_generate_single_card_image: failed to save image for card %r: %s",
-            card.get("id"), exc,
+            card_id, exc,
         )
+        return None
 
 
 async def _generate_and_save_card_images(
@@ -294,10 +349,10 @@ async def _generate_and_save_card_images(
     Generate and save images for all cards in a word-to-image exercise.
 
     Each card with a non-empty ``description`` and an empty ``imageUrl`` is
-    illustrated in parallel using fal.ai only.  Images are written
-    to the shared uploads directory under ``questions/{created_by}/`` — the
-    same path tree as teacher-manual uploads — so the existing static-file
-    serving route (``/api/v1/static/``) serves them without extra config.
+    illustrated in parallel using fal.ai only.  Images are stored
+    content-addressed under ``images/sha256/`` in the shared uploads tree (or
+    bucket), so the existing static-file serving route (``/api/v1/static/``)
+    serves them without extra config and identical images are stored once.
 
     Dicts in ``cards`` are mutated in-place; ``imageUrl`` is populated on
     success and left empty on failure so the teacher can upload manually.
@@ -334,6 +389,10 @@ async def _generate_and_save_card_images(
 
     # Generate all card images concurrently; individual failures are swallowed
     # inside _generate_single_card_image so one bad card cannot cancel others.
+    # Cards share the course-wide plan when one is active (course generation),
+    # otherwise this exercise's own plan; either way each concept is rendered
+    # once and fal.ai calls are bounded by the global CARD_IMAGE_CONCURRENCY.
+    local_plan = CardImagePlan()
     tasks = [
         _generate_single_card_image(
             card=card,
@@ -345,84 +404,29 @@ async def _generate_and_save_card_images(
             created_by=created_by,
             style=style,
             db=db,
+            local_plan=local_plan,
         )
         for card in cards
     ]
     await asyncio.gather(*tasks)
 
 
-# ── Public API ────────────────────────────────────────────────────────────────
-
-async def generate_exercise_for_segment(
-    *,
-    exercise_type: str,
+def _resolve_generation_inputs(
     db: Session,
-    segment_id: int,
     unit_id: int,
-    created_by: int,
-    # Common optional params — all generators receive them; unused ones are ignored.
-    block_title: str | None = None,
-    topic_hint: str | None = None,
-    content_language: str = "auto",
-    instruction_language: str = "english",
-    # Type-specific extras forwarded verbatim to the generator.
-    generator_params: dict | None = None,
-    # Accepted but intentionally NOT used for quota gating here.
-    # Quota enforcement is the responsibility of the calling HTTP endpoint
-    # (POST /segments/{id}/exercises/{type}).  Service-layer callers such as
-    # UnitGeneratorService and the course-generation SSE stream have already
-    # consumed their own quota bucket (unit_generation / course_generation)
-    # and must not be blocked by the standalone exercise_generation limit.
-    teacher_plan: str | None = None,  # noqa: ARG001
-    # When set (e.g. by UnitGenerator), forces the same LLM stack as unit text
-    # instead of the module default chain (avoids surprise Groq fallback).
-    provider: AIProvider | None = None,
-    # When True: run AI generation + card image creation but skip the DB write.
-    # The block id in the returned dict will be an empty string.
-    # The caller (lesson editor) is responsible for persisting when the teacher
-    # explicitly clicks Save.
-    preview_only: bool = False,
-) -> tuple[dict, dict]:
+    topic_hint: str | None,
+    instruction_language: str,
+) -> tuple[str, str | None, str | None, str]:
     """
-    Full pipeline for any exercise type:
-
-        load content → generate → persist block
-
-    Parameters
-    ----------
-    exercise_type
-        Registry key, e.g. "drag_to_gap", "type_word_in_gap", "match_pairs".
-    generator_params
-        Dict of extra kwargs forwarded directly to the type-specific generator.
-        Example: {"gap_count": 5, "gap_type": "Verbs only"} for drag_to_gap.
+    Load the unit's source text and the course language settings.
 
-    Returns
-    -------
-    (block_dict, metadata_dict)
+    Shared by the single-type and batched pipelines so both ground the LLM in
+    the same content.  Returns ``(unit_content, native_language,
+    target_language, effective_instruction_language)``.
 
-    Raises
-    ------
-    HTTPException 404  Segment or Unit not found.
-    HTTPException 400  Empty content, unsupported type, or LLM validation fail.
-    HTTPException 502  LLM provider unreachable.
-    HTTPException 500  Any other unexpected failure.
+    Raises HTTPException 404 / 400 like generate_exercise_for_segment.
     """
-    params = generator_params or {}
-    # Forwards optional provider into type-specific generators; omitted when None
-    # so they keep using _default_provider inside ai_exercise_generator.
-    exercise_call_kwargs = dict(params)
-    if provider is not None:
-        exercise_call_kwargs["provider"] = provider
-
-    logger.info(
-        "Starting %s generation — segment_id=%d, unit_id=%d, created_by=%d",
-        exercise_type, segment_id, unit_id, created_by,
-    )
-
-    # ── 1. Load Segment ───────────────────────────────────────────────────────
-    segment = _load_segment(db, segment_id)
-
-    # ── 2. Load Unit + assemble content ──────────────────────────────────────
+    # ── Load Unit + assemble content ─────────────────────────────────────────
     unit = _load_unit_with_content(db, unit_id)
     unit_content = _assemble_unit_content(unit, db)
 
@@ -445,7 +449,7 @@ async def generate_exercise_for_segment(
         "Assembled unit content — %d chars for unit_id=%d", len(unit_content), unit_id
     )
 
-    # ── 2b. Resolve course-level language settings ────────────────────────────
+    # ── Resolve course-level language settings ───────────────────────────────
     # native_language / target_language are stored on the Course row.
     # They are forwarded to generators that use them (currently: match_pairs).
     # Generators that don't need them absorb them via **_ignored.
@@ -467,7 +471,7 @@ async def generate_exercise_for_segment(
         # Never let a language-lookup failure block exercise generation.
         logger.warning("Could not resolve course languages: %s", _lang_exc)
 
-    # ── 2c. Default instruction_language to the course's native_language ─────
+    # ── Default instruction_language to the course's native_language ────────
     # When the caller leaves ``instruction_language`` at its historical default
     # ("english") we override it with the course's persisted native_language so
     # generated titles AND the new learner-facing ``instruction`` field come
@@ -486,18 +490,44 @@ async def generate_exercise_for_segment(
             getattr(unit, "course_id", None),
         )
 
-    # ── 3. Generate via LLM ───────────────────────────────────────────────────
+    return (
+        unit_content,
+        course_native_language,
+        course_target_language,
+        effective_instruction_language,
+    )
+
+
+async def _generate_single(
+    *,
+    exercise_type: str,
+    unit_id: int,
+    unit_content: str,
+    content_language: str,
+    instruction_language: str,
+    topic_hint: str | None,
+    native_language: str | None,
+    target_language: str | None,
+    exercise_call_kwargs: dict,
+    priority: int,
+    created_by: int,
+    teacher_plan: str | None,
+) -> tuple[dict, dict]:
+    """One generate_exercise() call with the module's HTTP exception mapping."""
     try:
-        exercise_data, metadata = await generate_exercise(
-            exercise_type=exercise_type,
-            unit_content=unit_content,
-            content_language=content_language,
-            instruction_language=effective_instruction_language,
-            topic_hint=topic_hint,
-            native_language=course_native_language,
-            target_language=course_target_language,
-            **exercise_call_kwargs,
-        )
+        with admission_priority(priority), llm_context(
+            phase=f"exercise.{exercise_type}", teacher_id=created_by or None, plan=teacher_plan,
+        ):
+            return await generate_exercise(
+                exercise_type=exercise_type,
+                unit_content=unit_content,
+                content_language=content_language,
+                instruction_language=instruction_language,
+                topic_hint=topic_hint,
+                native_language=native_language,
+                target_language=target_language,
+                **exercise_call_kwargs,
+            )
     except NotImplementedError as exc:
         raise HTTPException(
             status_code=400,
@@ -526,6 +556,120 @@ async def generate_exercise_for_segment(
             detail="Unexpected error during exercise generation.",
         ) from exc
 
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+async def generate_exercise_for_segment(
+    *,
+    exercise_type: str,
+    db: Session,
+    segment_id: int,
+    unit_id: int,
+    created_by: int,
+    # Common optional params — all generators receive them; unused ones are ignored.
+    block_title: str | None = None,
+    topic_hint: str | None = None,
+    content_language: str = "auto",
+    instruction_language: str = "english",
+    # Type-specific extras forwarded verbatim to the generator.
+    generator_params: dict | None = None,
+    # Accepted but intentionally NOT used for quota gating here.
+    # Quota enforcement is the responsibility of the calling HTTP endpoint
+    # (POST /segments/{id}/exercises/{type}).  Service-layer callers such as
+    # UnitGeneratorService and the course-generation SSE stream have already
+    # consumed their own quota bucket (unit_generation / course_generation)
+    # and must not be blocked by the standalone exercise_generation limit.
+    # Only used to pick the LLM admission priority (see rate_limiter.py);
+    # service-layer callers leave it None and inherit their own priority.
+    teacher_plan: str | None = None,
+    # When set (e.g. by UnitGenerator), forces the same LLM stack as unit text
+    # instead of the module default chain (avoids surprise Groq fallback).
+    provider: AIProvider | None = None,
+    # Already-validated (exercise_data, metadata) from generate_exercise_batch;
+    # when set the LLM step is skipped and only persistence runs.
+    prefetched: tuple[dict, dict] | None = None,
+    # Learner instruction already produced by a batch call; skips the
+    # per-block generate_exercise_instruction round-trip.
+    instruction: str | None = None,
+    # When True: run AI generation + card image creation but skip the DB write.
+    # The block id in the returned dict will be an empty string.
+    # The caller (lesson editor) is responsible for persisting when the teacher
+    # explicitly clicks Save.
+    preview_only: bool = False,
+) -> tuple[dict, dict]:
+    """
+    Full pipeline for any exercise type:
+
+        load content → generate → persist block
+
+    Parameters
+    ----------
+    exercise_type
+        Registry key, e.g. "drag_to_gap", "type_word_in_gap", "match_pairs".
+    generator_params
+        Dict of extra kwargs forwarded directly to the type-specific generator.
+        Example: {"gap_count": 5, "gap_type": "Verbs only"} for drag_to_gap.
+
+    Returns
+    -------
+    (block_dict, metadata_dict)
+
+    Raises
+    ------
+    HTTPException 404  Segment or Unit not found.
+    HTTPException 400  Empty content, unsupported type, or LLM validation fail.
+    HTTPException 502  LLM provider unreachable.
+    HTTPException 500  Any other unexpected failure.
+    """
+    params = generator_params or {}
+    # Forwards optional provider into type-specific generators; omitted when None
+    # so they keep using _default_provider inside ai_exercise_generator.
+    exercise_call_kwargs = dict(params)
+    if provider is not None:
+        exercise_call_kwargs["provider"] = provider
+    # Paid-plan single exercises are admitted ahead of free-tier ones when the
+    # LLM backends are saturated; without a plan keep the caller's priority.
+    priority = (
+        priority_for_plan(teacher_plan, "exercise")
+        if teacher_plan
+        else current_admission_priority()
+    )
+
+    logger.info(
+        "Starting %s generation — segment_id=%d, unit_id=%d, created_by=%d",
+        exercise_type, segment_id, unit_id, created_by,
+    )
+
+    # ── 1. Load Segment ───────────────────────────────────────────────────────
+    segment = _load_segment(db, segment_id)
+
+    # ── 2. Load Unit + assemble content + course languages ──────────────────
+    (
+        unit_content,
+        course_native_language,
+        course_target_language,
+        effective_instruction_language,
+    ) = _resolve_generation_inputs(db, unit_id, topic_hint, instruction_language)
+
+    # ── 3. Generate via LLM (unless a batch call already produced it) ────────
+    if prefetched is not None:
+        exercise_data, metadata = prefetched
+    else:
+        exercise_data, metadata = await _generate_single(
+            exercise_type=exercise_type,
+            unit_id=unit_id,
+            unit_content=unit_content,
+            content_language=content_language,
+            instruction_language=effective_instruction_language,
+            topic_hint=topic_hint,
+            native_language=course_native_language,
+            target_language=course_target_language,
+            exercise_call_kwargs=exercise_call_kwargs,
+            priority=priority,
+            created_by=created_by,
+            teacher_plan=teacher_plan,
+        )
+
     logger.info(
         "Generated %s for unit_id=%d (model=%s, attempts=%s)",
         exercise_type, unit_id,
@@ -539,12 +683,19 @@ async def generate_exercise_for_segment(
     # this when the per-type generator did not already supply one — that way
     # a future generator can opt out of the extra LLM round-trip by emitting
     # its own instruction string.
+    if not exercise_data.get("instruction") and instruction:
+        exercise_data["instruction"] = instruction
+        metadata["instruction"] = instruction
+        metadata["instruction_language"] = effective_instruction_language
     if not exercise_data.get("instruction"):
         try:
-            generated_instruction = await generate_exercise_instruction(
-                exercise_type=exercise_type,
-                instruction_language=effective_instruction_language,
-            )
+            with admission_priority(priority), llm_context(
+                phase="exercise.instruction", teacher_id=created_by or None, plan=teacher_plan,
+            ):
+                generated_instruction = await generate_exercise_instruction(
+                    exercise_type=exercise_type,
+                    instruction_language=effective_instruction_language,
+                )
         except Exception as _instr_exc:  # noqa: BLE001
             # Localization is best-effort; never let it block persistence.
             logger.warning(
@@ -636,6 +787,57 @@ async def generate_exercise_for_segment(
     return block, metadata
 
 
+async def generate_exercise_batch_for_segment(
+    *,
+    exercise_types: list[str],
+    db: Session,
+    unit_id: int,
+    created_by: int,
+    topic_hint: str | None = None,
+    content_language: str = "auto",
+    instruction_language: str = "english",
+    type_params: dict[str, dict] | None = None,
+    type_hints: dict[str, str] | None = None,
+    provider: AIProvider | None = None,
+) -> ExerciseBatchResult:
+    """
+    Generate several exercise types for one segment in a single LLM call.
+
+    Nothing is persisted: feed each ``result.exercises[type]`` into
+    generate_exercise_for_segment(prefetched=..., instruction=...) and call it
+    without ``prefetched`` for every type in ``result.failed`` or not
+    batchable.  Never raises — on any error every batchable type is reported
+    as failed so the caller degrades to the single-type pipeline.
+    """
+    try:
+        (
+            unit_content,
+            course_native_language,
+            course_target_language,
+            effective_instruction_language,
+        ) = _resolve_generation_inputs(db, unit_id, topic_hint, instruction_language)
+        with llm_context(phase="exercise.batch", teacher_id=created_by or None):
+            result = await generate_exercise_batch(
+                exercise_types,
+                unit_content,
+                content_language=content_language,
+                instruction_language=effective_instruction_language,
+                topic_hint=topic_hint,
+                type_params=type_params,
+                type_hints=type_hints,
+                native_language=course_native_language,
+                target_language=course_target_language,
+                provider=provider,
+            )
+    except Exception as exc:  # noqa: BLE001
+        logger.warning(
+            "Batched exercise generation failed for unit_id=%d (%s); "
+            "falling back to single-type calls.", unit_id, exc,
+        )
+        return ExerciseBatchResult(failed={t: str(exc) for t in exercise_types})
+    return result
+
+
 # Convenience wrapper kept for any code that calls the old specific function.
 async def generate_drag_to_gap_for_segment(
     db: Session,
@@ -28,16 +28,51 @@ Usage
         content_type="image/png",
     )
     card["imageUrl"] = url
+
+Content-addressed images
+------------------------
+``save_image_by_hash`` names the object after the SHA-256 of its bytes
+(``images/sha256/ab/abcd….png``) and skips the upload when that object
+already exists, so a cached concept image is stored once no matter how many
+exercises use it.  Such objects are shared, so they are never deleted with an
+exercise; app/services/storage/image_gc.py sweeps the unreferenced ones.
 """
 
 from __future__ import annotations
 
+import hashlib
 import io
 import logging
 import os
+import threading
+import time
+from typing import Iterator
 
 logger = logging.getLogger(__name__)
 
+# Prefix for content-addressed objects; GC only ever looks below it.
+HASHED_IMAGE_PREFIX = "images/sha256"
+
+_EXTENSIONS = {
+    "image/png":     "png",
+    "image/jpeg":    "jpg",
+    "image/webp":    "webp",
+    "image/svg+xml": "svg",
+}
+
+# object_name → (URL, last handed out, last seen stored) for hashed objects
+# this process has already stored or seen, so repeat saves skip even the
+# existence check and the GC can spare objects that were just reused but not
+# yet referenced.
+_known_objects: dict[str, tuple[str, float, float]] = {}
+_known_lock = threading.Lock()
+_KNOWN_OBJECTS_MAX = 10_000
+
+# A memo entry is trusted for one GC grace period after the object was last
+# seen in storage; after that another worker's sweep may have deleted it, so
+# the next save checks again (and re-uploads when it is gone).
+_KNOWN_OBJECTS_TTL = float(os.environ.get("IMAGE_GC_GRACE_HOURS", "24")) * 3600
+
 # ── Internal helpers ──────────────────────────────────────────────────────────
 
 
@@ -83,7 +118,7 @@ def save_image(data: bytes, object_name: str, content_type: str = "image/png") -
     # Strip any leading slash so path joins are consistent.
     object_name = object_name.lstrip("/")
 
-    public_url_base = (getattr(settings, "MINIO_PUBLIC_URL", "") or "").rstrip("/")
+    public_url_base = _public_base(settings)
 
     if public_url_base:
         return _save_to_cloud(data, object_name, content_type, settings, public_url_base)
@@ -91,6 +126,87 @@ def save_image(data: bytes, object_name: str, content_type: str = "image/png") -
         return _save_to_local(data, object_name)
 
 
+def save_image_by_hash(data: bytes, content_type: str = "image/png") -> str:
+    """
+    Persist *data* under its SHA-256 and return the URL (same forms as save_image).
+
+    When the object already exists (uploaded by any exercise, course or
+    worker) nothing is written — only the URL is returned.  Objects this
+    process remembers are re-checked once their memo entry is older than the
+    GC grace period, or as soon as a local object turns out to be missing.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    ext = _EXTENSIONS.get(content_type, "bin")
+    object_name = f"{HASHED_IMAGE_PREFIX}/{digest[:2]}/{digest}.{ext}"
+
+    now = time.time()
+    with _known_lock:
+        known = _known_objects.get(object_name)
+        if known is not None and now - known[2] >= _KNOWN_OBJECTS_TTL:
+            _known_objects.pop(object_name, None)
+            known = None
+    if known is not None and _touch(object_name):
+        with _known_lock:
+            _known_objects[object_name] = (known[0], now, known[2])
+        return known[0]
+
+    url = _existing_url(object_name)
+    if url is not None:
+        logger.info("file_storage: reusing %r (content hash hit)", object_name)
+    else:
+        url = save_image(data=data, object_name=object_name, content_type=content_type)
+
+    with _known_lock:
+        if len(_known_objects) >= _KNOWN_OBJECTS_MAX:
+            _known_objects.clear()
+        _known_objects[object_name] = (url, now, time.time())
+    return url
+
+
+def last_used_locally(object_name: str) -> float | None:
+    """Unix time this process last returned *object_name* from save_image_by_hash."""
+    with _known_lock:
+        known = _known_objects.get(object_name)
+    return known[1] if known else None
+
+
+def iter_hashed_images() -> Iterator[tuple[str, str, float]]:
+    """
+    Yield ``(object_name, digest, last_modified_unix)`` for every object under
+    HASHED_IMAGE_PREFIX in the active backend.
+    """
+    settings = _get_settings()
+    if _public_base(settings):
+        client, bucket = _cloud_client(settings)
+        for obj in client.list_objects(bucket, prefix=f"{HASHED_IMAGE_PREFIX}/", recursive=True):
+            name = obj.object_name
+            modified = obj.last_modified.timestamp() if obj.last_modified else time.time()
+            yield name, _digest_of(name), modified
+        return
+
+    root = os.path.join(_resolve_uploads_dir(), *HASHED_IMAGE_PREFIX.split("/"))
+    for dirpath, _dirs, files in os.walk(root):
+        for fname in files:
+            path = os.path.join(dirpath, fname)
+            rel = os.path.relpath(path, _resolve_uploads_dir()).replace(os.sep, "/")
+            yield rel, _digest_of(rel), os.path.getmtime(path)
+
+
+def delete_object(object_name: str) -> None:
+    """Remove one stored object from the active backend."""
+    settings = _get_settings()
+    with _known_lock:
+        _known_objects.pop(object_name, None)
+    if _public_base(settings):
+        client, bucket = _cloud_client(settings)
+        client.remove_object(bucket, object_name)
+    else:
+        path = os.path.join(_resolve_uploads_dir(), *object_name.split("/"))
+        if os.path.isfile(path):
+            os.remove(path)
+    logger.info("file_storage: deleted %r", object_name)
+
+
 def save_upload(
     file_data: bytes,
     object_name: str,
@@ -106,6 +222,72 @@ def save_upload(
 # ── Storage backends ──────────────────────────────────────────────────────────
 
 
+def _public_base(settings) -> str:
+    return (getattr(settings, "MINIO_PUBLIC_URL", "") or "").rstrip("/")
+
+
+def _cloud_client(settings, minio_cls=None):
+    """Return ``(Minio client, bucket name)`` from the MINIO_* settings."""
+    if minio_cls is None:
+        from minio import Minio as minio_cls  # noqa: PLC0415
+
+    client = minio_cls(
+        endpoint=getattr(settings, "MINIO_ENDPOINT", ""),
+        access_key=getattr(settings, "MINIO_ACCESS_KEY", ""),
+        secret_key=getattr(settings, "MINIO_SECRET_KEY", ""),
+        secure=bool(getattr(settings, "MINIO_SECURE", True)),
+    )
+    return client, getattr(settings, "MINIO_BUCKET_NAME", "eazy-italian")
+
+
+def _digest_of(object_name: str) -> str:
+    """``images/sha256/ab/abcd….png`` → ``abcd…``."""
+    return object_name.rsplit("/", 1)[-1].split(".", 1)[0]
+
+
+def _existing_url(object_name: str) -> str | None:
+    """URL of *object_name* if it is already stored, else None."""
+    settings = _get_settings()
+    public_url_base = _public_base(settings)
+    if public_url_base:
+        from minio.error import S3Error  # noqa: PLC0415
+
+        client, bucket = _cloud_client(settings)
+        try:
+            client.stat_object(bucket, object_name)
+        except S3Error as exc:
+            if exc.code in ("NoSuchKey", "NoSuchObject", "NoSuchBucket"):
+                return None
+            raise
+        return f"{public_url_base}/{object_name}"
+
+    path = os.path.join(_resolve_uploads_dir(), *object_name.split("/"))
+    if not os.path.isfile(path):
+        return None
+    _touch(object_name)
+    return f"/api/v1/static/{object_name}"
+
+
+def _touch(object_name: str) -> bool:
+    """
+    Refresh a local object's mtime so the GC grace period restarts on reuse.
+
+    Returns False when the local file is gone (swept by another worker);
+    cloud objects are not touched and always report True.
+    """
+    settings = _get_settings()
+    if _public_base(settings):
+        return True
+    path = os.path.join(_resolve_uploads_dir(), *object_name.split("/"))
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    except OSError as exc:
+        logger.warning("file_storage: could not touch %r: %s", object_name, exc)
+    return True
+
+
 def _save_to_cloud(
     data: bytes,
     object_name: str,
@@ -129,18 +311,7 @@ def _save_to_cloud(
             "Add `minio` to requirements.txt."
         ) from exc
 
-    endpoint = getattr(settings, "MINIO_ENDPOINT", "")
-    access_key = getattr(settings, "MINIO_ACCESS_KEY", "")
-    secret_key = getattr(settings, "MINIO_SECRET_KEY", "")
-    bucket_name = getattr(settings, "MINIO_BUCKET_NAME", "eazy-italian")
-    secure = bool(getattr(settings, "MINIO_SECURE", True))
-
-    client = Minio(
-        endpoint=endpoint,
-        access_key=access_key,
-        secret_key=secret_key,
-        secure=secure,
-    )
+    client, bucket_name = _cloud_client(settings, Minio)
 
     # Ensure the bucket exists (idempotent).
     if not client.bucket_exists(bucket_name):
@@ -0,0 +1,87 @@
+"""
+app/services/latest_exercise_answers.py
+
+Upsert maintenance for ``latest_exercise_answers`` (see the model module).
+
+Every path that appends to ``exercise_field_answer_events`` calls
+``upsert_latest_answers(db, rows)`` with the same row dicts before it
+commits, so the event log and the latest view never disagree.
+
+Rules
+-----
+  • one statement per call: ``INSERT … ON CONFLICT (pk) DO UPDATE``
+  • the update only applies when the incoming ``created_at`` is not older
+    than the stored ``updated_at`` — a delayed batch cannot overwrite a
+    newer answer or undo a clear
+  • a batch may hold several rows for one field (Postgres rejects touching
+    the same row twice in one statement), so only the newest row per key is
+    sent
+  • ``value=None`` writes SQL NULL — the clear sentinel
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Iterable
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.latest_exercise_answer import LatestExerciseAnswer
+
+_PK = ("classroom_id", "student_id", "block_id", "field_key")
+_UPDATED = ("exercise_key", "unit_id", "segment_id", "value", "is_correct",
+            "written_by_teacher", "updated_at")
+
+
+def newest_per_field(rows: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Reduce event row dicts to one latest-answer row per primary key.
+
+    Rows without ``created_at`` are stamped now; on equal timestamps the row
+    seen last wins, matching insertion order.
+    """
+    latest: dict[tuple, dict[str, Any]] = {}
+    for row in rows:
+        stamp = row.get("created_at") or datetime.now(timezone.utc)
+        key = tuple(row[c] for c in _PK)
+        current = latest.get(key)
+        if current is not None and current["updated_at"] > stamp:
+            continue
+        latest[key] = {
+            "classroom_id":       row["classroom_id"],
+            "student_id":         row["student_id"],
+            "block_id":           row["block_id"],
+            "field_key":          row["field_key"],
+            "exercise_key":       row["exercise_key"],
+            "unit_id":            row.get("unit_id"),
+            "segment_id":         row.get("segment_id"),
+            "value":              row.get("value"),
+            "is_correct":         row.get("is_correct"),
+            "written_by_teacher": bool(row.get("written_by_teacher", False)),
+            "updated_at":         stamp,
+        }
+    return list(latest.values())
+
+
+def upsert_statement(rows: list[dict[str, Any]]):
+    """The guarded multi-row upsert for already-reduced *rows*."""
+    stmt = pg_insert(LatestExerciseAnswer).values(rows)
+    table = LatestExerciseAnswer.__table__
+    return stmt.on_conflict_do_update(
+        index_elements=list(_PK),
+        set_={c: stmt.excluded[c] for c in _UPDATED},
+        where=stmt.excluded.updated_at >= table.c.updated_at,
+    )
+
+
+def upsert_latest_answers(db: Session, rows: Iterable[dict[str, Any]]) -> int:
+    """
+    Fold *rows* (exercise_field_answer_events column dicts) into
+    ``latest_exercise_answers``.  Does not commit — the caller commits it
+    together with the event insert.  Returns the number of keys sent.
+    """
+    reduced = newest_per_field(rows)
+    if reduced:
+        db.execute(upsert_statement(reduced))
+    return len(reduced)
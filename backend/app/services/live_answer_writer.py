@@ -0,0 +1,332 @@
+"""
+app/services/live_answer_writer.py
+
+Write-behind persistence for live exercise answer events.
+
+The live WebSocket used to open a ``SessionLocal()``, insert one
+``exercise_field_answer_events`` row and commit for every keystroke patch —
+on the event-loop thread, so one typing student stalled every socket in the
+process for the length of a DB round trip.  A teacher broadcast did that
+once per online student.
+
+Design
+------
+  stage(key, rows) called by the socket handler for every patch.  Holds the
+                  latest rows per (room, student, field) for
+                  ``LIVE_ANSWER_DEBOUNCE_MS`` (see live_coalescer) and only
+                  then submits them — a word typed into a gap becomes one
+                  row instead of one per keystroke.
+
+  submit(rows)    stamps ``created_at`` (if stage() has not) and
+                  puts the rows of one patch (one row, or one per student
+                  for a teacher broadcast) on a bounded asyncio queue.  Never
+                  touches the DB.  When the queue is full the *calling*
+                  socket awaits a free slot — backpressure lands on the
+                  producer, not on the other sockets.
+
+  worker task     takes the first item, then keeps collecting until
+                  ``LIVE_ANSWER_BATCH_ROWS`` rows are buffered or
+                  ``LIVE_ANSWER_FLUSH_MS`` has passed, and writes the batch
+                  with one multi-row INSERT in a worker thread, plus the
+                  matching upsert into ``latest_exercise_answers``.
+
+  flush(classroom_id, student_id)
+                  submits the staged rows of one classroom (and student) and
+                  waits until the queued rows of that scope are written; the
+                  hydrate / restore / clear paths call it so they read their
+                  own writes without waiting on other rooms.  With no
+                  arguments it submits and waits for everything.
+
+  stop()          flushes, then stops the worker (FastAPI shutdown).
+
+``created_at`` is the time of the last keystroke, not the server default:
+a batch is one transaction, and ``now()`` would give every row in it the
+same timestamp, breaking the latest-row-wins ordering of the restore queries.
+
+A failed batch is logged and counted, not retried — the same outcome a
+failed per-row commit had before.
+
+Environment variables
+---------------------
+LIVE_ANSWER_DEBOUNCE_MS   default: 2000   coalescing window per field (0 = persist every patch)
+LIVE_ANSWER_FLUSH_MS      default: 250    longest a row waits before its batch is written
+LIVE_ANSWER_BATCH_ROWS    default: 500    rows per INSERT
+LIVE_ANSWER_QUEUE_MAX     default: 10000  queued patches before submit() blocks
+
+Usage
+-----
+    await live_answer_writer.stage((room, student, key), [row, …])
+    await live_answer_writer.flush(room, student)   # read-your-writes
+    live_answer_writer.stats()             # → {"raw_rows": …, "raw_per_written_row": …}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Hashable
+
+from app.services.live_coalescer import KeyedCoalescer
+
+logger = logging.getLogger(__name__)
+
+# ── configuration ─────────────────────────────────────────────────────────────
+
+_DEBOUNCE_MS = float(os.environ.get("LIVE_ANSWER_DEBOUNCE_MS", "2000"))
+_FLUSH_MS    = float(os.environ.get("LIVE_ANSWER_FLUSH_MS", "250"))
+_BATCH_ROWS  = int(os.environ.get("LIVE_ANSWER_BATCH_ROWS", "500"))
+_QUEUE_MAX   = int(os.environ.get("LIVE_ANSWER_QUEUE_MAX", "10000"))
+
+_STOP = object()
+
+# Student part of a stage() key for a teacher broadcast to the whole room.
+BROADCAST = "*"
+
+
+def insert_answer_rows(rows: list[dict[str, Any]]) -> None:
+    """
+    Write *rows* to ``exercise_field_answer_events`` and fold them into
+    ``latest_exercise_answers`` in one transaction.
+
+    Blocking — the writer runs it via ``asyncio.to_thread``.
+    """
+    from sqlalchemy import insert
+
+    from app.core.database import SessionLocal
+    from app.models.exercise_field_answer_event import ExerciseFieldAnswerEvent
+    from app.services.latest_exercise_answers import upsert_latest_answers
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(ExerciseFieldAnswerEvent), rows)
+        upsert_latest_answers(db, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class LiveAnswerWriter:
+    """Per-field debounce, bounded queue and a single batching worker."""
+
+    def __init__(
+        self,
+        *,
+        debounce_ms: float = _DEBOUNCE_MS,
+        flush_ms: float = _FLUSH_MS,
+        batch_rows: int = _BATCH_ROWS,
+        queue_max: int = _QUEUE_MAX,
+        insert: Callable[[list[dict[str, Any]]], None] = insert_answer_rows,
+    ) -> None:
+        self._flush_s = max(0.0, flush_ms) / 1000
+        self._batch_rows = max(1, batch_rows)
+        self._queue_max = max(1, queue_max)
+        self._insert = insert
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._pending_rows = 0
+        # Queued patch → its rows, resolved once the batch holding it is written.
+        self._in_flight: dict[asyncio.Future, list[dict[str, Any]]] = {}
+        self._debounce = KeyedCoalescer(debounce_ms, self._submit_staged)
+        self._counters = {
+            "raw_rows":           0,
+            "enqueued_rows":      0,
+            "written_rows":       0,
+            "failed_rows":        0,
+            "batches":            0,
+            "flush_errors":       0,
+            "backpressure_waits": 0,
+            "max_batch_rows":     0,
+        }
+        self._last_flush_ms: float | None = None
+
+    # ── producer side ─────────────────────────────────────────────────────────
+
+    async def stage(self, key: Hashable, rows: list[dict[str, Any]]) -> None:
+        """
+        Record the rows of one patch; only the latest rows per *key* within
+        the debounce window are submitted.
+
+        *key* identifies the field being written — (classroom, student,
+        exercise_key), with the student replaced by ``BROADCAST`` for a
+        teacher broadcast so it is coalesced as one fan-out.
+        """
+        if not rows:
+            return
+        created_at = datetime.now(timezone.utc)
+        for row in rows:
+            row.setdefault("created_at", created_at)
+        self._counters["raw_rows"] += len(rows)
+        await self._debounce.push(key, rows)
+
+    async def _submit_staged(self, key: Hashable, rows: list[dict[str, Any]]) -> None:
+        await self.submit(rows)
+
+    async def submit(self, rows: list[dict[str, Any]]) -> None:
+        """
+        Queue the rows of one patch for the next batch.
+
+        Rows are ExerciseFieldAnswerEvent column dicts.  Returns as soon as
+        they are queued; waits only while the queue is full.
+        """
+        if not rows:
+            return
+        self.start()
+        created_at = datetime.now(timezone.utc)
+        for row in rows:
+            row.setdefault("created_at", created_at)
+        self._counters["enqueued_rows"] += len(rows)
+        self._pending_rows += len(rows)
+        written = asyncio.get_running_loop().create_future()
+        self._in_flight[written] = rows
+        try:
+            self._queue.put_nowait((rows, written))
+        except asyncio.QueueFull:
+            self._counters["backpressure_waits"] += 1
+            await self._queue.put((rows, written))
+
+    async def flush(self, classroom_id: int | None = None, student_id: int | None = None) -> None:
+        """
+        Submit staged rows and wait until they and every row queued before are
+        written (or failed).
+
+        With *classroom_id* only that classroom's rows are submitted and
+        waited for — with *student_id* too, only that student's (teacher
+        broadcasts to the room included).  Other rooms keep coalescing.
+        """
+        if classroom_id is None:
+            await self._debounce.flush()
+            if self._queue is None or self._task is None or self._task.done():
+                return
+            await self._queue.join()
+            return
+
+        def key_in_scope(key: Hashable) -> bool:
+            return (
+                isinstance(key, tuple) and len(key) == 3 and key[0] == classroom_id
+                and (student_id is None or key[1] in (student_id, BROADCAST))
+            )
+
+        def row_in_scope(row: dict[str, Any]) -> bool:
+            return row.get("classroom_id") == classroom_id and (
+                student_id is None or row.get("student_id") == student_id
+            )
+
+        await self._debounce.flush(key_in_scope)
+        if self._task is None or self._task.done():
+            return
+        waiting = [
+            written for written, rows in self._in_flight.items()
+            if any(row_in_scope(row) for row in rows)
+        ]
+        if waiting:
+            await asyncio.wait(waiting)
+
+    # ── lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Start the batching worker (idempotent)."""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._queue_max)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Write everything still staged or queued, then stop the worker."""
+        await self._debounce.flush()
+        task = self._task
+        if task is None or task.done():
+            return
+        await self._queue.put(_STOP)
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            task.cancel()
+            logger.warning(
+                "Live answer writer: %d row(s) still pending after %.0fs shutdown wait",
+                self._pending_rows, timeout,
+            )
+            # Nothing will write these any more — release scoped flush() waiters.
+            for written in self._in_flight:
+                if not written.done():
+                    written.set_result(None)
+            self._in_flight.clear()
+        self._task = None
+
+    def stats(self) -> dict[str, Any]:
+        batches = self._counters["batches"]
+        written = self._counters["written_rows"]
+        return {
+            **self._counters,
+            "raw_per_written_row": round(self._counters["raw_rows"] / written, 2) if written else None,
+            "debounce":            self._debounce.stats(),
+            "pending_rows":        self._pending_rows,
+            "queue_depth":         self._queue.qsize() if self._queue is not None else 0,
+            "avg_batch_rows":      round(written / batches, 1) if batches else None,
+            "last_flush_ms":       self._last_flush_ms,
+            "running":             self._task is not None and not self._task.done(),
+        }
+
+    # ── worker ────────────────────────────────────────────────────────────────
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            item = await queue.get()
+            if item is _STOP:
+                queue.task_done()
+                return
+            batch: list[dict[str, Any]] = list(item[0])
+            done: list[asyncio.Future] = [item[1]]
+            stopping = False
+            deadline = time.monotonic() + self._flush_s
+            while len(batch) < self._batch_rows:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    queue.task_done()
+                    stopping = True
+                    break
+                batch.extend(item[0])
+                done.append(item[1])
+            await self._write(batch, done)
+            if stopping:
+                return
+
+    async def _write(self, batch: list[dict[str, Any]], done: list[asyncio.Future]) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._insert, batch)
+        except Exception as exc:
+            self._counters["failed_rows"] += len(batch)
+            self._counters["flush_errors"] += 1
+            logger.warning("Live answer writer: batch of %d row(s) failed: %s", len(batch), exc)
+        else:
+            self._counters["written_rows"] += len(batch)
+            self._counters["batches"] += 1
+            self._counters["max_batch_rows"] = max(self._counters["max_batch_rows"], len(batch))
+            logger.debug("Live answer writer: wrote %d row(s)", len(batch))
+        finally:
+            self._last_flush_ms = round((time.perf_counter() - started) * 1000, 1)
+            self._pending_rows -= len(batch)
+            for written in done:
+                self._in_flight.pop(written, None)
+                if not written.done():
+                    written.set_result(None)
+                self._queue.task_done()
+
+
+live_answer_writer = LiveAnswerWriter()
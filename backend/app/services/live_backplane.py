@@ -0,0 +1,413 @@
+"""
+app/services/live_backplane.py
+==============================
+Cross-worker backplane for live classroom rooms.
+
+Room state (``_rooms`` in app/api/v1/endpoints/live.py) lives in process
+memory, so a teacher and a student on different uvicorn workers never saw
+each other.  The backplane lets every worker that holds sockets for a room
+share its patches and presence:
+
+* every local patch is published with a last-writer-wins stamp
+  ``(µs timestamp, worker id)``; a worker applies a remote patch only when
+  its stamp is newer than the one it holds for that key, so all workers
+  converge on the same value per key whatever order messages arrive in;
+* presence is published per worker (its local user list) and merged;
+* a worker opening a room loads the shared snapshot (patches + presence)
+  before its first socket gets a snapshot of its own.
+
+Hierarchy
+---------
+RoomBackplane (ABC)
+    ├── InMemoryBackplane   ← single worker, current behaviour (no I/O)
+    └── RedisBackplane      ← Redis hash per room + pub/sub channel per room
+
+Redis layout
+------------
+live:room:{id}:patches    HASH  key    → {"v": value, "ts": µs, "w": worker}
+live:room:{id}:presence   HASH  worker → {"v": [users], "ts": µs, "w": worker}
+live:room:{id}            channel for {"op": "patch"|"presence", …}
+
+Writes go through one Lua script that compares stamps, HSETs, refreshes the
+TTL and PUBLISHes atomically, so the hash always holds the newest value.
+Outgoing messages are queued and sent by one publisher task in order;
+``publish_*`` never blocks a socket handler.
+
+Environment variables
+---------------------
+LIVE_BACKPLANE         "memory" (default) or "redis".
+LIVE_BACKPLANE_TTL     Seconds a room's shared state outlives its last write (default 21600).
+REDIS_URL              Used by the redis backend (settings.REDIS_URL).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_BACKEND = os.environ.get("LIVE_BACKPLANE", "memory").strip().lower()
+_TTL     = int(os.environ.get("LIVE_BACKPLANE_TTL", "21600"))
+
+# Stamp of values that must only fill gaps (e.g. answers hydrated from the DB).
+SEED_STAMP = (1, "")
+
+RemoteHandler = Callable[[int, dict], Awaitable[None]]
+
+
+def _stamp(worker_id: str) -> tuple[int, str]:
+    return time.time_ns() // 1000, worker_id
+
+
+# ── Abstract base ─────────────────────────────────────────────────────────────
+
+class RoomBackplane(ABC):
+    """
+    Shares live-room patches and presence between workers.
+
+    ``on_remote(room_id, event)`` is awaited for every remote change this
+    worker should apply — already filtered by stamp, never for its own
+    publishes.  Events:
+
+        {"op": "patch", "key": k, "value": v, "target": uid|None, "meta": {…}|None}
+        {"op": "presence", "worker": w, "users": [...]}
+    """
+
+    def __init__(self, worker_id: str | None = None) -> None:
+        self.worker_id = worker_id or uuid.uuid4().hex[:12]
+        self._on_remote: Optional[RemoteHandler] = None
+        # room_id → key → newest stamp seen (local or remote)
+        self._stamps: dict[int, dict[str, tuple[int, str]]] = {}
+
+    def set_handler(self, on_remote: RemoteHandler) -> None:
+        self._on_remote = on_remote
+
+    async def open_room(self, room_id: int) -> dict[str, Any]:
+        """
+        Start following *room_id*.
+
+        Returns the shared snapshot: ``{"patches": {k: v}, "presence":
+        {worker: users}}`` (other workers only).
+        """
+        self._stamps.setdefault(room_id, {})
+        return await self._open(room_id)
+
+    async def close_room(self, room_id: int) -> None:
+        """Stop following *room_id* (this worker has no sockets left in it)."""
+        self.publish_presence(room_id, [])
+        self._stamps.pop(room_id, None)
+        await self._close(room_id)
+
+    def publish_patch(
+        self,
+        room_id: int,
+        key: str,
+        value: Any,
+        *,
+        target: int | None = None,
+        meta: dict | None = None,
+        seed: bool = False,
+    ) -> None:
+        """
+        Share one stored room key.  *target* marks a teacher patch routed to
+        one student; *meta* is passed through to the receivers untouched;
+        *seed* publishes with the lowest stamp so the value only fills keys
+        no worker has written.
+        """
+        stamp = SEED_STAMP if seed else _stamp(self.worker_id)
+        stamps = self._stamps.setdefault(room_id, {})
+        if stamp > stamps.get(key, (0, "")):
+            stamps[key] = stamp
+        self._publish(room_id, "patch", key, {"value": value, "target": target, "meta": meta}, stamp)
+
+    def publish_presence(self, room_id: int, users: list[dict]) -> None:
+        """Share this worker's local user list for *room_id*."""
+        self._publish(room_id, "presence", self.worker_id, {"users": users}, _stamp(self.worker_id))
+
+    def accept(self, room_id: int, key: str, stamp: tuple[int, str]) -> bool:
+        """Record *stamp* for a remote write; False when an equal or newer one is known."""
+        stamps = self._stamps.get(room_id)
+        if stamps is None:
+            return False                      # room not followed (any more)
+        if stamp <= stamps.get(key, (0, "")):
+            return False
+        stamps[key] = stamp
+        return True
+
+    async def start(self) -> None:
+        """Start background I/O (idempotent)."""
+
+    async def stop(self) -> None:
+        """Flush queued publishes and stop background I/O."""
+
+    @abstractmethod
+    async def _open(self, room_id: int) -> dict[str, Any]:
+        ...
+
+    @abstractmethod
+    async def _close(self, room_id: int) -> None:
+        ...
+
+    @abstractmethod
+    def _publish(self, room_id: int, op: str, field: str, body: dict, stamp: tuple[int, str]) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict[str, Any]:
+        """Return counters for monitoring."""
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} worker={self.worker_id}>"
+
+
+# ── In-memory backend ─────────────────────────────────────────────────────────
+
+class InMemoryBackplane(RoomBackplane):
+    """Single-worker backplane: nothing to share, every call is a no-op."""
+
+    async def _open(self, room_id: int) -> dict[str, Any]:
+        return {"patches": {}, "presence": {}}
+
+    async def _close(self, room_id: int) -> None:
+        return None
+
+    def _publish(self, room_id: int, op: str, field: str, body: dict, stamp: tuple[int, str]) -> None:
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        return {"backend": "memory", "worker": self.worker_id, "rooms": len(self._stamps)}
+
+
+# ── Redis backend ─────────────────────────────────────────────────────────────
+
+# KEYS: hash, channel   ARGV: field, ts, worker, stored json, message json, ttl
+_LWW_PUBLISH = """
+local cur = redis.call('HGET', KEYS[1], ARGV[1])
+if cur then
+  local c = cjson.decode(cur)
+  local ts = tonumber(ARGV[2])
+  if c.ts > ts or (c.ts == ts and c.w >= ARGV[3]) then
+    return 0
+  end
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+redis.call('PUBLISH', KEYS[2], ARGV[5])
+return 1
+"""
+
+
+def _text(raw: Any) -> str:
+    return raw.decode("utf-8") if isinstance(raw, (bytes, bytearray)) else raw
+
+
+class RedisBackplane(RoomBackplane):
+    """
+    Backplane over Redis pub/sub (redis.asyncio).
+
+    Redis failures never break a lesson: a failed publish is logged and
+    counted, and the room keeps working for the sockets on this worker.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        client: Any = None,
+        worker_id: str | None = None,
+        ttl_seconds: int = _TTL,
+    ) -> None:
+        super().__init__(worker_id)
+        self._url = url
+        self._client = client    # lazy-connect on first use unless injected
+        self._ttl = ttl_seconds
+        self._script: Any = None
+        self._pubsub: Any = None
+        self._outgoing: asyncio.Queue | None = None
+        self._publisher: asyncio.Task | None = None
+        self._listener: asyncio.Task | None = None
+        self._counters = {
+            "published": 0, "publish_errors": 0, "stale_writes": 0,
+            "received": 0, "applied": 0, "ignored": 0,
+        }
+
+    @staticmethod
+    def _keys(room_id: int) -> tuple[str, str, str]:
+        base = f"live:room:{room_id}"
+        return f"{base}:patches", f"{base}:presence", base
+
+    def _client_or_create(self):
+        if self._client is None:
+            import redis.asyncio as aioredis
+            self._client = aioredis.from_url(self._url, socket_connect_timeout=2)
+        return self._client
+
+    # ── lifecycle ─────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        client = self._client_or_create()
+        if self._script is None:
+            self._script = client.register_script(_LWW_PUBLISH)
+        if self._pubsub is None:
+            self._pubsub = client.pubsub()
+        if self._outgoing is None:
+            self._outgoing = asyncio.Queue()
+        if self._publisher is None or self._publisher.done():
+            self._publisher = asyncio.create_task(self._publish_loop())
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen_loop())
+
+    async def stop(self) -> None:
+        if self._outgoing is not None and self._publisher is not None and not self._publisher.done():
+            try:
+                await asyncio.wait_for(self._outgoing.join(), 5)
+            except asyncio.TimeoutError:
+                logger.warning("live_backplane: %d publish(es) dropped on shutdown", self._outgoing.qsize())
+        for task in (self._publisher, self._listener):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._publisher = self._listener = None
+
+    # ── rooms ─────────────────────────────────────────────────────────────────
+
+    async def _open(self, room_id: int) -> dict[str, Any]:
+        await self.start()
+        patches_key, presence_key, channel = self._keys(room_id)
+        # Subscribe first: a write landing between the read and the subscribe
+        # then arrives as a message and its stamp decides.
+        await self._pubsub.subscribe(channel)
+        snapshot: dict[str, Any] = {"patches": {}, "presence": {}}
+        try:
+            raw_patches = await self._client.hgetall(patches_key)
+            raw_presence = await self._client.hgetall(presence_key)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("live_backplane: snapshot of room %s failed: %s", room_id, exc)
+            return snapshot
+        for field, raw in raw_patches.items():
+            key, entry = _text(field), json.loads(_text(raw))
+            if self.accept(room_id, key, (entry["ts"], entry["w"])):
+                snapshot["patches"][key] = entry["v"]
+        for field, raw in raw_presence.items():
+            worker, entry = _text(field), json.loads(_text(raw))
+            if worker != self.worker_id and self.accept(room_id, f"\0presence/{worker}", (entry["ts"], entry["w"])):
+                snapshot["presence"][worker] = entry["v"]
+        return snapshot
+
+    async def _close(self, room_id: int) -> None:
+        if self._pubsub is None:
+            return
+        try:
+            await self._pubsub.unsubscribe(self._keys(room_id)[2])
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("live_backplane: leaving room %s failed: %s", room_id, exc)
+
+    # ── publishing ────────────────────────────────────────────────────────────
+
+    def _publish(self, room_id: int, op: str, field: str, body: dict, stamp: tuple[int, str]) -> None:
+        if self._outgoing is None:
+            self._outgoing = asyncio.Queue()
+        ts, worker = stamp
+        value = body.get("value") if op == "patch" else body["users"]
+        message = {"op": op, "room": room_id, "field": field, "ts": ts, "w": worker, **body}
+        stored = {"v": value, "ts": ts, "w": worker}
+        self._outgoing.put_nowait((room_id, op, field, stored, message))
+
+    async def _publish_loop(self) -> None:
+        while True:
+            room_id, op, field, stored, message = await self._outgoing.get()
+            patches_key, presence_key, channel = self._keys(room_id)
+            try:
+                written = await self._script(
+                    keys=[patches_key if op == "patch" else presence_key, channel],
+                    args=[field, stored["ts"], stored["w"], json.dumps(stored), json.dumps(message), self._ttl],
+                )
+                self._counters["published" if written else "stale_writes"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                self._counters["publish_errors"] += 1
+                logger.warning("live_backplane: publish to room %s failed: %s", room_id, exc)
+            finally:
+                self._outgoing.task_done()
+
+    # ── receiving ─────────────────────────────────────────────────────────────
+
+    async def _listen_loop(self) -> None:
+        while True:
+            if not self._stamps:
+                await asyncio.sleep(0.2)        # no room followed yet
+                continue
+            try:
+                msg = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("live_backplane: pub/sub read failed: %s", exc)
+                await asyncio.sleep(1.0)
+                continue
+            if not msg or msg.get("type") != "message":
+                continue
+            self._counters["received"] += 1
+            try:
+                await self._deliver(json.loads(_text(msg["data"])))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("live_backplane: applying a remote event failed")
+
+    async def _deliver(self, message: dict) -> None:
+        if message["w"] == self.worker_id or self._on_remote is None:
+            return
+        room_id = message["room"]
+        stamp = (message["ts"], message["w"])
+        if message["op"] == "patch":
+            if not self.accept(room_id, message["field"], stamp):
+                self._counters["ignored"] += 1
+                return
+            event = {"op": "patch", "key": message["field"], "value": message.get("value"),
+                     "target": message.get("target"), "meta": message.get("meta")}
+        else:
+            if not self.accept(room_id, f"\0presence/{message['field']}", stamp):
+                self._counters["ignored"] += 1
+                return
+            event = {"op": "presence", "worker": message["field"], "users": message.get("users") or []}
+        self._counters["applied"] += 1
+        await self._on_remote(room_id, event)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": "redis",
+            "worker":  self.worker_id,
+            "rooms":   len(self._stamps),
+            "queued":  self._outgoing.qsize() if self._outgoing is not None else 0,
+            **self._counters,
+        }
+
+
+# ── Singleton ─────────────────────────────────────────────────────────────────
+
+_backplane: RoomBackplane | None = None
+
+
+def get_backplane() -> RoomBackplane:
+    """Return the process-wide backplane selected by ``LIVE_BACKPLANE``."""
+    global _backplane
+    if _backplane is None:
+        if _BACKEND == "redis":
+            from app.core.config import settings
+
+            _backplane = RedisBackplane(url=settings.REDIS_URL)
+        else:
+            _backplane = InMemoryBackplane()
+        logger.info("live_backplane: using %r", _backplane)
+    return _backplane
@@ -0,0 +1,117 @@
+"""
+app/services/live_coalescer.py
+
+Per-key coalescing window for live-room patches.
+
+Typing "andiamo" into a gap sends seven patches for the same key, but only
+the last value matters to anyone who is not watching every keystroke.  A
+``KeyedCoalescer`` holds the latest payload per key and hands it to its
+``emit`` callback at most once per window:
+
+  trailing (default)   the first push opens a window; every push inside it
+                       replaces the payload; the last one is emitted when the
+                       window closes.  Used for persistence — one row per
+                       field per window instead of one per keystroke.
+
+  leading=True         the first push is emitted immediately, later pushes
+                       inside the window collapse into one trailing emit,
+                       which opens the next window.  Used for fan-out — the
+                       teacher sees the first keystroke at once and then at
+                       most one update per window (a capped rate).
+
+A window of 0 disables coalescing: every push is emitted straight away.
+``flush()`` emits every pending payload now (shutdown, read-your-writes), or
+only those of the keys a predicate selects.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class KeyedCoalescer:
+    """Latest-value-wins buffer with one timer per active key."""
+
+    def __init__(
+        self,
+        window_ms: float,
+        emit: Callable[[Hashable, Any], Awaitable[None]],
+        *,
+        leading: bool = False,
+    ) -> None:
+        self._window_s = max(0.0, window_ms) / 1000
+        self._emit = emit
+        self._leading = leading
+        self._pending: dict[Hashable, Any] = {}
+        self._timers: dict[Hashable, asyncio.Task] = {}
+        self.pushed = 0
+        self.emitted = 0
+
+    async def push(self, key: Hashable, payload: Any) -> None:
+        self.pushed += 1
+        if self._window_s <= 0:
+            await self._send(key, payload)
+            return
+        if key in self._timers:
+            self._pending[key] = payload        # replaces the value still waiting
+            return
+        if self._leading:
+            await self._send(key, payload)
+        else:
+            self._pending[key] = payload
+        self._timers[key] = asyncio.create_task(self._close_window(key))
+
+    async def flush(self, match: Callable[[Hashable], bool] | None = None) -> None:
+        """
+        Emit pending payloads now and close their windows — every key, or
+        only the keys *match* accepts.
+        """
+        if match is None:
+            timers, self._timers = self._timers, {}
+            pending, self._pending = self._pending, {}
+        else:
+            timers = {k: t for k, t in self._timers.items() if match(k)}
+            pending = {k: p for k, p in self._pending.items() if match(k)}
+            for key in timers:
+                del self._timers[key]
+            for key in pending:
+                del self._pending[key]
+        for task in timers.values():
+            task.cancel()
+        for key, payload in pending.items():
+            await self._send(key, payload)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pushed":    self.pushed,
+            "emitted":   self.emitted,
+            "coalesced": self.pushed - self.emitted - len(self._pending),
+            "pending":   len(self._pending),
+        }
+
+    # ── internal ──────────────────────────────────────────────────────────────
+
+    async def _close_window(self, key: Hashable) -> None:
+        try:
+            await asyncio.sleep(self._window_s)
+        except asyncio.CancelledError:
+            return
+        self._timers.pop(key, None)
+        if key not in self._pending:
+            return
+        payload = self._pending.pop(key)
+        if self._leading:
+            # The trailing emit counts as this window's first — keep the cap.
+            self._timers[key] = asyncio.create_task(self._close_window(key))
+        await self._send(key, payload)
+
+    async def _send(self, key: Hashable, payload: Any) -> None:
+        self.emitted += 1
+        try:
+            await self._emit(key, payload)
+        except Exception:
+            logger.exception("Live coalescer: emit failed for key %r", key)
@@ -0,0 +1,229 @@
+"""
+app/services/live_patch_store.py
+================================
+Patch state of one live room, indexed by owner.
+
+A room's patches used to be one flat dict.  Every student join walked all of
+it to build the personalised snapshot (strip the student's own
+``s/{uid}/…`` keys, drop everyone else's), and scanned it once more to find
+out whether the student had live answers at all — tens of thousands of
+prefix checks per join in a full class, multiplied by reconnect storms.
+
+``RoomPatches`` keeps the same keys split three ways:
+
+  shared     everything without an ``s/`` prefix — teacher fills, lesson
+             navigation, presence; every client sees these
+  students   uid → {"ex/…": value} for ``s/{uid}/…`` keys
+  private    any other ``s/…`` key (teachers only)
+
+so a student snapshot is the shared map plus one small per-student map.
+The serialised shared map is cached per *shared* version, so students
+typing do not invalidate it; the teacher's full snapshot is cached per room
+version.  A student's own value wins over a shared key with the same name.
+
+The object is a drop-in for the old dict where live.py reads or writes
+single keys (``[]``, ``in``, ``len``, ``update``).
+
+Versions and deltas
+-------------------
+Every write bumps ``version`` and moves the key to the end of a change log
+(one entry per key, ordered by the version of its last write), so
+``delta(since)`` returns what changed after a client's last seen version in
+O(changes).  ``epoch`` identifies this room instance: versions restart
+when a room is recreated (last socket left, restart, another worker), and a
+client whose epoch does not match gets a full snapshot instead.
+
+MessagePack snapshots (app/services/live_wire.py) are cached the same way as
+the JSON ones.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import uuid
+from typing import Any, Iterable, Iterator, Mapping
+
+import msgpack
+
+_STUDENT_KEY_RE = re.compile(r"^s/(\d+)/(.+)$")
+
+
+class RoomPatches:
+    """Shared / per-student / private patch maps with cached JSON snapshots."""
+
+    def __init__(self) -> None:
+        self.shared: dict[str, Any] = {}
+        self.students: dict[int, dict[str, Any]] = {}
+        self.private: dict[str, Any] = {}
+        self.version = 0
+        self.shared_version = 0
+        self.epoch = uuid.uuid4().hex[:12]
+        self._changes: dict[str, int] = {}
+        self._shared_json: tuple[int, str] | None = None
+        self._full_json: tuple[int, str] | None = None
+        self._shared_pairs: tuple[int, bytes] | None = None
+        self._full_msgpack: tuple[int, bytes] | None = None
+
+    # ── dict-style access ─────────────────────────────────────────────────────
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.version += 1
+        self._changes.pop(key, None)
+        self._changes[key] = self.version
+        if not key.startswith("s/"):
+            self.shared[key] = value
+            self.shared_version += 1
+            return
+        m = _STUDENT_KEY_RE.match(key)
+        if m:
+            self.students.setdefault(int(m.group(1)), {})[m.group(2)] = value
+        else:
+            self.private[key] = value
+
+    def __getitem__(self, key: str) -> Any:
+        container, inner = self._locate(key)
+        if container is None or inner not in container:
+            raise KeyError(key)
+        return container[inner]
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        container, inner = self._locate(key)
+        return container is not None and inner in container
+
+    def __len__(self) -> int:
+        return len(self.shared) + len(self.private) + sum(len(d) for d in self.students.values())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.as_dict())
+
+    def update(self, items: Mapping[str, Any] | Iterable[tuple[str, Any]]) -> None:
+        pairs = items.items() if isinstance(items, Mapping) else items
+        for key, value in pairs:
+            self[key] = value
+
+    def touch(self, key: str) -> None:
+        """Re-log *key* at a new version without changing its value."""
+        if key in self:
+            self[key] = self[key]
+
+    def _locate(self, key: str) -> tuple[dict[str, Any] | None, str]:
+        if not key.startswith("s/"):
+            return self.shared, key
+        m = _STUDENT_KEY_RE.match(key)
+        if m:
+            return self.students.get(int(m.group(1))), m.group(2)
+        return self.private, key
+
+    # ── snapshots ─────────────────────────────────────────────────────────────
+
+    def has_student(self, student_id: int) -> bool:
+        """True when the room holds at least one ``s/{student_id}/…`` key."""
+        return bool(self.students.get(student_id))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Every key in its stored form — the teacher's view."""
+        full = {**self.shared, **self.private}
+        for uid, own in self.students.items():
+            prefix = f"s/{uid}/"
+            for k, v in own.items():
+                full[prefix + k] = v
+        return full
+
+    def student_view(self, student_id: int) -> dict[str, Any]:
+        """
+        Personalised view for one student:
+
+        • "s/{student_id}/ex/…"  →  plain "ex/…"  (own answers, restored)
+        • "s/{other_id}/…"       →  excluded
+        • everything else        →  included as-is
+        """
+        return {**self.shared, **self.students.get(student_id, {})}
+
+    def shared_json(self) -> str:
+        """``json.dumps(shared)``, cached until a shared key changes."""
+        cached = self._shared_json
+        if cached is None or cached[0] != self.shared_version:
+            cached = self._shared_json = (self.shared_version, json.dumps(self.shared))
+        return cached[1]
+
+    def full_json(self) -> str:
+        """``json.dumps(as_dict())``, cached until any key changes."""
+        cached = self._full_json
+        if cached is None or cached[0] != self.version:
+            cached = self._full_json = (self.version, json.dumps(self.as_dict()))
+        return cached[1]
+
+    def student_json(self, student_id: int) -> str:
+        """
+        ``json.dumps(student_view(uid))`` in O(own keys): the cached shared
+        JSON spliced with the student's own map.
+        """
+        own = self.students.get(student_id)
+        if not own:
+            return self.shared_json()
+        if not self.shared:
+            return json.dumps(own)
+        if any(k in self.shared for k in own):
+            # Own value overrides a shared key — splice would duplicate it.
+            return json.dumps(self.student_view(student_id))
+        return self.shared_json()[:-1] + ", " + json.dumps(own)[1:]
+
+    # ── deltas ────────────────────────────────────────────────────────────────
+
+    def changed_since(self, version: int) -> list[str]:
+        """Keys written after *version*, oldest write first."""
+        keys: list[str] = []
+        for key in reversed(self._changes):
+            if self._changes[key] <= version:
+                break
+            keys.append(key)
+        keys.reverse()
+        return keys
+
+    def delta(self, since: int, student_id: int | None = None) -> dict[str, Any] | None:
+        """
+        Patches a client at version *since* is missing, in the same view as
+        the snapshot it would get (teacher: stored keys; student: shared keys
+        plus own keys stripped to "ex/…").  None when *since* is not a
+        version of this room — send a full snapshot instead.
+        """
+        if since < 0 or since > self.version:
+            return None
+        keys = self.changed_since(since)
+        if student_id is None:
+            return {k: self[k] for k in keys}
+        prefix = f"s/{student_id}/"
+        own = self.students.get(student_id, {})
+        delta = {k: self.shared[k] for k in keys if k in self.shared and k not in own}
+        for k in keys:
+            if k.startswith(prefix):
+                delta[k[len(prefix):]] = own[k[len(prefix):]]
+        return delta
+
+    # ── MessagePack snapshots ─────────────────────────────────────────────────
+
+    def full_msgpack(self) -> bytes:
+        """``msgpack.packb(as_dict())``, cached until any key changes."""
+        cached = self._full_msgpack
+        if cached is None or cached[0] != self.version:
+            cached = self._full_msgpack = (self.version, msgpack.packb(self.as_dict()))
+        return cached[1]
+
+    def student_msgpack(self, student_id: int) -> bytes:
+        """Packed student_view(uid): a fresh map header + cached shared pairs + own pairs."""
+        own = self.students.get(student_id) or {}
+        if any(k in self.shared for k in own):
+            return msgpack.packb(self.student_view(student_id))
+        cached = self._shared_pairs
+        if cached is None or cached[0] != self.shared_version:
+            cached = self._shared_pairs = (self.shared_version, _pack_pairs(self.shared))
+        packer = msgpack.Packer()
+        return packer.pack_map_header(len(self.shared) + len(own)) + cached[1] + _pack_pairs(own, packer)
+
+
+def _pack_pairs(items: Mapping[str, Any], packer: msgpack.Packer | None = None) -> bytes:
+    packer = packer or msgpack.Packer()
+    return b"".join(packer.pack(k) + packer.pack(v) for k, v in items.items())
@@ -0,0 +1,81 @@
+"""
+app/services/live_wire.py
+=========================
+Opt-in binary protocol for the live classroom WebSocket.
+
+A client that opens the socket with the ``live.msgpack.v1`` subprotocol
+(``new WebSocket(url, ["live.msgpack.v1"])``) talks MessagePack binary
+frames instead of JSON text; everyone else keeps the JSON protocol
+unchanged.  Message shapes are the JSON ones, plus:
+
+  server → client
+    snapshot   { "type": "snapshot", "patches": {…}, "epoch": "…", "v": N }
+    delta      { "type": "delta", "patches": {…}, "epoch": "…", "since": S, "v": N }
+    patch      { "type": "patch", "key": "…", "value": …, "v": N }
+    presence   { "type": "presence", "joined": [user, …], "left": [user_id, …], "v": N }
+
+  client → server
+    join       { "type": "join", …, "epoch": "…", "since": S }   (both optional)
+
+``v`` is the room version (RoomPatches.version) after the change.  A client
+remembers the epoch of its last snapshot and the highest ``v`` it applied;
+on reconnect it sends them with ``join`` and gets a ``delta`` with only the
+keys written since — or a full snapshot when the room was recreated.
+
+Presence goes out as join/leave diffs against the previous list instead of
+the whole ``_presence/users`` list on every change; the list itself is
+still part of snapshots and deltas.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+import msgpack
+from fastapi import WebSocket
+
+SUBPROTOCOL = "live.msgpack.v1"
+
+
+def negotiate(websocket: WebSocket) -> str | None:
+    """The subprotocol to accept for *websocket*: ours when offered, else None (JSON)."""
+    offered = websocket.scope.get("subprotocols") or ()
+    return SUBPROTOCOL if SUBPROTOCOL in offered else None
+
+
+def pack(frame: dict[str, Any]) -> bytes:
+    return msgpack.packb(frame)
+
+
+def unpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, strict_map_key=False)
+
+
+def snapshot_frame(body: bytes, *, epoch: str, version: int,
+                   since: int | None = None) -> bytes:
+    """
+    A snapshot (since None) or delta frame around an already packed
+    ``patches`` map, so cached snapshot bytes are reused as-is.
+    """
+    packer = msgpack.Packer()
+    head = {"type": "snapshot" if since is None else "delta", "epoch": epoch, "v": version}
+    if since is not None:
+        head["since"] = since
+    return (
+        packer.pack_map_header(len(head) + 1)
+        + b"".join(packer.pack(k) + packer.pack(v) for k, v in head.items())
+        + packer.pack("patches")
+        + body
+    )
+
+
+def presence_diff(
+    before: Iterable[dict[str, Any]],
+    after: Iterable[dict[str, Any]],
+) -> tuple[list[dict[str, Any]], list[Any]]:
+    """(users new or changed in *after*, user_ids gone from it)."""
+    old = {u["user_id"]: u for u in before}
+    new = {u["user_id"]: u for u in after}
+    joined = [u for uid, u in new.items() if old.get(uid) != u]
+    left = [uid for uid in old if uid not in new]
+    return joined, left
@@ -10,6 +10,8 @@ Architecture
 * Validates LLM output with Pydantic; retries exactly once on failure.
 * Never leaks raw LLM reasoning to callers.
 * Fully synchronous (generate) + async (agenerate) APIs.
+* agenerate_slides_stream() yields each slide as soon as its JSON object
+  closes in the provider's token stream (see ai/streaming_json.py).
 
 Usage
 -----
@@ -34,8 +36,7 @@ from __future__ import annotations
 
 import json
 import logging
-import re
-from typing import Any, Optional, TYPE_CHECKING
+from typing import Any, AsyncIterator, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from app.services.ai.cache.cache_service import CacheService
@@ -44,6 +45,8 @@ from pydantic import ValidationError
 
 from app.schemas.slides import Slide, SlideDeck, SlideGenerationRequest
 from app.services.ai.providers.base import AIProvider, AIProviderError
+from app.services.ai.streaming_json import StreamingArrayParser, parse_array_items
+from app.services.ai.tolerant_json import TruncatedJSONError, loads_tolerant
 
 logger = logging.getLogger(__name__)
 
@@ -289,6 +292,137 @@ class SlideGeneratorService:
             f"{last_error}"
         ) from last_error
 
+    async def agenerate_slides_stream(
+        self,
+        request: SlideGenerationRequest,
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """
+        Streaming slide generation.
+
+        Yields ``(kind, payload)`` tuples:
+
+        ("slide", Slide)      each slide as soon as its JSON object closes
+        ("retry", int)        the attempt failed — slides sent so far are void
+        ("deck",  SlideDeck)  the validated deck, always last
+
+        Uses the provider's ``agenerate_stream`` when it has one; otherwise the
+        whole response arrives as a single chunk and the slides are emitted
+        together.  A truncated response keeps every slide that closed before
+        the cut — no bracket-repair pass is needed.  Cache hits replay the
+        cached slides.
+
+        Raises SlideGenerationError after the last failed attempt.
+        """
+        if self._cache is not None:
+            cached, _ = self._cache.get_slide(request)
+            if cached is not None:
+                for slide in cached.slides:
+                    yield "slide", slide
+                yield "deck", cached
+                return
+
+        system_prompt = self._build_system_prompt(request)
+        user_prompt   = self._build_user_prompt(request)
+        full_prompt   = f"{system_prompt}\n\n{user_prompt}"
+
+        last_error: Exception | None = None
+
+        for attempt in range(self._max_retries + 1):
+            prompt = full_prompt
+            if attempt > 0:
+                logger.warning(
+                    "Slide generation retry %d/%d (stream) — topic=%r",
+                    attempt, self._max_retries, request.topic,
+                )
+                yield "retry", attempt
+                prompt += (
+                    "\n\nCRITICAL CORRECTION: Every single slide MUST have "
+                    "bullet_points as a non-empty JSON array with at least one string. "
+                    "A slide with bullet_points: [] is invalid. "
+                    "Return the complete corrected JSON now."
+                )
+
+            parser = StreamingArrayParser("slides")
+            slides: list[Slide] = []
+            try:
+                async for chunk in self._astream(prompt):
+                    for raw_slide in parser.feed(chunk):
+                        slide = self._validate_slide(raw_slide, len(slides))
+                        if slide is not None:
+                            slides.append(slide)
+                            yield "slide", slide
+
+                data = parser.finish()
+                if not data.get("slides"):
+                    raise SlideGenerationError(
+                        f"No slides found in AI response. Excerpt: {parser.text[:300]!r}"
+                    )
+                deck = self._build_deck(data, request, slides)
+
+                if self._cache is not None:
+                    self._cache.set_slide(request, deck)
+
+                yield "deck", deck
+                return
+
+            except (SlideGenerationError, AIProviderError) as exc:
+                last_error = exc
+                logger.error(
+                    "Slide generation attempt %d failed (stream): %s",
+                    attempt + 1, exc,
+                )
+
+        raise SlideGenerationError(
+            f"Failed to generate slides after {self._max_retries + 1} attempt(s): "
+            f"{last_error}"
+        ) from last_error
+
+    async def _astream(self, prompt: str) -> AsyncIterator[str]:
+        """Token stream from the provider, or one chunk if it cannot stream."""
+        if hasattr(self._provider, "agenerate_stream"):
+            async for chunk in self._provider.agenerate_stream(prompt):
+                yield chunk
+        else:
+            yield await self._provider.agenerate(prompt)
+
+    def _validate_slide(self, raw: dict[str, Any], index: int) -> Slide | None:
+        """Sanitize + validate one streamed slide; None if it is unusable."""
+        cleaned = self._sanitize({"slides": [raw]}, offset=index)["slides"]
+        if not cleaned:
+            return None
+        try:
+            slide = Slide.model_validate(cleaned[0])
+        except ValidationError as exc:
+            logger.warning("Streamed slide %d failed validation: %s", index + 1, exc)
+            return None
+        object.__setattr__(slide, "id", index + 1)
+        return slide
+
+    def _build_deck(
+        self,
+        data: dict[str, Any],
+        request: SlideGenerationRequest,
+        slides: list[Slide],
+    ) -> SlideDeck:
+        """Assemble the final deck from already-validated streamed slides."""
+        try:
+            deck = SlideDeck(
+                topic            = data.get("topic") or request.topic,
+                level            = data.get("level") or request.level,
+                target_audience  = data.get("target_audience", request.target_audience),
+                duration_minutes = data.get("duration_minutes") or request.duration_minutes,
+                slides           = slides,
+            )
+        except ValidationError as exc:
+            raise SlideGenerationError(
+                f"AI output failed schema validation: {exc}"
+            ) from exc
+        logger.info(
+            "Slide deck streamed — topic=%r level=%r slides=%d provider=%r",
+            deck.topic, deck.level, len(deck.slides), self._provider,
+        )
+        return deck
+
     # ── Prompt builders ────────────────────────────────────────────────────────
 
     def _build_system_prompt(self, req: SlideGenerationRequest) -> str:
@@ -331,17 +465,17 @@ class SlideGeneratorService:
 
         Strategy
         --------
-        1. Strip any accidental markdown fences.
-        2. Try direct json.loads on the full response.
-        3. Fall back to a first-JSON-object regex extraction.
-        4. Feed the dict to SlideDeck for Pydantic validation.
-        5. Back-fill top-level fields from the request (topic, level, …)
+        1. Decode the first JSON object with the shared tolerant decoder
+           (fences, prose, bad escapes, trailing commas).
+        2. On a truncated response keep only the slides that closed.
+        3. Feed the dict to SlideDeck for Pydantic validation.
+        4. Back-fill top-level fields from the request (topic, level, …)
            if the model omitted them.
         """
         if not raw or not raw.strip():
             raise SlideGenerationError("AI provider returned an empty response.")
 
-        cleaned = self._strip_markdown_fences(raw.strip())
+        cleaned = raw.strip()
 
         data = self._extract_json(cleaned)
 
@@ -372,199 +506,59 @@ class SlideGeneratorService:
         )
         return deck
 
-    @staticmethod
-    def _strip_markdown_fences(text: str) -> str:
-        """Remove ```json … ``` or ``` … ``` wrappers the model sometimes adds."""
-        # Match optional language tag after opening fence
-        fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
-        if fenced:
-            return fenced.group(1).strip()
-        return text
-
-    @staticmethod
-    def _fix_escapes(text: str) -> str:
-        r"""
-        Fix invalid JSON escape sequences produced by the model.
-
-        JSON only permits: \\  \"  \/  \b  \f  \n  \r  \t  \uXXXX
-        The model sometimes writes bare backslashes inside strings,
-        e.g. "Timing hint: \Teacher" or "path: C:\Users\name".
-
-        Strategy: replace any backslash NOT followed by a valid escape
-        character with a double-backslash (escaped literal backslash).
-        Only operates inside JSON string values to avoid mangling structure.
-        """
-        # Replace \X where X is not a valid JSON escape character
-        # Valid: " \ / b f n r t u
-        return re.sub(
-            r'\\(?!["\\/bfnrtu])',
-            r'\\\\',
-            text,
-        )
-
-    @staticmethod
-    def _repair_truncated_json(fragment: str) -> dict[str, Any] | None:
-        """
-        Attempt to close a truncated JSON object by counting unclosed
-        brackets and strings, then appending the minimum closing tokens.
-
-        Returns parsed dict on success, None if repair fails.
-        This is a best-effort recovery — the last slide(s) may be incomplete
-        but the deck will still validate if earlier slides are intact.
-        """
-        text    = fragment.rstrip()
-        depth   = 0
-        in_str  = False
-        escape  = False
-
-        for ch in text:
-            if escape:
-                escape = False
-                continue
-            if ch == "\\" and in_str:
-                escape = True
-                continue
-            if ch == '"':
-                in_str = not in_str
-                continue
-            if in_str:
-                continue
-            if ch in "{[":
-                depth += 1
-            elif ch in "}]":
-                depth -= 1
-
-        if depth <= 0:
-            return None  # wasn't actually truncated
-
-        # If we're still inside a string, close it first
-        suffix = ""
-        if in_str:
-            suffix += '"'
-
-        # Close arrays and objects based on stack depth
-        # Walk the fragment to know the correct close sequence
-        close_stack = []
-        in_str2     = False
-        escape2     = False
-
-        for ch in fragment:
-            if escape2:
-                escape2 = False
-                continue
-            if ch == "\\" and in_str2:
-                escape2 = True
-                continue
-            if ch == '"':
-                in_str2 = not in_str2
-                continue
-            if in_str2:
-                continue
-            if ch == "{":
-                close_stack.append("}")
-            elif ch == "[":
-                close_stack.append("]")
-            elif ch in "}]":
-                if close_stack:
-                    close_stack.pop()
-
-        suffix += "".join(reversed(close_stack))
-
-        repaired_text = text + suffix
-        try:
-            result = json.loads(repaired_text)
-            logger.warning(
-                "Repaired truncated JSON by appending %r — "
-                "last slide(s) may be incomplete.",
-                suffix,
-            )
-            return result
-        except json.JSONDecodeError:
-            return None
-
     @staticmethod
     def _extract_json(text: str) -> dict[str, Any]:
         """
-        Parse the first complete JSON object found in *text*.
+        Parse the first JSON object found in *text*.
 
-        Handles:
-        - Straight json.loads (fast path)
-        - JSON embedded in prose
-        - Invalid escape sequences (model writes \\T, \\e, etc.)
-        - Truncated responses (model hit token limit mid-output)
+        Fences, surrounding prose, invalid escapes (\\T, C:\\Users) and
+        trailing commas are repaired in one scan by ``loads_tolerant``.  A
+        truncated response (model hit its token limit) is not auto-closed —
+        that would keep a half-written last slide — instead every slide that
+        closed before the cut is kept.
         """
-        # ── 1. clean invalid escape sequences ─────────────────────────────────
-        text = SlideGeneratorService._fix_escapes(text)
-
-        # ── 2. fast path ───────────────────────────────────────────────────────
         try:
-            return json.loads(text)
-        except json.JSONDecodeError:
+            data = loads_tolerant(text, roots="{", allow_truncated=False)
+        except TruncatedJSONError:
             pass
-
-        # ── 3. find outermost { } block ────────────────────────────────────────
-        start = text.find("{")
-        if start == -1:
+        except json.JSONDecodeError as exc:
+            if "{" not in text:
+                raise SlideGenerationError(
+                    f"No JSON object found in AI response. Excerpt: {text[:300]!r}"
+                ) from exc
             raise SlideGenerationError(
-                f"No JSON object found in AI response. Excerpt: {text[:300]!r}"
+                f"Extracted JSON block is invalid: {exc}. "
+                f"Excerpt: {text[:400]!r}"
+            ) from exc
+        else:
+            if isinstance(data, dict):
+                return data
+            raise SlideGenerationError(
+                f"AI response is not a JSON object. Excerpt: {text[:300]!r}"
             )
 
-        depth, in_str, escape = 0, False, False
-        end_idx = None
-
-        for idx, ch in enumerate(text[start:], start=start):
-            if escape:
-                escape = False
-                continue
-            if ch == "\\" and in_str:
-                escape = True
-                continue
-            if ch == '"':
-                in_str = not in_str
-                continue
-            if in_str:
-                continue
-            if ch == "{":
-                depth += 1
-            elif ch == "}":
-                depth -= 1
-                if depth == 0:
-                    end_idx = idx
-                    break
-
-        if end_idx is not None:
-            candidate = text[start : end_idx + 1]
-            try:
-                return json.loads(candidate)
-            except json.JSONDecodeError as exc:
-                # Try escape-fix again on the isolated block
-                candidate = SlideGeneratorService._fix_escapes(candidate)
-                try:
-                    return json.loads(candidate)
-                except json.JSONDecodeError:
-                    raise SlideGenerationError(
-                        f"Extracted JSON block is invalid: {exc}. "
-                        f"Block excerpt: {candidate[:400]!r}"
-                    ) from exc
-
-        # ── 4. truncated response — attempt repair ─────────────────────────────
+        start = text.find("{")
         logger.warning(
-            "JSON appears truncated (depth=%d after full scan). "
-            "Attempting repair. Text length: %d",
-            depth, len(text),
+            "JSON appears truncated. Salvaging completed slides. Text length: %d",
+            len(text),
         )
-        repaired = SlideGeneratorService._repair_truncated_json(text[start:])
-        if repaired:
-            return repaired
+        salvaged, items = parse_array_items(text[start:], "slides")
+        if items:
+            logger.warning(
+                "Recovered %d complete slide(s) from truncated JSON — "
+                "last slide(s) may be missing.",
+                len(items),
+            )
+            return salvaged
 
         raise SlideGenerationError(
-            f"Could not find or repair a complete JSON object. "
+            f"Could not find a complete JSON object or any complete slide. "
             f"Response was likely truncated. "
             f"Excerpt: {text[start:start+300]!r}"
         )
 
     @staticmethod
-    def _sanitize(data: dict[str, Any]) -> dict[str, Any]:
+    def _sanitize(data: dict[str, Any], offset: int = 0) -> dict[str, Any]:
         """
         Clean raw LLM output before Pydantic validation.
 
@@ -575,11 +569,14 @@ class SlideGeneratorService:
         - slide missing the bullet_points key → inject fallback
         - slide missing the title key         → inject fallback title
         - slides list is null / missing       → return empty list (caught later)
+
+        *offset* is the position of the first slide in the deck — used for
+        fallback titles when slides are sanitized one at a time while streaming.
         """
         slides_raw = data.get("slides") or []
 
         cleaned = []
-        for i, slide in enumerate(slides_raw):
+        for i, slide in enumerate(slides_raw, start=offset):
             if not isinstance(slide, dict):
                 continue  # skip completely malformed entries
 
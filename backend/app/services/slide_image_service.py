@@ -8,9 +8,13 @@ Flow
 1. Caller passes a SlideDeck (already generated by SlideGeneratorService).
 2. For each slide, SlideImageService builds a targeted image prompt via
    ImagePromptBuilder, using the slide's title and bullet points.
-3. The prompt is sent to the injected ImageProvider.
-4. The data URI returned by ImageResult.as_data_uri() is written directly
-   to Slide.image (Optional[str]) — no intermediate SlideImage wrapper.
+3. The prompt is sent to the injected ImageProvider — unless the provider
+   can render the slide from a local template (render_slide_template()).
+4. As soon as an image comes back it is uploaded (content-addressed, via
+   file_storage.save_image_by_hash) while still holding its semaphore slot,
+   and the resulting URL is written to Slide.image (Optional[str]).  The
+   data URI from ImageResult.as_data_uri() is only used for placeholders,
+   when uploads are disabled, or when the upload fails.
 5. The enriched SlideDeck is returned.
 
 Design principles
@@ -20,8 +24,10 @@ Design principles
   via asyncio.gather() to minimise total latency.
 * Failures on individual slides are caught and replaced with a
   NullImageProvider placeholder — one bad image never kills the deck.
-* Slide.image is now Optional[str] (a data URI) rather than a nested
-  SlideImage object, simplifying serialisation and frontend consumption.
+* Slide.image is Optional[str] (a URL, or a data URI as fallback) rather
+  than a nested SlideImage object, simplifying serialisation and frontend
+  consumption.  URLs keep cached decks and SSE frames small — a PNG data
+  URI is hundreds of KB per slide.
 * Prompt construction is delegated to ImagePromptBuilder.
 
 Usage
@@ -36,25 +42,70 @@ Usage
 
     # deck is a SlideDeck returned by SlideGeneratorService
     enriched_deck = await img_service.enrich_deck(deck)
-    # enriched_deck.slides[i].image is now a data URI string
+    # enriched_deck.slides[i].image is now an image URL
+
+Environment variables
+---------------------
+SLIDE_IMAGE_UPLOAD  Upload generated images and return URLs (default true);
+                    "false" keeps inline data URIs.
 """
 
 from __future__ import annotations
 
 import asyncio
+import base64
 import logging
+import os
 from typing import Optional
 
 from app.schemas.slides import Slide, SlideDeck
 from app.services.ai.image_providers.image_base import (
+    ImageFormat,
     ImageProvider,
     ImageProviderError,
+    ImageResult,
     NullImageProvider,
 )
 from app.services.image_prompt_builder import ImagePromptBuilder
 
 logger = logging.getLogger(__name__)
 
+_UPLOAD_IMAGES = os.environ.get("SLIDE_IMAGE_UPLOAD", "true").strip().lower() != "false"
+
+_MIME_TYPES = {
+    ImageFormat.SVG:  "image/svg+xml",
+    ImageFormat.PNG:  "image/png",
+    ImageFormat.JPEG: "image/jpeg",
+    ImageFormat.WEBP: "image/webp",
+}
+
+
+async def store_slide_image(result: ImageResult, upload: Optional[bool] = None) -> str:
+    """
+    Upload *result* and return its URL, or its data URI when it is a
+    placeholder, the upload fails, or uploads are off (*upload* defaults to
+    SLIDE_IMAGE_UPLOAD).
+
+    Storage is content-addressed, so regenerating an identical image (e.g.
+    a cached SVG) reuses the stored object; image_gc reclaims images whose
+    deck was never saved.
+    """
+    if upload is None:
+        upload = _UPLOAD_IMAGES
+    if not upload or result.is_empty() or result.format not in _MIME_TYPES:
+        return result.as_data_uri()
+    from app.services.file_storage import save_image_by_hash  # noqa: PLC0415
+
+    try:
+        if result.format == ImageFormat.SVG:
+            raw = result.data.encode("utf-8")
+        else:
+            raw = base64.b64decode(result.data)
+        return await asyncio.to_thread(save_image_by_hash, raw, _MIME_TYPES[result.format])
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Slide image upload failed, keeping data URI: %s", exc)
+        return result.as_data_uri()
+
 
 class SlideImageService:
     """
@@ -78,6 +129,9 @@ class SlideImageService:
         Deck topic forwarded to ImagePromptBuilder for richer prompts.
     target_audience : str
         Audience description forwarded to ImagePromptBuilder.
+    upload_images : bool
+        Upload each image as soon as it is generated and store its URL in
+        Slide.image instead of a data URI.  Default: SLIDE_IMAGE_UPLOAD.
     """
 
     def __init__(
@@ -89,6 +143,7 @@ class SlideImageService:
         style:              str  = "educational, flat illustration, clean background",
         topic:              str  = "",
         target_audience:    str  = "",
+        upload_images:      bool = _UPLOAD_IMAGES,
     ) -> None:
         if not isinstance(image_provider, ImageProvider):
             raise TypeError(
@@ -102,6 +157,7 @@ class SlideImageService:
         self._style             = style
         self._topic             = topic
         self._audience          = target_audience
+        self._upload            = upload_images
         self._null              = NullImageProvider()
 
     # ── Public API ─────────────────────────────────────────────────────────────
@@ -120,7 +176,8 @@ class SlideImageService:
         Returns
         -------
         SlideDeck
-            Same deck with each Slide.image field populated as a data URI string.
+            Same deck with each Slide.image field populated with an image URL
+            (or a data URI when uploads are off or fail).
         """
         n = len(deck.slides)
         logger.info(
@@ -146,26 +203,22 @@ class SlideImageService:
             return_exceptions=False,
         )
 
-        # Stitch images back onto slide copies.
-        # Slide.image is Optional[str] — a plain data URI — so we call
-        # result.as_data_uri() directly instead of wrapping in a SlideImage object.
-        enriched_slides = []
-        for slide, image_result in zip(deck.slides, results):
-            enriched_slides.append(
-                slide.model_copy(
-                    update={"image": image_result.as_data_uri() if image_result else None}
-                )
-            )
+        # Stitch images back onto slide copies.  _safe_generate already
+        # resolved each result to the string stored in Slide.image.
+        enriched_slides = [
+            slide.model_copy(update={"image": image})
+            for slide, image in zip(deck.slides, results)
+        ]
 
         return deck.model_copy(update={"slides": enriched_slides})
 
     # ── Private helpers ────────────────────────────────────────────────────────
 
-    async def _safe_generate(self, task, sem: asyncio.Semaphore):
+    async def _safe_generate(self, task, sem: asyncio.Semaphore) -> Optional[str]:
         """
-        Generate one image with semaphore throttling.
-        Returns None for skipped slides.
-        Catches all errors and returns a placeholder ImageResult.
+        Generate one image with semaphore throttling and return the value
+        for Slide.image.  Returns None for skipped slides.
+        Catches all errors and returns a placeholder data URI.
         """
         if task is None:
             return None
@@ -176,7 +229,9 @@ class SlideImageService:
 
         async with sem:
             try:
-                result = await self._provider.agenerate_image(
+                result = self._provider.render_slide_template(
+                    slide.title, slide.bullet_points, alt_text,
+                ) or await self._provider.agenerate_image(
                     prompt   = prompt,
                     alt_text = alt_text,
                     style    = self._style,
@@ -185,7 +240,9 @@ class SlideImageService:
                     "Slide %d image OK — source=%s chars/bytes=%d",
                     index, result.source, len(result.data),
                 )
-                return result
+                # Upload inside the slot: the image is released as soon as it
+                # is stored, and uploads share the provider's concurrency cap.
+                return await store_slide_image(result, upload=self._upload)
 
             except (ImageProviderError, Exception) as exc:
                 logger.error(
@@ -195,7 +252,7 @@ class SlideImageService:
                 return self._null.generate_image(
                     prompt   = prompt,
                     alt_text = alt_text,
-                )
+                ).as_data_uri()
 
     @staticmethod
     def _build_image_prompt(
@@ -221,5 +278,5 @@ class SlideImageService:
     def __repr__(self) -> str:
         return (
             f"<SlideImageService provider={self._provider!r} "
-            f"concurrency={self._concurrency}>"
+            f"concurrency={self._concurrency} upload={self._upload}>"
         )
\ No newline at end of file
@@ -0,0 +1,403 @@
+"""
+app/services/slide_svg_templates.py
+===================================
+Deterministic 800×450 SVG illustrations for the common language-lesson
+slide shapes, rendered locally from the slide's title and bullet points.
+
+SVGImageProvider otherwise asks the LLM to hand-write SVG for every slide
+(3–15 s, different output on every run).  Most lesson slides fall into a
+handful of shapes, each recognised from its bullets:
+
+  conjugation   "io parlo", "tu parli", …          → pronoun / form table
+  comparison    "Essere vs Avere" + "Essere: …"    → two-column cards
+  dialogue      "Marco: Ciao!", "Anna: Ciao!", …   → alternating chat bubbles
+  timeline      "1861: …", "Poi …", "Step 2 …"     → horizontal event line
+  vocabulary    "la mela — apple", …               → card grid
+
+Rendering is a pure function of (title, bullets): identical input gives
+byte-identical output, so results can be cached and content-addressed.
+render_slide_svg() returns None when no template fits — callers fall back
+to the LLM.
+
+Colours and fonts follow the LLM prompt's design standards so template and
+generated diagrams look alike within one deck.
+"""
+
+from __future__ import annotations
+
+import html
+import re
+from typing import Callable, Optional, Sequence
+
+__all__ = ["detect_slide_intent", "render_slide_svg", "TEMPLATE_INTENTS"]
+
+# ── Design tokens ─────────────────────────────────────────────────────────────
+
+_W, _H     = 800, 450
+_FONT      = "'Segoe UI', system-ui, sans-serif"
+_BG        = "#F8FAFC"
+_PRIMARY   = "#2563EB"
+_ACCENT    = "#10B981"
+_AMBER     = "#F59E0B"
+_HEADING   = "#0F172A"
+_BODY      = "#475569"
+_BORDER    = "#CBD5E1"
+_CARD      = "#FFFFFF"
+_TINT      = "#EFF6FF"
+
+# ── Text helpers ──────────────────────────────────────────────────────────────
+
+def _esc(t: str) -> str:
+    return html.escape(str(t), quote=False)
+
+
+def _trunc(text: str, n: int) -> str:
+    return text if len(text) <= n else text[: n - 1].rstrip() + "…"
+
+
+def _clean(text: str) -> str:
+    """Strip markdown emphasis and list markers the LLM leaves in bullets."""
+    text = re.sub(r"[*`]+|__", "", str(text))
+    text = re.sub(r"^\s*(?:[-•·]\s+)", "", text)
+    return " ".join(text.split())
+
+
+def _wrap(text: str, width: int, max_lines: int) -> list[str]:
+    """Greedy word wrap to *width* chars, ellipsising past *max_lines*."""
+    lines: list[str] = []
+    current = ""
+    for word in text.split():
+        candidate = f"{current} {word}".strip()
+        if len(candidate) <= width or not current:
+            current = candidate
+        else:
+            lines.append(current)
+            current = word
+    if current:
+        lines.append(current)
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] = _trunc(lines[-1] + " …", width)
+    return [_trunc(line, width) for line in lines]
+
+
+def _text(x: float, y: float, text: str, size: int = 14, fill: str = _BODY,
+          weight: str = "400", anchor: str = "start") -> str:
+    return (
+        f'<text x="{x:g}" y="{y:g}" font-family="{_FONT}" font-size="{size}" '
+        f'font-weight="{weight}" fill="{fill}" text-anchor="{anchor}">{_esc(text)}</text>'
+    )
+
+
+def _lines(x: float, y: float, lines: Sequence[str], size: int = 14,
+           fill: str = _BODY, weight: str = "400", anchor: str = "start") -> str:
+    step = round(size * 1.35)
+    return "".join(
+        _text(x, y + i * step, line, size, fill, weight, anchor) for i, line in enumerate(lines)
+    )
+
+
+def _frame(title: str, desc: str, body: str) -> str:
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {_W} {_H}">'
+        f"<title>{_esc(title)}</title><desc>{_esc(desc)}</desc>"
+        f'<rect width="{_W}" height="{_H}" fill="{_BG}"/>'
+        + _text(40, 48, _trunc(title, 60), 20, _HEADING, "700")
+        + f'<rect x="40" y="60" width="56" height="4" rx="2" fill="{_PRIMARY}"/>'
+        + body
+        + "</svg>"
+    )
+
+
+# ── Bullet parsers ────────────────────────────────────────────────────────────
+
+_PAIR_SPLIT = re.compile(r"\s+[—–-]{1,2}\s+|\s*(?:→|->|=)\s*|:\s+")
+_PAREN_PAIR = re.compile(r"^(?P<a>[^()]{1,40}?)\s*\((?P<b>[^()]{1,50})\)$")
+
+_PRONOUNS = {
+    # it / en / fr / es / de — the target languages the platform teaches
+    "io", "tu", "lui", "lei", "lui/lei", "noi", "voi", "loro",
+    "i", "you", "he", "she", "he/she", "it", "we", "they",
+    "je", "il", "elle", "il/elle", "nous", "vous", "ils", "elles", "ils/elles",
+    "yo", "él", "ella", "él/ella", "usted", "nosotros", "vosotros", "ellos", "ustedes",
+    "ich", "du", "er", "sie", "er/sie", "wir", "ihr", "sie/sie",
+}
+
+_SPEAKER_RE = re.compile(
+    r"^(?:[-–—]\s*)?(?P<who>[A-ZÀ-Þ][\wÀ-ÿ'.]{0,14})\s*:\s+(?P<line>\S.*)$"
+)
+
+_WHEN_RE = re.compile(
+    r"^(?P<when>"
+    r"\d{3,4}(?:\s*(?:BC|AD|a\.C\.|d\.C\.))?s?"
+    r"|(?:step|fase|passo|stage)\s*\d+"
+    r"|first|then|next|later|finally|afterwards|before|after"
+    r"|prima|poi|dopo|infine|alla fine|ieri|oggi|domani|yesterday|today|tomorrow"
+    r")\b\s*(?:[:,—–-]\s*)?(?P<what>\S.*)$",
+    re.IGNORECASE,
+)
+
+_TIMELINE_TITLE = re.compile(
+    r"\b(timeline|history|storia|cronologia|sequence|sequenza|evolution|evoluzione)\b", re.I
+)
+_DIALOGUE_TITLE = re.compile(r"\b(dialogue|dialog|dialogo|conversation|conversazione)\b", re.I)
+_VS_SPLIT       = re.compile(r"\s+(?:vs\.?|versus|contro)\s+", re.I)
+
+
+def _pair(bullet: str) -> Optional[tuple[str, str]]:
+    """'la mela — apple' / 'ciao: hello' / 'grazie (thanks)' → (term, gloss)."""
+    m = _PAREN_PAIR.match(bullet)
+    if m:
+        a, b = m.group("a").strip(), m.group("b").strip()
+    else:
+        parts = _PAIR_SPLIT.split(bullet, maxsplit=1)
+        if len(parts) != 2:
+            return None
+        a, b = parts[0].strip(), parts[1].strip()
+    if not a or not b or len(a) > 40 or len(a.split()) > 4 or len(b) > 80:
+        return None
+    return a, b
+
+
+def _conjugation_row(bullet: str) -> Optional[tuple[str, str, str]]:
+    """'io parlo — I speak' → ('io', 'parlo', 'I speak')."""
+    m = re.match(r"^\(?(?P<p>[^\s():]+)\)?\s*:?\s+(?P<rest>\S.*)$", bullet)
+    if not m or m.group("p").lower() not in _PRONOUNS:
+        return None
+    rest = m.group("rest")
+    gloss = ""
+    pair = _pair(rest)
+    if pair:
+        rest, gloss = pair
+    if len(rest) > 30:
+        return None
+    return m.group("p"), rest, gloss
+
+
+def _enough(matches: int, total: int, minimum: int = 3) -> bool:
+    return matches >= minimum and matches >= 0.6 * total
+
+
+# ── Intent detection ──────────────────────────────────────────────────────────
+
+def _is_conjugation(title: str, bullets: list[str]) -> bool:
+    return _enough(sum(_conjugation_row(b) is not None for b in bullets), len(bullets))
+
+
+def _is_dialogue(title: str, bullets: list[str]) -> bool:
+    turns = [m.group("who") for b in bullets if (m := _SPEAKER_RE.match(b))]
+    speakers = set(turns)
+    if not _enough(len(turns), len(bullets), minimum=2) or not 2 <= len(speakers) <= 4:
+        return False
+    # "Ciao: Hello" bullets look like turns too; a real dialogue has someone
+    # speaking twice, or says so in the title.
+    return len(turns) > len(speakers) or bool(_DIALOGUE_TITLE.search(title))
+
+
+def _comparison_sides(title: str) -> Optional[tuple[str, str]]:
+    parts = _VS_SPLIT.split(title, maxsplit=1)
+    if len(parts) != 2 or not parts[0].strip() or not parts[1].strip():
+        return None
+    return parts[0].strip(), parts[1].strip()
+
+
+def _comparison_columns(
+    title: str, bullets: list[str],
+) -> Optional[tuple[str, str, list[str], list[str]]]:
+    sides = _comparison_sides(title)
+    left_head, right_head = sides or ("", "")
+
+    # Row form: every bullet is "x vs y".
+    rows = [_VS_SPLIT.split(b, maxsplit=1) for b in bullets]
+    rows = [r for r in rows if len(r) == 2]
+    if _enough(len(rows), len(bullets), minimum=2):
+        return left_head, right_head, [r[0] for r in rows], [r[1] for r in rows]
+
+    # Label form: "Essere: …" / "Avere: …" under a "Essere vs Avere" title.
+    if sides is None:
+        return None
+    left: list[str] = []
+    right: list[str] = []
+    for b in bullets:
+        pair = _pair(b)
+        if pair is None:
+            continue
+        label = pair[0].lower()
+        if label in left_head.lower():
+            left.append(pair[1])
+        elif label in right_head.lower():
+            right.append(pair[1])
+    if left and right and _enough(len(left) + len(right), len(bullets), minimum=2):
+        return left_head, right_head, left, right
+    return None
+
+
+def _is_comparison(title: str, bullets: list[str]) -> bool:
+    return _comparison_columns(title, bullets) is not None
+
+
+def _is_timeline(title: str, bullets: list[str]) -> bool:
+    dated = sum(_WHEN_RE.match(b) is not None for b in bullets)
+    if _enough(dated, len(bullets)):
+        return True
+    return bool(_TIMELINE_TITLE.search(title)) and 3 <= len(bullets) <= 6
+
+
+def _is_vocabulary(title: str, bullets: list[str]) -> bool:
+    # Short glosses only: "Uso: esprime azioni concluse nel passato" is an
+    # explanation slide, not a word list.
+    pairs = [p for b in bullets if (p := _pair(b)) and len(p[1]) <= 40]
+    return _enough(len(pairs), len(bullets))
+
+
+# ── Renderers ─────────────────────────────────────────────────────────────────
+
+def _render_conjugation(title: str, bullets: list[str]) -> str:
+    rows = [r for b in bullets if (r := _conjugation_row(b))][:8]
+    has_gloss = any(g for _, _, g in rows)
+    top, row_h = 90, min(40, 320 // len(rows))
+    cols = (60, 250, 490) if has_gloss else (160, 400)
+    width = 680 if has_gloss else 480
+    body = [f'<rect x="{cols[0] - 20}" y="{top}" width="{width}" height="{row_h * len(rows)}" '
+            f'rx="8" fill="{_CARD}" stroke="{_BORDER}" stroke-width="1.5"/>']
+    for i, (pronoun, form, gloss) in enumerate(rows):
+        y = top + i * row_h
+        if i % 2:
+            body.append(f'<rect x="{cols[0] - 19}" y="{y}" width="{width - 2}" height="{row_h}" fill="{_TINT}"/>')
+        baseline = y + row_h / 2 + 5
+        body.append(_text(cols[0], baseline, pronoun, 15, _BODY, "600"))
+        body.append(_text(cols[1], baseline, form, 16, _PRIMARY, "700"))
+        if has_gloss:
+            body.append(_text(cols[2], baseline, _trunc(gloss, 26), 13, _BODY))
+    return _frame(title, "Conjugation table: " + "; ".join(f"{p} {f}" for p, f, _ in rows), "".join(body))
+
+
+def _render_dialogue(title: str, bullets: list[str]) -> str:
+    turns = [(m.group("who"), m.group("line")) for b in bullets if (m := _SPEAKER_RE.match(b))][:6]
+    first = turns[0][0]
+    top, gap = 84, 8
+    bubble_h = min(52, (_H - top - 16) // len(turns) - gap)
+    body = []
+    for i, (who, line) in enumerate(turns):
+        left = who == first
+        wrapped = _wrap(line, 58, 2 if bubble_h >= 46 else 1)
+        w = min(560, 40 + 8 * max(len(s) for s in wrapped))
+        x = 100 if left else _W - 100 - w
+        y = top + i * (bubble_h + gap)
+        fill, stroke = (_TINT, _PRIMARY) if left else ("#ECFDF5", _ACCENT)
+        avatar_x = 60 if left else _W - 60
+        body.append(f'<circle cx="{avatar_x}" cy="{y + bubble_h / 2:g}" r="18" fill="{stroke}"/>')
+        body.append(_text(avatar_x, y + bubble_h / 2 + 5, who[:2].upper(), 12, "#FFFFFF", "700", "middle"))
+        body.append(f'<rect x="{x}" y="{y}" width="{w}" height="{bubble_h}" rx="12" '
+                    f'fill="{fill}" stroke="{stroke}" stroke-width="1.5"/>')
+        body.append(_text(x + 16, y + 17, who, 11, stroke, "700"))
+        body.append(_lines(x + 16, y + 35, wrapped, 14, _HEADING))
+    desc = "Dialogue between " + " and ".join(dict.fromkeys(w for w, _ in turns))
+    return _frame(title, desc, "".join(body))
+
+
+def _render_comparison(title: str, bullets: list[str]) -> str:
+    left_head, right_head, left, right = _comparison_columns(title, bullets)  # type: ignore[misc]
+    body = []
+    for x, head, items, colour in ((40, left_head, left, _PRIMARY), (430, right_head, right, _ACCENT)):
+        body.append(f'<rect x="{x}" y="84" width="330" height="340" rx="8" fill="{_CARD}" '
+                    f'stroke="{colour}" stroke-width="2"/>')
+        y = 116
+        if head:
+            body.append(f'<rect x="{x}" y="84" width="330" height="48" rx="8" fill="{colour}"/>')
+            body.append(_text(x + 165, 115, _trunc(head, 24), 18, "#FFFFFF", "700", "middle"))
+            y = 160
+        for item in items[:5]:
+            wrapped = _wrap(item, 34, 2)
+            body.append(f'<circle cx="{x + 22}" cy="{y - 5}" r="4" fill="{colour}"/>')
+            body.append(_lines(x + 36, y, wrapped, 14, _HEADING))
+            y += 22 * len(wrapped) + 14
+    body.append(f'<circle cx="400" cy="254" r="22" fill="{_AMBER}"/>')
+    body.append(_text(400, 260, "VS", 14, "#FFFFFF", "800", "middle"))
+    desc = f"Comparison: {left_head or 'left'} versus {right_head or 'right'}"
+    return _frame(title, desc, "".join(body))
+
+
+def _render_timeline(title: str, bullets: list[str]) -> str:
+    events = []
+    for b in bullets[:6]:
+        m = _WHEN_RE.match(b)
+        events.append((m.group("when"), m.group("what")) if m else ("", b))
+    n = len(events)
+    step = (_W - 160) / max(1, n - 1) if n > 1 else 0
+    line_y = 220
+    body = [f'<line x1="60" y1="{line_y}" x2="{_W - 60}" y2="{line_y}" stroke="{_BORDER}" stroke-width="4" stroke-linecap="round"/>']
+    for i, (when, what) in enumerate(events):
+        x = 80 + i * step if n > 1 else _W / 2
+        colour = _PRIMARY if i % 2 == 0 else _ACCENT
+        body.append(f'<circle cx="{x:g}" cy="{line_y}" r="12" fill="{colour}" stroke="{_CARD}" stroke-width="3"/>')
+        label = when or str(i + 1)
+        body.append(_text(x, line_y - 26, _trunc(label, 14), 15, colour, "700", "middle"))
+        width = max(12, int(step / 8)) if n > 1 else 40
+        body.append(_lines(x, line_y + 40, _wrap(what, width, 4), 13, _HEADING, "400", "middle"))
+    desc = "Timeline: " + "; ".join(f"{w} {t}".strip() for w, t in events)
+    return _frame(title, desc, "".join(body))
+
+
+def _render_vocabulary(title: str, bullets: list[str]) -> str:
+    pairs = [p for b in bullets if (p := _pair(b))][:12]
+    n = len(pairs)
+    cols = 2 if n <= 4 else 3 if n <= 9 else 4
+    rows = -(-n // cols)
+    gap = 16
+    card_w = (_W - 80 - gap * (cols - 1)) / cols
+    card_h = min(96, (_H - 90 - 24 - gap * (rows - 1)) / rows)
+    chars = int(card_w / 9)
+    body = []
+    for i, (term, gloss) in enumerate(pairs):
+        x = 40 + (i % cols) * (card_w + gap)
+        y = 90 + (i // cols) * (card_h + gap)
+        cx = x + card_w / 2
+        body.append(f'<rect x="{x:g}" y="{y:g}" width="{card_w:g}" height="{card_h:g}" rx="8" '
+                    f'fill="{_CARD}" stroke="{_BORDER}" stroke-width="1.5"/>')
+        body.append(f'<rect x="{x:g}" y="{y:g}" width="6" height="{card_h:g}" rx="3" fill="{_PRIMARY}"/>')
+        body.append(_text(cx, y + card_h / 2 - 4, _trunc(term, chars), 18, _PRIMARY, "700", "middle"))
+        body.append(_text(cx, y + card_h / 2 + 18, _trunc(gloss, chars + 6), 13, _BODY, "400", "middle"))
+    desc = "Vocabulary: " + "; ".join(f"{t} = {g}" for t, g in pairs)
+    return _frame(title, desc, "".join(body))
+
+
+# Checked in order — the most specific shapes first ("Essere: …" bullets under
+# an "Essere vs Avere" title would also pass as dialogue turns).
+_TEMPLATES: tuple[tuple[str, Callable[[str, list[str]], bool], Callable[[str, list[str]], str]], ...] = (
+    ("conjugation", _is_conjugation, _render_conjugation),
+    ("comparison",  _is_comparison,  _render_comparison),
+    ("dialogue",    _is_dialogue,    _render_dialogue),
+    ("timeline",    _is_timeline,    _render_timeline),
+    ("vocabulary",  _is_vocabulary,  _render_vocabulary),
+)
+
+TEMPLATE_INTENTS = tuple(name for name, _, _ in _TEMPLATES)
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+def detect_slide_intent(title: str, bullet_points: Sequence[str]) -> Optional[str]:
+    """Return the template name that fits this slide, or None."""
+    bullets = [b for b in (_clean(x) for x in bullet_points or []) if b]
+    if not bullets:
+        return None
+    title = _clean(title)
+    for name, matches, _ in _TEMPLATES:
+        if matches(title, bullets):
+            return name
+    return None
+
+
+def render_slide_svg(title: str, bullet_points: Sequence[str]) -> Optional[tuple[str, str]]:
+    """
+    Render the slide with its matching template.
+
+    Returns ``(intent, svg)`` or None when no template fits.
+    """
+    intent = detect_slide_intent(title, bullet_points)
+    if intent is None:
+        return None
+    bullets = [b for b in (_clean(x) for x in bullet_points) if b]
+    render = next(r for name, _, r in _TEMPLATES if name == intent)
+    return intent, render(_clean(title), bullets)
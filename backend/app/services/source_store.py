@@ -0,0 +1,279 @@
+"""
+app/services/source_store.py
+============================
+Short-lived store for course-builder source tokens.
+
+POST /course-builder/outline/files extracts the uploaded files once and hands
+the browser a single-use ``source_token``; the SSE stream
+(GET /course-builder/{id}/stream?source_token=…) pops the text back out.
+Speculative unit pre-generation reads it with peek() so the stream can still
+pop it later.
+The two requests may land on different uvicorn workers, so the text must live
+somewhere all workers can see.
+
+Hierarchy
+---------
+SourceStore (ABC)
+    ├── InMemorySourceStore   ← per-process LRU + TTL (dev / single worker)
+    └── RedisSourceStore      ← shared across workers (SET EX + atomic pop)
+
+Entries are capped at ``max_chars`` characters and zlib-compressed, so one
+entry is a few KB in memory/Redis instead of up to ~40K chars of text.
+
+Environment variables
+---------------------
+SOURCE_STORE_BACKEND      "memory" (default) or "redis".
+SOURCE_STORE_MAX_ENTRIES  In-memory LRU bound (default 256).
+REDIS_URL                 Used by the redis backend (settings.REDIS_URL).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_BACKEND     = os.environ.get("SOURCE_STORE_BACKEND", "memory").strip().lower()
+_MAX_ENTRIES = int(os.environ.get("SOURCE_STORE_MAX_ENTRIES", "256"))
+
+
+def _pack(text: str, max_chars: int | None) -> bytes:
+    if max_chars is not None:
+        text = text[:max_chars]
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def _unpack(blob: bytes) -> str:
+    return zlib.decompress(blob).decode("utf-8")
+
+
+# ── Abstract base ─────────────────────────────────────────────────────────────
+
+class SourceStore(ABC):
+    """
+    Single-use token → text store with a per-entry TTL.
+
+    Implementations must be thread-safe; they are called directly from async
+    handlers (every operation is O(1) and does not block for long).
+    """
+
+    def __init__(self, max_chars: int | None = None) -> None:
+        # Per-entry character cap applied before compression.
+        self.max_chars = max_chars
+
+    def put(self, text: str, ttl_seconds: float) -> str:
+        """Store *text* (truncated to max_chars) and return a fresh token."""
+        token = str(uuid.uuid4())
+        blob = _pack(text, self.max_chars)
+        self._put(token, blob, ttl_seconds)
+        logger.debug("source_store: stored token %s (%d bytes compressed)", token, len(blob))
+        return token
+
+    def pop(self, token: str) -> str | None:
+        """Return and delete the text for *token*; None if unknown or expired."""
+        blob = self._pop(token)
+        if blob is None:
+            return None
+        return _unpack(blob)
+
+    def peek(self, token: str) -> str | None:
+        """Return the text for *token* without consuming it (speculative readers)."""
+        blob = self._peek(token)
+        if blob is None:
+            return None
+        return _unpack(blob)
+
+    @abstractmethod
+    def _put(self, token: str, blob: bytes, ttl_seconds: float) -> None:
+        """Persist one compressed entry."""
+
+    @abstractmethod
+    def _pop(self, token: str) -> bytes | None:
+        """Atomically fetch and delete one compressed entry."""
+
+    @abstractmethod
+    def _peek(self, token: str) -> bytes | None:
+        """Fetch one compressed entry without deleting it."""
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Delete expired entries. Returns count deleted."""
+
+    @abstractmethod
+    def stats(self) -> dict[str, Any]:
+        """Return counters for monitoring."""
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}>"
+
+
+# ── In-memory backend ─────────────────────────────────────────────────────────
+
+class InMemorySourceStore(SourceStore):
+    """
+    Per-process LRU with TTL.
+
+    Expired entries are swept on every put; when ``max_entries`` is reached
+    the least recently stored token is evicted.  Only correct with a single
+    worker (or sticky sessions) — use RedisSourceStore otherwise.
+    """
+
+    def __init__(self, max_entries: int = 256, max_chars: int | None = None) -> None:
+        super().__init__(max_chars)
+        self._max_entries = max(1, max_entries)
+        # token → (compressed text, monotonic expiry), oldest first.
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._evicted = 0
+
+    def _put(self, token: str, blob: bytes, ttl_seconds: float) -> None:
+        with self._lock:
+            self._sweep(time.monotonic())
+            self._entries[token] = (blob, time.monotonic() + ttl_seconds)
+            while len(self._entries) > self._max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._evicted += 1
+                logger.info("source_store: evicted token %s (LRU full)", evicted)
+
+    def _pop(self, token: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.pop(token, None)
+        if entry is None:
+            return None
+        blob, expiry = entry
+        if time.monotonic() > expiry:
+            logger.info("source_store: token %s expired", token)
+            return None
+        return blob
+
+    def _peek(self, token: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(token)
+        if entry is None or time.monotonic() > entry[1]:
+            return None
+        return entry[0]
+
+    def _sweep(self, now: float) -> int:
+        expired = [t for t, (_, exp) in self._entries.items() if now > exp]
+        for t in expired:
+            del self._entries[t]
+        return len(expired)
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._sweep(time.monotonic())
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "backend":     "memory",
+                "entries":     len(self._entries),
+                "bytes":       sum(len(b) for b, _ in self._entries.values()),
+                "max_entries": self._max_entries,
+                "evicted":     self._evicted,
+            }
+
+
+# ── Redis backend ─────────────────────────────────────────────────────────────
+
+class RedisSourceStore(SourceStore):
+    """
+    Shared store backed by Redis; any worker can pop any token.
+
+    Storage format
+    --------------
+    key  : "source_token:{token}"
+    value: zlib-compressed UTF-8 text
+    TTL  : ttl_seconds (Redis expires the key itself)
+
+    Redis failures never fail an upload: the entry falls back to a local
+    InMemorySourceStore, which still works when the stream hits this worker.
+    """
+
+    _PREFIX = "source_token:"
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        max_chars: int | None = None,
+        client: Any = None,
+    ) -> None:
+        super().__init__(max_chars)
+        self._url = url
+        self._client = client   # lazy-connect on first use unless injected
+        self._fallback = InMemorySourceStore(max_entries=_MAX_ENTRIES, max_chars=max_chars)
+
+    def _client_or_raise(self):
+        if self._client is None:
+            import redis
+            self._client = redis.from_url(self._url, socket_timeout=2, socket_connect_timeout=2)
+        return self._client
+
+    def _put(self, token: str, blob: bytes, ttl_seconds: float) -> None:
+        try:
+            self._client_or_raise().set(self._PREFIX + token, blob, ex=max(1, int(ttl_seconds)))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("source_store: redis SET failed (%s); keeping token %s locally", exc, token)
+            self._fallback._put(token, blob, ttl_seconds)
+
+    def _pop(self, token: str) -> bytes | None:
+        blob = self._fallback._pop(token)
+        if blob is not None:
+            return blob
+        try:
+            # MULTI/EXEC makes GET + DEL atomic, so a token is consumed once
+            # even when two workers race on a reconnect.
+            pipe = self._client_or_raise().pipeline(transaction=True)
+            pipe.get(self._PREFIX + token)
+            pipe.delete(self._PREFIX + token)
+            blob, _ = pipe.execute()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("source_store: redis pop failed for token %s: %s", token, exc)
+            return None
+        return blob
+
+    def _peek(self, token: str) -> bytes | None:
+        blob = self._fallback._peek(token)
+        if blob is not None:
+            return blob
+        try:
+            return self._client_or_raise().get(self._PREFIX + token)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("source_store: redis GET failed for token %s: %s", token, exc)
+            return None
+
+    def purge_expired(self) -> int:
+        # Redis handles TTL expiry automatically
+        return self._fallback.purge_expired()
+
+    def stats(self) -> dict[str, Any]:
+        return {"backend": "redis", "local_fallback": self._fallback.stats()}
+
+
+# ── Singleton ─────────────────────────────────────────────────────────────────
+
+_store: SourceStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_source_store(max_chars: int | None = None) -> SourceStore:
+    """Return the process-wide store selected by ``SOURCE_STORE_BACKEND``."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if _BACKEND == "redis":
+                from app.core.config import settings
+
+                _store = RedisSourceStore(url=settings.REDIS_URL, max_chars=max_chars)
+            else:
+                _store = InMemorySourceStore(max_entries=_MAX_ENTRIES, max_chars=max_chars)
+            logger.info("source_store: using %r", _store)
+        return _store
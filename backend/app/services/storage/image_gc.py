@@ -0,0 +1,141 @@
+"""
+app/services/storage/image_gc.py
+================================
+Garbage collection for content-addressed images.
+
+file_storage.save_image_by_hash() stores each distinct image once under
+``images/sha256/…`` and hands the same URL to every exercise that needs it,
+so deleting an exercise must never delete its images.  Instead this sweep
+periodically:
+
+1. collects every digest still referenced from the JSON columns that hold
+   block payloads (segments.media_blocks, units.homework_blocks) and from
+   presentation_slides.image_url;
+2. lists the stored hashed objects;
+3. deletes the ones that are unreferenced AND older than the grace period
+   (and not handed out by this process within it), so an image saved for a
+   block that is still being generated is never collected.
+
+Environment variables
+---------------------
+IMAGE_GC_INTERVAL_HOURS  Sweep interval; 0 disables the background task (default 24).
+IMAGE_GC_GRACE_HOURS     Minimum object age before it may be deleted (default 24).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+import time
+from typing import Any
+
+from sqlalchemy import String, cast
+from sqlalchemy.orm import Session
+
+from app.services.file_storage import (
+    HASHED_IMAGE_PREFIX,
+    delete_object,
+    iter_hashed_images,
+    last_used_locally,
+)
+
+logger = logging.getLogger(__name__)
+
+_INTERVAL_HOURS = float(os.environ.get("IMAGE_GC_INTERVAL_HOURS", "24"))
+_GRACE_HOURS    = float(os.environ.get("IMAGE_GC_GRACE_HOURS", "24"))
+
+_DIGEST_RE = re.compile(re.escape(HASHED_IMAGE_PREFIX) + r"/[0-9a-f]{2}/([0-9a-f]{64})")
+
+
+def collect_referenced_digests(db: Session) -> set[str]:
+    """Return every image digest referenced from persisted content."""
+    from app.models.presentation import PresentationSlide  # noqa: PLC0415
+    from app.models.segment import Segment  # noqa: PLC0415
+    from app.models.unit import Unit  # noqa: PLC0415
+
+    pattern = f"%{HASHED_IMAGE_PREFIX}/%"
+    sources = (
+        cast(Segment.media_blocks, String),
+        cast(Unit.homework_blocks, String),
+        PresentationSlide.image_url,
+    )
+    digests: set[str] = set()
+    for column in sources:
+        for (text,) in db.query(column).filter(column.like(pattern)).yield_per(500):
+            digests.update(_DIGEST_RE.findall(text or ""))
+    return digests
+
+
+def sweep_orphaned_images(
+    db: Session,
+    grace_seconds: float | None = None,
+    dry_run: bool = False,
+) -> dict[str, Any]:
+    """
+    Delete hashed images no longer referenced anywhere.
+
+    Returns ``{"scanned", "referenced", "deleted", "kept_recent", "errors"}``.
+    """
+    grace = _GRACE_HOURS * 3600 if grace_seconds is None else grace_seconds
+    referenced = collect_referenced_digests(db)
+    cutoff = time.time() - grace
+    stats = {"scanned": 0, "referenced": len(referenced), "deleted": 0, "kept_recent": 0, "errors": 0}
+
+    for object_name, digest, modified in list(iter_hashed_images()):
+        stats["scanned"] += 1
+        if digest in referenced:
+            continue
+        if modified > cutoff or (last_used_locally(object_name) or 0) > cutoff:
+            stats["kept_recent"] += 1
+            continue
+        if dry_run:
+            stats["deleted"] += 1
+            continue
+        try:
+            delete_object(object_name)
+            stats["deleted"] += 1
+        except Exception as exc:  # noqa: BLE001
+            stats["errors"] += 1
+            logger.warning("image_gc: could not delete %r: %s", object_name, exc)
+
+    logger.info("image_gc: sweep done%s — %s", " (dry run)" if dry_run else "", stats)
+    return stats
+
+
+# ── Background task ───────────────────────────────────────────────────────────
+
+_gc_task: asyncio.Task | None = None
+
+
+def _run_sweep() -> dict[str, Any]:
+    from app.core.database import SessionLocal  # noqa: PLC0415
+
+    db = SessionLocal()
+    try:
+        return sweep_orphaned_images(db)
+    finally:
+        db.close()
+
+
+async def _gc_loop(interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(_run_sweep)
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("image_gc: sweep failed: %s", exc)
+
+
+def start_gc_task() -> None:
+    """Launch the periodic sweep (no-op when IMAGE_GC_INTERVAL_HOURS is 0)."""
+    global _gc_task
+    if _INTERVAL_HOURS <= 0:
+        return
+    if _gc_task is None or _gc_task.done():
+        _gc_task = asyncio.create_task(_gc_loop(_INTERVAL_HOURS * 3600))
+        logger.info(
+            "image_gc: task started (interval=%.1fh, grace=%.1fh)",
+            _INTERVAL_HOURS, _GRACE_HOURS,
+        )
@@ -29,15 +29,23 @@ Phase 1 — Titles
       description.  The description is the primary driver.
 
 Phase 2 — Rich text blocks (one LLM call per segment)
-    Each segment title gets its own dedicated call.
+    Each segment title gets its own dedicated call.  The calls (plus the
+    unit vocabulary table) run concurrently, bounded by
+    ``UNIT_SEGMENT_CONCURRENCY`` and the backend's rate limit.
     • File-based: uses the per-segment excerpt from Phase 0, instructing the
       model to draw ONLY from that portion of the document.
     • Topic-based: generates fresh language-teaching content (grammar rules,
       vocabulary, examples) from the topic alone.
+    A reply that cannot be parsed is repaired on its own with a short prompt
+    that carries the neighbouring segments as context
+    (``UNIT_SEGMENT_REPAIR_ATTEMPTS``); the other segments are never redone.
 
-Phase 3 — Exercises (one call per exercise, inside _persist)
+Phase 3 — Exercises (inside _persist)
     Every exercise generator receives the segment title + the actual text-block
     content as its ``topic_hint``, grounding exercises in what the text teaches.
+    One batched call per segment returns the JSON-shaped exercises and all
+    learner instructions (``UNIT_EXERCISE_BATCH``); parts that fail validation
+    and the remaining types get one call each.
 
 Exercise distribution (deterministic, inside _persist)
 ------------------------------------------------------
@@ -72,22 +80,44 @@ test_without_timer, test_with_timer, true_false
 
 from __future__ import annotations
 
+import asyncio
+import inspect
 import json
 import logging
+import os
 import uuid
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Callable
 
-from pydantic import BaseModel, Field, ValidationError, model_validator
+from pydantic import BaseModel, Field, model_validator
 from sqlalchemy.orm import Session
 
 from app.models.segment import Segment, SegmentStatus
 from app.models.unit import Unit
 from app.services.ai.providers.base import AIProvider, AIProviderError
-from app.services.exercise_generation_flow import generate_exercise_for_segment
+from app.services.ai.providers.rate_limiter import concurrency_hint
+from app.services.ai.providers.telemetry import llm_context
+from app.services.ai.tolerant_json import loads_tolerant
+from app.services.exercise_generation_flow import (
+    generate_exercise_batch_for_segment,
+    generate_exercise_for_segment,
+)
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on Phase 2 LLM calls in flight per unit; the backend's rate
+# limit may lower it further (see rate_limiter.concurrency_hint).
+_SEGMENT_CONCURRENCY = int(os.environ.get("UNIT_SEGMENT_CONCURRENCY", "4"))
+
+# A segment whose text reply cannot be parsed gets this many small repair
+# prompts (with its neighbours as context) before falling back to the raw
+# reply / placeholder; 0 disables repair.
+_SEGMENT_REPAIR_ATTEMPTS = int(os.environ.get("UNIT_SEGMENT_REPAIR_ATTEMPTS", "1"))
+
+# Ask for a segment's exercises (and their instructions) in one batched prompt
+# before falling back to one call per type; set to "false" to disable.
+_EXERCISE_BATCH = os.environ.get("UNIT_EXERCISE_BATCH", "true").strip().lower() != "false"
+
 
 # ── Supported exercise types ──────────────────────────────────────────────────
 
@@ -192,6 +222,14 @@ class UnitBlueprint(BaseModel):
     segments: list[SegmentBlueprint] = Field(..., min_length=1)
 
 
+class SegmentTextError(ValueError):
+    """A segment-text reply that does not yield a usable SegmentBlueprint (strict parsing)."""
+
+    def __init__(self, message: str, raw: str = "") -> None:
+        super().__init__(message)
+        self.raw = raw
+
+
 # ── File-analysis planning types ──────────────────────────────────────────────
 
 @dataclass
@@ -278,12 +316,88 @@ class UnitGeneratorService:
         # touches this set, so teachers can still create duplicates afterwards.
         self._used_image_vocab: set[str] = set()
 
+    @staticmethod
+    def _llm_phase(request: "UnitGenerateRequest", phase: str):
+        """Telemetry context for one LLM call of this pipeline."""
+        return llm_context(phase=phase, teacher_id=request.teacher_id or None, plan=request.plan)
+
+    @staticmethod
+    def _exercise_lang_directive(request: "UnitGenerateRequest", exercise_type: str) -> str:
+        """Language contract prepended to an exercise's topic_hint ("" when monolingual)."""
+        _target_lang = request.language.strip()
+        _native_lang  = request.instruction_language.strip()
+        _is_bilingual = (
+            _target_lang
+            and _native_lang
+            and _target_lang.lower() != _native_lang.lower()
+        )
+
+        # ── Per-exercise-type language directive ──────────────────────
+        # Each exercise type has its own language contract:
+        #
+        #  • drag_to_gap / type_word_in_gap / build_sentence /
+        #    order_paragraphs / sort_into_columns / select_word_form /
+        #    drag_word_to_image / type_word_to_image /
+        #    select_form_to_image
+        #      → ALL content in TARGET language only.
+        #        Title in NATIVE (instruction) language.
+        #
+        #  • match_pairs
+        #      → Left column: TARGET language word/phrase.
+        #        Right column: NATIVE language translation.
+        #        Both columns present, each in its own language.
+        #
+        #  • test_without_timer / test_with_timer / true_false
+        #      → Questions (prompts) may mix languages to test
+        #        comprehension (e.g. "What does X mean?").
+        #        Answer options in TARGET language.
+        #        Title in NATIVE language.
+        #
+        # The hint prepended here is read by every generator's prompt
+        # builder.  Generator-level lang_hint (content_language param)
+        # handles the actual enforcement; this directive is belt-and-
+        # suspenders for the LLM.
+        if not _is_bilingual:
+            return ""
+        if exercise_type == "match_pairs":
+            lang_directive = (
+                f"[LANGUAGE DIRECTIVE — MATCH PAIRS BILINGUAL MODE]\n"
+                f"Left column  → word or phrase in {_target_lang.upper()} (the language being taught).\n"
+                f"Right column → its translation in {_native_lang.upper()} (the student's native language).\n"
+                f"Do NOT put both sides in the same language.\n"
+                f"Title: write in {_native_lang.upper()}.\n\n"
+            )
+        elif exercise_type in ("test_without_timer", "test_with_timer", "true_false"):
+            lang_directive = (
+                f"[LANGUAGE DIRECTIVE — TEST/TRUE-FALSE]\n"
+                f"Question prompts: may be in {_native_lang.upper()} or {_target_lang.upper()} "
+                f"depending on what is being tested (e.g. comprehension questions in "
+                f"{_native_lang.upper()}, grammar identification in {_target_lang.upper()}).\n"
+                f"Answer options: MUST be in {_target_lang.upper()}.\n"
+                f"Title: write in {_native_lang.upper()}.\n"
+                f"Source text below contains {_native_lang.upper()} grammar explanations — "
+                f"use the {_target_lang.upper()} examples embedded in them for answer options.\n\n"
+            )
+        else:
+            # All other exercise types: target language only
+            lang_directive = (
+                f"[LANGUAGE DIRECTIVE — EXERCISES]\n"
+                f"ALL exercise content (sentences, words, gaps, answer options) MUST be "
+                f"entirely in {_target_lang.upper()} (the language being taught).\n"
+                f"The source text below contains {_native_lang.upper()} grammar explanations — "
+                f"IGNORE those; extract only the {_target_lang.upper()} example sentences "
+                f"and vocabulary for exercise content.\n"
+                f"Title: write in {_native_lang.upper()}.\n\n"
+            )
+        return lang_directive
+
     # ── Public API ────────────────────────────────────────────────────────────
 
     async def generate(
         self,
         request: UnitGenerateRequest,
         db: Session,
+        on_segment: Callable[[int, int, "SegmentBlueprint"], Any] | None = None,
     ) -> UnitGenerateResult:
         """
         4-phase pipeline (both topic-based and file-based):
@@ -302,12 +416,20 @@ class UnitGeneratorService:
 
         Phase 2 — Rich text blocks (one LLM call per segment)
             Each segment is generated in isolation, anchored to its own focus
-            and forbidden from mentioning other sections' topics.
+            and forbidden from mentioning other sections' topics.  Segments
+            and the vocabulary table are generated concurrently; a failing
+            segment is repaired (or, failing that, gets a placeholder) without
+            affecting the others.
 
         Phase 3 — Persist + Exercises
             _smart_assign_exercises() picks one best-fit exercise type per segment
             from the teacher's chosen types, ensuring every chosen type appears at
             least once across the unit rather than repeating all types in every segment.
+
+        ``on_segment(index, total, segment_blueprint)`` — optional, sync or
+        async — is called as soon as each Phase 2 segment is ready (always in
+        segment order), so SSE callers can push partial results before the
+        unit is persisted.
         """
         logger.info(
             "UnitGenerator: start unit_id=%d teacher_id=%d topic=%r level=%s "
@@ -372,73 +494,82 @@ class UnitGeneratorService:
 
         logger.info("UnitGenerator: phase1 complete — titles=%s", titles)
 
-        # ── Phase 2: rich text block per segment ──────────────────────────────
-        segments: list[SegmentBlueprint] = []
-        for idx, title in enumerate(titles):
+        # ── Phase 2 + 2b: segment texts and unit vocabulary, concurrently ─────
+        # Segments never read each other's text and the glossary only needs
+        # the titles, so all of them fan out at once — bounded by a semaphore
+        # sized from the backend's rate limit.  A 4-segment unit takes about
+        # as long as its slowest segment instead of the sum of all four.
+        total = len(titles)
+        slots = asyncio.Semaphore(concurrency_hint(self.provider, _SEGMENT_CONCURRENCY))
+        ready: dict[int, SegmentBlueprint] = {}
+        notified = 0
+        notify_lock = asyncio.Lock()
+
+        async def _segment_job(idx: int, title: str) -> SegmentBlueprint:
+            nonlocal notified
             plan_entry = segment_plans[idx] if idx < len(segment_plans) else None
-            # Log what drives this segment so problems are immediately visible in logs
-            logger.info(
-                "UnitGenerator: phase2 segment %d/%d generating — title=%r "
-                "teaches=%r explain_in=%r directive=%r focus=%r",
-                idx + 1, len(titles), title,
-                request.language, request.instruction_language,
-                (request.description or "")[:120],
-                (plan_entry.focus[:120] if plan_entry and plan_entry.focus else "—"),
-            )
-            try:
-                seg_bp = await self._generate_segment_text(
-                    title, idx, request,
-                    source_excerpt=plan_entry.excerpt if plan_entry else None,
-                    section_focus=plan_entry.focus if plan_entry else None,
-                    forbidden_topics=plan_entry.forbidden_topics if plan_entry else None,
-                    is_overview=(idx == 0 and plan_entry is not None),
-                )
-            except Exception as exc:
-                logger.warning(
-                    "UnitGenerator: text generation failed for segment %d %r — "
-                    "using placeholder: %s", idx, title, exc,
+            async with slots:
+                # Log what drives this segment so problems are immediately visible in logs
+                logger.info(
+                    "UnitGenerator: phase2 segment %d/%d generating — title=%r "
+                    "teaches=%r explain_in=%r directive=%r focus=%r",
+                    idx + 1, total, title,
+                    request.language, request.instruction_language,
+                    (request.description or "")[:120],
+                    (plan_entry.focus[:120] if plan_entry and plan_entry.focus else "—"),
                 )
-                seg_bp = SegmentBlueprint(
-                    title=title,
-                    description=f"Segment about {title}",
-                    texts=[TextBlueprint(
-                        title="Key Points",
-                        content=f"## {title}\n\nThis segment covers key points.",
-                    )],
+                seg_bp = await self._generate_segment_with_repair(
+                    idx, titles, request, segment_plans, ready,
                 )
-            segments.append(seg_bp)
             logger.info(
                 "UnitGenerator: phase2 segment %d/%d complete — %r",
-                idx + 1, len(titles), title,
+                idx + 1, total, title,
             )
+            # on_segment fires in segment order: each finished segment releases
+            # itself and any later ones that were already waiting on it.
+            ready[idx] = seg_bp
+            async with notify_lock:
+                while notified in ready:
+                    await self._notify_segment(on_segment, notified, total, ready[notified])
+                    notified += 1
+            return seg_bp
 
-        # ── Phase 2b: unit vocabulary table (first section only) ──────────────
         # Attach a compact 3-column glossary (target word · translation ·
         # example) of words that recur across the whole unit. Rendered as a
         # dedicated "vocabulary" block at the top of section 1.
-        if segments:
-            try:
-                vocab = await self._generate_vocabulary(
-                    unit_topic=request.topic,
-                    section_titles=titles,
-                    request=request,
-                )
-                if vocab:
-                    segments[0].vocabulary = vocab
-                    logger.info(
-                        "UnitGenerator: phase2b vocabulary complete — %d words for unit_id=%d",
-                        len(vocab), request.unit_id,
+        async def _vocabulary_job() -> list[VocabularyEntry]:
+            async with slots:
+                try:
+                    return await self._generate_vocabulary(
+                        unit_topic=request.topic,
+                        section_titles=titles,
+                        request=request,
                     )
-            except Exception as exc:
-                logger.warning(
-                    "UnitGenerator: phase2b vocabulary generation failed for unit_id=%d "
-                    "— skipping table: %s", request.unit_id, exc,
-                )
+                except Exception as exc:
+                    logger.warning(
+                        "UnitGenerator: phase2b vocabulary generation failed for unit_id=%d "
+                        "— skipping table: %s", request.unit_id, exc,
+                    )
+                    return []
+
+        *segments, vocab = await asyncio.gather(
+            *(_segment_job(idx, title) for idx, title in enumerate(titles)),
+            _vocabulary_job(),
+        )
+        if segments and vocab:
+            segments[0].vocabulary = vocab
+            logger.info(
+                "UnitGenerator: phase2b vocabulary complete — %d words for unit_id=%d",
+                len(vocab), request.unit_id,
+            )
 
         blueprint = UnitBlueprint(segments=segments)
 
         # ── Phase 3: persist + exercises ──────────────────────────────────────
-        result = await self._persist(blueprint, request, db, segment_plans=segment_plans)
+        # Exercise generators get teacher_id from created_by; the plan is only
+        # carried by this context (teacher_plan is deliberately not forwarded).
+        with self._llm_phase(request, "exercise"):
+            result = await self._persist(blueprint, request, db, segment_plans=segment_plans)
 
         logger.info(
             "UnitGenerator: completed unit_id=%d — %d segments, %d texts, "
@@ -448,6 +579,23 @@ class UnitGeneratorService:
         )
         return result
 
+    @staticmethod
+    async def _notify_segment(
+        callback: Callable[[int, int, "SegmentBlueprint"], Any] | None,
+        index: int,
+        total: int,
+        seg_bp: "SegmentBlueprint",
+    ) -> None:
+        """Invoke the on_segment hook; a failing hook never breaks generation."""
+        if callback is None:
+            return
+        try:
+            result = callback(index, total, seg_bp)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as exc:
+            logger.warning("UnitGenerator: on_segment hook failed for segment %d: %s", index, exc)
+
     async def preview(self, request: UnitGenerateRequest) -> UnitBlueprint:
         """Generate and validate the blueprint without touching the database."""
         segment_plans: list[SegmentPlan] = []
@@ -471,20 +619,12 @@ class UnitGeneratorService:
         if len(titles) < 2:
             titles.append(f"{request.topic} — Part 2")
 
-        segments: list[SegmentBlueprint] = []
-        for idx, title in enumerate(titles):
-            plan_entry = segment_plans[idx] if idx < len(segment_plans) else None
-            try:
-                seg_bp = await self._generate_segment_text(
-                    title, idx, request,
-                    source_excerpt=plan_entry.excerpt if plan_entry else None,
-                    section_focus=plan_entry.focus if plan_entry else None,
-                    forbidden_topics=plan_entry.forbidden_topics if plan_entry else None,
-                    is_overview=(idx == 0 and plan_entry is not None),
-                )
-            except Exception:
-                seg_bp = SegmentBlueprint(title=title, texts=[])
-            segments.append(seg_bp)
+        ready: dict[int, SegmentBlueprint] = {}
+        for idx in range(len(titles)):
+            ready[idx] = await self._generate_segment_with_repair(
+                idx, titles, request, segment_plans, ready,
+            )
+        segments = [ready[idx] for idx in range(len(titles))]
 
         return UnitBlueprint(segments=segments)
 
@@ -725,32 +865,14 @@ Return ONLY valid JSON — no markdown fences, no preamble:
 The "sections" array must contain EXACTLY {n} objects. Do not return fewer than {n}."""
 
         try:
-            raw = await self.provider.agenerate(prompt)
+            with self._llm_phase(request, "unit.plan"):
+                raw = await self.provider.agenerate(prompt)
         except AIProviderError as exc:
             raise RuntimeError(f"AI provider error during topic planning: {exc}") from exc
 
-        import re as _re
-        text = raw.strip()
-        text = _re.sub(r"^```[a-z]*\n?", "", text)
-        text = _re.sub(r"\n?```$", "", text)
-        brace_start = text.find("{")
-        if brace_start == -1:
+        if "{" not in raw:
             raise ValueError("Topic planner returned no JSON.")
-        depth = 0
-        brace_end = len(text)
-        for i, ch in enumerate(text[brace_start:], brace_start):
-            if ch == "{":
-                depth += 1
-            elif ch == "}":
-                depth -= 1
-                if depth == 0:
-                    brace_end = i + 1
-                    break
-        raw_json = text[brace_start:brace_end]
-        try:
-            data = json.loads(raw_json)
-        except json.JSONDecodeError:
-            data = json.loads(self._repair_json(raw_json))
+        data = loads_tolerant(raw, roots="{")
 
         sections = data.get("sections", [])
         if not isinstance(sections, list) or not sections:
@@ -837,7 +959,6 @@ The "sections" array must contain EXACTLY {n} objects. Do not return fewer than
         Returns list[SegmentPlan] sorted in document order.
         Falls back gracefully — caller catches any exception.
         """
-        import re as _re
 
         max_sections = request.num_segments
         full_text = (request.source_content or "").strip()
@@ -920,33 +1041,15 @@ IMPORTANT: if the document clearly has N distinct topics (e.g. 3 tenses),
 produce N+1 sections (intro + one per topic), even if that is less than {max_sections}."""
 
         try:
-            raw = await self.provider.agenerate(prompt)
+            with self._llm_phase(request, "unit.plan"):
+                raw = await self.provider.agenerate(prompt)
         except AIProviderError as exc:
             raise RuntimeError(f"AI provider error during document analysis: {exc}") from exc
 
         # ── Parse JSON ────────────────────────────────────────────────────────
-        text = raw.strip()
-        text = _re.sub(r"^```[a-z]*\n?", "", text)
-        text = _re.sub(r"\n?```$", "", text)
-
-        brace_start = text.find("{")
-        if brace_start == -1:
+        if "{" not in raw:
             raise ValueError("Document analysis returned no JSON object.")
-        depth = 0
-        brace_end = len(text)
-        for i, ch in enumerate(text[brace_start:], brace_start):
-            if ch == "{":
-                depth += 1
-            elif ch == "}":
-                depth -= 1
-                if depth == 0:
-                    brace_end = i + 1
-                    break
-        raw_json = text[brace_start:brace_end]
-        try:
-            data = json.loads(raw_json)
-        except json.JSONDecodeError:
-            data = json.loads(self._repair_json(raw_json))
+        data = loads_tolerant(raw, roots="{")
 
         sections = data.get("sections", [])
         if not isinstance(sections, list) or not sections:
@@ -1037,16 +1140,15 @@ Rules:
 - No markdown, no preamble, no trailing text."""
 
         try:
-            raw = await self.provider.agenerate(prompt)
+            with self._llm_phase(request, "unit.titles"):
+                raw = await self.provider.agenerate(prompt)
         except AIProviderError as exc:
             raise RuntimeError(f"AI provider error during title generation: {exc}") from exc
 
         import re as _re
         text = raw.strip()
-        text = _re.sub(r"^```[a-z]*\n?", "", text)
-        text = _re.sub(r"\n?```$", "", text)
         try:
-            data = json.loads(text)
+            data = loads_tolerant(text, roots="{")
             titles = data.get("titles", [])
             if isinstance(titles, list):
                 return [str(t).strip() for t in titles if str(t).strip()]
@@ -1056,6 +1158,159 @@ Rules:
         found = _re.findall(r'"([^"]{2,120})"', text)
         return [t for t in found if t not in ("titles",)][: request.num_segments]
 
+    # ── Phase 2: segment text with targeted repair ────────────────────────────
+
+    async def _generate_segment_with_repair(
+        self,
+        idx: int,
+        titles: list[str],
+        request: "UnitGenerateRequest",
+        segment_plans: list["SegmentPlan"],
+        ready: dict[int, "SegmentBlueprint"],
+    ) -> "SegmentBlueprint":
+        """
+        Generate segment *idx*; if its reply is unusable, repair only that one.
+
+        The first attempt parses strictly.  A failure triggers up to
+        ``UNIT_SEGMENT_REPAIR_ATTEMPTS`` small repair prompts that carry the
+        neighbouring segments (already generated ones from *ready*, otherwise
+        their plan) as context — the other segments are never regenerated.
+        Only when repair fails too does the segment fall back to the raw reply
+        or a placeholder, as before.
+        """
+        title = titles[idx]
+        plan_entry = segment_plans[idx] if idx < len(segment_plans) else None
+        raw = ""
+        try:
+            return await self._generate_segment_text(
+                title, idx, request,
+                source_excerpt=plan_entry.excerpt if plan_entry else None,
+                section_focus=plan_entry.focus if plan_entry else None,
+                forbidden_topics=plan_entry.forbidden_topics if plan_entry else None,
+                is_overview=(idx == 0 and plan_entry is not None),
+                strict=True,
+            )
+        except SegmentTextError as exc:
+            raw, reason = exc.raw, str(exc)
+        except Exception as exc:
+            reason = str(exc)
+
+        for attempt in range(1, _SEGMENT_REPAIR_ATTEMPTS + 1):
+            logger.warning(
+                "UnitGenerator: segment %d %r unusable (%s) — repair %d/%d",
+                idx, title, reason, attempt, _SEGMENT_REPAIR_ATTEMPTS,
+            )
+            try:
+                return await self._repair_segment_text(
+                    idx, titles, request, plan_entry,
+                    neighbours=self._segment_neighbours(idx, titles, segment_plans, ready),
+                    reason=reason,
+                )
+            except SegmentTextError as exc:
+                raw, reason = exc.raw or raw, str(exc)
+            except Exception as exc:
+                reason = str(exc)
+
+        if raw:
+            logger.warning(
+                "UnitGenerator: segment %d %r — using raw reply as fallback", idx, title,
+            )
+            return self._parse_segment_text(raw, title)
+        logger.warning(
+            "UnitGenerator: text generation failed for segment %d %r — "
+            "using placeholder: %s", idx, title, reason,
+        )
+        return SegmentBlueprint(
+            title=title,
+            description=f"Segment about {title}",
+            texts=[TextBlueprint(
+                title="Key Points",
+                content=f"## {title}\n\nThis segment covers key points.",
+            )],
+        )
+
+    @staticmethod
+    def _segment_neighbours(
+        idx: int,
+        titles: list[str],
+        segment_plans: list["SegmentPlan"],
+        ready: dict[int, "SegmentBlueprint"],
+    ) -> list[tuple[str, str, str]]:
+        """``(position, title, summary)`` for the segments right before / after *idx*."""
+        neighbours: list[tuple[str, str, str]] = []
+        for position, j in (("previous", idx - 1), ("next", idx + 1)):
+            if not 0 <= j < len(titles):
+                continue
+            done = ready.get(j)
+            if done is not None and done.description:
+                summary = done.description
+            elif j < len(segment_plans):
+                summary = segment_plans[j].focus
+            else:
+                summary = ""
+            neighbours.append((position, titles[j], summary))
+        return neighbours
+
+    async def _repair_segment_text(
+        self,
+        idx: int,
+        titles: list[str],
+        request: "UnitGenerateRequest",
+        plan_entry: "SegmentPlan | None",
+        neighbours: list[tuple[str, str, str]],
+        reason: str,
+    ) -> "SegmentBlueprint":
+        """
+        One compact prompt that regenerates just segment *idx*.
+
+        Much shorter than the full segment prompt: the segment's own focus and
+        excerpt, one line per neighbour so the text fits between them, and
+        why the previous reply was rejected.  Raises SegmentTextError when the
+        reply is still unusable.
+        """
+        title = titles[idx]
+        neighbour_lines = "\n".join(
+            f"  {position:<8}: {n_title}" + (f" — {summary[:160]}" if summary else "")
+            for position, n_title, summary in neighbours
+        ) or "  (none)"
+        focus = (plan_entry.focus if plan_entry and plan_entry.focus else title)
+        excerpt_block = ""
+        if plan_entry and plan_entry.excerpt:
+            excerpt_block = f"\nSource text for this segment:\n---\n{plan_entry.excerpt[:800].strip()}\n---\n"
+        directive = ""
+        if request.description and request.description.strip():
+            directive = f"\nTeacher directive (mandatory): {request.description.strip()[:300]}\n"
+
+        prompt = f"""Your previous reply for one lesson segment was rejected ({reason}).
+Write ONLY this segment again.
+
+  Segment {idx + 1} of {len(titles)}: {title}
+  Focus      : {focus}
+  Level      : {request.level} (CEFR)
+  Teaches    : {request.language} (examples in this language)
+  Explain in : {request.instruction_language} (all prose and headings in this language)
+
+Neighbouring segments (do not repeat their content):
+{neighbour_lines}
+{directive}{excerpt_block}
+Return ONLY a single valid JSON object — no markdown fences, no preamble:
+
+{{
+  "title": "{title}",
+  "description": "<one sentence: what the student will learn in this segment>",
+  "text_title": "<heading for the text block>",
+  "text_content": "<120–250 words of markdown: ## rule, ### key points, ### examples>"
+}}
+
+Keep JSON strictly valid: escape inner quotes with \\", no trailing commas."""
+
+        try:
+            with self._llm_phase(request, "unit.segment_repair"):
+                raw = await self.provider.agenerate(prompt)
+        except AIProviderError as exc:
+            raise RuntimeError(f"AI provider error repairing segment '{title}': {exc}") from exc
+        return self._parse_segment_text(raw, title, strict=True)
+
     # ── Phase 2: per-segment rich text generation ─────────────────────────────
 
     async def _generate_segment_text(
@@ -1067,10 +1322,14 @@ Rules:
         section_focus: str | None = None,
         forbidden_topics: list[str] | None = None,
         is_overview: bool = False,
+        strict: bool = False,
     ) -> "SegmentBlueprint":
         """
         Generate a rich educational text block for a single segment.
 
+        With ``strict`` an unusable reply raises SegmentTextError instead of
+        being turned into a raw-text fallback segment.
+
         Overview segment (is_overview=True, always index 0):
             Written as a roadmap — introduces the whole unit, names all upcoming
             sections, explains why the topic matters. Does NOT teach any sub-topic.
@@ -1193,12 +1452,13 @@ BILINGUAL RULE (most important):
 - Keep JSON strictly valid: escape inner quotes with \\", no trailing commas."""
 
             try:
-                raw = await self.provider.agenerate(prompt)
+                with self._llm_phase(request, "unit.segment_text"):
+                    raw = await self.provider.agenerate(prompt)
             except AIProviderError as exc:
                 raise RuntimeError(
                     f"AI provider error generating overview for '{title}': {exc}"
                 ) from exc
-            return self._parse_overview_segment(raw, title)
+            return self._parse_overview_segment(raw, title, strict=strict)
 
         # ── Content segment prompt ────────────────────────────────────────────
         if source_excerpt or section_focus:
@@ -1296,13 +1556,14 @@ BILINGUAL RULE (most important):
 - Keep JSON strictly valid: escape inner quotes with \\", no trailing commas."""
 
         try:
-            raw = await self.provider.agenerate(prompt)
+            with self._llm_phase(request, "unit.segment_text"):
+                raw = await self.provider.agenerate(prompt)
         except AIProviderError as exc:
             raise RuntimeError(
                 f"AI provider error generating text for segment '{title}': {exc}"
             ) from exc
 
-        return self._parse_segment_text(raw, title)
+        return self._parse_segment_text(raw, title, strict=strict)
 
     # ── Phase 2b: unit vocabulary generation ──────────────────────────────────
 
@@ -1376,7 +1637,8 @@ Rules:
 - Keep JSON strictly valid: escape inner quotes with \\", no trailing commas."""
 
         try:
-            raw = await self.provider.agenerate(prompt)
+            with self._llm_phase(request, "unit.vocabulary"):
+                raw = await self.provider.agenerate(prompt)
         except AIProviderError as exc:
             raise RuntimeError(f"AI provider error generating vocabulary: {exc}") from exc
 
@@ -1384,32 +1646,11 @@ Rules:
 
     def _parse_vocabulary(self, raw: str) -> list["VocabularyEntry"]:
         """Parse the vocabulary JSON into validated VocabularyEntry rows."""
-        import re as _re
-
-        text = raw.strip()
-        text = _re.sub(r"^```[a-z]*\n?", "", text, flags=_re.MULTILINE)
-        text = _re.sub(r"\n?```$", "", text.strip())
-
-        brace_start = text.find("{")
-        if brace_start != -1:
-            depth = 0
-            for i, ch in enumerate(text[brace_start:], brace_start):
-                if ch == "{":
-                    depth += 1
-                elif ch == "}":
-                    depth -= 1
-                    if depth == 0:
-                        text = text[brace_start : i + 1]
-                        break
-
         try:
-            data = json.loads(text)
+            data = loads_tolerant(raw)
         except json.JSONDecodeError:
-            try:
-                data = json.loads(self._repair_json(text))
-            except json.JSONDecodeError:
-                logger.warning("UnitGenerator: could not parse vocabulary JSON — skipping table")
-                return []
+            logger.warning("UnitGenerator: could not parse vocabulary JSON — skipping table")
+            return []
 
         rows = data.get("words") if isinstance(data, dict) else None
         if not isinstance(rows, list):
@@ -1439,44 +1680,26 @@ Rules:
                 continue
         return out
 
-    def _parse_segment_text(self, raw: str, title: str) -> "SegmentBlueprint":
+    def _parse_segment_text(self, raw: str, title: str, strict: bool = False) -> "SegmentBlueprint":
         """Parse the per-segment JSON into a SegmentBlueprint."""
-        import re as _re
-
-        text = raw.strip()
-        text = _re.sub(r"^```[a-z]*\n?", "", text, flags=_re.MULTILINE)
-        text = _re.sub(r"\n?```$", "", text.strip())
-
-        brace_start = text.find("{")
-        if brace_start != -1:
-            depth = 0
-            for i, ch in enumerate(text[brace_start:], brace_start):
-                if ch == "{":
-                    depth += 1
-                elif ch == "}":
-                    depth -= 1
-                    if depth == 0:
-                        text = text[brace_start : i + 1]
-                        break
-
         try:
-            data = json.loads(text)
+            data = loads_tolerant(raw, roots="{")
         except json.JSONDecodeError:
-            # Repair common issues (unescaped quotes in content)
-            repaired = self._repair_json(text)
-            try:
-                data = json.loads(repaired)
-            except json.JSONDecodeError:
-                logger.warning(
-                    "UnitGenerator: could not parse segment text JSON for %r — "
-                    "using raw content as fallback", title,
-                )
-                data = {
-                    "title": title,
-                    "description": f"Learn about {title}",
-                    "text_title": "Key Points",
-                    "text_content": raw[:1500],
-                }
+            if strict:
+                raise SegmentTextError("reply is not a JSON object", raw) from None
+            logger.warning(
+                "UnitGenerator: could not parse segment text JSON for %r — "
+                "using raw content as fallback", title,
+            )
+            data = {
+                "title": title,
+                "description": f"Learn about {title}",
+                "text_title": "Key Points",
+                "text_content": raw[:1500],
+            }
+
+        if strict and not (isinstance(data, dict) and str(data.get("text_content") or "").strip()):
+            raise SegmentTextError('reply has no "text_content"', raw)
 
         seg_title = data.get("title") or title
         description = data.get("description") or f"Learn about {title}"
@@ -1489,7 +1712,7 @@ Rules:
             texts=[TextBlueprint(title=text_title, content=text_content[:2000])],
         )
 
-    def _parse_overview_segment(self, raw: str, title: str) -> "SegmentBlueprint":
+    def _parse_overview_segment(self, raw: str, title: str, strict: bool = False) -> "SegmentBlueprint":
         """
         Parse the overview JSON which has a ``texts`` array of multiple blocks.
 
@@ -1506,32 +1729,13 @@ Rules:
         Falls back gracefully to ``_parse_segment_text`` if the model returns
         the older single-block format.
         """
-        import re as _re
-
-        text = raw.strip()
-        text = _re.sub(r"^```[a-z]*\n?", "", text, flags=_re.MULTILINE)
-        text = _re.sub(r"\n?```$", "", text.strip())
-
-        brace_start = text.find("{")
-        if brace_start != -1:
-            depth = 0
-            for i, ch in enumerate(text[brace_start:], brace_start):
-                if ch == "{":
-                    depth += 1
-                elif ch == "}":
-                    depth -= 1
-                    if depth == 0:
-                        text = text[brace_start: i + 1]
-                        break
-
         try:
-            data = json.loads(text)
+            data = loads_tolerant(raw, roots="{")
         except json.JSONDecodeError:
-            try:
-                data = json.loads(self._repair_json(text))
-            except json.JSONDecodeError:
-                # Fall back to single-block parser
-                return self._parse_segment_text(raw, title)
+            # Fall back to single-block parser
+            return self._parse_segment_text(raw, title, strict=strict)
+        if not isinstance(data, dict):
+            return self._parse_segment_text(raw, title, strict=strict)
 
         seg_title = data.get("title") or title
         description = data.get("description") or f"Introduction to {title}"
@@ -1555,6 +1759,8 @@ Rules:
                 )
 
         # ── Single-block fallback (old format) ────────────────────────────────
+        if strict and not str(data.get("text_content") or "").strip():
+            raise SegmentTextError('reply has neither "texts" nor "text_content"', raw)
         text_title = data.get("text_title") or "Unit Overview"
         text_content = data.get("text_content") or raw[:1500]
         return SegmentBlueprint(
@@ -1563,174 +1769,6 @@ Rules:
             texts=[TextBlueprint(title=text_title, content=text_content[:2000])],
         )
 
-    # ── Blueprint parser ──────────────────────────────────────────────────────
-
-    _LOG_RAW_CHARS = 2000
-
-    def _parse_blueprint(self, raw_output: str) -> UnitBlueprint:
-        """
-        Extract and validate the JSON blueprint from the raw LLM output.
-        Resilient to markdown fences and truncated output.
-        """
-        text = raw_output.strip()
-
-        # Strip markdown fences
-        if text.startswith("```"):
-            lines = text.splitlines()
-            lines = lines[1:]
-            if lines and lines[-1].strip().startswith("```"):
-                lines = lines[:-1]
-            text = "\n".join(lines).strip()
-
-        # Isolate first JSON object
-        brace_start = text.find("{")
-        if brace_start == -1:
-            raise ValueError(
-                "AI response contained no JSON object. "
-                f"Raw output (first 300 chars): {raw_output[:300]!r}"
-            )
-
-        depth = 0
-        brace_end = -1
-        for i, ch in enumerate(text[brace_start:], start=brace_start):
-            if ch == "{":
-                depth += 1
-            elif ch == "}":
-                depth -= 1
-                if depth == 0:
-                    brace_end = i + 1
-                    break
-
-        json_text = text[brace_start:brace_end] if brace_end != -1 else text[brace_start:]
-
-        # Fast path
-        try:
-            return self._validate_blueprint(json.loads(json_text))
-        except json.JSONDecodeError:
-            pass
-        except ValueError:
-            raise
-
-        # Repair truncated JSON
-        logger.warning(
-            "UnitGenerator: LLM output appears truncated — attempting repair. "
-            "Raw (first %d chars):\n%s",
-            self._LOG_RAW_CHARS,
-            raw_output[: self._LOG_RAW_CHARS],
-        )
-        repaired = self._repair_json(json_text)
-        try:
-            return self._validate_blueprint(json.loads(repaired))
-        except (json.JSONDecodeError, ValueError):
-            pass
-
-        # Extract partial segments
-        partial = self._extract_partial_segments(json_text or text)
-        if partial:
-            logger.warning(
-                "UnitGenerator: recovered %d partial segment(s) from truncated output.",
-                len(partial),
-            )
-            try:
-                return UnitBlueprint(segments=partial)
-            except Exception:
-                pass
-
-        logger.error(
-            "UnitGenerator: JSON decode failed after all recovery attempts.\n"
-            "Raw (%d chars): %s",
-            self._LOG_RAW_CHARS,
-            raw_output[: self._LOG_RAW_CHARS],
-        )
-        raise ValueError(
-            "AI returned invalid / truncated JSON that could not be recovered. "
-            "Try again or reduce the amount of source material."
-        )
-
-    # ── JSON repair helpers ───────────────────────────────────────────────────
-
-    @staticmethod
-    def _repair_json(text: str) -> str:
-        stack: list[str] = []
-        in_string = False
-        escape_next = False
-
-        for ch in text:
-            if escape_next:
-                escape_next = False
-                continue
-            if ch == "\\" and in_string:
-                escape_next = True
-                continue
-            if ch == '"':
-                in_string = not in_string
-                continue
-            if in_string:
-                continue
-            if ch in "{[":
-                stack.append(ch)
-            elif ch == "}" and stack and stack[-1] == "{":
-                stack.pop()
-            elif ch == "]" and stack and stack[-1] == "[":
-                stack.pop()
-
-        suffix = ""
-        if in_string:
-            suffix += '"'
-        if (text + suffix).rstrip().endswith(":"):
-            suffix += "null"
-        for opener in reversed(stack):
-            suffix += "}" if opener == "{" else "]"
-
-        return text + suffix
-
-    @staticmethod
-    def _extract_partial_segments(text: str) -> list[SegmentBlueprint]:
-        segments: list[SegmentBlueprint] = []
-        i = 0
-        while i < len(text):
-            if text[i] != "{":
-                i += 1
-                continue
-            depth = 0
-            j = i
-            in_str = False
-            esc = False
-            while j < len(text):
-                ch = text[j]
-                if esc:
-                    esc = False
-                elif ch == "\\" and in_str:
-                    esc = True
-                elif ch == '"':
-                    in_str = not in_str
-                elif not in_str:
-                    if ch == "{":
-                        depth += 1
-                    elif ch == "}":
-                        depth -= 1
-                        if depth == 0:
-                            candidate = text[i : j + 1]
-                            try:
-                                data = json.loads(candidate)
-                                if "title" in data:
-                                    seg = SegmentBlueprint.model_validate(data)
-                                    segments.append(seg)
-                            except Exception:
-                                pass
-                            break
-                j += 1
-            i = j + 1
-
-        return segments
-
-    @staticmethod
-    def _validate_blueprint(data: Any) -> UnitBlueprint:
-        try:
-            return UnitBlueprint.model_validate(data)
-        except ValidationError as exc:
-            raise ValueError(f"Blueprint schema validation failed: {exc}") from exc
-
     # ── Image prompt helpers ──────────────────────────────────────────────────
 
     @staticmethod
@@ -2215,6 +2253,28 @@ Rules:
             # so it persists across segments and units within one generation run.
             _IMAGE_CARD_TYPES = self._IMAGE_CARD_TYPES
 
+            # ── One batched prompt for the segment's exercises ────────────────
+            # JSON-shaped types and every learner instruction come back from a
+            # single call over the shared segment text; only the parts that fail
+            # validation (and types without a batch schema) hit the per-type
+            # generators below.
+            batch = None
+            if _EXERCISE_BATCH and seg_bp.exercises:
+                ex_types = [ex_bp.type for ex_bp in seg_bp.exercises]
+                batch = await generate_exercise_batch_for_segment(
+                    exercise_types=ex_types,
+                    db=db,
+                    unit_id=request.unit_id,
+                    created_by=request.teacher_id,
+                    topic_hint=rich_hint if rich_hint.strip() else None,
+                    content_language=request.content_language,
+                    instruction_language=request.instruction_language,
+                    type_hints={
+                        t: self._exercise_lang_directive(request, t) for t in ex_types
+                    },
+                    provider=self.provider,
+                )
+
             for ex_bp in seg_bp.exercises:
                 # Always use rich_hint (segment title + full text content) so the
                 # AI generator has the actual lesson material to draw from.
@@ -2238,70 +2298,8 @@ Rules:
                         f"Choose COMPLETELY DIFFERENT vocabulary words for every card."
                     )
 
-                _target_lang = request.language.strip()
-                _native_lang  = request.instruction_language.strip()
-                _is_bilingual = (
-                    _target_lang
-                    and _native_lang
-                    and _target_lang.lower() != _native_lang.lower()
-                )
-
-                # ── Per-exercise-type language directive ──────────────────────
-                # Each exercise type has its own language contract:
-                #
-                #  • drag_to_gap / type_word_in_gap / build_sentence /
-                #    order_paragraphs / sort_into_columns / select_word_form /
-                #    drag_word_to_image / type_word_to_image /
-                #    select_form_to_image
-                #      → ALL content in TARGET language only.
-                #        Title in NATIVE (instruction) language.
-                #
-                #  • match_pairs
-                #      → Left column: TARGET language word/phrase.
-                #        Right column: NATIVE language translation.
-                #        Both columns present, each in its own language.
-                #
-                #  • test_without_timer / test_with_timer / true_false
-                #      → Questions (prompts) may mix languages to test
-                #        comprehension (e.g. "What does X mean?").
-                #        Answer options in TARGET language.
-                #        Title in NATIVE language.
-                #
-                # The hint prepended here is read by every generator's prompt
-                # builder.  Generator-level lang_hint (content_language param)
-                # handles the actual enforcement; this directive is belt-and-
-                # suspenders for the LLM.
-                if _is_bilingual:
-                    if ex_bp.type == "match_pairs":
-                        lang_directive = (
-                            f"[LANGUAGE DIRECTIVE — MATCH PAIRS BILINGUAL MODE]\n"
-                            f"Left column  → word or phrase in {_target_lang.upper()} (the language being taught).\n"
-                            f"Right column → its translation in {_native_lang.upper()} (the student's native language).\n"
-                            f"Do NOT put both sides in the same language.\n"
-                            f"Title: write in {_native_lang.upper()}.\n\n"
-                        )
-                    elif ex_bp.type in ("test_without_timer", "test_with_timer", "true_false"):
-                        lang_directive = (
-                            f"[LANGUAGE DIRECTIVE — TEST/TRUE-FALSE]\n"
-                            f"Question prompts: may be in {_native_lang.upper()} or {_target_lang.upper()} "
-                            f"depending on what is being tested (e.g. comprehension questions in "
-                            f"{_native_lang.upper()}, grammar identification in {_target_lang.upper()}).\n"
-                            f"Answer options: MUST be in {_target_lang.upper()}.\n"
-                            f"Title: write in {_native_lang.upper()}.\n"
-                            f"Source text below contains {_native_lang.upper()} grammar explanations — "
-                            f"use the {_target_lang.upper()} examples embedded in them for answer options.\n\n"
-                        )
-                    else:
-                        # All other exercise types: target language only
-                        lang_directive = (
-                            f"[LANGUAGE DIRECTIVE — EXERCISES]\n"
-                            f"ALL exercise content (sentences, words, gaps, answer options) MUST be "
-                            f"entirely in {_target_lang.upper()} (the language being taught).\n"
-                            f"The source text below contains {_native_lang.upper()} grammar explanations — "
-                            f"IGNORE those; extract only the {_target_lang.upper()} example sentences "
-                            f"and vocabulary for exercise content.\n"
-                            f"Title: write in {_native_lang.upper()}.\n\n"
-                        )
+                lang_directive = self._exercise_lang_directive(request, ex_bp.type)
+                if lang_directive:
                     hint = lang_directive + hint
 
                 # NOTE: native_language / target_language for match_pairs bilingual
@@ -2337,6 +2335,9 @@ Rules:
                         content_language=request.content_language,
                         instruction_language=request.instruction_language,
                         generator_params=_gen_params,
+                        # pop: a repeated type in the same segment is generated singly.
+                        prefetched=batch.exercises.pop(ex_bp.type, None) if batch else None,
+                        instruction=batch.instructions.get(ex_bp.type) if batch else None,
                         # Use the same AI provider that generated the unit text so
                         # exercises don't fall back to _default_provider (Groq) and
                         # fail when GROQ_API_KEY is absent or rate-limited.
@@ -111,6 +111,60 @@ async def start_presence_eviction():
     start_eviction_task(interval_seconds=60, max_age_seconds=90)
 
 
+@app.on_event("startup")
+async def start_ai_circuit_probes():
+    from app.services.ai.providers.circuit_breaker import start_probe_task
+    start_probe_task()
+
+
+@app.on_event("startup")
+async def start_llm_telemetry_flush():
+    from app.services.ai.providers.telemetry import start_flush_task
+    start_flush_task()
+
+
+@app.on_event("startup")
+async def start_image_gc():
+    from app.services.storage.image_gc import start_gc_task
+    start_gc_task()
+
+
+@app.on_event("startup")
+async def start_answer_event_maintenance():
+    from app.services.answer_event_maintenance import start_maintenance_task
+    start_maintenance_task()
+
+
+@app.on_event("shutdown")
+async def flush_llm_telemetry():
+    from app.services.ai.providers.telemetry import stop_flush_task
+    await stop_flush_task()
+
+
+@app.on_event("startup")
+async def start_live_answer_writer():
+    from app.services.live_answer_writer import live_answer_writer
+    live_answer_writer.start()
+
+
+@app.on_event("shutdown")
+async def flush_live_answer_writer():
+    from app.services.live_answer_writer import live_answer_writer
+    await live_answer_writer.stop()
+
+
+@app.on_event("startup")
+async def start_live_backplane():
+    from app.services.live_backplane import get_backplane
+    await get_backplane().start()
+
+
+@app.on_event("shutdown")
+async def stop_live_backplane():
+    from app.services.live_backplane import get_backplane
+    await get_backplane().stop()
+
+
 @app.on_event("startup")
 async def warmup_rag():
     # RAG / LaBSE warmup disabled — not in use.
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+bench_answer_events.py
+
+Size and insert-latency report for exercise_field_answer_events — run it
+before and after alembic 0025 / a maintenance pass to compare.
+
+Reports the table size across all partitions (indexes included), the
+estimated row count and partition count, then times ``--batches`` inserts of
+``--rows`` synthetic rows each (the same multi-row INSERT + latest-answer
+upsert the live answer writer issues).  Every batch is rolled back, so the
+table is left as it was.  ``--maintain`` runs one maintenance pass first.
+
+Usage
+-----
+python scripts/bench_answer_events.py --classroom-id 12 --student-id 34
+python scripts/bench_answer_events.py --classroom-id 12 --student-id 34 \\
+    --rows 500 --batches 50 --maintain --json-out bench_answers.json
+
+Requirements: backend dependencies and DATABASE_URL pointing at Postgres;
+the classroom and student must exist (foreign keys).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+_BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_BACKEND_DIR))
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.models.exercise_field_answer_event import ExerciseFieldAnswerEvent  # noqa: E402
+from app.services.answer_event_maintenance import run_maintenance, table_stats  # noqa: E402
+from app.services.latest_exercise_answers import upsert_latest_answers  # noqa: E402
+
+
+def _rows(classroom_id: int, student_id: int, count: int, batch: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "classroom_id": classroom_id, "student_id": student_id,
+            "unit_id": None, "segment_id": None,
+            "exercise_key": f"ex/bench-{batch}/gap-{i}", "block_id": f"bench-{batch}",
+            "field_key": f"gap-{i}", "value": f"answer {i}", "is_correct": None,
+            "written_by_teacher": False, "is_broadcast": False,
+            "created_at": now + timedelta(microseconds=i),
+        }
+        for i in range(count)
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--classroom-id", type=int, required=True)
+    parser.add_argument("--student-id", type=int, required=True)
+    parser.add_argument("--rows", type=int, default=200, help="rows per batch")
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--maintain", action="store_true", help="run one maintenance pass first")
+    parser.add_argument("--json-out", type=Path)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report: dict = {"before": table_stats(db)}
+        if args.maintain:
+            report["maintenance"] = run_maintenance(db)
+
+        timings: list[float] = []
+        for batch in range(args.batches):
+            rows = _rows(args.classroom_id, args.student_id, args.rows, batch)
+            started = time.perf_counter()
+            db.execute(insert(ExerciseFieldAnswerEvent), rows)
+            upsert_latest_answers(db, rows)
+            db.flush()
+            timings.append((time.perf_counter() - started) * 1000)
+            db.rollback()
+
+        timings.sort()
+        report["insert_ms"] = {
+            "rows_per_batch": args.rows,
+            "batches":        args.batches,
+            "p50":            round(statistics.median(timings), 2),
+            "p95":            round(timings[max(0, int(len(timings) * 0.95) - 1)], 2),
+            "max":            round(timings[-1], 2),
+        }
+        report["after"] = table_stats(db)
+    finally:
+        db.close()
+
+    print(json.dumps(report, indent=2, default=str))
+    if args.json_out:
+        args.json_out.write_text(json.dumps(report, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
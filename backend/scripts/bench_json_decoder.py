@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+bench_json_decoder.py
+
+Micro-benchmark: the shared single-pass decoder (app.services.ai.tolerant_json)
+against the per-generator repair chains it replaced.
+
+The legacy chains are frozen copies of what the generators ran before —
+exercise (_extract_json_object → json.loads → _sanitize_json_control_chars),
+unit (fence regex → brace scan → json.loads → _repair_json) and slides
+(_strip_markdown_fences → _fix_escapes → json.loads → brace scan).
+
+Inputs are the malformed-output corpus in tests/fixtures/llm_json plus a
+synthetic large slide deck (well-formed, with control characters, and
+truncated) so the linear-time behaviour is visible.  For every input the
+report shows µs per call and whether each decoder produced a value.
+
+Usage
+-----
+python scripts/bench_json_decoder.py                 # 2 000 iterations per input
+python scripts/bench_json_decoder.py --number 200 --json-out bench_json.json
+
+Requirements: backend dependencies only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import timeit
+from pathlib import Path
+from typing import Any, Callable
+
+_BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_BACKEND_DIR))
+
+from app.services.ai.tolerant_json import loads_tolerant  # noqa: E402
+
+_CORPUS_DIR = _BACKEND_DIR / "tests" / "fixtures" / "llm_json"
+
+
+# ── Legacy chains (frozen) ─────────────────────────────────────────────────────
+
+def _legacy_exercise(raw: str) -> Any:
+    cleaned = re.sub(r"```(?:json)?", "", raw, flags=re.IGNORECASE).strip()
+    match = re.search(r"\{.*\}", cleaned, re.DOTALL)
+    if not match:
+        raise ValueError("no object")
+    text = re.sub(r",\s*(\])", r"\1", match.group(0))
+    text = re.sub(r",\s*(\})", r"\1", text)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        out: list[str] = []
+        in_string = escape_next = False
+        for ch in text:
+            if escape_next:
+                out.append(ch)
+                escape_next = False
+            elif ch == "\\" and in_string:
+                out.append(ch)
+                escape_next = True
+            elif ch == '"':
+                in_string = not in_string
+                out.append(ch)
+            elif in_string and ch in "\n\r\t":
+                out.append({"\n": "\\n", "\r": "\\r", "\t": "\\t"}[ch])
+            else:
+                out.append(ch)
+        return json.loads("".join(out))
+
+
+def _legacy_close_brackets(text: str) -> str:
+    stack: list[str] = []
+    in_string = escape_next = False
+    for ch in text:
+        if escape_next:
+            escape_next = False
+            continue
+        if ch == "\\" and in_string:
+            escape_next = True
+            continue
+        if ch == '"':
+            in_string = not in_string
+            continue
+        if in_string:
+            continue
+        if ch in "{[":
+            stack.append(ch)
+        elif ch == "}" and stack and stack[-1] == "{":
+            stack.pop()
+        elif ch == "]" and stack and stack[-1] == "[":
+            stack.pop()
+    suffix = '"' if in_string else ""
+    if (text + suffix).rstrip().endswith(":"):
+        suffix += "null"
+    return text + suffix + "".join("}" if o == "{" else "]" for o in reversed(stack))
+
+
+def _legacy_unit(raw: str) -> Any:
+    text = re.sub(r"^```[a-z]*\n?", "", raw.strip(), flags=re.MULTILINE)
+    text = re.sub(r"\n?```$", "", text.strip())
+    start = text.find("{")
+    if start != -1:
+        depth = 0
+        for i, ch in enumerate(text[start:], start):
+            if ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    text = text[start : i + 1]
+                    break
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return json.loads(_legacy_close_brackets(text))
+
+
+_INVALID_ESCAPE = re.compile(r'\\(?!["\\/bfnrtu])')
+
+
+def _legacy_slides(raw: str) -> Any:
+    text = raw.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1).strip()
+    text = _INVALID_ESCAPE.sub(r"\\\\", text)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    start = text.find("{")
+    depth, in_str, escape = 0, False, False
+    for idx, ch in enumerate(text[start:], start=start):
+        if escape:
+            escape = False
+        elif ch == "\\" and in_str:
+            escape = True
+        elif ch == '"':
+            in_str = not in_str
+        elif not in_str and ch == "{":
+            depth += 1
+        elif not in_str and ch == "}":
+            depth -= 1
+            if depth == 0:
+                return json.loads(text[start : idx + 1])
+    raise ValueError("truncated")
+
+
+DECODERS: dict[str, Callable[[str], Any]] = {
+    "tolerant":        loads_tolerant,
+    "legacy_exercise": _legacy_exercise,
+    "legacy_unit":     _legacy_unit,
+    "legacy_slides":   _legacy_slides,
+}
+
+
+# ── Inputs ─────────────────────────────────────────────────────────────────────
+
+def _large_deck(n_slides: int = 400) -> str:
+    slides = [
+        {
+            "title": f"Slide {i}: il congiuntivo",
+            "bullet_points": [f"Penso che tu abbia ragione ({i}.{j})" for j in range(5)],
+            "teacher_notes": "Leggere ad alta voce e chiedere esempi agli studenti.",
+        }
+        for i in range(n_slides)
+    ]
+    return json.dumps({"topic": "Il congiuntivo", "slides": slides}, ensure_ascii=False)
+
+
+def load_inputs(corpus_dir: Path) -> dict[str, str]:
+    inputs = {p.stem: p.read_text() for p in sorted(corpus_dir.glob("*.txt"))}
+    deck = _large_deck()
+    inputs["large_deck_valid"] = deck
+    inputs["large_deck_raw_newlines"] = "```json\n" + deck.replace("ad alta voce", "ad alta\nvoce") + "\n```"
+    inputs["large_deck_truncated"] = deck[: int(len(deck) * 0.9)]
+    return inputs
+
+
+# ── Runner ─────────────────────────────────────────────────────────────────────
+
+def bench(inputs: dict[str, str], number: int) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    for name, raw in inputs.items():
+        # Large inputs get fewer iterations so one run stays in seconds.
+        reps = max(1, number * 2_000 // max(2_000, len(raw)))
+        row: dict[str, Any] = {"input": name, "chars": len(raw), "number": reps}
+        for dec_name, decode in DECODERS.items():
+            try:
+                decode(raw)
+                parsed = True
+            except (ValueError, RecursionError):
+                parsed = False
+            seconds = min(timeit.repeat(lambda: _swallow(decode, raw), number=reps, repeat=3))
+            row[dec_name] = {"us_per_call": round(seconds / reps * 1e6, 1), "parsed": parsed}
+        rows.append(row)
+    return rows
+
+
+def _swallow(decode: Callable[[str], Any], raw: str) -> None:
+    try:
+        decode(raw)
+    except (ValueError, RecursionError):
+        pass
+
+
+def print_report(rows: list[dict[str, Any]]) -> None:
+    names = list(DECODERS)
+    print(f"{'input':32} {'chars':>8}  " + "  ".join(f"{n:>17}" for n in names))
+    for row in rows:
+        cells = []
+        for n in names:
+            cell = row[n]
+            mark = " " if cell["parsed"] else "✗"
+            cells.append(f"{cell['us_per_call']:>14.1f}µs{mark}")
+        print(f"{row['input']:32} {row['chars']:>8}  " + "  ".join(cells))
+    print("\n✗ = decoder raised (no value recovered)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2_000, help="iterations per small input")
+    parser.add_argument("--corpus", default=str(_CORPUS_DIR), help="malformed-output fixture directory")
+    parser.add_argument("--json-out", help="write the report to this JSON file")
+    args = parser.parse_args()
+
+    rows = bench(load_inputs(Path(args.corpus)), args.number)
+    print_report(rows)
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(rows, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
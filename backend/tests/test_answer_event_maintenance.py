@@ -0,0 +1,200 @@
+"""
+Unit tests for app/services/answer_event_maintenance.py
+
+Covers:
+  * monthly partition naming and bounds, including the year rollover.
+  * only months whose whole range is past the retention window expire.
+  * compaction deletes superseded rows of closed lessons only and keeps the
+    newest row per field, across several batches.
+  * on a table that is not partitioned, partition upkeep and expiry are no-ops.
+  * a full pass off PostgreSQL skips the size stats and still compacts.
+  * expiry archives a partition before detaching and dropping it, and drops
+    nothing when the archive cannot be written.
+"""
+
+import gzip
+import json
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.services import answer_event_maintenance as m
+
+
+def test_partition_names_and_bounds():
+    dec = date(2026, 12, 1)
+    assert m.next_month(dec) == date(2027, 1, 1)
+    assert m.partition_name(dec) == "exercise_field_answer_events_202612"
+    assert m.partition_month("exercise_field_answer_events_202612") == dec
+    assert m.partition_month(m.DEFAULT_PARTITION) is None
+    assert m.partition_ddl(dec).endswith("FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')")
+    assert m.month_start(datetime(2026, 10, 19, 8, tzinfo=timezone.utc)) == date(2026, 10, 1)
+
+
+def test_expired_months_respect_retention():
+    months = [date(2026, month, 1) for month in range(1, 11)]
+    now = datetime(2026, 10, 19, tzinfo=timezone.utc)
+    # 90 days back is 2026-07-21: June ends before it, July does not.
+    assert m.expired_months(months, now, 90) == months[:6]
+    assert m.expired_months(months, now, 0) == []
+
+
+# ── Compaction / unpartitioned table (SQLite) ─────────────────────────────────
+
+_NOW = datetime(2026, 10, 19, 12, 0)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE exercise_field_answer_events (
+                id INTEGER PRIMARY KEY, classroom_id INTEGER, student_id INTEGER,
+                block_id TEXT, field_key TEXT, value TEXT, created_at TIMESTAMP)
+        """))
+        conn.execute(text("""
+            CREATE TABLE latest_exercise_answers (
+                classroom_id INTEGER, student_id INTEGER, block_id TEXT,
+                field_key TEXT, updated_at TIMESTAMP)
+        """))
+        conn.execute(text("CREATE TABLE live_sessions (classroom_id INTEGER PRIMARY KEY)"))
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _write(db, classroom_id, field_key, *ages_hours):
+    """One event per age (hours before _NOW); the youngest is the latest answer."""
+    stamps = [_NOW - timedelta(hours=h) for h in ages_hours]
+    for stamp in stamps:
+        db.execute(
+            text("INSERT INTO exercise_field_answer_events "
+                 "(classroom_id, student_id, block_id, field_key, value, created_at) "
+                 "VALUES (:c, 3, 'b1', :f, :v, :t)"),
+            {"c": classroom_id, "f": field_key, "v": f"at {stamp}", "t": stamp},
+        )
+    db.execute(
+        text("INSERT INTO latest_exercise_answers VALUES (:c, 3, 'b1', :f, :t)"),
+        {"c": classroom_id, "f": field_key, "t": max(stamps)},
+    )
+    db.commit()
+
+
+def _remaining(db, classroom_id, field_key):
+    return db.execute(
+        text("SELECT created_at FROM exercise_field_answer_events "
+             "WHERE classroom_id = :c AND field_key = :f"),
+        {"c": classroom_id, "f": field_key},
+    ).fetchall()
+
+
+def test_compaction_keeps_newest_row_of_closed_lessons(db):
+    _write(db, 1, "gap-0", 50, 49, 48)      # closed, quiet for 48h  → keep newest
+    _write(db, 1, "gap-1", 50, 2)           # still being answered   → untouched
+    _write(db, 2, "gap-0", 50, 48)          # lesson live right now  → untouched
+    db.execute(text("INSERT INTO live_sessions VALUES (2)"))
+    db.commit()
+
+    deleted = m.compact_closed_lessons(db, quiet_hours=24, batch=1, now=_NOW)
+
+    assert deleted == 2
+    assert len(_remaining(db, 1, "gap-0")) == 1
+    assert len(_remaining(db, 1, "gap-1")) == 2
+    assert len(_remaining(db, 2, "gap-0")) == 2
+    assert m.compact_closed_lessons(db, quiet_hours=24, now=_NOW) == 0
+    assert m.compact_closed_lessons(db, quiet_hours=0, now=_NOW) == 0
+
+
+def test_unpartitioned_table_skips_partition_steps(db, tmp_path):
+    _write(db, 1, "gap-0", 24 * 400)
+    assert not m.is_partitioned(db)
+    assert m.ensure_partitions(db, now=_NOW) == 0
+    assert m.expire_partitions(db, retention_days=30, archive_dir=str(tmp_path)) == []
+    assert len(_remaining(db, 1, "gap-0")) == 1
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_full_pass_off_postgres_still_compacts(db, monkeypatch):
+    _write(db, 1, "gap-0", 24 * 400, 24 * 300)
+    monkeypatch.setattr(m, "_RETENTION_DAYS", 30)
+
+    report = m.run_maintenance(db)
+
+    assert report["size_before"] is None and report["size_after"] is None
+    assert report["partitioned"] is False
+    assert report["compacted_rows"] == 1
+    assert len(_remaining(db, 1, "gap-0")) == 1
+
+
+# ── Expiry (recorded statements) ──────────────────────────────────────────────
+
+class _Rows:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def mappings(self):
+        return iter(self._rows)
+
+
+class _RecordingSession:
+    """Records executed SQL; SELECTs from a partition return its rows."""
+
+    def __init__(self, partitions, fail_select=False):
+        self.partitions = partitions
+        self.fail_select = fail_select
+        self.statements: list[str] = []
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append(sql)
+        if sql.startswith("SELECT"):
+            if self.fail_select:
+                raise OSError("archive source unavailable")
+            name = sql.split(" FROM ")[1].split()[0]
+            return _Rows(self.partitions[name])
+        return None
+
+    def commit(self):
+        self.statements.append("COMMIT")
+
+
+@pytest.fixture
+def partitioned(monkeypatch):
+    names = ["exercise_field_answer_events_202601", "exercise_field_answer_events_202609",
+             m.DEFAULT_PARTITION]
+    monkeypatch.setattr(m, "is_partitioned", lambda db: True)
+    monkeypatch.setattr(m, "list_partitions", lambda db: names)
+    return {
+        "exercise_field_answer_events_202601": [
+            {"id": 1, "value": "andiamo", "created_at": datetime(2026, 1, 5, tzinfo=timezone.utc)},
+            {"id": 2, "value": None, "created_at": datetime(2026, 1, 6, tzinfo=timezone.utc)},
+        ],
+        "exercise_field_answer_events_202609": [],
+    }
+
+
+def test_expiry_archives_then_drops(partitioned, tmp_path):
+    db = _RecordingSession(partitioned)
+    now = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+    expired = m.expire_partitions(db, retention_days=90, archive_dir=str(tmp_path), now=now)
+
+    archive = tmp_path / "exercise_field_answer_events_202601.jsonl.gz"
+    assert expired == [{"partition": "exercise_field_answer_events_202601",
+                        "archive": str(archive), "rows": 2}]
+    with gzip.open(archive, "rt") as fh:
+        assert [json.loads(line)["id"] for line in fh] == [1, 2]
+    assert [s.split()[0] for s in db.statements] == ["SELECT", "ALTER", "DROP", "COMMIT"]
+    assert db.statements[1].endswith("DETACH PARTITION exercise_field_answer_events_202601")
+    assert not any("202609" in s or "default" in s for s in db.statements)
+
+
+def test_expiry_drops_nothing_when_archive_fails(partitioned, tmp_path):
+    db = _RecordingSession(partitioned, fail_select=True)
+    with pytest.raises(OSError):
+        m.expire_partitions(db, retention_days=90, archive_dir=str(tmp_path),
+                            now=datetime(2026, 10, 19, tzinfo=timezone.utc))
+    assert not any(s.startswith(("ALTER", "DROP")) for s in db.statements)
@@ -0,0 +1,75 @@
+"""
+Unit tests for app/services/card_image_plan.py
+
+Covers:
+  * concurrent and later requests for one concept share a single render.
+  * a failed render is not cached, so a later card retries.
+  * renders across concepts never exceed the global concurrency bound.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services import card_image_plan as cip
+
+
+@pytest.mark.asyncio
+async def test_same_concept_renders_once():
+    plan = cip.CardImagePlan()
+    calls: list[str] = []
+
+    async def render(_db):
+        calls.append("apple")
+        await asyncio.sleep(0.01)
+        return "/img/apple.png"
+
+    urls = await asyncio.gather(*(plan.image_url("apple", render) for _ in range(5)))
+    assert urls == ["/img/apple.png"] * 5
+    assert await plan.image_url("apple", render) == "/img/apple.png"
+    assert calls == ["apple"]
+    assert plan.stats()["deduped"] == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_render_is_retried():
+    plan = cip.CardImagePlan()
+    results = iter([None, "/img/pear.png"])
+
+    async def render(_db):
+        return next(results)
+
+    assert await plan.image_url("pear", render) is None
+    assert await plan.image_url("pear", render) == "/img/pear.png"
+
+
+@pytest.mark.asyncio
+async def test_global_concurrency_bound(monkeypatch):
+    monkeypatch.setattr(cip, "_CONCURRENCY", 2)
+    monkeypatch.setattr(cip, "_semaphore", None)
+    plan = cip.CardImagePlan()
+    active = peak = 0
+
+    async def render(_db):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return "/img/x.png"
+
+    await asyncio.gather(*(plan.image_url(f"c{i}", render) for i in range(6)))
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_scope_is_visible_to_child_tasks():
+    plan = cip.CardImagePlan()
+
+    async def child():
+        return cip.current_card_image_plan()
+
+    with cip.card_image_scope(plan):
+        seen = await asyncio.create_task(child())
+    assert seen is plan
+    assert cip.current_card_image_plan() is None
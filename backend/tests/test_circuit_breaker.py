@@ -0,0 +1,164 @@
+"""
+Unit tests for app/services/ai/providers/circuit_breaker.py
+
+Covers:
+  * closed → open on error rate and on slow-call rate.
+  * open → half-open after the cool-down, single trial slot.
+  * CircuitBreakerProvider short-circuits while open.
+  * admission-queue rejections are not counted as backend failures.
+  * latency excludes time queued in the rate limiter; streams are timed to
+    their first chunk.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.ai.providers.base import AIProvider, AIProviderError
+from app.services.ai.providers import circuit_breaker as cb
+from app.services.ai.providers.rate_limiter import AdmissionRejected, RateLimitedProvider
+
+
+class _FlakyProvider(AIProvider):
+    def __init__(self, exc: Exception | None = None) -> None:
+        self.model = "flaky"
+        self.calls = 0
+        self.exc = exc
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        if self.exc:
+            raise self.exc
+        return "ok"
+
+
+class _SlowStream(AIProvider):
+    """Answers at once but dribbles the rest of its stream out slowly."""
+
+    def generate(self, prompt: str) -> str:
+        return "ok"
+
+    async def agenerate(self, prompt: str) -> str:
+        return "ok"
+
+    async def agenerate_stream(self, prompt: str):
+        yield "first"
+        await asyncio.sleep(0.1)
+        yield "rest"
+
+
+class _QueuedLimiter:
+    """Rate limiter whose admission queue always takes 0.1s."""
+
+    backend = "test"
+
+    async def acquire(self, tokens: int, priority: int = 0) -> float:
+        await asyncio.sleep(0.1)
+        return 0.1
+
+    def reconcile(self, estimated: int, actual: int) -> None:
+        pass
+
+    def penalize(self, seconds: float = 0.0) -> None:
+        pass
+
+
+def _breaker(**kw) -> cb.CircuitBreaker:
+    params = dict(window=10, min_calls=4, error_rate=0.5, slow_call_seconds=1.0,
+                  slow_call_rate=0.75, open_seconds=60)
+    params.update(kw)
+    return cb.CircuitBreaker("test", **params)
+
+
+class TestStateMachine:
+    def test_opens_on_error_rate(self):
+        breaker = _breaker()
+        for _ in range(2):
+            breaker.record_success(0.1)
+        breaker.record_failure(0.1, "boom")
+        assert breaker.state == cb.CLOSED
+        breaker.record_failure(0.1, "boom")
+        assert breaker.state == cb.OPEN
+        assert not breaker.is_available()
+        assert not breaker.allow_request()
+
+    def test_opens_on_slow_calls(self):
+        breaker = _breaker()
+        for _ in range(4):
+            breaker.record_success(5.0)
+        assert breaker.state == cb.OPEN
+
+    def test_half_open_single_trial(self):
+        breaker = _breaker(open_seconds=0.0)
+        for _ in range(4):
+            breaker.record_failure(0.1, "boom")
+        assert breaker.allow_request()              # claims the trial
+        assert breaker.state == cb.HALF_OPEN
+        assert not breaker.allow_request()
+        breaker.record_success(0.1)
+        assert breaker.state == cb.CLOSED
+
+    def test_failed_trial_reopens(self):
+        breaker = _breaker(open_seconds=0.0)
+        for _ in range(4):
+            breaker.record_failure(0.1, "boom")
+        assert breaker.allow_request()
+        breaker.record_failure(0.1, "still down")
+        assert breaker.snapshot()["opens"] == 2
+
+
+class TestCircuitBreakerProvider:
+    def test_short_circuits_while_open(self):
+        breaker = _breaker()
+        inner = _FlakyProvider(AIProviderError("timeout"))
+        provider = cb.CircuitBreakerProvider(inner, breaker)
+        for _ in range(4):
+            with pytest.raises(AIProviderError):
+                provider.generate("x")
+        with pytest.raises(cb.CircuitOpenError):
+            provider.generate("x")
+        assert inner.calls == 4
+        assert not cb.is_available(provider)
+        assert provider.model == "flaky"
+
+    @pytest.mark.asyncio
+    async def test_admission_rejection_is_not_a_failure(self):
+        breaker = _breaker()
+        provider = cb.CircuitBreakerProvider(
+            _FlakyProvider(AdmissionRejected("groq rate limit: queue")), breaker,
+        )
+        for _ in range(6):
+            with pytest.raises(AdmissionRejected):
+                await provider.agenerate("x")
+        assert breaker.state == cb.CLOSED
+        assert breaker.snapshot()["window_calls"] == 0
+
+    def test_probe_success_closes_circuit(self, monkeypatch):
+        breaker = _breaker()
+        for _ in range(4):
+            breaker.record_failure(0.1, "boom")
+        monkeypatch.setitem(cb._breakers, "test", breaker)
+        cb.record_probe_result("test", ok=True, latency=0.2)
+        assert breaker.state == cb.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_is_not_backend_latency(self):
+        breaker = _breaker(slow_call_seconds=0.05)
+        provider = cb.CircuitBreakerProvider(
+            RateLimitedProvider(_SlowStream(), _QueuedLimiter()), breaker,
+        )
+        for _ in range(4):
+            assert await provider.agenerate("x") == "ok"
+        assert breaker.state == cb.CLOSED
+        assert breaker.snapshot()["slow_call_rate"] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_stream_is_timed_to_first_chunk(self):
+        breaker = _breaker(slow_call_seconds=0.05)
+        provider = cb.CircuitBreakerProvider(
+            RateLimitedProvider(_SlowStream(), _QueuedLimiter()), breaker,
+        )
+        for _ in range(4):
+            assert [tok async for tok in provider.agenerate_stream("x")] == ["first", "rest"]
+        assert breaker.state == cb.CLOSED
+        assert breaker.snapshot()["slow_call_rate"] == 0.0
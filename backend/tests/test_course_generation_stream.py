@@ -0,0 +1,207 @@
+"""
+Unit tests for the pipelined unit scheduler in
+app/api/v1/endpoints/course_generation.py (_stream_generation)
+
+Covers:
+  * units of one teacher never run above the plan limit, across two streams.
+  * a failing unit emits unit_error and the stream still completes.
+  * closing the stream cancels the units still generating.
+  * a teacher's semaphore entry is dropped once nothing holds it.
+  * /speculate refuses courses of other teachers; the speculation
+    fingerprint changes with the course description.
+"""
+
+import asyncio
+import gc
+import json
+import os
+from types import SimpleNamespace
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
+
+import pytest  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+
+import app.core.database as database  # noqa: E402
+import app.services.ai.providers.router as router  # noqa: E402
+import app.services.unit_generator as unit_generator  # noqa: E402
+from app.api.v1.endpoints import course_generation as cg  # noqa: E402
+
+
+class _Query:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def filter(self, *args):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def all(self):
+        return self._rows
+
+    def first(self):
+        return None
+
+
+class _Session:
+    closed = 0
+
+    def __init__(self, units):
+        self._units = units
+
+    def query(self, model):
+        return _Query(self._units)
+
+    def close(self):
+        _Session.closed += 1
+
+
+class _Service:
+    """Stands in for UnitGeneratorService; records how many units overlap."""
+
+    def __init__(self, delay=0.02, fail_ids=()):
+        self.delay = delay
+        self.fail_ids = set(fail_ids)
+        self.running = 0
+        self.peak = 0
+        self.cancelled: list[int] = []
+
+    async def generate(self, request, db, on_segment=None):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            if request.unit_id in self.fail_ids:
+                raise RuntimeError(f"unit {request.unit_id} failed")
+            return SimpleNamespace(segments_created=1, exercises_created=2)
+        except asyncio.CancelledError:
+            self.cancelled.append(request.unit_id)
+            raise
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture
+def course(monkeypatch):
+    """Patches unit loading and generation; returns setup(unit_ids, service)."""
+
+    def setup(unit_ids, service):
+        units = [
+            SimpleNamespace(id=uid, title=f"Unit {uid}", description="", outline_sections=None,
+                            created_by=7)
+            for uid in unit_ids
+        ]
+        monkeypatch.setattr(database, "SessionLocal", lambda: _Session(units))
+        monkeypatch.setattr(router, "get_provider_for_plan", lambda plan, workload=None: object())
+        monkeypatch.setattr(unit_generator, "UnitGeneratorService", lambda ai_provider: service)
+        return service
+
+    return setup
+
+
+def _stream(course_id, user_id=7, plan="free"):
+    return cg._stream_generation(
+        course_id, "A1", "Italian", "English", "", teacher_plan=plan,
+        user=SimpleNamespace(id=user_id),
+    )
+
+
+async def _events(stream) -> list[dict]:
+    return [json.loads(chunk[len("data: "):]) async for chunk in stream if chunk.startswith("data: ")]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded_per_teacher(course):
+    service = course(range(1, 6), _Service())
+
+    first, second = await asyncio.gather(_events(_stream(9001)), _events(_stream(9002)))
+
+    # Free plan: two units at once, shared by both streams of teacher 7.
+    assert service.peak == 2
+    for events in (first, second):
+        assert events[-1] == {"type": "complete", "units_done": 5, "total": 5}
+        assert sorted(e["unit_id"] for e in events if e["type"] == "unit_done") == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_failing_unit_reports_error_and_stream_completes(course):
+    course([1, 2, 3], _Service(fail_ids={2}))
+    _Session.closed = 0
+
+    events = await _events(_stream(9003))
+
+    errors = [e for e in events if e["type"] == "unit_error"]
+    assert [(e["unit_id"], e["error"]) for e in errors] == [(2, "unit 2 failed")]
+    assert sorted(e["unit_id"] for e in events if e["type"] == "unit_done") == [1, 3]
+    assert events[-1] == {"type": "complete", "units_done": 2, "total": 3}
+    # Loader session plus one per unit — all closed, the failed one included.
+    assert _Session.closed == 4
+
+
+@pytest.mark.asyncio
+async def test_closing_the_stream_cancels_workers(course):
+    service = course([1, 2, 3], _Service(delay=10))
+    stream = _stream(9004)
+
+    async for chunk in stream:
+        if '"unit_start"' in chunk:
+            break
+    await asyncio.sleep(0)
+    assert service.running == 2
+
+    await stream.aclose()
+
+    assert sorted(service.cancelled) == [1, 2]
+    assert service.running == 0
+
+
+def test_idle_semaphore_entries_are_evicted():
+    slots = cg._teacher_unit_slots(4242, "pro")
+    assert cg._teacher_unit_slots(4242, "pro") is slots
+    assert 4242 in cg._teacher_unit_semaphores
+
+    # A plan change builds a new semaphore; the old one lives on with its holder.
+    upgraded = cg._teacher_unit_slots(4242, "free")
+    assert upgraded is not slots and cg._teacher_unit_semaphores[4242] is upgraded
+
+    del slots, upgraded
+    gc.collect()
+    assert 4242 not in cg._teacher_unit_semaphores
+
+
+class _Rows:
+    """Query over plain objects; understands ``Model.column == value`` filters."""
+
+    def __init__(self, rows):
+        self._rows = rows
+
+    def filter(self, *criteria):
+        return _Rows([
+            row for row in self._rows
+            if all(getattr(row, c.left.key) == c.right.value for c in criteria)
+        ])
+
+    def first(self):
+        return self._rows[0] if self._rows else None
+
+
+@pytest.mark.asyncio
+async def test_speculate_rejects_another_teachers_course(monkeypatch):
+    monkeypatch.setattr(cg, "SPECULATIVE_UNITS", 2)
+    db = SimpleNamespace(query=lambda model: _Rows([SimpleNamespace(id=9005, created_by=7)]))
+    intruder = SimpleNamespace(id=8)
+
+    with pytest.raises(HTTPException) as exc:
+        await cg.speculate_course_units(9005, cg.SpeculateRequest(), db=db, current_user=intruder)
+
+    assert exc.value.status_code == 404
+    assert cg.speculation_registry.get(9005) is None
+
+
+def test_fingerprint_covers_course_description():
+    spec = {"title": "Unit 1", "description": "", "outline_sections": None}
+    before = cg._unit_fingerprint(spec, "A1", "Italian", "English", "Use Harry Potter", "")
+    after = cg._unit_fingerprint(spec, "A1", "Italian", "English", "Use Star Wars", "")
+    assert before != after
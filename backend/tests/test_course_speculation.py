@@ -0,0 +1,72 @@
+"""
+Unit tests for app/services/course_speculation.py
+
+Covers:
+  * a stream attaching to a running job receives buffered + live events.
+  * a finished job is replayed; a stale fingerprint is not attached.
+  * discard cancels running jobs and returns persisted segment ids.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.course_speculation import SpeculationRegistry
+
+
+def _job(release: asyncio.Event, segment_ids=(11, 12)):
+    async def run(unit):
+        unit.emit({"type": "segment_ready", "unit_id": unit.unit_id, "segment_index": 0})
+        await release.wait()
+        unit.result = SimpleNamespace(segment_ids=list(segment_ids))
+        unit.emit({"type": "unit_done", "unit_id": unit.unit_id})
+    return run
+
+
+async def _collect(unit) -> list[str]:
+    return [event["type"] async for event in unit.events()]
+
+
+@pytest.mark.asyncio
+async def test_stream_follows_running_job():
+    registry = SpeculationRegistry()
+    release = asyncio.Event()
+    registry.start(1, teacher_id=7, service=None, jobs=[(10, "fp", _job(release))])
+    await asyncio.sleep(0)
+
+    unit = registry.claim(1, 10, "fp")
+    follower = asyncio.create_task(_collect(unit))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == ["segment_ready", "unit_done"]
+    assert await _collect(unit) == ["segment_ready", "unit_done"]  # replay
+    assert registry.stats()["claimed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_fingerprint_is_not_attached():
+    registry = SpeculationRegistry()
+    registry.start(1, teacher_id=7, service=None, jobs=[(10, "old", _job(asyncio.Event()))])
+    await asyncio.sleep(0)
+
+    assert registry.claim(1, 10, "new") is None
+    assert 10 not in registry.get(1).units
+
+
+@pytest.mark.asyncio
+async def test_discard_cancels_and_returns_segments():
+    registry = SpeculationRegistry()
+    done, pending = asyncio.Event(), asyncio.Event()
+    done.set()
+    registry.start(1, teacher_id=7, service=None, jobs=[
+        (10, "a", _job(done, segment_ids=(11, 12))),
+        (20, "b", _job(pending)),
+    ])
+    await asyncio.sleep(0.01)
+
+    task = registry.get(1).units[20].task
+    assert await registry.discard(1, {10, 20}) == [11, 12]
+    assert task.cancelled()
+    assert registry.get(1) is None
@@ -0,0 +1,74 @@
+"""
+Unit tests for DeepSeekProvider.agenerate_stream
+(app/services/ai/providers/deepseek_provider.py)
+
+Covers:
+  * tokens from the worker thread arrive in order; worker errors re-raise.
+  * a consumer that stops early makes the worker stop reading and close
+    the upstream stream.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.ai.providers.base import AIProviderError
+from app.services.ai.providers.deepseek_provider import DeepSeekProvider
+
+
+class _Upstream:
+    """Stands in for generate_stream(): a slow token stream that notes when it is closed."""
+
+    def __init__(self, tokens: int = 200, fail_after: int | None = None) -> None:
+        self.tokens = tokens
+        self.fail_after = fail_after
+        self.read = 0
+        self.closed = threading.Event()
+
+    def __call__(self, prompt: str):
+        try:
+            for n in range(self.tokens):
+                if n == self.fail_after:
+                    raise AIProviderError("DeepSeek stream timed out")
+                time.sleep(0.005)
+                self.read += 1
+                yield f"t{n} "
+        finally:
+            self.closed.set()
+
+
+def _provider(upstream: _Upstream) -> DeepSeekProvider:
+    provider = DeepSeekProvider(api_key="test")
+    provider.generate_stream = upstream
+    return provider
+
+
+@pytest.mark.asyncio
+async def test_tokens_arrive_in_order():
+    upstream = _Upstream(tokens=5)
+    tokens = [tok async for tok in _provider(upstream).agenerate_stream("x")]
+    assert tokens == [f"t{n} " for n in range(5)]
+    assert upstream.closed.is_set()
+
+
+@pytest.mark.asyncio
+async def test_worker_error_is_reraised():
+    upstream = _Upstream(fail_after=2)
+    with pytest.raises(AIProviderError):
+        async for _ in _provider(upstream).agenerate_stream("x"):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_early_stop_stops_the_worker():
+    upstream = _Upstream()
+    stream = _provider(upstream).agenerate_stream("x")
+    async for tok in stream:
+        if tok == "t2 ":
+            break
+    await stream.aclose()
+
+    assert await asyncio.to_thread(upstream.closed.wait, 2)
+    assert upstream.read < upstream.tokens
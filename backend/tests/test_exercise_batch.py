@@ -0,0 +1,94 @@
+"""
+Unit tests for generate_exercise_batch in app/services/ai_exercise_generator.py
+
+Covers:
+  * valid parts are validated and returned with the translated instruction,
+    invalid parts are reported in ``failed`` for single-type fallback.
+  * an unparseable reply marks every batchable part as failed.
+  * English instructions + no batchable types make no LLM call.
+"""
+
+import json
+import os
+
+import pytest
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
+
+from app.services.ai.providers.base import AIProvider  # noqa: E402
+from app.services.ai_exercise_generator import generate_exercise_batch  # noqa: E402
+
+
+class _StubProvider(AIProvider):
+    model = "stub"
+
+    def __init__(self, reply: str) -> None:
+        self.reply = reply
+        self.prompts: list[str] = []
+
+    def generate(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return self.reply
+
+    async def agenerate(self, prompt: str) -> str:
+        return self.generate(prompt)
+
+
+_REPLY = {
+    "exercises": {
+        "drag_to_gap": {
+            "title": "Passato prossimo",
+            "passage": "Ieri io [ho mangiato] la pizza. Noi [siamo andati] al mare.",
+        },
+        "match_pairs": {"title": "Parole", "pairs": []},
+    },
+    "instructions": {
+        "drag_to_gap": "Перетащите слова в пропуски",
+        "match_pairs": "Соедините пары",
+        "build_sentence": "Составьте предложение",
+    },
+}
+
+
+@pytest.mark.asyncio
+async def test_valid_parts_kept_and_invalid_parts_fall_back():
+    provider = _StubProvider(json.dumps(_REPLY, ensure_ascii=False))
+    result = await generate_exercise_batch(
+        ["drag_to_gap", "match_pairs", "build_sentence"],
+        "Il passato prossimo si forma con avere o essere.",
+        instruction_language="Russian",
+        provider=provider,
+    )
+
+    assert len(provider.prompts) == 1
+    assert provider.prompts[0].count("Il passato prossimo") == 1
+
+    data, meta = result.exercises["drag_to_gap"]
+    assert data["gaps"] == {"g1": "ho mangiato", "g2": "siamo andati"}
+    assert data["instruction"] == "Перетащите слова в пропуски"
+    assert meta["generation_strategy"] == "batch"
+
+    assert set(result.failed) == {"match_pairs"}
+    assert "build_sentence" not in result.exercises
+    assert result.instructions["build_sentence"] == "Составьте предложение"
+
+
+@pytest.mark.asyncio
+async def test_unparseable_reply_fails_every_part():
+    provider = _StubProvider("sorry, no JSON today")
+    result = await generate_exercise_batch(
+        ["true_false", "match_pairs"], "content", provider=provider,
+    )
+    assert result.exercises == {}
+    assert set(result.failed) == {"true_false", "match_pairs"}
+    assert result.instructions["true_false"].startswith("Decide")
+
+
+@pytest.mark.asyncio
+async def test_english_without_batchable_types_skips_llm():
+    provider = _StubProvider("{}")
+    result = await generate_exercise_batch(
+        ["build_sentence", "drag_word_to_image"], "content", provider=provider,
+    )
+    assert provider.prompts == []
+    assert result.instructions["build_sentence"] == "Build the correct sentence from the words"
@@ -0,0 +1,118 @@
+"""
+Unit tests for app/services/ai/providers/hedging.py
+
+Covers:
+  * a primary that answers before the hedge delay wins; the secondary is
+    never called.
+  * a slow primary is hedged, the faster secondary wins and the primary is
+    cancelled — and vice versa when the primary answers first after the hedge.
+  * a primary that fails before the hedge fires fails over immediately.
+  * concurrent calls on one shared instance each see the model that
+    answered them, without mutating the instance.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.ai.providers.base import AIProvider, AIProviderError
+from app.services.ai.providers.hedging import HedgedProvider
+
+
+class _SlowProvider(AIProvider):
+    def __init__(self, model: str, delay: float, exc: Exception | None = None) -> None:
+        self.model = model
+        self.delay = delay
+        self.exc = exc
+        self.calls = 0
+        self.cancelled = 0
+
+    def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    async def agenerate(self, prompt: str) -> str:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.exc is not None:
+            raise self.exc
+        return f"{self.model}: {prompt}"
+
+
+def _hedged(primary: AIProvider, secondary: AIProvider, delay: float) -> HedgedProvider:
+    return HedgedProvider(primary, secondary, name="test", delay=delay)
+
+
+@pytest.mark.asyncio
+async def test_primary_wins_before_hedge_delay():
+    primary, secondary = _SlowProvider("deepseek", 0.01), _SlowProvider("groq", 0.01)
+    hedged = _hedged(primary, secondary, delay=0.5)
+
+    assert await hedged.agenerate("ciao") == "deepseek: ciao"
+    assert hedged.model == "deepseek"
+    assert secondary.calls == 0
+    assert hedged.stats()["hedged"] == 0
+
+
+@pytest.mark.asyncio
+async def test_secondary_wins_after_hedge_and_primary_is_cancelled():
+    primary, secondary = _SlowProvider("deepseek", 5.0), _SlowProvider("groq", 0.01)
+    hedged = _hedged(primary, secondary, delay=0.05)
+
+    assert await hedged.agenerate("ciao") == "groq: ciao"
+    await asyncio.sleep(0)
+    assert hedged.model == "groq"
+    assert primary.cancelled == 1
+    stats = hedged.stats()
+    assert stats["hedged"] == 1 and stats["secondary_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_primary_wins_after_hedge_and_secondary_is_cancelled():
+    primary, secondary = _SlowProvider("deepseek", 0.1), _SlowProvider("groq", 5.0)
+    hedged = _hedged(primary, secondary, delay=0.02)
+
+    assert await hedged.agenerate("ciao") == "deepseek: ciao"
+    await asyncio.sleep(0)
+    assert hedged.model == "deepseek"
+    assert secondary.calls == 1 and secondary.cancelled == 1
+    assert hedged.stats()["secondary_wins"] == 0
+
+
+@pytest.mark.asyncio
+async def test_primary_failure_before_hedge_fails_over():
+    primary = _SlowProvider("deepseek", 0.01, exc=AIProviderError("boom"))
+    secondary = _SlowProvider("groq", 0.01)
+    hedged = _hedged(primary, secondary, delay=5.0)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    assert await hedged.agenerate("ciao") == "groq: ciao"
+    assert loop.time() - started < 1.0  # did not wait for the hedge delay
+    assert hedged.model == "groq"
+    stats = hedged.stats()
+    assert stats["failovers"] == 1 and stats["hedged"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_each_see_their_own_model():
+    class _ByPrompt(_SlowProvider):
+        async def agenerate(self, prompt: str) -> str:
+            self.delay = 5.0 if prompt == "slow" else 0.01
+            return await super().agenerate(prompt)
+
+    hedged = _hedged(_ByPrompt("deepseek", 0), _SlowProvider("groq", 0.01), delay=0.05)
+
+    async def call(prompt: str) -> tuple[str, str]:
+        out = await hedged.agenerate(prompt)
+        await asyncio.sleep(0.1)  # let the other call finish in between
+        return out, hedged.model
+
+    fast, slow = await asyncio.gather(call("fast"), call("slow"))
+    assert fast == ("deepseek: fast", "deepseek")
+    assert slow == ("groq: slow", "groq")
+    assert hedged.model == "deepseek"  # this task made no call: primary's model
+    assert "model" not in vars(hedged)
@@ -0,0 +1,86 @@
+"""
+Unit tests for content-addressed image storage (local mode) and its GC sweep.
+
+Covers:
+  * save_image_by_hash writes identical bytes once and returns the same URL.
+  * a remembered object deleted by another worker is uploaded again, both
+    when the local file is missing and when the memo entry has expired.
+  * sweep_orphaned_images deletes unreferenced objects past the grace period
+    and keeps referenced or recently saved ones.
+"""
+
+import os
+import time
+
+import pytest
+
+from app.services import file_storage
+from app.services.storage import image_gc
+
+
+@pytest.fixture()
+def uploads(tmp_path, monkeypatch):
+    monkeypatch.setenv("UPLOADS_DIR", str(tmp_path))
+    monkeypatch.setattr(file_storage, "_known_objects", {})
+    return tmp_path
+
+
+def _stored_files(root) -> list[str]:
+    return [os.path.join(d, f) for d, _, files in os.walk(root) for f in files]
+
+
+def test_identical_bytes_are_stored_once(uploads):
+    first = file_storage.save_image_by_hash(b"\x89PNG mela", "image/png")
+    file_storage._known_objects.clear()  # force the on-disk existence check
+    second = file_storage.save_image_by_hash(b"\x89PNG mela", "image/png")
+    other = file_storage.save_image_by_hash(b"\x89PNG pera", "image/png")
+
+    assert first == second != other
+    assert first.startswith("/api/v1/static/images/sha256/")
+    assert len(_stored_files(uploads)) == 2
+
+
+def test_memo_hit_reuploads_swept_object(uploads):
+    url = file_storage.save_image_by_hash(b"\x89PNG mela", "image/png")
+    for path in _stored_files(uploads):
+        os.remove(path)  # another worker's GC swept it
+
+    assert file_storage.save_image_by_hash(b"\x89PNG mela", "image/png") == url
+    assert len(_stored_files(uploads)) == 1
+
+
+def test_expired_memo_entry_is_rechecked(uploads, monkeypatch):
+    calls = []
+    real_existing = file_storage._existing_url
+    monkeypatch.setattr(
+        file_storage, "_existing_url",
+        lambda name: calls.append(name) or real_existing(name),
+    )
+    file_storage.save_image_by_hash(b"\x89PNG mela", "image/png")
+    file_storage.save_image_by_hash(b"\x89PNG mela", "image/png")
+    assert len(calls) == 1  # fresh memo hit skips the check
+
+    monkeypatch.setattr(file_storage, "_KNOWN_OBJECTS_TTL", 0)
+    file_storage.save_image_by_hash(b"\x89PNG mela", "image/png")
+    assert len(calls) == 2
+
+
+def test_sweep_deletes_only_old_orphans(uploads, monkeypatch):
+    kept = file_storage.save_image_by_hash(b"referenced", "image/png")
+    orphan = file_storage.save_image_by_hash(b"orphan", "image/png")
+    file_storage._known_objects.clear()
+    old = time.time() - 3 * 86400
+    for path in _stored_files(uploads):
+        os.utime(path, (old, old))
+    recent = file_storage.save_image_by_hash(b"just generated", "image/png")
+
+    kept_digest = kept.rsplit("/", 1)[-1].split(".")[0]
+    monkeypatch.setattr(image_gc, "collect_referenced_digests", lambda db: {kept_digest})
+
+    stats = image_gc.sweep_orphaned_images(db=None, grace_seconds=86400)
+
+    assert stats["deleted"] == 1 and stats["kept_recent"] == 1
+    remaining = {p.replace(os.sep, "/") for p in _stored_files(uploads)}
+    assert any(p.endswith(kept.rsplit("/", 1)[-1]) for p in remaining)
+    assert any(p.endswith(recent.rsplit("/", 1)[-1]) for p in remaining)
+    assert not any(p.endswith(orphan.rsplit("/", 1)[-1]) for p in remaining)
@@ -0,0 +1,49 @@
+"""
+Unit tests for app/services/latest_exercise_answers.py
+
+Covers:
+  * a batch is reduced to the newest row per (classroom, student, block, field),
+    clears (value None) included.
+  * the upsert only overwrites a stored row with an equal-or-newer write.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.latest_exercise_answers import newest_per_field, upsert_statement
+
+
+def _row(student_id, field_key, value, created_at):
+    return {
+        "classroom_id": 1, "student_id": student_id, "unit_id": 5, "segment_id": None,
+        "exercise_key": f"ex/b1/{field_key}", "block_id": "b1", "field_key": field_key,
+        "value": value, "is_correct": None, "written_by_teacher": False,
+        "is_broadcast": False, "created_at": created_at,
+    }
+
+
+def test_newest_row_per_field_wins():
+    t0 = datetime(2026, 10, 19, tzinfo=timezone.utc)
+    later = t0 + timedelta(seconds=1)
+    reduced = newest_per_field([
+        _row(3, "gap-0", "and", t0),
+        _row(3, "gap-0", None, later),          # cleared afterwards
+        _row(3, "gap-1", "newer", later),
+        _row(3, "gap-1", "late batch", t0),     # older row arriving last
+        _row(4, "gap-0", "andiamo", t0),
+    ])
+    by_key = {(r["student_id"], r["field_key"]): r for r in reduced}
+    assert len(reduced) == 3
+    assert by_key[(3, "gap-0")]["value"] is None
+    assert by_key[(3, "gap-0")]["updated_at"] == later
+    assert by_key[(3, "gap-1")]["value"] == "newer"
+    assert "is_broadcast" not in by_key[(4, "gap-0")]
+
+
+def test_upsert_is_guarded_by_timestamp():
+    t0 = datetime(2026, 10, 19, tzinfo=timezone.utc)
+    stmt = upsert_statement(newest_per_field([_row(3, "gap-0", "x", t0)]))
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (classroom_id, student_id, block_id, field_key) DO UPDATE" in sql
+    assert "WHERE excluded.updated_at >= latest_exercise_answers.updated_at" in sql
@@ -0,0 +1,180 @@
+"""
+Unit tests for app/services/live_answer_writer.py and live_coalescer.py
+
+Covers:
+  * patches submitted within the flush window are written in one batch,
+    and a batch is cut at LIVE_ANSWER_BATCH_ROWS.
+  * flush() returns once queued rows are written; stop() writes the tail.
+  * a full queue makes the submitting coroutine wait (backpressure).
+  * a failed INSERT is counted, not retried, and does not stop the worker.
+  * a word typed into one field is persisted as a single row; flush()
+    writes staged rows immediately.
+  * leading-edge fan-out sends the first and the last value of a burst.
+  * a scoped flush writes and waits for one classroom / student only; other
+    rooms keep coalescing.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.live_answer_writer import BROADCAST, LiveAnswerWriter
+from app.services.live_coalescer import KeyedCoalescer
+
+
+def _row(i: int) -> dict:
+    return {"classroom_id": 1, "student_id": i, "exercise_key": "ex/b/f", "value": i}
+
+
+class _Sink:
+    def __init__(self, fail: bool = False, delay: float = 0.0) -> None:
+        self.batches: list[list[dict]] = []
+        self.fail = fail
+        self.delay = delay
+
+    def __call__(self, rows: list[dict]) -> None:
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("db down")
+        self.batches.append(list(rows))
+
+
+@pytest.mark.asyncio
+async def test_rows_are_batched_until_flush_window_or_size():
+    sink = _Sink()
+    writer = LiveAnswerWriter(flush_ms=50, batch_rows=5, insert=sink)
+    for i in range(3):
+        await writer.submit([_row(i)])
+    await writer.submit([_row(10 + i) for i in range(4)])    # broadcast fan-out
+    await writer.flush()
+
+    assert [len(b) for b in sink.batches] == [7]    # one patch is never split
+    assert all(r["created_at"] is not None for r in sink.batches[0])
+    stats = writer.stats()
+    assert stats["written_rows"] == 7 and stats["batches"] == 1 and stats["pending_rows"] == 0
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_writes_queued_rows():
+    sink = _Sink()
+    writer = LiveAnswerWriter(flush_ms=10_000, batch_rows=100, insert=sink)
+    await writer.submit([_row(1)])
+    await writer.submit([_row(2)])
+    await writer.stop()
+    assert [r["student_id"] for b in sink.batches for r in b] == [1, 2]
+    assert not writer.stats()["running"]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_applies_backpressure():
+    sink = _Sink(delay=0.05)
+    writer = LiveAnswerWriter(flush_ms=0, batch_rows=1, queue_max=1, insert=sink)
+    for i in range(4):
+        await asyncio.wait_for(writer.submit([_row(i)]), timeout=2)
+    await writer.stop()
+    assert writer.stats()["backpressure_waits"] >= 1
+    assert sum(len(b) for b in sink.batches) == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_counted_and_worker_survives():
+    sink = _Sink(fail=True)
+    writer = LiveAnswerWriter(flush_ms=0, batch_rows=10, insert=sink)
+    await writer.submit([_row(1)])
+    await writer.flush()
+    sink.fail = False
+    await writer.submit([_row(2)])
+    await writer.stop()
+    stats = writer.stats()
+    assert stats["failed_rows"] == 1 and stats["flush_errors"] == 1
+    assert stats["written_rows"] == 1
+
+
+@pytest.mark.asyncio
+async def test_keystrokes_in_one_field_persist_one_row():
+    sink = _Sink()
+    writer = LiveAnswerWriter(debounce_ms=30, flush_ms=0, insert=sink)
+    for prefix in ("a", "an", "and", "andi", "andia", "andiam", "andiamo"):
+        await writer.stage((1, 7, "ex/b/gap-0"), [{**_row(7), "value": prefix}])
+    await writer.stage((1, 8, "ex/b/gap-0"), [{**_row(8), "value": "x"}])
+    await asyncio.sleep(0.1)
+    await writer.flush()
+
+    written = {r["student_id"]: r["value"] for b in sink.batches for r in b}
+    assert written == {7: "andiamo", 8: "x"}
+    stats = writer.stats()
+    assert stats["raw_rows"] == 8 and stats["written_rows"] == 2
+    assert stats["raw_per_written_row"] == 4.0
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_staged_rows_before_the_window_closes():
+    sink = _Sink()
+    writer = LiveAnswerWriter(debounce_ms=10_000, flush_ms=0, insert=sink)
+    await writer.stage("k", [_row(1)])
+    await writer.flush()
+    assert [len(b) for b in sink.batches] == [1]
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_leading_fanout_sends_first_and_last_value():
+    sent: list = []
+
+    async def emit(key, value):
+        sent.append(value)
+
+    fanout = KeyedCoalescer(30, emit, leading=True)
+    for value in range(5):
+        await fanout.push("k", value)
+    assert sent == [0]
+    await asyncio.sleep(0.1)
+    assert sent == [0, 4]
+    assert fanout.stats()["coalesced"] == 3
+
+
+@pytest.mark.asyncio
+async def test_scoped_flush_leaves_other_rooms_coalescing():
+    sink = _Sink()
+    writer = LiveAnswerWriter(debounce_ms=10_000, flush_ms=0, insert=sink)
+    await writer.stage((1, 7, "ex/b/gap-0"), [_row(7)])
+    await writer.stage((1, 8, "ex/b/gap-0"), [_row(8)])
+    await writer.stage((1, BROADCAST, "ex/b/gap-1"), [_row(7), _row(8)])
+    await writer.stage((2, 7, "ex/b/gap-0"), [{**_row(7), "classroom_id": 2}])
+
+    await writer.flush(1, 7)
+    written = [(r["classroom_id"], r["student_id"]) for b in sink.batches for r in b]
+    assert sorted(written) == [(1, 7), (1, 7), (1, 8)]     # own field + the broadcast
+    assert writer.stats()["debounce"]["pending"] == 2
+
+    await writer.flush(1)
+    assert writer.stats()["debounce"]["pending"] == 1       # room 2 still coalescing
+    await writer.stop()
+    assert sum(len(b) for b in sink.batches) == 5
+
+
+@pytest.mark.asyncio
+async def test_scoped_flush_does_not_wait_for_other_rooms():
+    release = threading.Event()
+
+    def insert(rows):
+        if rows[0]["classroom_id"] == 2:
+            release.wait(2)
+
+    writer = LiveAnswerWriter(debounce_ms=0, flush_ms=0, batch_rows=1, insert=insert)
+    await writer.submit([_row(1)])
+    await writer.flush(1)
+    await writer.submit([{**_row(1), "classroom_id": 2}])   # slow batch of another room
+
+    await asyncio.wait_for(writer.flush(1), 0.5)
+    everything = asyncio.create_task(writer.flush())
+    await asyncio.sleep(0.05)
+    assert not everything.done()
+    release.set()
+    await asyncio.wait_for(everything, 2)
+    await writer.stop()
@@ -0,0 +1,139 @@
+"""
+Unit tests for app/services/live_backplane.py
+
+Covers:
+  * a patch published by one worker reaches the other, never its publisher.
+  * a worker opening a room later gets the shared snapshot and presence.
+  * last-writer-wins: an older stamp neither overwrites the shared hash nor
+    a newer local value; seeded values only fill gaps.
+  * the in-memory backplane shares nothing.
+"""
+
+import asyncio
+import json
+from collections import defaultdict
+
+import pytest
+
+from app.services.live_backplane import InMemoryBackplane, RedisBackplane
+
+
+class _FakeRedis:
+    """Minimal stand-in for the redis.asyncio calls RedisBackplane makes."""
+
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[str, str]] = defaultdict(dict)
+        self.subscribers: dict[str, list["_FakePubSub"]] = defaultdict(list)
+
+    def register_script(self, lua: str):
+        return self._lww_publish
+
+    async def _lww_publish(self, keys, args):
+        hash_key, channel = keys
+        field, ts, worker, stored, message, _ttl = args
+        current = self.hashes[hash_key].get(field)
+        if current is not None:
+            cur = json.loads(current)
+            if (cur["ts"], cur["w"]) >= (int(ts), worker):
+                return 0
+        self.hashes[hash_key][field] = stored
+        for sub in self.subscribers[channel]:
+            sub.messages.put_nowait({"type": "message", "channel": channel, "data": message.encode()})
+        return 1
+
+    async def hgetall(self, key):
+        return {k.encode(): v.encode() for k, v in self.hashes[key].items()}
+
+    def pubsub(self):
+        return _FakePubSub(self)
+
+
+class _FakePubSub:
+    def __init__(self, client: _FakeRedis) -> None:
+        self.client = client
+        self.messages: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.client.subscribers[channel].append(self)
+
+    async def unsubscribe(self, channel):
+        self.client.subscribers[channel].remove(self)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        try:
+            return await asyncio.wait_for(self.messages.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def _worker(client: _FakeRedis, name: str) -> tuple[RedisBackplane, list]:
+    received: list = []
+
+    async def on_remote(room_id, event):
+        received.append((room_id, event))
+
+    backplane = RedisBackplane(client=client, worker_id=name)
+    backplane.set_handler(on_remote)
+    return backplane, received
+
+
+async def _settle() -> None:
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_patch_and_presence_cross_workers():
+    client = _FakeRedis()
+    a, got_a = _worker(client, "a")
+    b, got_b = _worker(client, "b")
+    await a.open_room(7)
+    await b.open_room(7)
+
+    a.publish_patch(7, "s/3/ex/b1/gap-0", "andiamo")
+    b.publish_presence(7, [{"user_id": 1, "role": "teacher"}])
+    await _settle()
+
+    assert got_b == [(7, {"op": "patch", "key": "s/3/ex/b1/gap-0", "value": "andiamo",
+                          "target": None, "meta": None})]
+    assert got_a == [(7, {"op": "presence", "worker": "b", "users": [{"user_id": 1, "role": "teacher"}]})]
+
+    late, _ = _worker(client, "c")
+    snapshot = await late.open_room(7)
+    assert snapshot["patches"] == {"s/3/ex/b1/gap-0": "andiamo"}
+    assert snapshot["presence"] == {"b": [{"user_id": 1, "role": "teacher"}]}
+    for backplane in (a, b, late):
+        await backplane.stop()
+
+
+@pytest.mark.asyncio
+async def test_last_writer_wins_and_seed_fills_gaps():
+    client = _FakeRedis()
+    a, _ = _worker(client, "a")
+    b, got_b = _worker(client, "b")
+    await a.open_room(1)
+    await b.open_room(1)
+
+    b.publish_patch(1, "ex/b1/gap-0", "new")
+    await _settle()
+    # A message stamped before b's write arrives late: b keeps its value.
+    assert not b.accept(1, "ex/b1/gap-0", (1, "a"))
+    a.publish_patch(1, "ex/b1/gap-0", "db value", seed=True)
+    a.publish_patch(1, "ex/b1/gap-1", "db value", seed=True)
+    await _settle()
+
+    stored = {k: json.loads(v)["v"] for k, v in client.hashes["live:room:1:patches"].items()}
+    assert stored == {"ex/b1/gap-0": "new", "ex/b1/gap-1": "db value"}
+    assert [e["key"] for _, e in got_b] == ["ex/b1/gap-1"]
+    assert a.stats()["stale_writes"] == 1
+    for backplane in (a, b):
+        await backplane.stop()
+
+
+@pytest.mark.asyncio
+async def test_in_memory_backplane_shares_nothing():
+    backplane = InMemoryBackplane()
+    assert await backplane.open_room(1) == {"patches": {}, "presence": {}}
+    backplane.publish_patch(1, "ex/b/f", 1)
+    await backplane.close_room(1)
+    assert backplane.stats()["rooms"] == 0
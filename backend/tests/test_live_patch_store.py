@@ -0,0 +1,83 @@
+"""
+Unit tests for app/services/live_patch_store.py
+
+Covers:
+  * the student view matches the old flat-dict personalisation rules.
+  * cached JSON snapshots equal json.dumps of the views and are reused until
+    the relevant map changes.
+  * deltas hold exactly the keys written after a version, in the same view
+    as the snapshot; MessagePack snapshots decode to the views.
+"""
+
+import json
+
+import msgpack
+
+from app.services.live_patch_store import RoomPatches
+
+
+def _room() -> RoomPatches:
+    patches = RoomPatches()
+    patches.update({
+        "ex/b1/gap-0":     "teacher fill",
+        "_presence/users": [{"user_id": 1}],
+        "s/3/ex/b1/gap-1": "mine",
+        "s/4/ex/b1/gap-1": "theirs",
+        "s/x/odd":         "teacher only",
+    })
+    return patches
+
+
+def test_student_view_and_lookups():
+    patches = _room()
+    assert patches.student_view(3) == {
+        "ex/b1/gap-0": "teacher fill",
+        "_presence/users": [{"user_id": 1}],
+        "ex/b1/gap-1": "mine",
+    }
+    assert patches.student_view(9) == patches.shared
+    assert patches.has_student(3) and not patches.has_student(9)
+    assert "s/4/ex/b1/gap-1" in patches and "s/5/ex/b1/gap-1" not in patches
+    assert patches["s/x/odd"] == "teacher only"
+    assert len(patches) == 5
+    assert set(patches.as_dict()) == set(_room().as_dict())
+
+
+def test_cached_json_matches_views():
+    patches = _room()
+    assert json.loads(patches.student_json(3)) == patches.student_view(3)
+    assert json.loads(patches.full_json()) == patches.as_dict()
+
+    shared = patches.shared_json()
+    patches["s/3/ex/b1/gap-2"] = "typing"          # student key: shared cache kept
+    assert patches.shared_json() is shared
+    assert json.loads(patches.student_json(3))["ex/b1/gap-2"] == "typing"
+
+    patches["ex/b1/gap-1"] = "broadcast"           # collides with an own key
+    assert patches.shared_json() is not shared
+    assert json.loads(patches.student_json(3))["ex/b1/gap-1"] == "mine"
+    assert json.loads(patches.student_json(4))["ex/b1/gap-1"] == "theirs"
+
+
+def test_delta_and_msgpack_views():
+    patches = _room()
+    seen = patches.version
+    patches["s/3/ex/b1/gap-1"] = "edited"
+    patches["s/4/ex/b1/gap-1"] = "other"
+    patches["ex/b2/gap-0"] = "fill"
+    patches["ex/b1/gap-1"] = "shadowed"             # hidden by student 3's own key
+    patches.touch("s/x/odd")
+
+    assert patches.changed_since(seen) == [
+        "s/3/ex/b1/gap-1", "s/4/ex/b1/gap-1", "ex/b2/gap-0", "ex/b1/gap-1", "s/x/odd",
+    ]
+    assert patches.delta(seen, 3) == {"ex/b1/gap-1": "edited", "ex/b2/gap-0": "fill"}
+    assert patches.delta(seen, 9) == {"ex/b2/gap-0": "fill", "ex/b1/gap-1": "shadowed"}
+    assert set(patches.delta(seen)) == set(patches.changed_since(seen))
+    assert patches.delta(patches.version) == {}
+    assert patches.delta(patches.version + 1) is None
+
+    assert msgpack.unpackb(patches.full_msgpack()) == patches.as_dict()
+    assert msgpack.unpackb(patches.student_msgpack(3)) == patches.student_view(3)
+    assert msgpack.unpackb(patches.student_msgpack(4)) == patches.student_view(4)
+    assert msgpack.unpackb(patches.student_msgpack(9)) == patches.student_view(9)
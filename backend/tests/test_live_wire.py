@@ -0,0 +1,39 @@
+"""
+Unit tests for app/services/live_wire.py
+
+Covers:
+  * the subprotocol is accepted only when the client offers it.
+  * snapshot / delta frames wrap pre-packed patches into a decodable map.
+  * presence diffs report new or changed users and the ids that left.
+"""
+
+from types import SimpleNamespace
+
+import msgpack
+
+from app.services import live_wire
+
+
+def test_negotiate_only_when_offered():
+    offered = SimpleNamespace(scope={"subprotocols": ["chat", live_wire.SUBPROTOCOL]})
+    plain = SimpleNamespace(scope={"subprotocols": []})
+    assert live_wire.negotiate(offered) == live_wire.SUBPROTOCOL
+    assert live_wire.negotiate(plain) is None
+
+
+def test_snapshot_and_delta_frames():
+    body = msgpack.packb({"ex/b1/gap-0": "andiamo"})
+    assert live_wire.unpack(live_wire.snapshot_frame(body, epoch="e1", version=7)) == {
+        "type": "snapshot", "epoch": "e1", "v": 7, "patches": {"ex/b1/gap-0": "andiamo"},
+    }
+    delta = live_wire.unpack(live_wire.snapshot_frame(body, epoch="e1", version=9, since=7))
+    assert delta["type"] == "delta" and delta["since"] == 7 and delta["v"] == 9
+
+
+def test_presence_diff():
+    teacher = {"user_id": 1, "role": "teacher"}
+    anna, marco = {"user_id": 2, "role": "student"}, {"user_id": 3, "role": "student"}
+    renamed = {**anna, "user_name": "Anna"}
+    assert live_wire.presence_diff([teacher, anna], [teacher, renamed, marco]) == ([renamed, marco], [])
+    assert live_wire.presence_diff([teacher, anna], [teacher]) == ([], [2])
+    assert live_wire.presence_diff([teacher], [teacher]) == ([], [])
@@ -0,0 +1,88 @@
+"""
+Unit tests for app/services/ai/providers/recording.py and the committed
+LLM fixtures in fixtures/llm.
+
+Covers:
+  * a recorded call replays verbatim; repeated prompts come back in
+    recording order and reset() makes them available again.
+  * a prompt with no recording raises and is counted instead of being served
+    some other record.
+  * scripts/benchmark_generation.py replays every committed fixture offline
+    with no prompt misses.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.services.ai.providers.base import AIProvider, AIProviderError
+from app.services.ai.providers.recording import RecordingProvider, ReplayProvider
+
+_BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class _EchoProvider(AIProvider):
+    model = "echo"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        return f"{prompt} #{self.calls}"
+
+    async def agenerate(self, prompt: str) -> str:
+        return self.generate(prompt)
+
+
+@pytest.fixture
+def fixture_path(tmp_path):
+    path = tmp_path / "echo.json"
+    recorder = RecordingProvider(_EchoProvider(), path)
+    recorder.generate("ciao")
+    asyncio.run(recorder.agenerate("ciao"))
+    recorder.generate("grazie")
+    return path
+
+
+def test_replay_serves_recordings_in_order(fixture_path):
+    replay = ReplayProvider(fixture_path)
+    assert replay.generate("grazie") == "grazie #3"
+    assert replay.generate("ciao") == "ciao #1"
+    assert asyncio.run(replay.agenerate("ciao")) == "ciao #2"
+
+    replay.reset()
+    assert replay.generate("ciao") == "ciao #1"
+    assert replay.misses == 0
+
+
+def test_replay_miss_fails_loudly(fixture_path):
+    replay = ReplayProvider(fixture_path)
+    with pytest.raises(AIProviderError, match="no recording"):
+        replay.generate("buongiorno")
+    replay.generate("grazie")
+    with pytest.raises(AIProviderError):
+        replay.generate("grazie")  # recorded once, asked twice
+    assert replay.misses == 2
+
+
+def test_committed_fixtures_replay_offline(tmp_path):
+    report_path = tmp_path / "bench.json"
+    env = {**os.environ, "DEEPSEEK_API_KEY": "offline-replay"}
+    result = subprocess.run(
+        [sys.executable, "scripts/benchmark_generation.py", "--repeat", "1",
+         "--json-out", str(report_path)],
+        cwd=_BACKEND_DIR, env=env, capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-2000:]
+
+    report = json.loads(report_path.read_text())
+    assert set(report) == {"unit", "course", "slides", "exercise"}
+    for pipeline, entry in report.items():
+        records = json.loads((_BACKEND_DIR / "fixtures" / "llm" / f"{pipeline}.json").read_text())
+        assert entry["llm_calls"] == len(records["records"]), pipeline
@@ -0,0 +1,175 @@
+"""
+Unit tests for app/services/ai/providers/telemetry.py
+
+Covers:
+  * llm_context nesting only overrides the keys it passes.
+  * TelemetryProvider records phase / teacher / plan, reported vs estimated
+    token counts, and failed calls.
+  * usage reported from a worker thread (agenerate → to_thread) is picked up.
+  * collector percentiles and requeue after a failed flush.
+  * GET /admin/ai/telemetry scopes teachers to their own calls; only admins
+    see other teachers, the global aggregate and the live counters.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.ai.providers.base import AIProvider, AIProviderError
+from app.services.ai.providers import telemetry as tm
+
+
+class _UsageProvider(AIProvider):
+    model = "fake-model"
+
+    def __init__(self, usage: dict | None = None, exc: Exception | None = None) -> None:
+        self.usage = usage
+        self.exc = exc
+
+    def generate(self, prompt: str) -> str:
+        if self.exc:
+            raise self.exc
+        tm.report_usage(self.usage)
+        return "x" * 40
+
+    async def agenerate(self, prompt: str) -> str:
+        return await asyncio.to_thread(self.generate, prompt)
+
+
+def _wrap(inner: AIProvider, **kw) -> tuple[tm.TelemetryProvider, tm.TelemetryCollector]:
+    collector = tm.TelemetryCollector(max_buffer=100, window=100)
+    return tm.TelemetryProvider(inner, "deepseek", collector=collector, **kw), collector
+
+
+class TestContext:
+    def test_nested_context_keeps_outer_keys(self):
+        with tm.llm_context(teacher_id=7, plan="pro"):
+            with tm.llm_context(phase="unit.plan"):
+                assert tm.current_llm_context() == {"teacher_id": 7, "plan": "pro", "phase": "unit.plan"}
+            assert tm.current_llm_context() == {"teacher_id": 7, "plan": "pro"}
+        assert tm.current_llm_context() == {}
+
+
+class TestTelemetryProvider:
+    def test_records_context_and_reported_usage(self):
+        provider, collector = _wrap(_UsageProvider({"prompt_tokens": 1000, "completion_tokens": 500}))
+        with tm.llm_context(phase="unit.vocabulary", teacher_id=3, plan="free"):
+            provider.generate("prompt")
+        (row,) = collector.drain()
+        assert row["phase"] == "unit.vocabulary"
+        assert row["teacher_id"] == 3 and row["plan"] == "free"
+        assert row["model"] == "fake-model"
+        assert (row["prompt_tokens"], row["completion_tokens"]) == (1000, 500)
+        assert row["tokens_estimated"] is False
+        assert row["cost_usd"] == pytest.approx(tm.estimate_cost("deepseek", 1000, 500))
+
+    @pytest.mark.asyncio
+    async def test_usage_reported_from_worker_thread(self):
+        provider, collector = _wrap(_UsageProvider({"prompt_tokens": 12, "completion_tokens": 34}))
+        await provider.agenerate("prompt")
+        (row,) = collector.drain()
+        assert (row["prompt_tokens"], row["completion_tokens"]) == (12, 34)
+        assert row["phase"] == tm.UNKNOWN_PHASE
+
+    def test_estimates_tokens_and_uses_default_phase(self):
+        provider, collector = _wrap(_UsageProvider(None), phase="slides")
+        provider.generate("p" * 400)
+        (row,) = collector.drain()
+        assert row["phase"] == "slides"
+        assert row["tokens_estimated"] is True
+        assert (row["prompt_tokens"], row["completion_tokens"]) == (100, 10)
+
+    def test_failed_call_is_recorded_and_reraised(self):
+        provider, collector = _wrap(_UsageProvider(exc=AIProviderError("DeepSeek timed out")))
+        with pytest.raises(AIProviderError):
+            provider.generate("prompt")
+        (row,) = collector.drain()
+        assert row["ok"] is False
+        assert "timed out" in row["error"]
+        assert row["completion_tokens"] == 0
+
+
+class TestCollector:
+    def test_percentiles_and_requeue(self):
+        collector = tm.TelemetryCollector(max_buffer=3, window=100)
+        for ms in (100, 200, 300, 400, 500):
+            collector.record({
+                "phase": "unit.plan", "latency_ms": ms, "ok": True,
+                "prompt_tokens": 1, "completion_tokens": 1, "cost_usd": 0.0,
+            })
+        stats = collector.snapshot()
+        assert stats["phases"]["unit.plan"]["p50_ms"] == 300
+        assert stats["phases"]["unit.plan"]["p95_ms"] == 480
+        assert stats["pending"] == 3 and stats["dropped"] == 2
+
+        rows = collector.drain()
+        collector.requeue(rows)
+        assert collector.snapshot()["pending"] == 3
+        assert collector.snapshot()["flush_errors"] == 1
+
+
+class _Query:
+    """Chainable stand-in for db.query(...); records filter expressions."""
+
+    def __init__(self):
+        self.filters: list[str] = []
+
+    def filter(self, *criteria):
+        self.filters.extend(str(c) for c in criteria)
+        return self
+
+    def group_by(self, *args):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def all(self):
+        return []
+
+
+class _Db:
+    def __init__(self):
+        self.last = _Query()
+
+    def query(self, *columns):
+        return self.last
+
+
+class TestTelemetryEndpoint:
+    async def _call(self, monkeypatch, role, user_id=7, teacher_id=None):
+        from app.api.v1.endpoints.ai_health import ai_telemetry
+
+        monkeypatch.setattr(tm, "flush_telemetry", lambda: 0)
+        db = _Db()
+        user = SimpleNamespace(id=user_id, role=role)
+        body = await ai_telemetry(hours=24, teacher_id=teacher_id, db=db, current_user=user)
+        return body, db.last.filters
+
+    @pytest.mark.asyncio
+    async def test_teacher_is_scoped_to_self(self, monkeypatch):
+        body, filters = await self._call(monkeypatch, "teacher")
+        assert body["teacher_id"] == 7 and body["live"] is None
+        assert any("teacher_id" in f for f in filters)
+
+        with pytest.raises(HTTPException) as exc:
+            await self._call(monkeypatch, "teacher", teacher_id=8)
+        assert exc.value.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_student_is_rejected(self, monkeypatch):
+        with pytest.raises(HTTPException) as exc:
+            await self._call(monkeypatch, "student")
+        assert exc.value.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_admin_sees_everyone_or_any_teacher(self, monkeypatch):
+        body, filters = await self._call(monkeypatch, "admin")
+        assert body["teacher_id"] is None and body["live"] is not None
+        assert not any("teacher_id" in f for f in filters)
+
+        body, filters = await self._call(monkeypatch, "admin", teacher_id=8)
+        assert body["teacher_id"] == 8
+        assert any("teacher_id" in f for f in filters)
@@ -0,0 +1,125 @@
+"""
+Unit tests for app/services/ai/providers/rate_limiter.py
+
+Covers:
+  * plan/workload → priority mapping (paid course ahead of free exercise).
+  * token-bucket admission on both the RPM and TPM dimension.
+  * priority ordering of queued callers.
+  * queue-wait budget → rate-limit AIProviderError.
+  * upstream 429 → cool-down pause.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.ai.providers.base import AIProvider, AIProviderError
+from app.services.ai.providers import rate_limiter as rl
+
+
+class _EchoProvider(AIProvider):
+    def __init__(self, fail_with: str | None = None) -> None:
+        self.model = "echo"
+        self.calls: list[str] = []
+        self._fail_with = fail_with
+
+    def generate(self, prompt: str) -> str:
+        self.calls.append(prompt)
+        if self._fail_with:
+            raise AIProviderError(self._fail_with)
+        return prompt.upper()
+
+
+class TestPriorities:
+    def test_paid_course_before_free_exercise(self):
+        assert rl.priority_for_plan("pro", "course") < rl.priority_for_plan("free", "exercise")
+
+    def test_plan_tier_dominates_workload(self):
+        assert rl.priority_for_plan("standard", "exercise") < rl.priority_for_plan("free", "course")
+
+    def test_unknown_values_default_to_lowest(self):
+        assert rl.priority_for_plan(None, "???") == rl.DEFAULT_PRIORITY
+
+    def test_admission_priority_context(self):
+        assert rl.current_admission_priority() == rl.DEFAULT_PRIORITY
+        with rl.admission_priority(0):
+            assert rl.current_admission_priority() == 0
+        assert rl.current_admission_priority() == rl.DEFAULT_PRIORITY
+
+
+class TestTokenBucket:
+    def test_take_and_refill(self):
+        bucket = rl.TokenBucket(capacity=2, per_minute=60)   # 1 token / s
+        now = 1000.0
+        bucket._updated = now
+        assert bucket.seconds_until(2, now) == 0
+        bucket.take(2, now)
+        assert bucket.seconds_until(1, now) == pytest.approx(1.0)
+        assert bucket.seconds_until(1, now + 1.0) == 0
+
+    def test_oversized_request_does_not_deadlock(self):
+        bucket = rl.TokenBucket(capacity=10, per_minute=600)
+        assert bucket.seconds_until(1_000, bucket._updated) == 0
+
+
+class TestBackendRateLimiter:
+    @pytest.mark.asyncio
+    async def test_rpm_dimension_blocks_until_refill(self):
+        limiter = rl.BackendRateLimiter("test", rpm=1, tpm=0, max_wait=0.5)
+        await limiter.acquire(10)
+        with pytest.raises(AIProviderError, match="rate limit"):
+            await limiter.acquire(10)
+        assert limiter.snapshot()["rejected"] == 1
+        assert limiter.snapshot()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_higher_priority_admitted_first(self):
+        # 1200 rpm → one request every 50 ms, bucket holds one.
+        limiter = rl.BackendRateLimiter("test", rpm=1200, tpm=0, max_wait=5)
+        limiter._requests = rl.TokenBucket(capacity=1, per_minute=1200)
+        await limiter.acquire(1)           # drain the bucket
+
+        order: list[str] = []
+
+        async def caller(name: str, priority: int) -> None:
+            await limiter.acquire(1, priority)
+            order.append(name)
+
+        low = asyncio.create_task(caller("free-exercise", rl.priority_for_plan("free", "exercise")))
+        await asyncio.sleep(0)
+        high = asyncio.create_task(caller("pro-course", rl.priority_for_plan("pro", "course")))
+        await asyncio.gather(low, high)
+        assert order == ["pro-course", "free-exercise"]
+
+    def test_reconcile_charges_tokens(self):
+        limiter = rl.BackendRateLimiter("test", rpm=0, tpm=1000)
+        limiter.acquire_blocking(100)
+        limiter.reconcile(estimated=100, actual=400)
+        assert limiter.snapshot()["tokens_available"] == pytest.approx(600, abs=5)
+
+
+class TestRateLimitedProvider:
+    @pytest.mark.asyncio
+    async def test_wraps_and_forwards_attributes(self):
+        inner = _EchoProvider()
+        provider = rl.RateLimitedProvider(inner, rl.BackendRateLimiter("test", rpm=10, tpm=0))
+        assert await provider.agenerate("ciao") == "CIAO"
+        assert provider.generate("ok") == "OK"
+        assert provider.model == "echo"
+        assert inner.calls == ["ciao", "ok"]
+
+    @pytest.mark.asyncio
+    async def test_upstream_429_pauses_backend(self):
+        limiter = rl.BackendRateLimiter("test", rpm=10, tpm=0)
+        provider = rl.RateLimitedProvider(_EchoProvider(fail_with="HTTP 429 too many requests"), limiter)
+        with pytest.raises(AIProviderError):
+            await provider.agenerate("x")
+        snap = limiter.snapshot()
+        assert snap["upstream_429s"] == 1
+        assert snap["paused_for_s"] > 0
+
+    @pytest.mark.asyncio
+    async def test_stream_falls_back_to_single_chunk(self):
+        provider = rl.RateLimitedProvider(_EchoProvider(), rl.BackendRateLimiter("test", rpm=10, tpm=0))
+        chunks = [c async for c in provider.agenerate_stream("abc")]
+        assert chunks == ["ABC"]
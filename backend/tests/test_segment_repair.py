@@ -0,0 +1,92 @@
+"""
+Unit tests for segment-level repair in app/services/unit_generator.py
+
+Covers:
+  * one unusable segment reply costs one small repair prompt, carrying its
+    neighbours as context; the other segments are generated once.
+  * a segment whose repair also fails keeps the old raw-reply fallback.
+"""
+
+import json
+import os
+
+import pytest
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
+
+from app.services.ai.providers.base import AIProvider  # noqa: E402
+from app.services.unit_generator import (  # noqa: E402
+    SegmentPlan,
+    UnitGenerateRequest,
+    UnitGeneratorService,
+)
+
+
+class _ScriptedProvider(AIProvider):
+    model = "stub"
+
+    def __init__(self, replies: dict[str, list[str]]) -> None:
+        # segment title -> replies in call order
+        self.replies = replies
+        self.prompts: list[str] = []
+
+    def generate(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        for title, queue in self.replies.items():
+            if f": {title}" in prompt and queue:
+                return queue.pop(0)
+        raise AssertionError("unexpected prompt")
+
+    async def agenerate(self, prompt: str) -> str:
+        return self.generate(prompt)
+
+
+def _segment_reply(title: str) -> str:
+    return json.dumps({
+        "title": title,
+        "description": f"Learn {title}",
+        "text_title": "Rules",
+        "text_content": f"## {title}\n\nExplanation and examples.",
+    })
+
+
+_TITLES = ["Essere", "Avere", "Andare", "Fare"]
+
+
+def _request() -> UnitGenerateRequest:
+    return UnitGenerateRequest(
+        unit_id=1, topic="Verbi", level="A1", language="Italian", num_segments=4,
+    )
+
+
+def _plans() -> list[SegmentPlan]:
+    return [SegmentPlan(title=t, focus=f"focus on {t}", excerpt="") for t in _TITLES]
+
+
+@pytest.mark.asyncio
+async def test_only_the_broken_segment_is_repaired():
+    replies = {t: [_segment_reply(t)] for t in _TITLES}
+    replies["Andare"] = ["Sorry, I can't help with that.", _segment_reply("Andare")]
+    provider = _ScriptedProvider(replies)
+    service = UnitGeneratorService(provider)
+    plans = _plans()
+    ready = {}
+    for idx in range(len(_TITLES)):
+        ready[idx] = await service._generate_segment_with_repair(idx, _TITLES, _request(), plans, ready)
+
+    assert len(provider.prompts) == len(_TITLES) + 1
+    repair_prompt = provider.prompts[3]
+    assert "was rejected" in repair_prompt
+    assert "previous: Avere — Learn Avere" in repair_prompt
+    assert "next    : Fare — focus on Fare" in repair_prompt
+    assert ready[2].texts[0].content.startswith("## Andare")
+
+
+@pytest.mark.asyncio
+async def test_failed_repair_falls_back_to_raw_reply():
+    provider = _ScriptedProvider({"Essere": ["not json at all", "still not json"]})
+    service = UnitGeneratorService(provider)
+    seg = await service._generate_segment_with_repair(0, ["Essere"], _request(), [], {})
+    assert len(provider.prompts) == 2
+    assert seg.texts[0].content == "still not json"
+
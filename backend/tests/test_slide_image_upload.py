@@ -0,0 +1,71 @@
+"""
+Unit tests for slide-image uploads in app/services/slide_image_service.py
+
+Covers:
+  * enrich_deck stores generated images and puts URLs (not data URIs) on slides.
+  * placeholders and failed uploads keep their data URI.
+"""
+
+import base64
+
+import pytest
+
+from app.schemas.slides import Slide, SlideDeck
+from app.services import file_storage
+from app.services.ai.image_providers.image_base import (
+    ImageFormat,
+    ImageProvider,
+    ImageProviderError,
+    ImageResult,
+)
+from app.services.slide_image_service import SlideImageService, store_slide_image
+
+
+class _PngProvider(ImageProvider):
+    def generate_image(self, prompt, alt_text="", style="", width=800, height=600):
+        if "Errore" in prompt:
+            raise ImageProviderError("boom")
+        return ImageResult(
+            data        = base64.b64encode(b"\x89PNG " + prompt.encode()).decode(),
+            format      = ImageFormat.PNG,
+            alt_text    = alt_text,
+            source      = "test",
+            prompt_used = prompt,
+        )
+
+
+def _deck(*titles: str) -> SlideDeck:
+    return SlideDeck(
+        topic            = "Passato prossimo",
+        level            = "A2",
+        duration_minutes = 10,
+        slides           = [Slide(title=t, bullet_points=["punto"]) for t in titles],
+    )
+
+
+@pytest.fixture()
+def uploads(tmp_path, monkeypatch):
+    monkeypatch.setenv("UPLOADS_DIR", str(tmp_path))
+    monkeypatch.setattr(file_storage, "_known_objects", {})
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_enrich_deck_stores_urls(uploads):
+    service = SlideImageService(_PngProvider(), upload_images=True)
+    deck = await service.enrich_deck(_deck("Essere", "Avere", "Errore"))
+
+    essere, avere, errore = (s.image for s in deck.slides)
+    assert essere.startswith("/api/v1/static/images/sha256/") and essere.endswith(".png")
+    assert avere.startswith("/api/v1/static/") and avere != essere
+    assert errore.startswith("data:image/svg+xml")  # placeholder stays inline
+
+
+@pytest.mark.asyncio
+async def test_upload_failure_keeps_data_uri(monkeypatch):
+    def _fail(*_args, **_kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(file_storage, "save_image_by_hash", _fail)
+    result = _PngProvider().generate_image("Essere")
+    assert await store_slide_image(result, upload=True) == result.as_data_uri()
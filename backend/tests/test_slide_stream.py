@@ -0,0 +1,147 @@
+"""
+Unit tests for streamed slide generation.
+
+Covers:
+  * SlideGeneratorService.agenerate_slides_stream emits each slide while the
+    response is still streaming, in order, then the validated deck.
+  * an unusable attempt emits "retry" and the next attempt's slides follow;
+    a provider without agenerate_stream delivers the slides in one go.
+  * POST /generate-slides-stream sends slide → … → deck → finished events,
+    and an "error" event when the provider fails.
+"""
+
+import asyncio
+import json
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
+
+from app.api.v1.endpoints import slide_generation  # noqa: E402
+from app.schemas.slides import SlideGenerationRequest  # noqa: E402
+from app.services.ai.providers.base import AIProvider, AIProviderError  # noqa: E402
+from app.services.slide_generator import SlideGeneratorService  # noqa: E402
+
+_DECK = json.dumps({
+    "topic": "Il passato prossimo", "level": "A2", "duration_minutes": 20,
+    "slides": [
+        {"title": "Introduzione", "bullet_points": ["avere o essere"]},
+        {"title": "Accordo", "bullet_points": ["andato / andata"], "examples": ["Maria è partita."]},
+        {"title": "Riepilogo", "bullet_points": ["ripasso"]},
+    ],
+})
+_REQUEST = SlideGenerationRequest(topic="Il passato prossimo", level="A2", duration_minutes=20)
+
+
+class _StreamingProvider(AIProvider):
+    """Streams each scripted response in 7-character chunks, logging what was sent."""
+
+    model = "fake-stream"
+
+    def __init__(self, *responses: str, exc: Exception | None = None) -> None:
+        self.responses = list(responses)
+        self.exc = exc
+        self.sent: list[str] = []
+
+    def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    async def agenerate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    async def agenerate_stream(self, prompt: str):
+        if self.exc is not None:
+            raise self.exc
+        text = self.responses.pop(0)
+        for i in range(0, len(text), 7):
+            self.sent.append(text[i : i + 7])
+            await asyncio.sleep(0)
+            yield text[i : i + 7]
+
+
+class _OneShotProvider(AIProvider):
+    model = "fake"
+
+    def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    async def agenerate(self, prompt: str) -> str:
+        return _DECK
+
+
+async def _collect(service: SlideGeneratorService) -> list[tuple[str, object]]:
+    return [event async for event in service.agenerate_slides_stream(_REQUEST)]
+
+
+@pytest.mark.asyncio
+async def test_slides_are_emitted_while_streaming():
+    provider = _StreamingProvider(_DECK)
+    service = SlideGeneratorService(ai_provider=provider)
+
+    chunks_at_slide = []
+    events = []
+    async for kind, payload in service.agenerate_slides_stream(_REQUEST):
+        events.append((kind, payload))
+        if kind == "slide":
+            chunks_at_slide.append(len(provider.sent))
+
+    assert [kind for kind, _ in events] == ["slide", "slide", "slide", "deck"]
+    assert [p.title for k, p in events if k == "slide"] == ["Introduzione", "Accordo", "Riepilogo"]
+    assert [p.id for k, p in events if k == "slide"] == [1, 2, 3]
+    assert chunks_at_slide[0] < len(provider.sent)  # first slide before the stream ended
+    deck = events[-1][1]
+    assert [s.title for s in deck.slides] == ["Introduzione", "Accordo", "Riepilogo"]
+
+
+@pytest.mark.asyncio
+async def test_unusable_attempt_retries():
+    service = SlideGeneratorService(ai_provider=_StreamingProvider("Sorry, no JSON today.", _DECK))
+    events = await _collect(service)
+    assert [kind for kind, _ in events] == ["retry", "slide", "slide", "slide", "deck"]
+    assert events[0][1] == 1
+
+
+@pytest.mark.asyncio
+async def test_provider_without_stream_emits_all_slides():
+    events = await _collect(SlideGeneratorService(ai_provider=_OneShotProvider()))
+    assert [kind for kind, _ in events] == ["slide", "slide", "slide", "deck"]
+
+
+def _sse_events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def _client(provider: AIProvider) -> TestClient:
+    app = FastAPI()
+    app.include_router(slide_generation.router)
+    app.dependency_overrides[slide_generation.get_slide_service] = (
+        lambda: SlideGeneratorService(ai_provider=provider, max_retries=1)
+    )
+    return TestClient(app)
+
+
+def test_endpoint_streams_sse_events():
+    response = _client(_StreamingProvider(_DECK)).post(
+        "/generate-slides-stream", json=_REQUEST.model_dump(mode="json"),
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = _sse_events(response.text)
+    assert [name for name, _ in events] == ["slide", "slide", "slide", "deck", "finished"]
+    assert [data["slide_id"] for name, data in events if name == "slide"] == [1, 2, 3]
+    assert len(events[3][1]["slides"]) == 3
+
+
+def test_endpoint_reports_provider_failure():
+    response = _client(_StreamingProvider(exc=AIProviderError("down"))).post(
+        "/generate-slides-stream", json=_REQUEST.model_dump(mode="json"),
+    )
+    assert [name for name, _ in _sse_events(response.text)] == ["retry", "error"]
@@ -0,0 +1,67 @@
+"""
+Unit tests for app/services/slide_svg_templates.py
+
+Covers:
+  * each template is picked from typical slide bullets; prose falls through.
+  * output is well-formed, escaped and byte-identical across runs.
+  * SVGImageProvider renders matching slides without calling the LLM.
+"""
+
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from app.services.ai.image_providers.svg_provider import SVGImageProvider
+from app.services.ai.providers.base import AIProvider
+from app.services.slide_svg_templates import detect_slide_intent, render_slide_svg
+
+SLIDES = {
+    "conjugation": ("Il verbo parlare", ["io parlo — I speak", "tu parli", "lui/lei parla", "noi parliamo"]),
+    "dialogue": ("Al bar", ["Marco: Ciao, un caffè?", "Anna: Sì, grazie!", "Marco: Ecco a te."]),
+    "comparison": ("Essere vs Avere", ["Essere: movement verbs", "Avere: transitive verbs", "Essere: reflexive verbs"]),
+    "timeline": ("L'Italia unita", ["1861: Unification", "1871: Rome becomes capital", "1946: Republic"]),
+    "vocabulary": ("La frutta", ["la mela — apple", "la pera — pear", "l'uva — grapes", "la fragola — strawberry"]),
+}
+
+
+@pytest.mark.parametrize("intent", sorted(SLIDES))
+def test_intent_detected_and_rendered(intent):
+    title, bullets = SLIDES[intent]
+    assert detect_slide_intent(title, bullets) == intent
+    name, svg = render_slide_svg(title, bullets)
+    root = ET.fromstring(svg)
+    assert name == intent
+    assert root.get("viewBox") == "0 0 800 450"
+    assert root[0].tag.endswith("title") and root[1].tag.endswith("desc")
+    assert render_slide_svg(title, bullets)[1] == svg
+
+
+def test_prose_slide_has_no_template():
+    bullets = [
+        "The passato prossimo describes completed actions.",
+        "It is formed with an auxiliary and a past participle.",
+        "Uso: esprime azioni concluse nel passato recente o con effetti sul presente",
+    ]
+    assert render_slide_svg("Il passato prossimo", bullets) is None
+
+
+def test_markup_is_escaped():
+    _, svg = render_slide_svg("A & B <vs> C", ["x <y> — one", "a & b — two", "c — three"])
+    ET.fromstring(svg)
+    assert "&lt;y&gt;" in svg and "&amp; b" in svg
+
+
+class _NoLLM(AIProvider):
+    def generate(self, prompt: str) -> str:
+        raise AssertionError("LLM must not be called for template slides")
+
+    def __repr__(self) -> str:
+        return "<NoLLM>"
+
+
+def test_provider_uses_template_before_llm():
+    provider = SVGImageProvider(ai_provider=_NoLLM())
+    title, bullets = SLIDES["vocabulary"]
+    result = provider.render_slide_template(title, bullets, "Fruit vocabulary")
+    assert result is not None and result.source.endswith("template:vocabulary")
+    assert provider.render_slide_template("Intro", ["Welcome to the course."]) is None
@@ -0,0 +1,106 @@
+"""
+Unit tests for app/services/source_store.py
+
+Covers:
+  * in-memory store: single-use pop, peek, TTL expiry, LRU bound, per-entry cap.
+  * redis store: a token stored by one worker is popped by another, once.
+  * redis outage: put falls back to the local store instead of failing.
+"""
+
+import time
+
+from app.services.source_store import InMemorySourceStore, RedisSourceStore
+
+
+class _FakeRedis:
+    """Minimal stand-in for the redis-py calls RedisSourceStore makes."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, tuple[bytes, float]] = {}
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (value, time.monotonic() + (ex or 1e9))
+
+    def get(self, key):
+        entry = self.data.get(key)
+        if entry is None or time.monotonic() > entry[1]:
+            return None
+        return entry[0]
+
+    def delete(self, key):
+        return 1 if self.data.pop(key, None) else 0
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, client: _FakeRedis) -> None:
+        self.client = client
+        self.ops: list = []
+
+    def get(self, key):
+        self.ops.append(("get", key))
+
+    def delete(self, key):
+        self.ops.append(("delete", key))
+
+    def execute(self):
+        return [getattr(self.client, op)(key) for op, key in self.ops]
+
+
+class _DownRedis:
+    def set(self, *args, **kwargs):
+        raise ConnectionError("redis down")
+
+    def pipeline(self, transaction=True):
+        raise ConnectionError("redis down")
+
+
+class TestInMemorySourceStore:
+    def test_pop_is_single_use(self):
+        store = InMemorySourceStore()
+        token = store.put("ciao " * 100, ttl_seconds=60)
+        assert store.pop(token) == "ciao " * 100
+        assert store.pop(token) is None
+
+    def test_peek_does_not_consume(self):
+        store = InMemorySourceStore()
+        token = store.put("testo", ttl_seconds=60)
+        assert store.peek(token) == "testo"
+        assert store.pop(token) == "testo"
+        assert store.peek(token) is None
+
+    def test_expired_token_returns_none(self):
+        store = InMemorySourceStore()
+        token = store.put("text", ttl_seconds=-1)
+        assert store.pop(token) is None
+
+    def test_lru_bound_and_char_cap(self):
+        store = InMemorySourceStore(max_entries=2, max_chars=5)
+        first = store.put("aaaaaaaa", ttl_seconds=60)
+        second = store.put("bbbbbbbb", ttl_seconds=60)
+        third = store.put("cccccccc", ttl_seconds=60)
+        assert store.pop(first) is None
+        assert store.pop(second) == "bbbbb"
+        assert store.pop(third) == "ccccc"
+        assert store.stats()["evicted"] == 1
+
+
+class TestRedisSourceStore:
+    def test_token_is_shared_across_workers(self):
+        client = _FakeRedis()
+        worker_a = RedisSourceStore(client=client, max_chars=40_000)
+        worker_b = RedisSourceStore(client=client, max_chars=40_000)
+        text = "Il passato prossimo. " * 1000
+        token = worker_a.put(text, ttl_seconds=60)
+        (blob, _), = client.data.values()
+        assert len(blob) < len(text) // 10
+        assert worker_b.pop(token) == text
+        assert worker_a.pop(token) is None
+
+    def test_outage_falls_back_to_local_store(self):
+        store = RedisSourceStore(client=_DownRedis())
+        token = store.put("text", ttl_seconds=60)
+        assert store.pop(token) == "text"
+        assert store.pop("unknown") is None
@@ -0,0 +1,102 @@
+"""
+Unit tests for app/services/ai/streaming_json.py
+
+Covers:
+  * the same response split at every offset (and fed one character at a
+    time) yields the same items in the same order and the same root object.
+  * braces, brackets and escaped quotes inside strings, nested containers
+    inside items and a same-named key deeper down do not produce items.
+  * a response cut at every offset emits exactly the items that closed
+    before the cut, and finish() salvages them without repair.
+  * fences / prose before the first "{" and a malformed item are skipped.
+  * the scan buffer holds only the open item, not the whole response.
+"""
+
+import json
+
+from app.services.ai.streaming_json import StreamingArrayParser, parse_array_items
+
+_ITEMS = [
+    {"title": "Intro {not a brace}", "bullet_points": ["a [b] c", "say \"ciao\""]},
+    {"title": "Nested", "bullet_points": ["x"], "extra": {"slides": [{"deep": True}]}},
+    {"title": "Escapes \\ and }]", "bullet_points": [], "examples": None},
+]
+
+_PREFIX = 'Here is the deck:\n```json\n{"topic": "Il passato {prossimo}", "slides": ['
+_SUFFIX = '], "duration_minutes": 20}\n```'
+
+
+def _build() -> tuple[str, list[int]]:
+    """The response text and, per item, the offset just after its closing brace."""
+    text, ends = _PREFIX, []
+    for n, item in enumerate(_ITEMS):
+        if n:
+            text += ", "
+        text += json.dumps(item)
+        ends.append(len(text))
+    return text + _SUFFIX, ends
+
+
+_DOC, _ITEM_ENDS = _build()
+_ROOT = {"topic": "Il passato {prossimo}", "slides": _ITEMS, "duration_minutes": 20}
+
+
+def _feed_all(parser: StreamingArrayParser, chunks: list[str]) -> list[dict]:
+    return [item for chunk in chunks for item in parser.feed(chunk)]
+
+
+def test_every_split_yields_same_items():
+    for split in range(len(_DOC) + 1):
+        parser = StreamingArrayParser("slides")
+        emitted = _feed_all(parser, [_DOC[:split], _DOC[split:]])
+        assert emitted == _ITEMS, f"split at {split}"
+        assert parser.finish() == _ROOT, f"split at {split}"
+
+
+def test_one_character_at_a_time():
+    parser = StreamingArrayParser("slides")
+    seen_at = []
+    for i, ch in enumerate(_DOC):
+        if parser.feed(ch):
+            seen_at.append(i + 1)
+    assert parser.items == _ITEMS
+    assert seen_at == _ITEM_ENDS  # each item as soon as its brace arrives
+    assert parser.complete
+
+
+def test_truncated_tail_keeps_closed_items():
+    for cut in range(len(_DOC)):
+        expected = [item for item, end in zip(_ITEMS, _ITEM_ENDS) if end <= cut]
+        parser = StreamingArrayParser("slides")
+        emitted = _feed_all(parser, [_DOC[: cut // 2], _DOC[cut // 2 : cut]])
+        assert emitted == expected, f"cut at {cut}"
+
+        data = parser.finish()
+        assert data == (_ROOT if parser.complete else {"slides": expected}), f"cut at {cut}"
+
+
+def test_malformed_item_is_skipped():
+    text = '{"slides": [{"title": "ok"}, {"title" "no colon"}, {"title": "also ok",}]}'
+    _data, items = parse_array_items(text, "slides")
+    assert [item["title"] for item in items] == ["ok", "also ok"]
+
+
+def test_feed_after_root_closed_is_ignored():
+    parser = StreamingArrayParser("slides")
+    parser.feed('{"slides": [{"a": 1}]}')
+    assert parser.feed('{"slides": [{"a": 2}]}') == []
+    assert parser.items == [{"a": 1}]
+
+
+def test_scan_buffer_does_not_grow_with_the_response():
+    item = json.dumps({"title": "Slide", "bullet_points": ["uno", "due", "tre"]})
+    doc = '{"slides": [' + ", ".join([item] * 2000) + "]}"
+    parser = StreamingArrayParser("slides")
+    longest = 0
+    for i in range(0, len(doc), 7):
+        parser.feed(doc[i:i + 7])
+        longest = max(longest, len(parser._buf))
+    assert len(parser.items) == 2000
+    assert longest < 2 * len(item)
+    assert parser.text == doc
+    assert len(parser.finish()["slides"]) == 2000
@@ -0,0 +1,62 @@
+"""
+Unit tests for app/services/ai/tolerant_json.py
+
+Covers:
+  * every raw LLM response in tests/fixtures/llm_json decodes to its
+    ``.expected.json`` twin.
+  * allow_truncated=False reports a cut-off response instead of closing it.
+  * the slide and exercise parsers route through the shared decoder.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
+
+from app.services.ai.tolerant_json import TruncatedJSONError, loads_tolerant, scan_json  # noqa: E402
+
+_CORPUS = Path(__file__).parent / "fixtures" / "llm_json"
+_CASES = sorted(p.stem for p in _CORPUS.glob("*.txt"))
+
+
+@pytest.mark.parametrize("name", _CASES)
+def test_corpus_decodes(name):
+    raw = (_CORPUS / f"{name}.txt").read_text()
+    expected = json.loads((_CORPUS / f"{name}.expected.json").read_text())
+    assert loads_tolerant(raw) == expected
+
+
+def test_valid_json_is_untouched():
+    text = '{"a": [1, 2.5, true, null], "b": "x \\" y"}'
+    assert scan_json(text) == (text, False)
+
+
+def test_truncation_can_be_refused():
+    raw = '{"slides": [{"title": "One"}, {"title": "Tw'
+    with pytest.raises(TruncatedJSONError):
+        loads_tolerant(raw, allow_truncated=False)
+    assert loads_tolerant(raw)["slides"][-1] == {"title": "Tw"}
+
+
+def test_no_json_value_raises():
+    with pytest.raises(json.JSONDecodeError):
+        loads_tolerant("I could not generate that lesson, sorry.")
+
+
+def test_slide_parser_keeps_only_closed_slides():
+    from app.services.slide_generator import SlideGeneratorService
+
+    raw = '```json\n{"topic": "Cibo", "slides": [{"title": "Pane", "bullet_points": ["il pane",]}, {"title": "Vi'
+    data = SlideGeneratorService._extract_json(raw)
+    assert [s["title"] for s in data["slides"]] == ["Pane"]
+
+
+def test_exercise_parser_rejects_missing_object():
+    from app.services.ai_exercise_generator import _robust_json_loads
+
+    assert _robust_json_loads('Sure:\n{"paragraphs": ["Uno.\nDue."],}') == {"paragraphs": ["Uno.\nDue."]}
+    with pytest.raises(ValueError, match="did not return a JSON object"):
+        _robust_json_loads("no json here")
@@ -0,0 +1,148 @@
+"""
+Unit tests for the concurrent Phase 2 of UnitGeneratorService.generate.
+
+Covers:
+  * segments that finish out of order still reach on_segment in index order.
+  * a segment whose calls fail gets a placeholder while the others complete.
+  * no more calls are in flight than the semaphore sized by concurrency_hint.
+"""
+
+import asyncio
+import json
+import os
+import re
+
+import pytest
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
+
+from app.services import unit_generator  # noqa: E402
+from app.services.ai.providers.base import AIProvider, AIProviderError  # noqa: E402
+from app.services.unit_generator import (  # noqa: E402
+    UnitGenerateRequest,
+    UnitGenerateResult,
+    UnitGeneratorService,
+)
+
+_INTRO = "Introduction & Learning Outcomes"
+_TITLES = [_INTRO, "Avere or Essere", "Participle Agreement", "Irregular Participles"]
+# Segment 0 is the slowest, so completion order is 1, 3, 2, 0.
+_DELAYS = {_INTRO: 0.08, "Avere or Essere": 0.01, "Participle Agreement": 0.05,
+           "Irregular Participles": 0.02}
+
+
+class _PhaseTwoProvider(AIProvider):
+    """Answers plan / segment / glossary prompts; tracks calls in flight."""
+
+    model = "fake"
+
+    def __init__(self, fail_title: str | None = None) -> None:
+        self.fail_title = fail_title
+        self.in_flight = 0
+        self.peak = 0
+        self.finished: list[str] = []
+
+    def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    async def agenerate(self, prompt: str) -> str:
+        if "Plan a lesson unit with EXACTLY" in prompt:
+            return json.dumps({"sections": [
+                {"title": t, "focus": f"About {t}.", "learning_outcomes": "",
+                 "scope": "- one point", "is_intro": i == 0}
+                for i, t in enumerate(_TITLES)
+            ]})
+
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            if "building a unit glossary" in prompt:
+                await asyncio.sleep(0.03)
+                return json.dumps({"words": [
+                    {"word": w, "translation": t, "example": f"Ho {w}."}
+                    for w, t in (("mangiato", "eaten"), ("visto", "seen"), ("fatto", "done"),
+                                 ("preso", "taken"), ("detto", "said"), ("letto", "read"))
+                ]})
+            title = self._title_of(prompt)
+            await asyncio.sleep(_DELAYS[title])
+        finally:
+            self.in_flight -= 1
+
+        if title == self.fail_title:
+            raise AIProviderError(f"{title}: backend down")
+        self.finished.append(title)
+        return json.dumps({
+            "title": title,
+            "description": f"Learn {title}.",
+            "text_title": title,
+            "text_content": f"## {title}\n\nSpiegazione.\n\n### Examples\n✓ *Ho mangiato.*",
+        })
+
+    @staticmethod
+    def _title_of(prompt: str) -> str:
+        if "Write the INTRODUCTION section" in prompt:
+            return _INTRO
+        match = (re.search(r"Segment title : (.+)", prompt)
+                 or re.search(r"Segment \d+ of \d+: (.+)", prompt))
+        return match.group(1).strip()
+
+
+def _service(provider: AIProvider, captured: dict) -> UnitGeneratorService:
+    service = UnitGeneratorService(ai_provider=provider)
+
+    async def _persist(blueprint, request, db, segment_plans=None):
+        captured["blueprint"] = blueprint
+        return UnitGenerateResult(segments_created=len(blueprint.segments), exercises_created=0)
+
+    service._persist = _persist
+    return service
+
+
+_REQUEST = UnitGenerateRequest(
+    unit_id=1, topic="Il passato prossimo", level="A2", language="Italian",
+    num_segments=len(_TITLES),
+)
+
+
+@pytest.fixture(autouse=True)
+def _two_slots(monkeypatch):
+    monkeypatch.setattr(unit_generator, "concurrency_hint", lambda provider, ceiling: 2)
+
+
+@pytest.mark.asyncio
+async def test_on_segment_fires_in_index_order_despite_completion_order():
+    provider, captured, notified = _PhaseTwoProvider(), {}, []
+
+    async def on_segment(index, total, seg_bp):
+        notified.append((index, total, seg_bp.title))
+
+    await _service(provider, captured).generate(_REQUEST, db=None, on_segment=on_segment)
+
+    assert provider.finished != _TITLES  # really completed out of order
+    assert notified == [(i, len(_TITLES), t) for i, t in enumerate(_TITLES)]
+    segments = captured["blueprint"].segments
+    assert [s.title for s in segments] == _TITLES
+    assert all(s.texts[0].content.startswith(f"## {s.title}") for s in segments)
+    assert segments[0].vocabulary  # glossary job ran alongside
+
+
+@pytest.mark.asyncio
+async def test_failing_segment_does_not_cancel_the_others():
+    provider, captured, notified = _PhaseTwoProvider(fail_title="Participle Agreement"), {}, []
+
+    await _service(provider, captured).generate(
+        _REQUEST, db=None, on_segment=lambda i, total, seg: notified.append(i),
+    )
+
+    assert notified == [0, 1, 2, 3]
+    assert sorted(provider.finished) == sorted(t for t in _TITLES if t != "Participle Agreement")
+    texts = {s.title: s.texts[0].content for s in captured["blueprint"].segments}
+    assert "This segment covers key points." in texts["Participle Agreement"]
+    assert texts["Irregular Participles"].startswith("## Irregular Participles")
+
+
+@pytest.mark.asyncio
+async def test_semaphore_bounds_calls_in_flight():
+    provider = _PhaseTwoProvider()
+    await _service(provider, {}).generate(_REQUEST, db=None)
+    assert provider.peak == 2
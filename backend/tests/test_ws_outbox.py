@@ -0,0 +1,100 @@
+"""
+Unit tests for app/core/ws_outbox.py
+
+Covers:
+  * a broadcast is queued as one shared frame and delivered in order, while a
+    stalled socket does not delay the others.
+  * a send exceeding the timeout closes the socket with 1013.
+  * overflow policies: "close" closes the socket, "drop_oldest" keeps the
+    newest frames; both are counted.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.ws_outbox import SLOW_CONSUMER_CLOSE_CODE, OutboxHub
+
+
+class _FakeSocket:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.frames: list[str] = []
+        self.closed_with: int | None = None
+
+    async def send_text(self, frame: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.frames.append(frame)
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        self.closed_with = code
+
+
+@pytest.mark.asyncio
+async def test_broadcast_is_not_held_up_by_a_stalled_socket():
+    hub = OutboxHub(max_frames=10, send_timeout=5)
+    fast, stalled = _FakeSocket(), _FakeSocket(delay=10)
+    for ws in (fast, stalled):
+        hub.open(ws)
+
+    frame = '{"type": "patch"}'
+    assert hub.broadcast([fast, stalled], frame) == 2
+    hub.send(fast, "second")
+    await asyncio.sleep(0.01)
+
+    assert fast.frames == [frame, "second"]
+    assert fast.frames[0] is frame                 # serialised once, shared
+    assert hub.stats()["queued_frames"] == 0       # stalled frame is in flight
+    for ws in (fast, stalled):
+        hub.close(ws)
+    await asyncio.sleep(0.01)                      # let the writers see the cancel
+
+
+@pytest.mark.asyncio
+async def test_send_timeout_closes_slow_consumer():
+    hub = OutboxHub(max_frames=10, send_timeout=0.02)
+    slow = _FakeSocket(delay=1)
+    hub.open(slow)
+    hub.send(slow, "a")
+    hub.send(slow, "b")
+    await asyncio.sleep(0.1)
+
+    assert slow.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert hub.send(slow, "c") is False
+    stats = hub.stats()
+    assert stats["send_timeouts"] == 1 and stats["frames_dropped"] == 2
+    hub.close(slow)
+
+
+@pytest.mark.asyncio
+async def test_overflow_close_policy():
+    hub = OutboxHub(max_frames=2, send_timeout=5, overflow="close")
+    stalled = _FakeSocket(delay=10)
+    hub.open(stalled)
+    for i in range(4):                      # 1 in flight, 2 queued, 1 overflows
+        hub.send(stalled, str(i))
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.01)
+
+    assert stalled.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert hub.stats()["overflow_closes"] == 1
+    hub.close(stalled)
+    await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_overflow_drop_oldest_policy():
+    hub = OutboxHub(max_frames=2, send_timeout=5, overflow="drop_oldest")
+    ws = _FakeSocket(delay=0.01)
+    hub.open(ws)
+    hub.send(ws, "0")
+    await asyncio.sleep(0)                  # "0" is now in flight
+    for i in range(1, 5):
+        hub.send(ws, str(i))
+    await asyncio.sleep(0.1)
+
+    assert ws.frames == ["0", "3", "4"]
+    assert ws.closed_with is None
+    assert hub.stats()["frames_dropped"] == 2
+    hub.close(ws)
@@ -946,6 +946,20 @@ export default function CreateCourseModal({ open, onClose, onCreated }) {
         }
       }
 
+      // ── Step 2b: start pre-generating the first unit(s) while the teacher
+      // reviews the outline.  Fire-and-forget — the SSE stream attaches to this
+      // work if it is still valid, and PATCH /outline discards edited units.
+      fetch(buildAdminApiUrl(`/course-builder/${course.id}/speculate`), {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', ...authHeaders() },
+        body: JSON.stringify({
+          level,
+          language:        (targetLanguage || 'English').trim(),
+          native_language: (nativeLanguage || 'English').trim(),
+          source_token:    sourceToken || undefined,
+        }),
+      }).catch(() => { /* speculative only */ });
+
       // ── Step 3: cache outline (+ source_token) for UnitSelectorModal ─────────
       try {
         sessionStorage.setItem(`ai_outline_${course.id}`, JSON.stringify(outline));